@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Monero Mining Controller - A/B Benchmark
+
+Runs alternating timed trials of two XMRig variants on this host and reports
+whether the hashrate difference between them is real:
+
+    python ab_benchmark.py --a randomx.scratchpad_prefetch_mode=1 --b randomx.scratchpad_prefetch_mode=2
+    python ab_benchmark.py --b version=6.22.2 --pairs 6 --trial 180
+    python ab_benchmark.py --history
+
+A variant is config.json plus dotted-key overrides (values are parsed as
+JSON), optionally run on another installed XMRig version (version=6.22.2) or
+binary (xmrig=path). With no overrides both sides are the same, which
+measures the noise on this host.
+
+Trials run in ABBA order so slow drift, such as the room warming up, cancels
+out. Each trial waits for XMRig's threads to come up, discards a warm-up
+period and then samples the 10s hashrate through the controller's monitor.
+The trial means are compared pair by pair with a paired t-test, and every run
+is appended to ab-results.jsonl.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+sys.path.insert(0, str(SCRIPT_DIR))
+
+API_PORT = 44446  # Trials get their own API port, clear of the controller's and the warm standby's
+
+def _beta_fraction(a, b, x):
+    """Continued fraction for the regularized incomplete beta function (modified Lentz)"""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 300):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return result
+
+def regularized_beta(x, a, b):
+    """I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _beta_fraction(a, b, x) / a
+    return 1.0 - front * _beta_fraction(b, a, 1.0 - x) / b
+
+def t_two_sided_p(t, df):
+    """Two-sided p-value of Student's t with df degrees of freedom"""
+    return regularized_beta(df / (df + t * t), df / 2.0, 0.5)
+
+def t_critical(confidence, df):
+    """Critical t for a two-sided interval at the given confidence"""
+    low, high = 0.0, 1e6
+    for _ in range(200):
+        middle = (low + high) / 2
+        if t_two_sided_p(middle, df) > 1.0 - confidence:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+def paired_comparison(a_means, b_means, confidence=0.95):
+    """Paired t-test of B against A over per-pair trial means"""
+    diffs = [b - a for a, b in zip(a_means, b_means)]
+    pairs = len(diffs)
+    mean_a = statistics.fmean(a_means)
+    mean_diff = statistics.fmean(diffs)
+    stderr = statistics.stdev(diffs) / math.sqrt(pairs)
+    if stderr > 0:
+        p_value = t_two_sided_p(mean_diff / stderr, pairs - 1)
+        margin = t_critical(confidence, pairs - 1) * stderr
+    else:
+        p_value = 1.0 if mean_diff == 0 else 0.0
+        margin = 0.0
+    percent = (lambda value: value / mean_a * 100) if mean_a else (lambda value: None)
+    return {
+        'pairs': pairs,
+        'confidence': confidence,
+        'mean_a': mean_a,
+        'mean_b': statistics.fmean(b_means),
+        'diff': mean_diff,
+        'diff_pct': percent(mean_diff),
+        'ci': [mean_diff - margin, mean_diff + margin],
+        'ci_pct': [percent(mean_diff - margin), percent(mean_diff + margin)],
+        'p_value': p_value,
+        'significant': p_value < 1.0 - confidence
+    }
+
+def parse_variant(specs):
+    """Turn ["version=6.22.2", "randomx.mode=light", ...] into a variant"""
+    variant = {'version': None, 'xmrig': None, 'overrides': {}}
+    for spec in specs or []:
+        key, separator, value = spec.partition('=')
+        if not separator or not key:
+            raise ValueError(f"expected key=value, got {spec!r}")
+        if key in ('version', 'xmrig'):
+            variant[key] = value
+            continue
+        try:
+            variant['overrides'][key] = json.loads(value)
+        except ValueError:
+            variant['overrides'][key] = value
+    return variant
+
+def describe_variant(variant):
+    """Short human-readable form of a variant"""
+    parts = [f"XMRig {variant['version']}"] if variant.get('version') else []
+    if variant.get('xmrig'):
+        parts.append(Path(variant['xmrig']).name)
+    parts += [f"{key}={json.dumps(value)}" for key, value in variant.get('overrides', {}).items()]
+    return " ".join(parts) or "base config"
+
+def other_miners():
+    """PIDs of XMRig processes already running on this host"""
+    import psutil
+    return [process.pid for process in psutil.process_iter(['name'])
+            if (process.info['name'] or "").lower() in ("xmrig", "xmrig.exe")]
+
+class ABBenchmark:
+    """Alternating timed trials of two variants, run through one XMRigController"""
+
+    def __init__(self, variant_a, variant_b, base_config, trial=120.0, warmup=30.0, sample_interval=10.0,
+                 pairs=5, confidence=0.95, ready_timeout=300.0, controller=None):
+        import mining_controller as mc
+
+        if pairs < 2:
+            raise ValueError("at least 2 pairs of trials are needed")
+        self.variants = {'A': variant_a, 'B': variant_b}
+        self.base_config = base_config
+        self.trial = trial
+        self.warmup = warmup
+        self.sample_interval = sample_interval
+        self.pairs = pairs
+        self.confidence = confidence
+        self.ready_timeout = ready_timeout
+        self.controller = controller or mc.XMRigController()
+        self.workdir = None
+
+    def _binary(self, variant):
+        """The XMRig executable a variant runs on"""
+        import mining_controller as mc
+
+        if variant.get('xmrig'):
+            path = Path(variant['xmrig'])
+            return path if path.is_absolute() else SCRIPT_DIR / path
+        if variant.get('version'):
+            return mc.get_xmrig_path(variant['version'])
+        return Path(self.controller.xmrig_path)
+
+    def _prepare(self, label):
+        """Write the variant's config and check its binary; returns (binary, config path)"""
+        import mining_controller as mc
+        variant = self.variants[label]
+        binary = self._binary(variant)
+        if not os.access(binary, os.X_OK):
+            raise ValueError(f"variant {label}: XMRig executable not found: {binary}")
+        config = mc.apply_config_overrides(self.base_config, variant['overrides'])
+        http = config.setdefault('http', {})
+        http.update({'enabled': True, 'host': "127.0.0.1", 'port': API_PORT, 'restricted': False})
+        http['access-token'] = http.get('access-token') or os.urandom(16).hex()
+        config['watch'] = True
+        path = self.workdir / f"config-{label.lower()}.json"
+        with open(path, 'w') as f:
+            json.dump(config, f, indent=4)
+        return str(binary), str(path)
+
+    def order(self):
+        """ABBA ABBA ...: alternate which variant goes first in each pair"""
+        return [label for pair in range(self.pairs) for label in (("A", "B") if pair % 2 == 0 else ("B", "A"))]
+
+    def run_trial(self, binary, config_path):
+        """Run one variant for a trial; returns its mean 10s hashrate and sample stats"""
+        controller = self.controller
+        monitor = controller.monitor
+        controller.xmrig_path = binary
+        controller.config_path = config_path
+        success, message = controller.start_mining()
+        if not success:
+            raise RuntimeError(message)
+        try:
+            # Threads start once the RandomX dataset is built; only then does the warm-up begin
+            deadline = time.monotonic() + self.ready_timeout
+            while not monitor.log_buffer.grep("READY", count=1):
+                if not monitor.is_xmrig_running():
+                    raise RuntimeError("XMRig exited before its threads started")
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"XMRig threads not ready within {self.ready_timeout:.0f}s")
+                time.sleep(0.05)
+            time.sleep(self.warmup)
+
+            samples = []
+            temperatures = []
+            next_at = time.monotonic()
+            end = next_at + self.trial
+            while time.monotonic() < end:
+                if not monitor.is_xmrig_running():
+                    raise RuntimeError("XMRig exited during the trial")
+                # Ask for a fresh report so every sample is a new 10s window, not the last periodic line
+                monitor.stats['hashrate_windows'] = [None, None, None]
+                if controller.request_report("hashrate")[0] and monitor.stats['hashrate_windows'][0]:
+                    samples.append(monitor.stats['hashrate_windows'][0])
+                temperature = monitor.sensors.read_temperature()
+                if temperature is not None:
+                    temperatures.append(temperature)
+                next_at += self.sample_interval
+                time.sleep(max(0.0, min(next_at, end) - time.monotonic()))
+        finally:
+            controller.stop_mining()
+        if not samples:
+            raise RuntimeError("no hashrate samples were collected")
+        return {
+            'mean': statistics.fmean(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'samples': len(samples),
+            'temperature': round(statistics.fmean(temperatures), 1) if temperatures else None
+        }
+
+    def run(self, progress=None):
+        """Run every trial and compare the variants; returns the result record"""
+        import mining_controller as mc
+
+        controller = self.controller
+        if controller.monitor.is_xmrig_running():
+            raise RuntimeError("the controller's miner is running; stop it first")
+        original = controller.xmrig_path, controller.config_path
+        controller_loop = controller.controller_loop
+        own_loop = controller_loop is None
+        if own_loop:
+            controller_loop = mc.ControllerLoop()
+            controller_loop.start()
+            controller.controller_loop = controller_loop
+            controller.events.start(controller_loop)
+        self.workdir = Path(tempfile.mkdtemp(prefix="mmc-ab-"))
+        trials = []
+        try:
+            prepared = {label: self._prepare(label) for label in self.variants}
+            for index, label in enumerate(self.order()):
+                trial = dict(self.run_trial(*prepared[label]), variant=label)
+                trials.append(trial)
+                controller.events.emit("ab_trial", variant=label, mean=round(trial['mean'], 1),
+                                       samples=trial['samples'])
+                if progress:
+                    progress(f"trial {index + 1}/{2 * self.pairs} {label}: {trial['mean']:.1f} H/s "
+                             f"({trial['samples']} samples)")
+        finally:
+            controller.xmrig_path, controller.config_path = original
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            if own_loop:
+                controller.events.close()
+                controller_loop.stop()
+                controller.controller_loop = None
+
+        means = {label: [trial['mean'] for trial in trials if trial['variant'] == label] for label in self.variants}
+        result = paired_comparison(means['A'], means['B'], self.confidence)
+        controller.events.emit("ab_result", diff_pct=result['diff_pct'], p_value=result['p_value'],
+                               significant=result['significant'])
+        return {
+            'time': round(time.time(), 3),
+            'host': platform.node(),
+            'a': dict(self.variants['A'], label=describe_variant(self.variants['A'])),
+            'b': dict(self.variants['B'], label=describe_variant(self.variants['B'])),
+            'trial_s': self.trial,
+            'warmup_s': self.warmup,
+            'sample_interval_s': self.sample_interval,
+            'trials': trials,
+            'result': result
+        }
+
+def save_result(path, record):
+    """Append one run to the results file"""
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+def load_results(path):
+    """All stored runs, oldest first; unreadable lines are skipped"""
+    records = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+def format_verdict(result):
+    """One-line summary of a comparison"""
+    low, high = result['ci_pct']
+    verdict = "B is faster" if result['diff'] > 0 else "B is slower"
+    if not result['significant']:
+        verdict = "no significant difference"
+    return (f"{result['diff_pct']:+.2f}% ({result['confidence'] * 100:.0f}% CI {low:+.2f}% .. {high:+.2f}%), "
+            f"p={result['p_value']:.3g}: {verdict}")
+
+def print_result(record):
+    """Print one run's trials and verdict"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    result = record['result']
+    table = Table(title=f"A: {record['a']['label']}  vs  B: {record['b']['label']}")
+    table.add_column("Trial", justify="right")
+    table.add_column("Variant")
+    table.add_column("Mean H/s", justify="right")
+    table.add_column("Stdev", justify="right")
+    table.add_column("Samples", justify="right")
+    table.add_column("Temp", justify="right")
+    for index, trial in enumerate(record['trials'], 1):
+        temperature = trial.get('temperature')
+        table.add_row(str(index), trial['variant'], f"{trial['mean']:.1f}", f"{trial['stdev']:.1f}",
+                      str(trial['samples']), f"{temperature}°C" if temperature is not None else "-")
+    console.print(table)
+    console.print(f"A {result['mean_a']:.1f} H/s, B {result['mean_b']:.1f} H/s over {result['pairs']} pairs")
+    console.print(f"[{'green' if result['significant'] else 'yellow'}]{format_verdict(result)}[/]")
+
+def print_history(records):
+    """Print stored runs, newest last"""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="A/B benchmark history")
+    table.add_column("When")
+    table.add_column("Host")
+    table.add_column("A")
+    table.add_column("B")
+    table.add_column("Pairs", justify="right")
+    table.add_column("Result")
+    for record in records:
+        table.add_row(time.strftime("%Y-%m-%d %H:%M", time.localtime(record['time'])), record.get('host', "-"),
+                      record['a']['label'], record['b']['label'], str(record['result']['pairs']),
+                      format_verdict(record['result']))
+    Console().print(table)
+
+def main():
+    parser = argparse.ArgumentParser(description="A/B benchmark two XMRig versions or config variants")
+    parser.add_argument("--a", action="append", metavar="KEY=VALUE",
+                        help="Variant A setting: version=, xmrig= or a dotted config key (repeatable)")
+    parser.add_argument("--b", action="append", metavar="KEY=VALUE", help="Variant B setting (repeatable)")
+    parser.add_argument("--config", default=str(SCRIPT_DIR / "config.json"), help="Base XMRig config")
+    parser.add_argument("--pairs", type=int, default=5, help="Pairs of trials (at least 2)")
+    parser.add_argument("--trial", type=float, default=120.0, help="Sampling seconds per trial")
+    parser.add_argument("--warmup", type=float, default=30.0,
+                        help="Seconds discarded after XMRig's threads start")
+    parser.add_argument("--sample-interval", type=float, default=10.0, help="Seconds between hashrate samples")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level for the interval")
+    parser.add_argument("--results", default=str(SCRIPT_DIR / "ab-results.jsonl"), help="Results file")
+    parser.add_argument("--history", action="store_true", help="Show stored results and exit")
+    parser.add_argument("--force", action="store_true", help="Run even if another XMRig is running")
+    args = parser.parse_args()
+
+    if args.history:
+        records = load_results(args.results)
+        if not records:
+            print(f"No results in {args.results}")
+            return
+        print_history(records)
+        return
+
+    try:
+        variant_a, variant_b = parse_variant(args.a), parse_variant(args.b)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.pairs < 2:
+        parser.error("--pairs must be at least 2")
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+    try:
+        with open(args.config, 'r') as f:
+            base_config = json.load(f)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot read base config {args.config}: {e}")
+    running = other_miners()
+    if running and not args.force:
+        sys.exit(f"XMRig is already running (PID {', '.join(map(str, running))}); "
+                 "stop it or use --force, results would be skewed")
+
+    benchmark = ABBenchmark(variant_a, variant_b, base_config, trial=args.trial, warmup=args.warmup,
+                            sample_interval=args.sample_interval, pairs=args.pairs, confidence=args.confidence)
+    minutes = 2 * args.pairs * (args.trial + args.warmup) / 60
+    print(f"A: {describe_variant(variant_a)}")
+    print(f"B: {describe_variant(variant_b)}")
+    print(f"{2 * args.pairs} trials, about {minutes:.0f} minutes plus dataset builds")
+    try:
+        record = benchmark.run(progress=print)
+    except KeyboardInterrupt:
+        sys.exit("Interrupted; nothing was saved")
+    except (RuntimeError, ValueError) as e:
+        sys.exit(f"A/B benchmark failed: {e}")
+    save_result(args.results, record)
+    print_result(record)
+    print(f"Saved to {args.results}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1741 @@
+#!/usr/bin/env python3
+"""
+Monero Mining Controller - Benchmark Script
+
+Performance regression checks for the controller:
+1. Cold-start import time of mining_controller (via python -X importtime)
+2. UI-only and heavy modules staying out of the import path
+3. Hot paths: log line parsing, stats summary, stats panel rendering,
+   config load/save and pool list handling at 10/100/1000 pools
+4. The monitor path end to end, driven by xmrig_simulator.py
+5. Optional soak run (--soak SECONDS) watching the monitor's memory growth
+6. The load governor's thread caps and pause/resume against the simulator,
+   sharing the thread allocation with another governor, and its cgroup
+   cpu.max quota
+7. Control jobs keeping their rhythm while slow I/O holds the I/O
+   executor, and the load governor's CPU split with a busy stand-in miner
+8. The thermal governor's H/J hill-climb on fake sensors, measured from
+   XMRig's 10-second window after each thread change has settled
+9. The fleet status protocol against fleet_dashboard.py's stand-in
+   controllers, and shutting them down with a stalled subscriber
+10. The tariff scheduler's plan across a midnight-wrapping window and its
+    run/throttle/pause transitions, with a fake clock and a stand-in miner
+11. Refreshing the pool catalogue from a signed list on a local HTTP server:
+    bad signatures, replayed older lists, ETags, custom pools and indexes
+12. The port advisor's tier and fixed-difficulty choice, and its share-cadence
+    check (converged, corrected, diverged, too slow) with a fake clock
+13. Event log queries by time, type and newest-N limit across rotated files,
+    including lines a crash left unindexed
+14. Warm-standby cutovers between two simulators: the gap, the old process
+    gone, the monitor following the new one, swapped config and API port,
+    and a fresh standby coming back
+15. Two settings stores updating one file at once, profile switches that
+    leave the CPU layout to config.json, and an unreadable settings file
+16. Wallet address validation against known Keccak-256 and address vectors
+17. TLS health checks against a local stand-in pool with a self-signed certificate
+18. setup.py's XMRig store with local archive fixtures: verification, offline
+    install, side-by-side versions and switching
+19. ab_benchmark.py's trial loop and statistics against two simulator variants
+20. The memory planner's layout choice, its fallback to light mode when
+    XMRig itself swaps, and the return to fast mode, with the simulator as XMRig
+21. The non-interactive subcommands over two controller directories
+
+Results can be saved with --save and compared against a previous run with
+--compare; exits non-zero when a check exceeds its budget, so it can run in CI.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import timeit
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+
+# Modules that must only be imported when they are actually used
+LAZY_MODULES = ("rich", "psutil", "urllib.request", "http.client")
+
+def run_python(args):
+    """Run a fresh interpreter in the project directory and return the result"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="")
+    return subprocess.run([sys.executable] + args, cwd=SCRIPT_DIR, env=env,
+                          capture_output=True, text=True)
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into {module: (self_us, cumulative_us)}"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            timings[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return timings
+
+def check_startup_time(budget_ms=100.0, runs=5):
+    """Check the cold-start import time of mining_controller"""
+    print("⏱️  Startup time (python -X importtime -c 'import mining_controller')")
+
+    # Warm the bytecode cache so we measure imports, not compilation
+    run_python(["-c", "import mining_controller"])
+
+    best_us = None
+    timings = {}
+    for _ in range(runs):
+        result = run_python(["-X", "importtime", "-c", "import mining_controller"])
+        if result.returncode != 0:
+            print(f"❌ Import failed:\n{result.stderr[-2000:]}")
+            return False
+        timings = parse_importtime(result.stderr)
+        if "mining_controller" not in timings:
+            print("❌ mining_controller missing from importtime output")
+            return False
+        cumulative_us = timings["mining_controller"][1]
+        best_us = cumulative_us if best_us is None else min(best_us, cumulative_us)
+
+    # Anything heavy that sneaks back into the import path is a regression
+    eager = [name for name in LAZY_MODULES if name in timings]
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:5]
+
+    best_ms = best_us / 1000
+    print(f"   mining_controller: {best_ms:.1f} ms (best of {runs}, budget {budget_ms:.0f} ms)")
+    print("   Slowest modules (self time):")
+    for name, (self_us, _) in slowest:
+        print(f"     {self_us / 1000:7.2f} ms  {name}")
+
+    passed = True
+    if eager:
+        print(f"❌ Eagerly imported: {', '.join(eager)}")
+        passed = False
+    if best_ms > budget_ms:
+        print(f"❌ Startup time {best_ms:.1f} ms exceeds budget of {budget_ms:.0f} ms")
+        passed = False
+    if passed:
+        print("✅ Startup time within budget")
+    return passed
+
+def bench(name, func, number=None, repeat=5):
+    """Time a callable and return per-call microseconds (best of several repeats)"""
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    print(f"   {name:<40} {best * 1e6:12.2f} µs/op  {1 / best:14,.0f} ops/s")
+    return best * 1e6
+
+def load_log_corpus(path=None, size=10000):
+    """Load a recorded XMRig log, or synthesize one with the simulator's emitter"""
+    if path:
+        with open(path, 'r', errors='replace') as f:
+            return [line.rstrip("\n") for line in f]
+
+    from xmrig_simulator import LogEmitter
+    emitter = LogEmitter("pool.example.com:3333", seed=42)
+    return emitter.banner() + [emitter.next_line() for _ in range(size)]
+
+def make_pools(count):
+    """Generate a pools.json-style pool list of the given size"""
+    return [{
+        "name": f"Pool {i:04d}",
+        "url": f"pool{i}.example.com",
+        "port": 3333 + i % 10,
+        "fee": (i % 20) / 10,
+        "min_payout": 0.001 * (i % 100 + 1),
+        "type": "PPLNS" if i % 3 else "PPS",
+        "location": ("Global", "US East", "EU West", "Asia")[i % 4],
+        "description": f"Benchmark pool number {i}",
+        "features": ["Benchmark"],
+        "recommended": i % 5 == 0
+    } for i in range(count)]
+
+def bench_hot_paths(corpus_path=None):
+    """Benchmark the controller's hot paths in-process"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+    from rich.console import Console
+
+    results = {}
+    print("\n🔥 Hot paths")
+
+    corpus = load_log_corpus(corpus_path)
+    monitor = mc.MiningMonitor()
+
+    def parse_corpus():
+        for line in corpus:
+            monitor._parse_xmrig_line(line)
+
+    per_corpus = bench(f"_parse_xmrig_line x{len(corpus)}", parse_corpus, number=1)
+    results['parse_line_us'] = per_corpus / len(corpus)
+    print(f"   {'  -> per line':<40} {results['parse_line_us']:12.3f} µs/line")
+
+    # get_system_stats samples CPU usage over a short interval, so keep the counts low
+    results['stats_summary_us'] = bench("get_stats_summary", monitor.get_stats_summary, number=3, repeat=3)
+
+    ui = mc.MiningUI()
+    ui.xmrig_controller.monitor = ui.monitor = monitor
+    console = Console(file=io.StringIO(), width=120, force_terminal=True)
+
+    def render_panel():
+        console.file = io.StringIO()
+        console.print(ui.create_stats_panel())
+
+    results['stats_panel_us'] = bench("create_stats_panel + render", render_panel, number=3, repeat=3)
+
+    # A week of 10-second samples; reading a chart must not depend on the sample count
+    history = mc.MetricHistory()
+    now = time.time()
+    for i in range(7 * 8640):
+        history.update({'hashrate': 2500.0 + i % 300, 'shares': i % 3 == 0, 'cpu': 90.0, 'temperature': 70.0},
+                       now - 7 * 86400 + i * 10)
+    for window in ("1h", "7d"):
+        results[f'history_{window}_us'] = bench(f"history sparkline ({window}, 60 columns)",
+                                                lambda: mc.sparkline(history.values('hashrate', window, 60, now)))
+
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-bench-"))
+    try:
+        config_path = workdir / "config.json"
+        shutil.copy(SCRIPT_DIR / "config.json.example", config_path)
+        controller = mc.XMRigController(xmrig_path=str(workdir / "xmrig"), config_path=str(config_path))
+        config = controller.load_config()
+        results['config_load_us'] = bench("XMRigController.load_config", controller.load_config)
+        results['config_save_us'] = bench("XMRigController.save_config", lambda: controller.save_config(config))
+
+        for count in (10, 100, 1000):
+            pools_path = workdir / f"pools_{count}.json"
+            with open(pools_path, 'w') as f:
+                json.dump({"pools": make_pools(count), "notes": {}}, f)
+            last_name = f"pool {count - 1:04d}"
+
+            def load():
+                selector = mc.PoolSelector(str(pools_path))
+                return selector.pools
+
+            selector = mc.PoolSelector(str(pools_path))
+            selector.pools  # Load once for the lookup/render benchmarks
+
+            def render_comparison():
+                console.file = io.StringIO()
+                selector.display_pool_comparison(console)
+
+            results[f'pools_{count}_load_us'] = bench(f"PoolSelector load ({count} pools)", load)
+            results[f'pools_{count}_lookup_us'] = bench(f"get_pool_info worst case ({count} pools)",
+                                                        lambda: selector.get_pool_info(last_name))
+            results[f'pools_{count}_render_us'] = bench(f"display_pool_comparison ({count} pools)",
+                                                        render_comparison, number=1 if count >= 1000 else 3,
+                                                        repeat=3)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+def check_load_governor():
+    """Run the load governor against the simulator, with a second cap held by another governor"""
+    from collections import deque
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🎚️  Load governor (xmrig_simulator.py, cpu.rx thread caps, pause/resume)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-governor-"))
+    failures = []
+    controller_loop = mc.ControllerLoop()
+    controller = governor = None
+    busy = {'foreground_cpu': 90.0, 'xmrig_cpu': 10.0, 'run_queue': 0, 'pressure': None, 'logical_cores': 4}
+    idle = dict(busy, foreground_cpu=0.0)
+    hold = dict(busy, foreground_cpu=30.0)  # Between the idle and busy thresholds
+    samples = deque()
+
+    def wait_for(condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    def simulator_threads():
+        try:
+            return len(api.backends()[0]['threads'])
+        except (OSError, ValueError, IndexError, KeyError):
+            return None
+
+    try:
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            config = json.load(f)
+        config['http'].update({'port': 44481, 'access-token': "governor-check"})
+        config['cpu']['rx'] = [0, 1, 2, 3]
+        with open(workdir / "config.json", 'w') as f:
+            json.dump(config, f)
+        cpu_controller = mc.CPUController(str(workdir / "config.json"))
+        user_cpu = cpu_controller.get_current_config()
+        controller = mc.XMRigController(xmrig_path=str(SCRIPT_DIR / "xmrig_simulator.py"),
+                                        config_path=str(workdir / "config.json"))
+        controller.events = controller.monitor.events = mc.EventLog(workdir / "events.jsonl")
+        controller.cpu_controller = cpu_controller
+        api = mc.XMRigAPI.from_config(config)
+        success, message = controller.start_mining()
+        if not success:
+            raise RuntimeError(message)
+
+        controller_loop.start()
+        governor = mc.LoadGovernor(controller, cpu_controller, controller_loop, interval=0.02,
+                                   busy_samples=2, idle_samples=2)
+        governor.sample = lambda: samples.popleft() if samples else hold
+        governor.start()
+
+        # Two busy samples shed one thread; XMRig reloads its thread list
+        samples.extend([busy] * 4)
+        if not wait_for(lambda: not samples and governor.threads == 2):
+            failures.append(f"4 busy samples left {governor.threads} threads")
+        elif cpu_controller.get_current_config().get('rx') != [0, 1]:
+            failures.append(f"cpu.rx is {cpu_controller.get_current_config().get('rx')} at 2 threads")
+        if not wait_for(lambda: simulator_threads() == 2):
+            failures.append(f"the simulator runs {simulator_threads()} threads, expected 2")
+
+        # At the minimum the next step is a pause
+        samples.extend([busy] * 4)
+        if not wait_for(lambda: controller.paused) or not api.summary().get('paused'):
+            failures.append("sustained load at 1 thread did not pause XMRig")
+
+        # Another governor's cap and the user's own pause survive this one releasing everything
+        cpu_controller.limit_threads("thermal", 2)
+        controller.pause_mining()
+        samples.extend([idle] * 8)
+        if not wait_for(lambda: not samples and governor.threads == 4):
+            failures.append(f"idle samples restored only {governor.threads} threads")
+        if not controller.paused or not api.summary().get('paused'):
+            failures.append("the load governor's release undid the user's pause")
+        controller.resume_mining()
+        if controller.paused or api.summary().get('paused'):
+            failures.append("XMRig was not resumed")
+        if cpu_controller.get_current_config().get('rx') != [0, 1]:
+            failures.append("the load governor's release undid the thermal cap")
+        cpu_controller.limit_threads("thermal", None)
+
+        # Stopping while throttled gives back the user's own cpu section, untouched
+        samples.extend([busy] * 2)
+        wait_for(lambda: not samples and governor.threads == 3)
+        governor.stop()
+        if cpu_controller.get_current_config() != user_cpu:
+            failures.append(f"stop left cpu {cpu_controller.get_current_config()}, expected {user_cpu}")
+        if not wait_for(lambda: simulator_threads() == 4):
+            failures.append(f"the simulator runs {simulator_threads()} threads after stop, expected 4")
+        # In a cgroup the cap is a cpu.max quota; the config is left alone
+        cgroup = mc.CgroupManager(root=workdir / "cgroup")
+        cgroup.path.mkdir(parents=True)
+        cpu_controller.enable_cgroup(cgroup)
+        cpu_controller.limit_threads("load", 2)
+        if (cgroup.path / "cpu.max").read_text() != "200000 100000" or cpu_controller.get_current_config() != user_cpu:
+            failures.append("a cap in cgroup mode did not set the cpu.max quota alone")
+        cpu_controller.limit_threads("load", None)
+        if (cgroup.path / "cpu.max").read_text() != "400000 100000":
+            failures.append("lifting the cap did not restore the cpu.max quota")
+        print("   4 -> 2 threads -> pause -> release under a thermal cap and a user pause -> user config restored; "
+              "cgroup quota")
+    except (OSError, ValueError, RuntimeError, KeyError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        if governor:
+            governor.stop()
+        controller_loop.stop()
+        if controller:
+            controller.stop_mining()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_control_loop():
+    """Check control jobs keep their rhythm while slow I/O holds every I/O worker, and the CPU split"""
+    from types import SimpleNamespace
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n⏱️  Control executor and load sampling (blocked I/O workers, busy stand-in miner)")
+    failures = []
+    controller_loop = mc.ControllerLoop()
+    controller_loop.start()
+    busy_child = None
+    try:
+        async def slow_io():
+            await controller_loop.loop.run_in_executor(None, time.sleep, 1.5)
+
+        # Two 1.5 s blocking calls take both I/O workers, as stalled pool or API requests would
+        for _ in range(controller_loop.max_workers):
+            controller_loop.submit(slow_io())
+        ticks = []
+        controller_loop.periodic("check-control", 0.05, lambda: ticks.append(time.monotonic()), control=True)
+        time.sleep(1.0)
+        controller_loop.cancel("check-control")
+        if len(ticks) < 10:
+            failures.append(f"control job ticked {len(ticks)} times in 1 s while I/O was blocked")
+
+        # XMRig's share is diffed over the same interval as the machine's, so a busy miner is not foreground load
+        busy_child = subprocess.Popen([sys.executable, "-c", "while True: pass"])
+        governor = mc.LoadGovernor(SimpleNamespace(xmrig_process=busy_child, paused=False), None, controller_loop)
+        governor.sample()
+        time.sleep(1.0)
+        sample = governor.sample()
+        one_core = 100.0 / sample['logical_cores']
+        if sample['xmrig_cpu'] < 0.7 * one_core or sample['foreground_cpu'] > governor.idle_foreground:
+            failures.append(f"busy miner sampled as xmrig {sample['xmrig_cpu']:.1f}%, "
+                            f"foreground {sample['foreground_cpu']:.1f}% (one core is {one_core:.1f}%)")
+        print(f"   {len(ticks)} control ticks in 1 s with both I/O workers blocked; busy miner "
+              f"{sample['xmrig_cpu']:.1f}% of the machine, foreground {sample['foreground_cpu']:.1f}%")
+    finally:
+        if busy_child:
+            busy_child.kill()
+            busy_child.wait()
+        controller_loop.stop()
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_thermal_governor():
+    """Hill-climb the thermal governor on fake sensors whose 10s window lags each thread change"""
+    from types import SimpleNamespace
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🌡️  Thermal governor (fake clock and sensors, lagging 10s hashrate window)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-thermal-"))
+    failures = []
+    hashes_per_joule = {1: 40.0, 2: 55.0, 3: 60.0, 4: 50.0}
+    now = [0.0]
+    changes = [(0.0, 4)]  # (time, threads) as XMRig ran them
+
+    def sensors(temperature=60.0):
+        threads = next(count for changed_at, count in reversed(changes) if changed_at <= now[0])
+        lagged = next((count for changed_at, count in reversed(changes) if changed_at <= now[0] - 10.0), threads)
+        power = 10.0 + 10.0 * threads
+        # The 10s window still averages the old thread count; the 15m one is far off
+        rate = hashes_per_joule[lagged] * (10.0 + 10.0 * lagged)
+        return {'temperature': temperature, 'power': power, 'hashrate_windows': [rate, rate, 1.0]}
+
+    try:
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            config = json.load(f)
+        config['cpu']['rx'] = [0, 1, 2, 3]
+        with open(workdir / "config.json", 'w') as f:
+            json.dump(config, f)
+        cpu_controller = mc.CPUController(str(workdir / "config.json"))
+        user_cpu = cpu_controller.get_current_config()
+        governor = mc.ThermalGovernor(SimpleNamespace(monitor=None), cpu_controller, mc.ControllerLoop(),
+                                      clock=lambda: now[0])
+        governor.max_threads = cpu_controller.user_thread_count()
+        governor.threads = governor.max_threads
+        governor.running = True
+
+        while now[0] < 600.0:
+            now[0] += governor.interval
+            threads = governor.threads
+            governor.step(sensors())
+            if governor.threads != threads:
+                changes.append((now[0], governor.threads))
+                if governor._samples:
+                    failures.append(f"H/J samples survived the change to {governor.threads} threads")
+        if governor.threads != 3 or governor.get_best_thread_count() != 3:
+            failures.append(f"settled on {governor.threads} threads (best {governor.get_best_thread_count()}), "
+                            f"expected 3; measured {governor.efficiency}")
+        elif abs(governor.efficiency[3][0] - hashes_per_joule[3]) > 1e-6:
+            failures.append(f"3 threads measured {governor.efficiency[3][0]:.1f} H/J, expected 60.0")
+        if cpu_controller.get_current_config().get('rx') != [0, 1, 2]:
+            failures.append(f"cpu.rx is {cpu_controller.get_current_config().get('rx')} at 3 threads")
+
+        # Over target sheds a thread on the same tick
+        now[0] += governor.interval
+        governor.step(sensors(temperature=95.0))
+        if governor.threads != 2 or governor.state != "limiting":
+            failures.append(f"over temperature left {governor.threads} threads ({governor.state})")
+        governor.stop()
+        if cpu_controller.get_current_config() != user_cpu:
+            failures.append(f"stop left cpu {cpu_controller.get_current_config()}, expected {user_cpu}")
+        path = " -> ".join(str(count) for _, count in changes)
+        print(f"   threads {path}; H/J " +
+              ", ".join(f"{count}: {mean:.1f}" for count, (mean, _) in sorted(governor.efficiency.items())))
+    except (OSError, ValueError, KeyError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_fleet_protocol(hosts=8):
+    """Follow fleet_dashboard.py stand-in controllers, then stop them with one subscriber stalled"""
+    import socket
+    import asyncio
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import fleet_dashboard
+
+    print(f"\n🛰️  Fleet protocol ({hosts} fleet_dashboard.py --local stand-ins, one stalled subscriber)")
+    failures = []
+
+    async def wait_for(condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    async def run():
+        servers, addresses = await fleet_dashboard.start_stand_ins(hosts, 0.05)
+        states = [fleet_dashboard.HostState(address) for address in addresses]
+        followers = [asyncio.create_task(fleet_dashboard.follow_host(state)) for state in states]
+        stalled = None
+        try:
+            # Deltas applied on top of the snapshot track each server's own state
+            if not await wait_for(lambda: all(state.last_seq >= 5 for state in states)):
+                failures.append(f"{sum(state.last_seq >= 5 for state in states)}/{hosts} hosts streamed 5 updates")
+            servers[0]._publisher.cancel()
+            await wait_for(lambda: states[0].data == servers[0].current, timeout=1.0)
+            if states[0].data != servers[0].current or states[0].name != "stand-in-000":
+                failures.append(f"{states[0].name} ended with {states[0].data}, server has {servers[0].current}")
+
+            # A subscriber that stopped reading: a tiny receive buffer, a large message and a full queue
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.setblocking(False)
+            await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", servers[1].port))
+            _, stalled = await asyncio.open_connection(sock=sock)
+            stalled.write(b'{"op":"subscribe"}\n')
+            known = set(servers[1]._subscribers)
+            await wait_for(lambda: set(servers[1]._subscribers) - known)
+            queue = (set(servers[1]._subscribers) - known).pop()
+            queue.put_nowait(b"x" * (8 << 20))
+            await asyncio.sleep(0.2)
+            while not queue.full():
+                queue.put_nowait(b"{}\n")
+
+            started = time.monotonic()
+            for server in servers:
+                try:
+                    await asyncio.wait_for(server.stop(), 3.0)
+                except asyncio.TimeoutError:
+                    failures.append(f"{server.name} did not stop within 3 s")
+                except asyncio.QueueFull:
+                    failures.append(f"{server.name} failed to stop: a subscriber queue was full")
+            elapsed = time.monotonic() - started
+            if not await wait_for(lambda: not any(state.connected for state in states), timeout=2.0):
+                failures.append(f"{sum(state.connected for state in states)} followers still connected after stop")
+            print(f"   {hosts} hosts in sync; stopped all servers in {elapsed * 1000:.0f} ms with a stalled subscriber")
+        finally:
+            for task in followers:
+                task.cancel()
+            await asyncio.gather(*followers, return_exceptions=True)
+            if stalled:
+                stalled.close()
+            for server in servers:
+                server.server.close()
+
+    asyncio.run(run())
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_tariff_scheduler():
+    """Plan a day across a midnight-wrapping window and apply it to a stand-in miner with a fake clock"""
+    from datetime import datetime
+    from types import SimpleNamespace
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🕰️  Tariff scheduler (fake clock, 23:00-07:00 night window, stand-in miner)")
+    failures = []
+    now = [datetime(2026, 1, 5, 12, 0)]
+    miner = {'running': False, 'starts': 0}
+    caps = []
+    xmrig_controller = SimpleNamespace(paused=False, events=SimpleNamespace(emit=lambda *args, **fields: None))
+    xmrig_controller.monitor = SimpleNamespace(stats={'hashrate': 0.0, 'peak_hashrate': 0.0}, last_power=None,
+                                               is_xmrig_running=lambda: miner['running'])
+
+    def start_mining():
+        miner.update(running=True, starts=miner['starts'] + 1)
+        return True, "started"
+
+    xmrig_controller.start_mining = start_mining
+
+    def set_paused(paused):
+        xmrig_controller.paused = paused
+        return True, "paused" if paused else "resumed"
+
+    xmrig_controller.hold_pause = lambda owner: set_paused(True)
+    xmrig_controller.release_pause = lambda owner: set_paused(False)
+    cpu_controller = SimpleNamespace(user_thread_count=lambda: 4,
+                                     limit_threads=lambda owner, threads: caps.append(threads) or threads)
+    # 10 kH/s earns 0.0072/h; at 100 W the night is profitable, the day slightly not, the peak clearly not
+    scheduler = mc.TariffScheduler(xmrig_controller, cpu_controller, None, clock=lambda: now[0], settings={
+        'default_price': 0.1, 'xmr_price': 160.0, 'network_hashrate': 4e9, 'block_reward': 0.6,
+        'power_watts': 100.0, 'expected_hashrate': 10000.0, 'run_margin': 0.0,
+        'windows': [{'name': "night", 'start': "23:00", 'end': "07:00", 'price': 0.02},
+                    {'name': "peak", 'start': "17:00", 'end': "20:00", 'price': 0.25}]})
+
+    for hour, minute, expected in ((23, 30, "night"), (2, 0, "night"), (6, 59, "night"), (7, 0, None), (18, 0, "peak")):
+        window = scheduler.window_at(now[0].replace(hour=hour, minute=minute))
+        if (window or {}).get('name') != expected:
+            failures.append(f"{hour:02d}:{minute:02d} fell in {window}, expected {expected}")
+
+    segments = scheduler.plan_day(now[0], 10000.0)
+    plan = [(segment['start'].strftime('%H:%M'), segment['action']) for segment in segments]
+    expected_plan = [("12:00", "throttle"), ("17:00", "pause"), ("20:00", "throttle"), ("23:00", "run"),
+                     ("07:00", "throttle")]
+    if plan != expected_plan:
+        failures.append(f"plan_day gave {plan}, expected {expected_plan}")
+    if segments[3]['until'] != datetime(2026, 1, 6, 7, 0):
+        failures.append(f"the night segment ends {segments[3]['until']}, expected 07:00 the next day")
+
+    # A stopped miner is only started by a run decision
+    for moment, action, starts, cap in ((datetime(2026, 1, 5, 12, 0), "throttle", 0, 2),
+                                        (datetime(2026, 1, 5, 17, 0), "pause", 0, None),
+                                        (datetime(2026, 1, 5, 23, 0), "run", 1, None),
+                                        (datetime(2026, 1, 6, 7, 0), "throttle", 1, 2)):
+        now[0] = moment
+        decision = scheduler.step()
+        if decision['action'] != action or miner['starts'] != starts or caps[-1] != cap:
+            failures.append(f"{moment:%H:%M} {decision['action']} left {miner['starts']} starts and cap {caps[-1]}, "
+                            f"expected {action}, {starts} starts and cap {cap}")
+
+    # A miner started, or restarted, inside a pause window is paused again on the next tick
+    miner['running'] = False
+    now[0] = datetime(2026, 1, 6, 17, 0)
+    scheduler.step()
+    miner['running'] = True
+    for moment, label in ((datetime(2026, 1, 6, 17, 30), "started"), (datetime(2026, 1, 6, 18, 0), "restarted")):
+        xmrig_controller.paused = False  # A fresh XMRig process comes up hashing
+        now[0] = moment
+        if scheduler.step()['action'] != "pause" or not xmrig_controller.paused:
+            failures.append(f"a miner {label} during the peak window kept mining")
+    print("   " + ", ".join(f"{start} {action}" for start, action in plan) + f"; {miner['starts']} start(s); "
+          "re-paused after a restart")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def start_pool_list_server(files):
+    """Serve files (path -> bytes) over local HTTP with body-hash ETags; returns (server, conditional hits)"""
+    import hashlib
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = files.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                hits.append(self.path)
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
+
+def check_pool_catalogue():
+    """Refresh the catalogue from a signed list on a local server: signatures, replays, ETags and indexes"""
+    import base64
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n📋 Pool catalogue (signed list on a local HTTP server)")
+    try:
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    except ImportError:
+        print("   skipped: the cryptography package is not installed")
+        return True
+
+    def pool(name, region, host, port=3333):
+        return {'name': name, 'url': host, 'port': port, 'fee': 1.0, 'min_payout': 0.01, 'location': region,
+                'servers': [{'host': host, 'ports': [{'port': port, 'difficulty': 10000},
+                                                     {'port': port + 1, 'tls': True}]}]}
+
+    key = Ed25519PrivateKey.generate()
+    public_key = base64.b64encode(key.public_key().public_bytes(serialization.Encoding.Raw,
+                                                                serialization.PublicFormat.Raw)).decode()
+    files = {}
+
+    def publish(updated, pools, signer=key):
+        body = json.dumps({'version': 2, 'last_updated': updated, 'pools': pools}).encode()
+        files['/pools.json'] = body
+        files['/pools.json.sig'] = base64.b64encode(signer.sign(body))
+
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-pools-"))
+    server, hits = start_pool_list_server(files)
+    url = f"http://127.0.0.1:{server.server_address[1]}/pools.json"
+    failures = []
+    try:
+        path = workdir / "pools.json"
+        path.write_text(json.dumps({'version': 2, 'last_updated': "2026-01-01",
+                                    'pools': [pool("Old Pool", "Global", "old.example"),
+                                              dict(pool("Broken Pool", "Global", "broken.example"), port=70000)]}))
+        catalogue = mc.PoolCatalogue(path)
+        if catalogue.load() or [p['name'] for p in catalogue.pools] != ["Old Pool"] or len(catalogue.errors) != 1:
+            failures.append(f"loading kept {[p['name'] for p in catalogue.pools]} with errors {catalogue.errors}")
+        catalogue.add(pool("My Pool", "Asia", "mine.example"))
+
+        publish("2026-02-01", [pool("EU Pool", "EU West", "eu.pool.example"),
+                               pool("US Pool", "US East", "us.pool.example", 5555)])
+        ok, message = catalogue.refresh(url, public_key)
+        names = [p['name'] for p in catalogue.pools]
+        if not ok or names != ["EU Pool", "US Pool", "My Pool"]:
+            failures.append(f"a good signature gave ({ok}, {message!r}) and pools {names}")
+        if (catalogue.get("eu pool") or {}).get('url') != "eu.pool.example" or catalogue.get("Old Pool"):
+            failures.append("the name index does not match the refreshed list")
+        if [p['name'] for p in catalogue.by_region("eu west")] != ["EU Pool"] or "Asia" not in catalogue.regions():
+            failures.append(f"the region index gave {catalogue.regions()}")
+        if (catalogue.find_by_host("US.POOL.EXAMPLE") or {}).get('name') != "US Pool":
+            failures.append("the host index does not find the US pool")
+        if not catalogue.get("My Pool") or not catalogue.get("My Pool").get('custom'):
+            failures.append("the custom pool did not survive the refresh")
+
+        ok, message = catalogue.refresh(url, public_key)
+        if not ok or "up to date" not in message or hits != ["/pools.json"]:
+            failures.append(f"an unchanged list gave ({ok}, {message!r}) after {len(hits)} conditional hit(s)")
+
+        rejected = (
+            ("a bad signature", "2026-03-01", [pool("Evil Pool", "Global", "evil.example")],
+             Ed25519PrivateKey.generate(), "signature"),
+            ("a replayed older list", "2026-01-15", [pool("Old Pool", "Global", "old.example")], key, "older"),
+            ("an invalid pool", "2026-03-01", [dict(pool("Bad Pool", "Global", "bad.example"), fee=150)], key,
+             "invalid"))
+        for label, updated, pools, signer, reason in rejected:
+            publish(updated, pools, signer)
+            ok, message = catalogue.refresh(url, public_key)
+            if ok or reason not in message or [p['name'] for p in catalogue.pools] != names:
+                failures.append(f"{label} gave ({ok}, {message!r})")
+
+        reloaded = mc.PoolCatalogue(path)
+        reloaded.load()
+        if [p['name'] for p in reloaded.pools] != names or reloaded.meta.get('last_updated') != "2026-02-01" \
+                or not (reloaded.meta.get('source') or {}).get('etag'):
+            failures.append(f"the saved catalogue reloaded as {[p['name'] for p in reloaded.pools]}, {reloaded.meta}")
+        print(f"   refresh to {len(names)} pools ({len(catalogue.regions())} regions), 304 on the unchanged list; "
+              "bad signature, replay and invalid pool rejected")
+    except OSError as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_port_advisor():
+    """Pick share tiers and fixed difficulties, then check and correct the share cadence with a fake clock"""
+    from types import SimpleNamespace
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🎯 Port advisor (fake clock, 30s share target, 10k/50k/200k tiers)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-ports-"))
+    failures = []
+    now = [1000000.0]
+    try:
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            config = json.load(f)
+        config['pools'][0].update({'url': "tiers.pool.example:3333", 'user': MAINNET_ADDRESS, 'tls': False})
+        with open(workdir / "config.json", 'w') as f:
+            json.dump(config, f)
+        controller = mc.XMRigController(xmrig_path="xmrig", config_path=str(workdir / "config.json"))
+        controller.events = controller.monitor.events = mc.EventLog(workdir / "events.jsonl")
+        monitor = controller.monitor
+        tiers = [{'port': port, 'difficulty': difficulty}
+                 for port, difficulty in ((3333, 10000), (5555, 50000), (7777, 200000))]
+        catalogue = mc.PoolCatalogue(workdir / "pools.json")
+        catalogue.pools = [
+            {'name': "Tiers", 'url': "tiers.pool.example", 'port': 3333, 'fee': 1.0, 'min_payout': 0.01,
+             'fixed_difficulty': {'min': 1000, 'max': 1000000},
+             'servers': [{'host': "tiers.pool.example", 'ports': tiers}]},
+            {'name': "Plain", 'url': "plain.pool.example", 'port': 3333, 'fee': 1.0, 'min_payout': 0.01,
+             'servers': [{'host': "plain.pool.example", 'ports': tiers}]}]
+        catalogue._index()
+        loop = SimpleNamespace(running=False)
+        advisor = mc.PortAdvisor(controller, loop, target_interval=30.0, clock=lambda: now[0])
+
+        def pool_config():
+            return controller.load_config()['pools'][0]
+
+        def shares(count, interval, difficulty, after=advisor.GRACE + 1):
+            """Accepted shares every `interval` seconds, starting once the grace period is over"""
+            start = now[0] + after
+            monitor.share_times.extend((start + n * interval, difficulty) for n in range(count))
+            now[0] = start + (count - 1) * interval + 1
+
+        # 1.5 kH/s wants 45k: the 50k tier is close enough
+        monitor.stats['hashrate_windows'] = [1500.0, 1500.0, None]
+        recommendation = advisor.recommend(catalogue)
+        if (recommendation['port'], recommendation['fixed_difficulty']) != (5555, None):
+            failures.append(f"1.5 kH/s picked {recommendation}")
+        # 20 kH/s wants 600k, three times the top tier: a fixed difficulty instead, then back to a tier
+        monitor.stats['hashrate_windows'] = [20000.0, 20000.0, None]
+        advisor.apply(advisor.recommend(catalogue), catalogue)
+        if pool_config()['user'] != MAINNET_ADDRESS + "+600000":
+            failures.append(f"20 kH/s set user ...{pool_config()['user'][-10:]!r}, expected a +600000 suffix")
+        monitor.stats['hashrate_windows'] = [1500.0, 1500.0, None]
+        advisor.apply(advisor.recommend(catalogue), catalogue)
+        if (pool_config()['user'], pool_config()['url']) != (MAINNET_ADDRESS, "tiers.pool.example:5555"):
+            failures.append(f"back to 1.5 kH/s left ...{pool_config()['user'][-10:]!r} on {pool_config()['url']}")
+
+        # A share every 33s converges
+        shares(8, 33.0, 50000)
+        if advisor.check() != "converged":
+            failures.append(f"33s shares gave '{advisor.state}', expected converged")
+
+        # The pool sees 250 H/s (a 50k share every 200s): corrected down to the 10k tier, which then converges
+        advisor.apply(advisor.recommend(catalogue), catalogue)
+        shares(8, 200.0, 50000)
+        state = advisor.check()
+        if state != "checking" or advisor.corrections != 1 or pool_config()['url'] != "tiers.pool.example:3333":
+            failures.append(f"slow shares gave '{advisor.state}' on {pool_config()['url']} after "
+                            f"{advisor.corrections} correction(s), expected the 10k tier")
+        shares(8, 40.0, 10000)
+        if advisor.check() != "converged":
+            failures.append(f"40s shares after the correction gave '{advisor.state}', expected converged")
+
+        # Without corrections left a wrong cadence is "diverged"; without shares it is "too slow"
+        advisor.max_corrections = 0
+        advisor.apply(advisor.recommend(catalogue), catalogue)
+        shares(8, 5.0, 50000)
+        if advisor.check() != "diverged":
+            failures.append(f"5s shares without corrections gave '{advisor.state}', expected diverged")
+        advisor.apply(advisor.recommend(catalogue), catalogue)
+        now[0] += advisor.GRACE + advisor.target_interval * advisor.MIN_SHARES * 2
+        if advisor.check() != "checking":
+            failures.append(f"a short wait without shares gave '{advisor.state}'")
+        now[0] += advisor.target_interval * advisor.MIN_SHARES * 2 + 1
+        if advisor.check() != "too slow":
+            failures.append(f"no shares for {advisor.target_interval * advisor.MIN_SHARES * 4:.0f}s gave "
+                            f"'{advisor.state}', expected too slow")
+
+        # A pool without fixed difficulty keeps the nearest tier, however far off
+        config = controller.load_config()
+        config['pools'][0]['url'] = "plain.pool.example:3333"
+        monitor.stats['hashrate_windows'] = [20000.0, 20000.0, None]
+        recommendation = advisor.recommend(catalogue, config)
+        if (recommendation['port'], recommendation['fixed_difficulty']) != (7777, None):
+            failures.append(f"20 kH/s on a pool without fixed difficulty picked {recommendation}")
+        print("   50k tier at 1.5 kH/s, +600000 at 20 kH/s and back; converged, corrected to 10k, diverged, too slow")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_event_log():
+    """Query a rotated event log by time, type and limit, with an unindexed crash tail"""
+    import struct
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🗒️  Event log (600 events over rotated files, crash tail)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-events-"))
+    failures = []
+    try:
+        log = mc.EventLog(workdir / "events.jsonl", max_bytes=8 * 1024, backups=2)
+        types = ("miner_start", "miner_stop", "miner_error")
+        for n in range(600):
+            # Queued directly so every event gets a distinct, known time
+            log.pending.append({'time': 1000.0 + n, 'mono': float(n), 'type': types[n % 3], 'n': n})
+            if n % 50 == 49:
+                log.flush()
+
+        def numbers(**query):
+            return [event['n'] for event in log.query(**query)]
+
+        everything = numbers()
+        first = everything[0] if everything else 600
+        if len(log.files()) != 3 or everything != list(range(first, 600)) or first == 0:
+            failures.append(f"{len(log.files())} files held events {first}..{everything[-1:]}, expected 3 "
+                            "rotated files ending at 599 with the oldest dropped")
+        expected = {
+            "since/until": (dict(since=1500, until=1510), list(range(500, 511))),
+            "type": (dict(types=["miner_error"]), [n for n in range(first, 600) if n % 3 == 2]),
+            "newest 5": (dict(limit=5), list(range(595, 600))),
+            "newest 4 errors": (dict(types=["miner_error"], limit=4), [590, 593, 596, 599]),
+            "newest 3 until": (dict(until=1550, limit=3), [548, 549, 550]),
+            "limit across files": (dict(limit=len(everything) - 1), everything[1:]),
+        }
+        for label, (query, want) in expected.items():
+            got = numbers(**query)
+            if got != want:
+                failures.append(f"{label}: got {got[:6]}{'...' if len(got) > 6 else ''} ({len(got)} events)")
+
+        # A crash between the data and index writes: unindexed lines, a torn line and a dangling index record
+        size = log.path.stat().st_size
+        with open(log.path, 'a') as f:
+            for n in (600, 601):
+                f.write(json.dumps({'time': 1000.0 + n, 'type': types[n % 3], 'n': n}) + "\n")
+            f.write('{"time": 1602.0, "ty')
+        with open(log.index_path, 'ab') as f:
+            f.write(struct.pack(log.RECORD_FORMAT, 1700.0, size + 4096, 80, 0))
+        if numbers(limit=3) != [599, 600, 601] or numbers(since=1598) != [598, 599, 600, 601]:
+            failures.append(f"the crash tail gave {numbers(limit=3)} and {numbers(since=1598)}")
+        if numbers(types=["miner_stop"], limit=2) != [598, 601]:
+            failures.append(f"the newest stops across the tail gave {numbers(types=['miner_stop'], limit=2)}")
+
+        bench("EventLog.query newest 20", lambda: log.query(limit=20), number=100, repeat=3)
+        print(f"   {len(everything)} events kept in {len(log.files())} files; time, type and newest-N queries "
+              "and the crash tail checked")
+    except (OSError, ValueError, KeyError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_warm_standby():
+    """Cut over to a warm standby simulator and back: gap, process, monitor, config and API port hand-over"""
+    import psutil
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🔥 Warm standby (xmrig_simulator.py, spawn -> ready -> cutover -> respawn)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-standby-"))
+    failures = []
+    controller_loop = mc.ControllerLoop()
+    controller = None
+
+    def wait_for(condition, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    try:
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            config = json.load(f)
+        config['http'].update({'port': 44484, 'access-token': "standby-check"})
+        with open(workdir / "config.json", 'w') as f:
+            json.dump(config, f)
+        controller = mc.XMRigController(xmrig_path=str(SCRIPT_DIR / "xmrig_simulator.py"),
+                                        config_path=str(workdir / "config.json"))
+        controller.events = controller.monitor.events = mc.EventLog(workdir / "events.jsonl")
+        controller_loop.start()
+        controller.controller_loop = controller_loop
+        standby = controller.standby = mc.WarmStandby(controller, controller_loop, api_port=44485)
+        standby.check_memory = lambda: (True, "ok")  # The simulator builds no real dataset
+        success, message = controller.start_mining()
+        if not success:
+            raise RuntimeError(message)
+
+        gaps = []
+        for cutover in (1, 2):
+            # Spawned behind the active miner, then paused once its dataset is ready
+            if not wait_for(lambda: standby.ready):
+                failures.append(f"cutover {cutover}: the standby stayed '{standby.state}'")
+                break
+            if not standby.get_api().summary().get('paused'):
+                failures.append(f"cutover {cutover}: the ready standby is hashing")
+            active_port = controller.get_api().port
+            old_pid, new_pid, new_config = controller.xmrig_process.pid, standby.process.pid, standby.config_path
+            cut_at = time.time()
+
+            success, message = controller.restart_mining()
+            gaps.append(standby.last_gap)
+            if not success or standby.last_gap is None or standby.last_gap > 1.0:
+                failures.append(f"cutover {cutover}: ({success}, {message!r}), gap {standby.last_gap}")
+            if psutil.pid_exists(old_pid) and psutil.Process(old_pid).status() != psutil.STATUS_ZOMBIE:
+                failures.append(f"cutover {cutover}: the old XMRig (pid {old_pid}) is still running")
+            if controller.xmrig_process.pid != new_pid:
+                failures.append(f"cutover {cutover}: the controller follows pid {controller.xmrig_process.pid}, "
+                                f"expected the standby's {new_pid}")
+            expected_run = new_config if new_config != controller.config_path else None
+            api = controller.get_api()
+            if controller.run_config_path != expected_run or api.port == active_port:
+                failures.append(f"cutover {cutover}: run config {controller.run_config_path}, API port {api.port}")
+            if api.summary().get('paused') or controller.paused:
+                failures.append(f"cutover {cutover}: the new active miner is paused")
+            if not wait_for(lambda: controller.monitor.log_buffer.grep(r"speed|new job|accepted", since=cut_at,
+                                                                        count=1)):
+                failures.append(f"cutover {cutover}: the monitor parsed nothing from the new process")
+
+            # A fresh standby runs from the config the old active miner used
+            if not wait_for(lambda: standby.ready) or standby.process.pid in (old_pid, new_pid) \
+                    or standby.get_api().port != active_port:
+                failures.append(f"cutover {cutover}: no fresh standby on port {active_port} ({standby.state})")
+
+        print("   cutover gaps " + ", ".join(f"{gap * 1000:.0f} ms" for gap in gaps if gap is not None)
+              + "; config and API port swapped and back; fresh standby ready after each")
+    except (OSError, ValueError, RuntimeError, KeyError, AttributeError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        if controller:
+            controller.stop_mining()
+        controller_loop.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_settings_store():
+    """Two stores on one file updating different keys at once, profiles, and an unreadable file"""
+    import threading
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🗄️  Settings store (two writers on one file, profiles)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-settings-"))
+    failures = []
+    updates = 200
+    try:
+        path = workdir / "user_settings.json"
+        # Two controllers on one host: separate stores (and lock file handles) on the same file
+        stores = [mc.SettingsStore(path), mc.SettingsStore(path)]
+        stores[0].update(shared="kept")
+
+        def writer(store, key):
+            for n in range(updates):
+                store.update({key: n})
+
+        threads = [threading.Thread(target=writer, args=(store, key)) for store, key in zip(stores, ("a", "b"))]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        with open(path, 'r') as f:
+            on_disk = json.load(f)
+        if on_disk != {'shared': "kept", 'a': updates - 1, 'b': updates - 1}:
+            failures.append(f"concurrent updates left {on_disk}")
+        if stores[0].get('b') != updates - 1 or stores[1].get('a') != updates - 1:
+            failures.append("a store's cache missed the other store's last write")
+
+        # Switching profiles leaves the CPU layout to the XMRig config
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            config = json.load(f)
+        config['cpu']['rx'] = [0, 1, 2, 3]
+        with open(workdir / "config.json", 'w') as f:
+            json.dump(config, f)
+        controller = mc.XMRigController(xmrig_path="xmrig", config_path=str(workdir / "config.json"))
+        controller.events = controller.monitor.events = stores[1].events = mc.EventLog(workdir / "events.jsonl")
+        stores[0].save_profile("day", {'wallet_address': MAINNET_ADDRESS, 'cpu': {'rx': [0, 1]},
+                                       'schedule': {'enabled': True}})
+        stores[0].save_profile("night", {'wallet_address': MAINNET_ADDRESS, 'cpu': {'rx': [0, 1, 2, 3]}})
+        success, message, profile = mc.apply_profile("day", controller, stores[1])
+        settings = stores[0].load()
+        if not success or settings.get('active_profile') != "day" or 'cpu' in settings:
+            failures.append(f"switching to 'day' gave ({success}, {message!r}) and settings keys {sorted(settings)}")
+        if (controller.load_config().get('cpu') or {}).get('rx') != [0, 1]:
+            failures.append(f"the 'day' CPU layout did not reach config.json: {controller.load_config().get('cpu')}")
+        mc.apply_profile("night", controller, stores[0])
+        if 'schedule' in stores[1].load() or (controller.load_config().get('cpu') or {}).get('rx') != [0, 1, 2, 3]:
+            failures.append("switching to 'night' kept the day schedule or CPU layout")
+        if mc.apply_profile("missing", controller, stores[0])[0]:
+            failures.append("an unknown profile was applied")
+
+        # An unreadable file is reported through the event log, not printed over the TUI
+        path.write_text("{not json")
+        stderr, sys.stderr = sys.stderr, io.StringIO()
+        try:
+            empty = stores[1].load()
+            printed = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        types = [event['type'] for event in stores[1].events.pending]
+        if empty or printed or "settings_unreadable" not in types or not stores[1].last_error:
+            failures.append(f"an unreadable file gave {empty}, printed {printed!r} and events {types}")
+        print(f"   2 x {updates} concurrent updates in {elapsed * 1000:.0f} ms, none lost; profiles switched; "
+              "unreadable file logged")
+    except (OSError, ValueError, KeyError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+# Keccak-256 digests (original Keccak padding, which differs from hashlib.sha3_256)
+KECCAK_VECTORS = [
+    (b"", "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"),
+    (b"abc", "4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45"),
+]
+# The Monero general fund donation address
+MAINNET_ADDRESS = "44AFFq5kSiGBoZ4NMDwYtN18obc8AemS33DBLWs3H7otXft3XjrpDtQGv7SqSsaBYBb98uNbr2VBBEt7f2wfn3RVGQBEP3A"
+
+def check_address_vectors():
+    """Check the address validator against known vectors and constructed good and bad addresses"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import monero_address as ma
+
+    print("\n🔑 Wallet address validation")
+    failures = []
+
+    def expect(label, login, valid, contains=""):
+        ok, message = ma.validate_wallet_address(login)
+        if ok != valid or contains not in message:
+            failures.append(f"{label}: got ({ok}, {message!r})")
+
+    for data, digest in KECCAK_VECTORS:
+        if ma.keccak256(data).hex() != digest:
+            failures.append(f"keccak256({data!r}) = {ma.keccak256(data).hex()}")
+
+    expect("mainnet standard", MAINNET_ADDRESS, True, "mainnet standard")
+    expect("fixed difficulty login", MAINNET_ADDRESS + "+50000", True)
+    expect("worker login", MAINNET_ADDRESS + ".rig01", True)
+    expect("typo", MAINNET_ADDRESS[:40] + ("B" if MAINNET_ADDRESS[40] != "B" else "C") + MAINNET_ADDRESS[41:],
+           False, "checksum")
+    expect("truncated", MAINNET_ADDRESS[:-1], False, "94 characters")
+    expect("not base58", MAINNET_ADDRESS[:-1] + "0", False, "base58")
+    expect("empty", "", False, "No wallet")
+
+    # Addresses of every network and type, built from the keys of the mainnet address
+    keys = ma.monero_base58_decode(MAINNET_ADDRESS)[1:65]
+    for prefix, (network, kind) in ma.MONERO_ADDRESS_PREFIXES.items():
+        body = bytes([prefix]) + keys + (bytes(range(8)) if kind == "integrated" else b"")
+        address = ma.monero_base58_encode(body + ma.keccak256(body)[:4])
+        info = ma.parse_monero_address(address)
+        if (info['network'], info['type']) != (network, kind) or ma.monero_base58_decode(address)[:-4] != body:
+            failures.append(f"{network} {kind}: round trip gave {info}")
+        expect(f"{network} {kind}", address, network == "mainnet", "" if network == "mainnet" else network)
+        if kind == "integrated" and info['payment_id'] != bytes(range(8)).hex():
+            failures.append(f"{network} integrated: payment ID {info['payment_id']}")
+    body = bytes([99]) + keys
+    expect("unknown network", ma.monero_base58_encode(body + ma.keccak256(body)[:4]), False, "network byte")
+
+    bench("validate_wallet_address", lambda: ma.validate_wallet_address(MAINNET_ADDRESS))
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("   all address vectors passed")
+    return not failures
+
+def start_tls_stand_in(workdir):
+    """Serve TLS on a local port with a fresh self-signed certificate; returns (port, certificate DER) or None"""
+    import ssl
+    import socket
+    import threading
+
+    cert_path, key_path = workdir / "cert.pem", workdir / "key.pem"
+    try:
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=pool.stand-in", "-keyout", str(key_path), "-out", str(cert_path)],
+                       check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(str(cert_path), str(key_path))
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def handle(conn):
+        try:
+            with context.wrap_socket(conn, server_side=True) as tls:
+                tls.recv(1)  # Hold the connection like a pool waiting for the stratum login
+        except OSError:
+            pass
+
+    def serve():
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server.getsockname()[1], ssl.PEM_cert_to_DER_cert(cert_path.read_text())
+
+def check_tls_health():
+    """Run the TLS health checker against the stand-in pool: timings, resumption and pinning"""
+    import hashlib
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🔒 TLS health (local stand-in pool)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-tls-"))
+    try:
+        stand_in = start_tls_stand_in(workdir)
+        if stand_in is None:
+            print("   skipped: openssl is not available to make a certificate")
+            return True
+        port, certificate = stand_in
+        fingerprint = hashlib.sha256(certificate).hexdigest()
+        checker = mc.TLSHealthChecker(timeout=2.0)
+        result = checker.check("127.0.0.1", port, pinned=fingerprint)
+        print(f"   {result['version']}: connect {result['connect_ms']:.2f} ms, handshake {result['handshake_ms']:.2f} ms, "
+              f"resumed {result['resumed_ms']:.2f} ms" if result.get('resumption') else f"   {result}")
+
+        failures = []
+        if not result['ok'] or result['fingerprint'] != fingerprint or not result['stable']:
+            failures.append(f"captured fingerprint {result.get('fingerprint')} (expected {fingerprint})")
+        if not result.get('resumption'):
+            failures.append("session resumption was not used")
+        if not result['recommend']:
+            failures.append("TLS on a loopback stand-in should be recommended")
+        if checker.check("127.0.0.1", port, pinned="00" * 32)['pin_matches'] is not False:
+            failures.append("a wrong pin was not detected")
+        closed = mc.TLSHealthChecker(timeout=1.0).check("127.0.0.1", 1)
+        if closed['ok'] or not closed['error']:
+            failures.append(f"closed port reported {closed}")
+        for failure in failures:
+            print(f"❌ {failure}")
+        if not failures:
+            print("   fingerprint, resumption and pin checks passed")
+        return not failures
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def make_xmrig_archive(workdir, version, fmt="tar.gz", extra=None):
+    """Build a release-style archive whose xmrig is the simulator; returns (path, sha256)"""
+    import hashlib
+    import tarfile
+    import zipfile
+
+    name = f"xmrig-{version}-linux-static-x64.{fmt}"
+    path = workdir / name
+    files = {f"xmrig-{version}/xmrig": (SCRIPT_DIR / "xmrig_simulator.py").read_bytes(),
+             f"xmrig-{version}/config.json": b"{}"}
+    files.update(extra or {})
+    if fmt == "zip":
+        with zipfile.ZipFile(path, 'w') as archive:
+            for member, data in files.items():
+                info = zipfile.ZipInfo(member)
+                info.external_attr = 0o755 << 16
+                archive.writestr(info, data)
+    else:
+        with tarfile.open(path, 'w:gz') as archive:
+            for member, data in files.items():
+                info = tarfile.TarInfo(member)
+                info.size, info.mode = len(data), 0o755
+                archive.addfile(info, io.BytesIO(data))
+    return path, hashlib.sha256(path.read_bytes()).hexdigest()
+
+def check_xmrig_store():
+    """Exercise setup.py's XMRig store offline with local archive fixtures"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import setup
+    import mining_controller as mc
+
+    print("\n📦 XMRig store (local archive fixtures)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-store-"))
+    failures = []
+    try:
+        store = setup.XMRigStore(root=workdir / "xmrig-versions", binary_dir=workdir)
+        old, old_sha = make_xmrig_archive(workdir, "6.21.0")
+        new, new_sha = make_xmrig_archive(workdir, "6.22.2", "zip")
+        evil, evil_sha = make_xmrig_archive(workdir, "6.0.0", extra={"../../escaped": b"x", "/abs": b"x"})
+        sums = workdir / "SHA256SUMS"
+        sums.write_text("".join(f"{sha}  {path.name}\n" for path, sha in ((old, old_sha), (new, new_sha), (evil, evil_sha))))
+
+        store.add_local(old, sums, "6.21.0")
+        store.add_local(new, sums, "6.22.2")
+        started = time.perf_counter()
+        version = store.install("linux-x64", "6.21.0", offline=True)
+        install_ms = (time.perf_counter() - started) * 1000
+        store.install("linux-x64", "6.22.2", offline=True)
+        if store.installed() != ["6.21.0", "6.22.2"]:
+            failures.append(f"installed versions {store.installed()}")
+        if os.path.realpath(workdir / "xmrig") != str(store.binary_path("6.22.2")):
+            failures.append("./xmrig does not point at the active version")
+        if not os.access(store.binary_path("6.21.0"), os.X_OK):
+            failures.append("extracted xmrig is not executable")
+        started = time.perf_counter()
+        store.activate("6.21.0")
+        switch_ms = (time.perf_counter() - started) * 1000
+        if store.install("linux-x64", None, offline=True) != "6.22.2":
+            failures.append("offline install without a version did not pick the newest cached version")
+
+        # Tampering: a corrupted cache entry and an archive that does not match SHA256SUMS
+        (store.archives / old_sha).write_bytes(b"corrupt")
+        shutil.rmtree(store.versions / "6.21.0")
+        try:
+            store.extract("6.21.0")
+            failures.append("a corrupted cached archive was extracted")
+        except ValueError:
+            pass
+        try:
+            store.add_archive(new, "6.22.3", old_sha)
+            failures.append("an archive with the wrong checksum was accepted")
+        except ValueError:
+            pass
+        store.add_local(evil, sums, "6.0.0")
+        store.extract("6.0.0")
+        if (workdir / "escaped").exists() or (workdir.parent / "escaped").exists() or Path("/abs").exists():
+            failures.append("extraction wrote outside the version directory")
+        print(f"   install from cache {install_ms:.1f} ms ({version}), switch active version {switch_ms:.2f} ms")
+
+        # The controller finds side-by-side versions by the same layout
+        original = mc.get_script_dir
+        mc.get_script_dir = lambda: workdir
+        try:
+            if mc.list_xmrig_versions() != store.installed():
+                failures.append(f"controller sees {mc.list_xmrig_versions()}")
+            controller = mc.XMRigController(xmrig_path=str(workdir / "xmrig"), config_path=str(workdir / "config.json"))
+            controller.events = mc.EventLog(workdir / "events.jsonl")
+            ok, message = controller.use_xmrig_version("6.22.2")
+            if not ok or controller.xmrig_path != str(store.binary_path("6.22.2")):
+                failures.append(f"use_xmrig_version: {message}")
+            if controller.use_xmrig_version("1.0.0")[0]:
+                failures.append("use_xmrig_version accepted a version that is not installed")
+        finally:
+            mc.get_script_dir = original
+    except (OSError, ValueError, KeyError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("   checksum, offline, side-by-side and path-safety checks passed")
+    return not failures
+
+def check_ab_harness():
+    """Run a short A/B benchmark with the simulator as XMRig, where B is known to be 75% slower"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import ab_benchmark
+    import mining_controller as mc
+
+    print("\n🆎 A/B harness (xmrig_simulator.py, randomx.mode auto vs light)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-ab-check-"))
+    failures = []
+    try:
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            base_config = json.load(f)
+        controller = mc.XMRigController(xmrig_path=str(SCRIPT_DIR / "xmrig_simulator.py"),
+                                        config_path=str(workdir / "config.json"))
+        controller.events = controller.monitor.events = mc.EventLog(workdir / "events.jsonl")
+        benchmark = ab_benchmark.ABBenchmark(
+            ab_benchmark.parse_variant([]), ab_benchmark.parse_variant(["randomx.mode=light"]), base_config,
+            trial=0.6, warmup=0.1, sample_interval=0.1, pairs=3, controller=controller)
+        started = time.perf_counter()
+        record = benchmark.run()
+        elapsed = time.perf_counter() - started
+        result = record['result']
+        low, high = result['ci_pct']
+        if [trial['variant'] for trial in record['trials']] != list("ABBAAB"):
+            failures.append(f"trial order {[trial['variant'] for trial in record['trials']]}")
+        if not result['significant'] or not low <= -75.0 <= high or not -78 < result['diff_pct'] < -72:
+            failures.append(f"expected a significant -75% difference, got {ab_benchmark.format_verdict(result)}")
+        if min(trial['samples'] for trial in record['trials']) < 3:
+            failures.append("too few samples per trial")
+        if controller.monitor.is_xmrig_running() or controller.config_path != str(workdir / "config.json"):
+            failures.append("the controller was not left as it was found")
+        results_path = workdir / "ab-results.jsonl"
+        ab_benchmark.save_result(results_path, record)
+        ab_benchmark.save_result(results_path, record)
+        if len(ab_benchmark.load_results(results_path)) != 2:
+            failures.append("stored results did not load back")
+        print(f"   {len(record['trials'])} trials in {elapsed:.1f}s: {ab_benchmark.format_verdict(result)}")
+    except (OSError, ValueError, RuntimeError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_memory_planner():
+    """Check RandomX layout planning and the swap fallback with the simulator as XMRig"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print("\n🧠 Memory planner (RandomX layouts, swap fallback and restore)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-memory-"))
+    failures = []
+    original_store = mc._settings_store
+    mc._settings_store = mc.SettingsStore(workdir / "user_settings.json")
+    controller = None
+    try:
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            config = json.load(f)
+        config['randomx'].update({'mode': "auto", 'numa': True})
+        with open(workdir / "config.json", 'w') as f:
+            json.dump(config, f)
+        controller = mc.XMRigController(xmrig_path=str(SCRIPT_DIR / "xmrig_simulator.py"),
+                                        config_path=str(workdir / "config.json"))
+        controller.events = controller.monitor.events = mc.EventLog(workdir / "events.jsonl")
+        planner = mc.MemoryPlanner(controller, None, None, auto=True)
+        controller.memory_planner = planner
+
+        # Two NUMA nodes, four threads: two datasets, then one, then light mode, then too little for anything
+        expected = {8192: ("fast", True), 4096: ("fast", False), 1024: ("light", True), 300: ("light", True)}
+        for available_mb, layout in expected.items():
+            plan = planner.plan(config, available_mb=available_mb, threads=4, numa_nodes=2)
+            if (plan['mode'], plan['numa']) != layout:
+                failures.append(f"{available_mb} MB: planned {plan['mode']} (numa {plan['numa']}), expected {layout}")
+        if plan['fits'] or plan['max_threads'] != 0:
+            failures.append("300 MB should fit no layout")
+        # A warm standby holds a second copy of whichever layout is chosen
+        controller.standby = mc.WarmStandby(controller, None)
+        for available_mb, layout in {8192: ("fast", False), 4096: ("light", True)}.items():
+            plan = planner.plan(config, available_mb=available_mb, threads=4, numa_nodes=2)
+            if (plan['mode'], plan['numa']) != layout:
+                failures.append(f"{available_mb} MB with a standby: planned {plan['mode']} (numa {plan['numa']}), "
+                                f"expected {layout}")
+        if controller.standby.footprint() != mc.MemoryPlanner.footprint("fast", os.cpu_count(),
+                                                                         numa_nodes=planner._numa_nodes()):
+            failures.append(f"the standby's footprint {controller.standby.footprint()} is not the planner's")
+        controller.standby = None
+        if mc.MemoryPlanner.footprint("fast", 8, one_gb_pages=True)['dataset'] != 3072:
+            failures.append("1 GB pages should round the dataset up to 3 GB")
+        (workdir / "meminfo").write_text("MemTotal: 4000000 kB\nHugePages_Total:    1280\n"
+                                         "HugePages_Free:      200\nHugepagesize:       2048 kB\n")
+        if mc.MemoryPlanner.read_hugepages(workdir / "meminfo") != {'total': 1280, 'free': 200, 'size_mb': 2.0}:
+            failures.append("hugepages not read from meminfo")
+
+        # Sustained swapping of XMRig itself in fast mode restarts the miner in light mode
+        available = [8192]
+        planner.plan = lambda config=None, **kwargs: mc.MemoryPlanner.plan(
+            planner, config, available_mb=available[0], threads=4, numa_nodes=1)
+        success, message = controller.start_mining()
+        if not success:
+            raise RuntimeError(message)
+        if Path("/proc/self/status").exists() and planner.miner_swap() != 0:
+            failures.append(f"VmSwap of the simulator read as {planner.miner_swap()}")
+        pid = controller.xmrig_process.pid
+        planner.step(planner.SWAP_MB * 1024 * 1024 // 2)  # A little in swap is not swapping
+        for tick in range(planner.SWAP_TICKS):
+            planner.step(512 * 1024 * 1024)
+        if not planner.swapping:
+            failures.append("512 MB of the miner in swap was not noticed")
+        if (controller.load_config().get('randomx') or {}).get('mode') != "light":
+            failures.append("swapping in fast mode did not switch to light mode")
+        if not controller.monitor.is_xmrig_running() or controller.xmrig_process.pid == pid:
+            failures.append("the miner was not restarted in light mode")
+
+        def saved():
+            return mc.get_settings_store().get('memory_planner') or {}
+
+        if not saved().get('avoid_fast'):
+            failures.append("the light-mode fallback was not saved")
+        types = [event['type'] for event in controller.events.pending]
+        if "memory_swapping" not in types or "memory_mode_switch" not in types:
+            failures.append(f"missing memory events in {types}")
+        planner.step(0)
+        if planner.swapping:
+            failures.append("swapping state did not clear once the miner left swap")
+
+        # Fast mode comes back once it has fitted with room to spare for RESTORE_TICKS ticks
+        planner.RESTORE_TICKS = 3
+        available[0] = 2600  # Fast fits, but not with the restore margin
+        for tick in range(planner.RESTORE_TICKS + 1):
+            planner.step(0)
+        pid = controller.xmrig_process.pid
+        available[0] = 8192
+        for tick in range(planner.RESTORE_TICKS):
+            planner.step(0)
+        if (controller.load_config().get('randomx') or {}).get('mode') != "fast" or planner.avoid_fast:
+            failures.append("fast mode was not restored once memory was available")
+        elif controller.xmrig_process.pid == pid or saved().get('avoid_fast'):
+            failures.append("restoring fast mode did not restart the miner and save the change")
+        print(f"   layouts at 8/4/1/0.3 GB, hugepages, swap fallback and fast mode restored ({planner.last_action})")
+    except (OSError, ValueError, RuntimeError, KeyError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        if controller:
+            controller.stop_mining()
+        mc._settings_store = original_store
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def check_cli():
+    """Drive the non-interactive subcommands over two controller directories with the simulator as XMRig"""
+    import socket
+
+    print("\n⌨️  Command line (apply, start, stats, stop, probe-pools over two directories)")
+    workdir = Path(tempfile.mkdtemp(prefix="mmc-cli-"))
+    directories = [workdir / "rig1", workdir / "rig2"]
+    targets = [arg for directory in directories for arg in ("--dir", str(directory))]
+    simulator = ["--xmrig", str(SCRIPT_DIR / "xmrig_simulator.py")]
+    failures = []
+    listener = None
+
+    def cli(*args):
+        result = run_python(["mining_controller.py", "--json"] + list(args))
+        try:
+            return result.returncode, json.loads(result.stdout)
+        except ValueError:
+            return result.returncode, {'ok': False, 'results': [], 'stdout': result.stdout, 'stderr': result.stderr}
+
+    try:
+        with open(SCRIPT_DIR / "config.json.example", 'r') as f:
+            config = json.load(f)
+        for port, directory in enumerate(directories, 44471):
+            directory.mkdir()
+            config['http'] = {'enabled': True, 'host': "127.0.0.1", 'port': port}
+            with open(directory / "config.json", 'w') as f:
+                json.dump(config, f)
+
+        # A bad change file is rejected before any directory is touched, including a wallet hidden in settings
+        before = (directories[0] / "config.json").read_text()
+        for bad in ({'threads': 2, 'pool_name': "SupportXMR"}, {'settings': {'wallet_address': "not-a-wallet"}}):
+            (workdir / "bad.json").write_text(json.dumps(bad))
+            returncode, _ = cli("apply", str(workdir / "bad.json"), *targets)
+            if returncode != 2 or (directories[0] / "config.json").read_text() != before or \
+                    (directories[0] / "user_settings.json").exists():
+                failures.append(f"invalid change file {bad} exited with {returncode} or changed a directory")
+
+        changes = {'pool': "SupportXMR", 'wallet': MAINNET_ADDRESS, 'priority': 4,
+                   'config': {'randomx.mode': "light"}, 'settings': {'memory_planner': {'auto': False}}}
+        (workdir / "changes.json").write_text(json.dumps(changes))
+        started = time.perf_counter()
+        returncode, output = cli("apply", str(workdir / "changes.json"), *targets)
+        apply_ms = (time.perf_counter() - started) * 1000
+        if returncode != 0 or len(output['results']) != 2:
+            failures.append(f"apply: {output}")
+        for directory in directories:
+            with open(directory / "config.json", 'r') as f:
+                applied = json.load(f)
+            pool = applied['pools'][0]
+            if (pool['url'], pool['user'], applied['cpu']['priority'], applied['randomx']['mode']) != \
+                    ("pool.supportxmr.com:3333", MAINNET_ADDRESS, 4, "light"):
+                failures.append(f"{directory.name}: change file not applied to config.json")
+
+        returncode, output = cli("start", *targets, *simulator)
+        if returncode != 0:
+            failures.append(f"start: {output}")
+        deadline = time.monotonic() + 10
+        while True:
+            returncode, output = cli("stats", *targets)
+            rates = [result.get('hashrate') for result in output['results']]
+            if (len(rates) == 2 and all(rates)) or time.monotonic() > deadline:
+                break
+            time.sleep(0.5)
+        if not all(result.get('status') == "Running" and result.get('hashrate') for result in output['results']):
+            failures.append(f"stats after start: {output}")
+        returncode, output = cli("start", "--dir", str(directories[0]), *simulator)
+        if returncode == 0:
+            failures.append("a second start was not refused")
+
+        returncode, output = cli("stop", *targets)
+        if returncode != 0:
+            failures.append(f"stop: {output}")
+        returncode, output = cli("stats", *targets)
+        if any(result.get('status') != "Stopped" for result in output['results']):
+            failures.append(f"stats after stop: {output}")
+
+        # One reachable and one closed endpoint from a local catalogue
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        open_port, closed_port = listener.getsockname()[1], closed.getsockname()[1]
+        closed.close()
+        (workdir / "pools.json").write_text(json.dumps({'pools': [{
+            'name': "Local", 'url': "127.0.0.1", 'port': open_port, 'fee': 0.0, 'min_payout': 0.1, 'type': "PPLNS",
+            'servers': [{'host': "127.0.0.1", 'ports': [{'port': open_port}, {'port': closed_port}]}]}]}))
+        returncode, output = cli("probe-pools", "--pools", str(workdir / "pools.json"), "--timeout", "2")
+        if returncode != 0 or [(result['port'], result['ok']) for result in output['results']] != \
+                [(open_port, True), (closed_port, False)]:
+            failures.append(f"probe-pools: {output}")
+        print(f"   apply to 2 directories {apply_ms:.0f} ms (one process); start, stats, stop and probe-pools checked")
+    except (OSError, ValueError, KeyError) as e:
+        failures.append(f"{type(e).__name__}: {e}")
+    finally:
+        if listener:
+            listener.close()
+        run_python(["mining_controller.py", "stop"] + targets)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def bench_monitor_end_to_end(lines=50000, rate=0):
+    """Drive MiningMonitor with the simulator and check every line is consumed"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import mining_controller as mc
+
+    print(f"\n🔁 Monitor end to end (xmrig_simulator.py, {lines} lines, rate {rate or 'max'})")
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPT_DIR / "xmrig_simulator.py"), "--rate", str(rate),
+         "--lines", str(lines), "--seed", "42", "--no-api", "-c", str(SCRIPT_DIR / "config.json.example")],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        stdin=subprocess.DEVNULL
+    )
+    controller_loop = mc.ControllerLoop()
+    controller_loop.start()
+    monitor = mc.MiningMonitor()
+    start = time.perf_counter()
+    monitor.start_monitoring(process, controller_loop)
+    process.wait()
+    monitor.wait_finished(timeout=30)
+    elapsed = time.perf_counter() - start
+    monitor.stop_monitoring()
+    controller_loop.stop()
+
+    from xmrig_simulator import LogEmitter
+    expected = lines + len(LogEmitter("").banner())
+    throughput = monitor.lines_processed / elapsed if elapsed > 0 else 0.0
+    print(f"   lines processed: {monitor.lines_processed}/{expected} in {elapsed:.2f}s ({throughput:,.0f} lines/s)")
+    print(f"   parsed hashrate: {monitor.stats['hashrate']:.1f} H/s")
+    if monitor.lines_processed < expected:
+        print(f"⚠️  Monitor dropped {expected - monitor.lines_processed} lines")
+    return {'monitor_lines_per_s': throughput, 'monitor_lines_dropped': expected - monitor.lines_processed}
+
+def soak_monitor(duration, rate=10000, error_rate=0.01):
+    """Run the monitor against the simulator for a long time and track memory growth"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import tracemalloc
+    import psutil
+    import mining_controller as mc
+
+    print(f"\n🧪 Soak test ({duration:.0f}s at {rate:,.0f} lines/s, {error_rate:.0%} errors)")
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPT_DIR / "xmrig_simulator.py"), "--rate", str(rate),
+         "--duration", str(duration), "--error-rate", str(error_rate), "--seed", "42", "--no-api",
+         "-c", str(SCRIPT_DIR / "config.json.example")],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        stdin=subprocess.DEVNULL
+    )
+    tracemalloc.start()
+    me = psutil.Process()
+    controller_loop = mc.ControllerLoop()
+    controller_loop.start()
+    monitor = mc.MiningMonitor()
+    monitor.start_monitoring(process, controller_loop)
+
+    # Ignore the start of the run while buffers and caches fill up: at least a
+    # tenth of the run and until the log ring buffer has wrapped once
+    warmup_until = time.monotonic() + max(1.0, duration / 10)
+    ring = monitor.log_buffer
+    while process.poll() is None and (time.monotonic() < warmup_until or ring.written < ring.capacity):
+        time.sleep(0.1)
+    baseline_rss = me.memory_info().rss
+    start_lines = monitor.lines_processed
+    start = time.perf_counter()
+
+    # Bounded buffers allocate in a sawtooth, so compare peaks rather than end points
+    heap_samples = []
+    while process.poll() is None:
+        time.sleep(0.5)
+        heap_samples.append(tracemalloc.get_traced_memory()[0])
+    monitor.wait_finished(timeout=30)
+    elapsed = time.perf_counter() - start
+    monitor.stop_monitoring()
+    controller_loop.stop()
+
+    rss_growth = (me.memory_info().rss - baseline_rss) / 1024
+    third = max(1, len(heap_samples) // 3)
+    traced_growth = (max(heap_samples[-third:]) - max(heap_samples[:third])) / 1024 if heap_samples else 0.0
+    tracemalloc.stop()
+    throughput = (monitor.lines_processed - start_lines) / elapsed if elapsed > 0 else 0.0
+
+    print(f"   lines processed: {monitor.lines_processed} ({throughput:,.0f} lines/s after warm-up)")
+    print(f"   RSS growth: {rss_growth:,.0f} KiB, Python heap peak growth: {traced_growth:,.0f} KiB")
+    return {'soak_lines_per_s': throughput, 'soak_rss_growth_kib': rss_growth,
+            'soak_heap_growth_kib': traced_growth}
+
+def compare_results(results, baseline_path, tolerance):
+    """Compare timings against a saved baseline; higher µs is a regression"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    print(f"\n📊 Comparison with {baseline_path} (tolerance {tolerance:.0%})")
+    passed = True
+    for key, value in sorted(results.items()):
+        if key not in baseline or not key.endswith("_us") or not baseline[key]:
+            continue
+        change = value / baseline[key] - 1
+        marker = "❌" if change > tolerance else "✅"
+        if change > tolerance:
+            passed = False
+        print(f"   {marker} {key:<36} {baseline[key]:12.2f} -> {value:12.2f} µs ({change:+.1%})")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description="Monero Mining Controller benchmarks")
+    parser.add_argument("--startup-budget-ms", type=float, default=100.0,
+                        help="Maximum cold-start import time in milliseconds")
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions per measurement")
+    parser.add_argument("--corpus", help="Recorded XMRig log to use for the parser benchmark")
+    parser.add_argument("--monitor-lines", type=int, default=50000, help="Lines for the end-to-end monitor run")
+    parser.add_argument("--monitor-rate", type=float, default=0, help="Simulator lines/s (0 = as fast as possible)")
+    parser.add_argument("--startup-only", action="store_true", help="Only run the startup time check")
+    parser.add_argument("--soak", type=float, default=0, help="Also run a soak test for this many seconds")
+    parser.add_argument("--soak-rate", type=float, default=10000, help="Simulator lines/s during the soak test")
+    parser.add_argument("--max-heap-growth-kib", type=float, default=1024,
+                        help="Maximum Python heap growth allowed during the soak test")
+    parser.add_argument("--save", help="Save results to a JSON file")
+    parser.add_argument("--compare", help="Compare results with a previously saved JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown when comparing")
+    args = parser.parse_args()
+
+    print("🚀 Monero Mining Controller Benchmarks")
+    print("=" * 40)
+
+    checks = [check_startup_time(args.startup_budget_ms, args.runs)]
+
+    if not args.startup_only:
+        results = bench_hot_paths(args.corpus)
+        checks.append(check_load_governor())
+        checks.append(check_control_loop())
+        checks.append(check_thermal_governor())
+        checks.append(check_fleet_protocol())
+        checks.append(check_tariff_scheduler())
+        checks.append(check_pool_catalogue())
+        checks.append(check_port_advisor())
+        checks.append(check_event_log())
+        checks.append(check_warm_standby())
+        checks.append(check_settings_store())
+        checks.append(check_address_vectors())
+        checks.append(check_tls_health())
+        checks.append(check_xmrig_store())
+        checks.append(check_ab_harness())
+        checks.append(check_memory_planner())
+        checks.append(check_cli())
+        results.update(bench_monitor_end_to_end(args.monitor_lines, args.monitor_rate))
+        checks.append(results['monitor_lines_dropped'] == 0)
+        if args.soak:
+            results.update(soak_monitor(args.soak, args.soak_rate))
+            if results['soak_heap_growth_kib'] > args.max_heap_growth_kib:
+                print(f"❌ Heap grew by more than {args.max_heap_growth_kib:.0f} KiB during the soak test")
+                checks.append(False)
+
+        if args.compare:
+            checks.append(compare_results(results, args.compare, args.tolerance))
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n💾 Results saved to {args.save}")
+
+    if not all(checks):
+        sys.exit(1)
+    print("\n🎉 All benchmarks passed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Monero Mining Controller - Fleet Dashboard
+
+Aggregates many controllers into one live table. Each controller serves its
+status stream with `--listen` (JSON lines over TCP: one snapshot, then only
+the fields that change), and this viewer subscribes to all of them:
+
+    python mining_controller.py --daemon --listen 0.0.0.0:7777      # on each rig
+    python fleet_dashboard.py rig01:7777 rig02:7777 --hosts-file hosts.txt
+
+Rendering runs at a fixed rate no matter how many hosts report, so viewer CPU
+stays bounded. `--local N` starts N stand-in controllers in-process for
+testing without any rigs.
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+
+class HostState:
+    """Latest known status of one controller"""
+
+    def __init__(self, address):
+        self.address = address
+        self.name = address
+        self.data = {}
+        self.connected = False
+        self.last_seen = 0.0
+        self.last_seq = 0
+        self.interval = 1.0
+        self.error = None
+
+    def apply(self, message):
+        """Fold one protocol message into the state"""
+        kind = message.get('type')
+        if kind == "hello":
+            self.name = message.get('host', self.address)
+            self.interval = message.get('interval', 1.0)
+        elif kind == "snapshot":
+            self.data = dict(message.get('data') or {})
+        elif kind == "delta":
+            self.data.update(message.get('data') or {})
+        self.last_seq = message.get('seq', self.last_seq)
+        self.last_seen = time.monotonic()
+
+    def health(self, now):
+        """Classify the host as ok, warn, stale, stopped or down"""
+        if not self.connected:
+            return "down"
+        if now - self.last_seen > max(15.0, self.interval * 5):
+            return "stale"
+        status = self.data.get('status')
+        if status != "Running":
+            return "stopped" if status in ("Stopped", None) else "warn"
+        accepted = self.data.get('accepted_shares', 0)
+        rejected = self.data.get('rejected_shares', 0)
+        if rejected and rejected / max(1, accepted + rejected) > 0.05:
+            return "warn"
+        temperature = self.data.get('temperature')
+        if temperature is not None and temperature >= 85:
+            return "warn"
+        return "ok"
+
+async def follow_host(state, reconnect_delay=1.0, max_delay=30.0):
+    """Subscribe to one controller, reconnecting with backoff"""
+    host, _, port = state.address.rpartition(':')
+    delay = reconnect_delay
+    while True:
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host or "127.0.0.1", int(port)), 5)
+            writer.write(b'{"op":"subscribe"}\n')
+            await writer.drain()
+            state.connected = True
+            state.error = None
+            delay = reconnect_delay
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                state.apply(json.loads(line))
+        except asyncio.CancelledError:
+            raise
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            state.error = str(e) or type(e).__name__
+        finally:
+            state.connected = False
+            if writer:
+                writer.close()
+        await asyncio.sleep(delay + random.uniform(0, delay / 2))
+        delay = min(max_delay, delay * 2)
+
+def format_hashrate(hashrate):
+    """Compact hashrate with units"""
+    if not hashrate:
+        return "-"
+    if hashrate >= 1e6:
+        return f"{hashrate / 1e6:.2f} MH/s"
+    if hashrate >= 1e3:
+        return f"{hashrate / 1e3:.2f} KH/s"
+    return f"{hashrate:.0f} H/s"
+
+HEALTH_STYLES = {"ok": "green", "warn": "yellow", "stopped": "dim", "stale": "magenta", "down": "red"}
+HEALTH_ORDER = {"down": 0, "stale": 1, "warn": 2, "stopped": 3, "ok": 4}
+
+def render(states, max_rows=40):
+    """Build the aggregated table; problem hosts first, then by name"""
+    from rich.table import Table
+    from rich.text import Text
+
+    now = time.monotonic()
+    rows = [(state.health(now), state) for state in states]
+    counts = {}
+    total_hashrate = 0.0
+    total_accepted = 0
+    total_rejected = 0
+    for health, state in rows:
+        counts[health] = counts.get(health, 0) + 1
+        if health in ("ok", "warn"):
+            total_hashrate += state.data.get('hashrate') or 0.0
+        total_accepted += state.data.get('accepted_shares') or 0
+        total_rejected += state.data.get('rejected_shares') or 0
+
+    summary = "  ".join(f"{name}: {counts[name]}" for name in HEALTH_ORDER if name in counts)
+    table = Table(title=f"Fleet: {len(states)} hosts | {format_hashrate(total_hashrate)} | "
+                        f"shares {total_accepted}/{total_rejected} | {summary}")
+    table.add_column("Host", style="cyan", no_wrap=True)
+    table.add_column("Health")
+    table.add_column("Hashrate", justify="right")
+    table.add_column("Accepted", justify="right", style="green")
+    table.add_column("Rejected", justify="right", style="red")
+    table.add_column("CPU %", justify="right")
+    table.add_column("Temp", justify="right")
+    table.add_column("Errors", justify="right")
+    table.add_column("Pool")
+
+    rows.sort(key=lambda row: (HEALTH_ORDER[row[0]], row[1].name))
+    for health, state in rows[:max_rows]:
+        data = state.data
+        temperature = data.get('temperature')
+        table.add_row(
+            state.name,
+            Text(health if health != "down" else f"down ({state.error or 'connecting'})", style=HEALTH_STYLES[health]),
+            format_hashrate(data.get('hashrate')),
+            str(data.get('accepted_shares', '-')),
+            str(data.get('rejected_shares', '-')),
+            str(data.get('cpu_usage', '-')),
+            f"{temperature}°C" if temperature is not None else "-",
+            str(data.get('errors', '-')),
+            str(data.get('pool') or '-')
+        )
+    if len(rows) > max_rows:
+        table.caption = f"... {len(rows) - max_rows} more hosts not shown"
+    return table
+
+def stand_in_snapshot(seed):
+    """Snapshot function for a fake controller with plausible, drifting stats"""
+    rng = random.Random(seed)
+    base = rng.uniform(500, 20000)
+    shares = {'accepted': 0, 'rejected': 0}
+    start = time.time()
+
+    def snapshot():
+        if rng.random() < 0.3:
+            shares['accepted'] += 1
+        if rng.random() < 0.005:
+            shares['rejected'] += 1
+        return {
+            'status': "Running",
+            'pool': "Stand-in",
+            'hashrate': round(base * rng.uniform(0.97, 1.03), 1),
+            'peak_hashrate': round(base * 1.05, 1),
+            'accepted_shares': shares['accepted'],
+            'rejected_shares': shares['rejected'],
+            'cpu_usage': rng.randint(85, 100),
+            'memory_usage': rng.randint(20, 60),
+            'temperature': rng.randint(55, 88),
+            'power': None,
+            'errors': shares['rejected'],
+            'uptime': int(time.time() - start)
+        }
+    return snapshot
+
+async def start_stand_ins(count, interval):
+    """Start local stand-in controllers and return their addresses"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from mining_controller import StatusServer
+
+    servers = []
+    for i in range(count):
+        server = StatusServer(stand_in_snapshot(i), "127.0.0.1", 0, interval=interval, name=f"stand-in-{i:03d}")
+        await server.start()
+        servers.append(server)
+    return servers, [f"127.0.0.1:{server.port}" for server in servers]
+
+async def run(addresses, refresh, local, interval, duration):
+    from rich.console import Console
+    from rich.live import Live
+
+    servers = []
+    if local:
+        servers, local_addresses = await start_stand_ins(local, interval)
+        addresses = list(addresses) + local_addresses
+
+    states = [HostState(address) for address in addresses]
+    followers = [asyncio.create_task(follow_host(state)) for state in states]
+    console = Console()
+    max_rows = max(5, console.size.height - 8)
+    started = time.monotonic()
+    try:
+        with Live(render(states, max_rows), console=console, auto_refresh=False) as live:
+            while not duration or time.monotonic() - started < duration:
+                await asyncio.sleep(refresh)
+                live.update(render(states, max_rows), refresh=True)
+    finally:
+        for task in followers:
+            task.cancel()
+        await asyncio.gather(*followers, return_exceptions=True)
+        for server in servers:
+            await server.stop()
+    return states
+
+def load_hosts_file(path):
+    """Read host:port entries, one per line, ignoring blanks and comments"""
+    with open(path, 'r') as f:
+        return [line.split('#', 1)[0].strip() for line in f if line.split('#', 1)[0].strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Monero Mining Controller fleet dashboard")
+    parser.add_argument("hosts", nargs="*", help="Controllers to watch as host:port")
+    parser.add_argument("--hosts-file", help="File with one host:port per line")
+    parser.add_argument("--refresh", type=float, default=1.0, help="Seconds between screen refreshes")
+    parser.add_argument("--local", type=int, default=0, help="Start this many local stand-in controllers")
+    parser.add_argument("--interval", type=float, default=1.0, help="Publish interval for stand-in controllers")
+    parser.add_argument("--duration", type=float, default=0, help="Exit after this many seconds (0 = until Ctrl+C)")
+    args = parser.parse_args()
+
+    addresses = list(args.hosts)
+    if args.hosts_file:
+        addresses.extend(load_hosts_file(args.hosts_file))
+    if not addresses and not args.local:
+        parser.error("no hosts given (use host:port arguments, --hosts-file or --local N)")
+
+    try:
+        asyncio.run(run(addresses, args.refresh, args.local, args.interval, args.duration))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
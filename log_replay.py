@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Monero Mining Controller - Log Replay
+
+Replays archived XMRig logs through the controller's own MiningMonitor parser,
+rebuilds the hashrate, share and pool-switch timeline and prints a summary:
+
+    python log_replay.py xmrig.log xmrig.log.1 xmrig.log.2.gz
+    python log_replay.py logs/*.gz --jobs 4 --timeline --bucket 15
+
+Plain files are read through mmap and gzip-rotated files are streamed, so
+memory stays flat however large the archive is; the timeline is kept per
+minute rather than per line. With --jobs N files are replayed in N worker
+processes and merged in time order.
+"""
+
+import sys
+import json
+import time
+import argparse
+import collections
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+sys.path.insert(0, str(SCRIPT_DIR))
+
+GAP_SECONDS = 300  # Silence longer than this is reported as a gap (crash, hang, machine asleep)
+
+class LineClock:
+    """Unix time, to the second, of "[2026-10-19 06:30:28.401] ..." lines
+
+    Only lines whose second differs from the previous line's are parsed, and
+    the start of each minute is cached, so most lines cost one slice compare.
+    """
+
+    def __init__(self):
+        self._minutes = {}
+        self._stamp = None
+        self._time = None
+
+    def __call__(self, line):
+        if len(line) < 25 or line[0] != '[' or line[24] != ']':
+            return None
+        stamp = line[1:20]
+        if stamp == self._stamp:
+            return self._time
+        base = self._minutes.get(stamp[:16])
+        try:
+            if base is None:
+                base = time.mktime((int(stamp[0:4]), int(stamp[5:7]), int(stamp[8:10]),
+                                    int(stamp[11:13]), int(stamp[14:16]), 0, 0, 0, -1))
+                self._minutes[stamp[:16]] = base
+            self._time = base + int(stamp[17:19])
+        except ValueError:
+            return None
+        self._stamp = stamp
+        return self._time
+
+def iter_lines(path):
+    """Raw lines of a log file: memory-mapped when plain, streamed when gzip"""
+    import mmap
+    import gzip
+
+    path = Path(path)
+    if path.suffix == ".gz":
+        with gzip.open(path, 'rb') as f:
+            yield from f
+        return
+    with open(path, 'rb') as f:
+        if not f.seek(0, 2):
+            return  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter(mm.readline, b"")
+
+def replay_file(path):
+    """Replay one log file; returns a JSON-friendly result with per-minute buckets"""
+    from mining_controller import MiningMonitor
+
+    monitor = MiningMonitor()
+    parse = monitor._parse_xmrig_line
+    classify = monitor.log_buffer.classify
+    stats = monitor.stats
+    shares = stats['shares']
+    clock = LineClock()
+
+    # minute -> [hashrate sum, hashrate samples, accepted, rejected, work (sum of share difficulty)]
+    buckets = collections.defaultdict(lambda: [0.0, 0, 0, 0, 0])
+    pools = []
+    startups = 0
+    gaps = []
+    errors = collections.Counter()
+    first = last = None
+    lines = 0
+    started = time.perf_counter()
+
+    for raw in iter_lines(path):
+        line = raw.decode('utf-8', 'replace').strip()
+        if not line:
+            continue
+        lines += 1
+        timestamp = clock(line)
+        if timestamp is not None:
+            if first is None:
+                first = timestamp
+            elif timestamp - last > GAP_SECONDS:
+                gaps.append((last, timestamp))
+            last = timestamp
+        if '* ABOUT' in line:
+            startups += 1  # First line of XMRig's startup banner
+            continue
+
+        accepted, rejected, windows = shares['accepted'], shares['rejected'], stats['hashrate_windows']
+        parse(line)
+        if last is None:
+            continue
+        minute = int(last // 60)
+        if stats['hashrate_windows'] is not windows:
+            rate = next((rate for rate in stats['hashrate_windows'] if rate), None)
+            if rate:
+                bucket = buckets[minute]
+                bucket[0] += rate
+                bucket[1] += 1
+        elif shares['accepted'] != accepted:
+            bucket = buckets[minute]
+            bucket[2] += 1
+            bucket[4] += monitor.share_times[-1][1] or 0
+        elif shares['rejected'] != rejected:
+            buckets[minute][3] += 1
+            errors[line[26:].split('(', 1)[0].strip()[:80]] += 1
+        elif 'use pool' in line:
+            pools.append((last, line.split('use pool', 1)[1].split()[0]))
+        elif 'new job' not in line and classify(line) == 2:
+            errors[line[26:].split('"', 1)[0].strip()[:80]] += 1
+
+    return {
+        'path': str(path),
+        'lines': lines,
+        'bytes': Path(path).stat().st_size,
+        'seconds': time.perf_counter() - started,
+        'first': first,
+        'last': last,
+        'buckets': {str(minute): values for minute, values in buckets.items()},
+        'pools': pools,
+        'startups': startups,
+        'gaps': gaps,
+        'errors': dict(errors)
+    }
+
+def merge(results):
+    """Combine per-file results into one timeline, in time order"""
+    results = sorted(results, key=lambda result: result['first'] or 0)
+    merged = {
+        'files': [result['path'] for result in results],
+        'lines': sum(result['lines'] for result in results),
+        'bytes': sum(result['bytes'] for result in results),
+        'first': min((result['first'] for result in results if result['first'] is not None), default=None),
+        'last': max((result['last'] for result in results if result['last'] is not None), default=None),
+        'buckets': {},
+        'pools': [],
+        'startups': sum(result['startups'] for result in results),
+        'gaps': [],
+        'errors': collections.Counter()
+    }
+    previous_last = None
+    for result in results:
+        for minute, values in result['buckets'].items():
+            bucket = merged['buckets'].setdefault(int(minute), [0.0, 0, 0, 0, 0])
+            for i, value in enumerate(values):
+                bucket[i] += value
+        merged['pools'].extend(result['pools'])
+        merged['gaps'].extend(result['gaps'])
+        if previous_last is not None and result['first'] is not None and result['first'] - previous_last > GAP_SECONDS:
+            merged['gaps'].append((previous_last, result['first']))  # Silence between rotated files
+        previous_last = result['last'] if result['last'] is not None else previous_last
+        merged['errors'].update(result['errors'])
+    merged['pools'].sort()
+    merged['gaps'].sort()
+    return merged
+
+def summarize(merged):
+    """Summary statistics of a merged timeline"""
+    buckets = merged['buckets']
+    rates = [values[0] / values[1] for values in buckets.values() if values[1]]
+    accepted = sum(values[2] for values in buckets.values())
+    rejected = sum(values[3] for values in buckets.values())
+    work = sum(values[4] for values in buckets.values())
+    span = (merged['last'] - merged['first']) if merged['first'] is not None else 0.0
+    downtime = sum(end - start for start, end in merged['gaps'])
+    mining = max(0.0, span - downtime)
+
+    # Pool switches: consecutive "use pool" lines naming a different pool
+    switches = []
+    for timestamp, pool in merged['pools']:
+        if not switches or switches[-1][1] != pool:
+            switches.append((timestamp, pool))
+
+    return {
+        'lines': merged['lines'],
+        'bytes': merged['bytes'],
+        'start': merged['first'],
+        'end': merged['last'],
+        'span_hours': span / 3600,
+        'downtime_hours': downtime / 3600,
+        'startups': merged['startups'],
+        'hashrate_avg': sum(rates) / len(rates) if rates else None,
+        'hashrate_min': min(rates) if rates else None,
+        'hashrate_max': max(rates) if rates else None,
+        # What the pool saw: the difficulty of accepted shares over the time spent mining
+        'hashrate_effective': work / mining if work and mining else None,
+        'accepted': accepted,
+        'rejected': rejected,
+        'reject_percent': rejected / (accepted + rejected) * 100 if accepted + rejected else 0.0,
+        'shares_per_hour': accepted / (mining / 3600) if mining else None,
+        'share_interval': mining / accepted if accepted else None,
+        'pool_switches': switches,
+        'gaps': merged['gaps'],
+        'top_errors': merged['errors'].most_common(10)
+    }
+
+def format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) if timestamp is not None else "-"
+
+def format_rate(hashrate):
+    return f"{hashrate:,.1f} H/s" if hashrate is not None else "-"
+
+def print_summary(summary, elapsed):
+    print(f"📄 {summary['lines']:,} lines, {summary['bytes'] / 1e6:,.1f} MB replayed in {elapsed:.2f}s "
+          f"({summary['lines'] / max(elapsed, 1e-9):,.0f} lines/s, {summary['bytes'] / 1e6 / max(elapsed, 1e-9):,.1f} MB/s)")
+    print(f"🕒 {format_time(summary['start'])} → {format_time(summary['end'])} "
+          f"({summary['span_hours']:.1f} h, {summary['downtime_hours']:.1f} h silent, {summary['startups']} XMRig start(s))")
+    print(f"⚡ Hashrate: avg {format_rate(summary['hashrate_avg'])}, min {format_rate(summary['hashrate_min'])}, "
+          f"max {format_rate(summary['hashrate_max'])}, effective {format_rate(summary['hashrate_effective'])}")
+    interval = f"{summary['share_interval']:.1f}s" if summary['share_interval'] else "-"
+    per_hour = f"{summary['shares_per_hour']:.1f}" if summary['shares_per_hour'] is not None else "-"
+    print(f"✅ Shares: {summary['accepted']:,} accepted, {summary['rejected']:,} rejected "
+          f"({summary['reject_percent']:.2f}%), {per_hour}/h, one every {interval}")
+    if summary['pool_switches']:
+        print("\n🏊 Pools:")
+        for timestamp, pool in summary['pool_switches']:
+            print(f"   {format_time(timestamp)}  {pool}")
+    if summary['gaps']:
+        print(f"\n⏸️  Gaps over {GAP_SECONDS // 60} minutes:")
+        for start, end in summary['gaps'][:20]:
+            print(f"   {format_time(start)} → {format_time(end)}  ({(end - start) / 60:.0f} min)")
+    if summary['top_errors']:
+        print("\n❌ Most frequent errors:")
+        for message, count in summary['top_errors']:
+            print(f"   {count:>8,}  {message}")
+
+def print_timeline(merged, bucket_minutes):
+    """One row per bucket: average hashrate, shares and the pool in use"""
+    print(f"\n📈 Timeline ({bucket_minutes} min buckets)")
+    print(f"   {'Time':<19} {'Hashrate':>14} {'Accepted':>9} {'Rejected':>9}  Pool")
+    grouped = {}
+    for minute, values in merged['buckets'].items():
+        bucket = grouped.setdefault(minute // bucket_minutes, [0.0, 0, 0, 0, 0])
+        for i, value in enumerate(values):
+            bucket[i] += value
+    pools = merged['pools']
+    pool_index = 0
+    pool = "-"
+    for key in sorted(grouped):
+        hashrate_sum, samples, accepted, rejected, _ = grouped[key]
+        start = key * bucket_minutes * 60
+        while pool_index < len(pools) and pools[pool_index][0] < start + bucket_minutes * 60:
+            pool = pools[pool_index][1]
+            pool_index += 1
+        hashrate = format_rate(hashrate_sum / samples) if samples else "-"
+        print(f"   {format_time(start):<19} {hashrate:>14} {accepted:>9,} {rejected:>9,}  {pool}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay XMRig logs and summarize hashrate, shares and pools")
+    parser.add_argument("files", nargs="+", help="Log files (plain or .gz), e.g. xmrig.log xmrig.log.1.gz")
+    parser.add_argument("--jobs", type=int, default=1, help="Replay files in this many worker processes")
+    parser.add_argument("--timeline", action="store_true", help="Print the timeline as well as the summary")
+    parser.add_argument("--bucket", type=int, default=60, help="Timeline bucket size in minutes")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    missing = [path for path in args.files if not Path(path).is_file()]
+    if missing:
+        parser.error(f"not a file: {', '.join(missing)}")
+
+    started = time.perf_counter()
+    if args.jobs > 1 and len(args.files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(args.files))) as pool:
+            results = list(pool.map(replay_file, args.files))
+    else:
+        results = [replay_file(path) for path in args.files]
+    merged = merge(results)
+    summary = summarize(merged)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(dict(summary, elapsed=elapsed), indent=2))
+        return
+    print_summary(summary, elapsed)
+    if args.timeline:
+        print_timeline(merged, max(1, args.bucket))
+
+if __name__ == "__main__":
+    main()
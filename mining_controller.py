@@ -1,4 +1,5 @@
 import os
+import re
 import json
 import time
 import subprocess
@@ -6,76 +7,872 @@ import threading
 import signal
 import sys
 import queue
+import copy
+import collections
+from contextlib import contextmanager
 from pathlib import Path
-import psutil
-import urllib.request
-import urllib.error
-from rich.console import Console
-from rich.table import Table
-from rich.live import Live
-from rich.panel import Panel
-from rich.text import Text
-from rich.prompt import Prompt, IntPrompt, Confirm
-from rich.columns import Columns
-from rich.align import Align
-from rich.markdown import Markdown
+
+from monero_address import validate_wallet_address
+
+# rich, psutil and urllib are imported where they are used so that the
+# module loads fast for non-interactive callers; see benchmark.py.
 
 def get_script_dir():
     """Get the directory where the script is located"""
     return Path(__file__).parent.absolute()
 
+async def probe_endpoint(host, port, timeout=5.0):
+    """Open a TCP connection to a pool endpoint; returns (ok, latency_ms, error)"""
+    import asyncio
+
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.TimeoutError:
+        return False, None, f"timed out after {timeout:.0f}s"
+    except OSError as e:
+        return False, None, str(e)
+    latency_ms = (time.perf_counter() - start) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True, latency_ms, None
+
+async def probe_pools(endpoints, timeout=5.0, concurrency=32):
+    """Probe many pool endpoints at once; returns them with ok, latency_ms and error, fastest first"""
+    import asyncio
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(endpoint):
+        async with semaphore:
+            ok, latency_ms, error = await probe_endpoint(endpoint['host'], endpoint['port'], timeout)
+        return dict(endpoint, ok=ok, latency_ms=None if latency_ms is None else round(latency_ms, 1), error=error)
+
+    results = await asyncio.gather(*(probe(endpoint) for endpoint in endpoints))
+    return sorted(results, key=lambda result: (not result['ok'], result['latency_ms'] or 0.0))
+
+class TLSHealthChecker:
+    """Measure TLS handshakes to pool endpoints and capture their certificate fingerprints
+
+    A check times a plain TCP connect, full TLS handshakes and handshakes that
+    resume the previous session. Pools mostly use self-signed certificates,
+    so they are not verified against a CA. Instead the SHA-256 fingerprint of
+    the certificate is captured for XMRig's tls-fingerprint pin. Sessions are
+    kept per endpoint, so repeated checks resume where the server allows it.
+    """
+
+    NEGLIGIBLE_MS = 50.0
+
+    def __init__(self, timeout=5.0, samples=3):
+        self.timeout = timeout
+        self.samples = samples
+        self.sessions = {}
+        self._context = None
+
+    @property
+    def context(self):
+        """Client context that accepts any certificate; trust comes from the pinned fingerprint"""
+        import ssl
+        if self._context is None:
+            self._context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            self._context.check_hostname = False
+            self._context.verify_mode = ssl.CERT_NONE
+        return self._context
+
+    def handshake(self, host, port, session=None):
+        """Connect, handshake and return timings, protocol details and the certificate fingerprint"""
+        import ssl
+        import socket
+        import select
+        import hashlib
+
+        started = time.perf_counter()
+        raw = socket.create_connection((host, port), self.timeout)
+        connected = time.perf_counter()
+        try:
+            sock = self.context.wrap_socket(raw, server_hostname=host, session=session)
+        except (OSError, ValueError):
+            raw.close()
+            raise
+        finished = time.perf_counter()
+        try:
+            # TLS 1.3 session tickets arrive after the handshake; read them without waiting for stratum data
+            sock.setblocking(False)
+            if select.select([sock], [], [], 0.05)[0]:
+                try:
+                    sock.recv(1)
+                except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                    pass
+            certificate = sock.getpeercert(binary_form=True)
+            return {
+                'connect_ms': (connected - started) * 1000,
+                'handshake_ms': (finished - connected) * 1000,
+                'reused': sock.session_reused,
+                'version': sock.version(),
+                'cipher': sock.cipher()[0],
+                'fingerprint': hashlib.sha256(certificate).hexdigest() if certificate else None,
+                'session': sock.session
+            }
+        finally:
+            sock.close()
+
+    def check(self, host, port, pinned=None):
+        """Sample full and resumed handshakes to one endpoint; returns a dict with a TLS recommendation"""
+        import statistics
+
+        result = {'host': host, 'port': port, 'ok': False, 'error': None, 'pinned': pinned}
+        full, resumed, fingerprints = [], [], set()
+        try:
+            for _ in range(self.samples):
+                sample = self.handshake(host, port)
+                full.append(sample)
+                fingerprints.add(sample['fingerprint'])
+                resumed_sample = self.handshake(host, port, session=sample['session'])
+                if resumed_sample['reused']:
+                    resumed.append(resumed_sample['handshake_ms'])
+                    self.sessions[(host, port)] = resumed_sample['session'] or sample['session']
+                fingerprints.add(resumed_sample['fingerprint'])
+        except (OSError, ValueError) as e:
+            result['error'] = str(e) or type(e).__name__
+            if not full:
+                return result
+
+        connect_ms = statistics.median(sample['connect_ms'] for sample in full)
+        handshake_ms = statistics.median(sample['handshake_ms'] for sample in full)
+        fingerprint = full[0]['fingerprint']
+        result.update(
+            ok=result['error'] is None,
+            connect_ms=connect_ms,
+            handshake_ms=handshake_ms,
+            resumed_ms=statistics.median(resumed) if resumed else None,
+            resumption=bool(resumed),
+            version=full[0]['version'],
+            cipher=full[0]['cipher'],
+            fingerprint=fingerprint,
+            stable=len(fingerprints) == 1,
+            pin_matches=None if not pinned else pinned.lower() == fingerprint
+        )
+        # TLS 1.3 adds one round trip and TLS 1.2 two; beyond that the server is slow to handshake
+        budget = max(self.NEGLIGIBLE_MS, 2 * connect_ms)
+        result['negligible'] = handshake_ms <= budget
+        result['recommend'] = result['ok'] and result['stable'] and result['negligible'] and result['pin_matches'] is not False
+        return result
+
+def get_xmrig_path(version=None):
+    """Get the XMRig executable, overridable with XMRIG_PATH (e.g. xmrig_simulator.py)
+
+    With a version, the executable of that release as installed side by side
+    by setup.py (xmrig-versions/versions/<version>/).
+    """
+    if version:
+        directory = get_script_dir() / "xmrig-versions" / "versions" / version
+        return directory / ("xmrig.exe" if (directory / "xmrig.exe").exists() else "xmrig")
+    override = os.environ.get("XMRIG_PATH")
+    if override:
+        path = Path(override)
+        return path if path.is_absolute() else get_script_dir() / path
+    return get_script_dir() / "xmrig"
+
+def list_xmrig_versions():
+    """XMRig versions installed by setup.py, oldest first"""
+    versions_dir = get_script_dir() / "xmrig-versions" / "versions"
+    if not versions_dir.exists():
+        return []
+    names = [path.name for path in versions_dir.iterdir() if path.is_dir() and not path.name.startswith(".")]
+    return sorted(names, key=lambda name: [int(part) if part.isdigit() else part for part in name.split(".")])
+
+class SettingsStore:
+    """user_settings.json with locking, atomic writes and named profiles
+
+    Reads are served from memory until the file's inode, mtime or size
+    changes. Writes take an advisory lock on a sidecar .lock file, re-read
+    the file whatever its stamp says (mtimes can be coarser than two quick
+    writes), apply only the changed keys and replace the file atomically,
+    so two controllers on one host do not overwrite each other's settings.
+
+    A profile is a named copy of the keys in PROFILE_KEYS (pool, wallet,
+    CPU layout, schedule). Switching copies a profile's values over the
+    top-level settings in one write.
+    """
+
+    PROFILE_KEYS = ('selected_pool', 'wallet_address', 'cpu', 'schedule')
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else get_script_dir() / "user_settings.json"
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._data = {}
+        self._stamp = None
+        self.events = None  # EventLog for an unreadable file, set by the controller
+        self.last_error = None
+
+    def _read(self, force=False):
+        """Refresh the cache if the file changed since it was last read (always, with force)"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._data, self._stamp = {}, None
+            return self._data
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if force or stamp != self._stamp:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                # Not printed: stderr would land on top of the TUI
+                self.last_error = f"Ignoring unreadable settings file {self.path}: {e}"
+                if self.events:
+                    self.events.emit("settings_unreadable", path=str(self.path), error=str(e))
+                data = {}
+            self._data = data if isinstance(data, dict) else {}
+            self._stamp = stamp
+        return self._data
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive advisory lock for a read-modify-write"""
+        with open(self.lock_path, 'a+') as lock_file:
+            if sys.platform == "win32":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, data):
+        """Replace the file atomically (the caller holds the lock) and update the cache"""
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        stat = self.path.stat()
+        self._data, self._stamp = data, (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        """Get a copy of all settings"""
+        return copy.deepcopy(self._read())
+
+    def get(self, key, default=None):
+        """Get one setting"""
+        value = self._read().get(key, default)
+        return copy.deepcopy(value)
+
+    def update(self, changes=None, **kwargs):
+        """Set (or, with None, remove) the given keys, leaving all others as they are on disk"""
+        changes = dict(changes or {}, **kwargs)
+        with self._locked():
+            data = copy.deepcopy(self._read(force=True))
+            for key, value in changes.items():
+                if value is None:
+                    data.pop(key, None)
+                else:
+                    data[key] = copy.deepcopy(value)
+            self._write(data)
+        return data
+
+    def save(self, settings):
+        """Replace all settings"""
+        with self._locked():
+            self._write(copy.deepcopy(settings))
+
+    def clear(self):
+        """Remove all settings, including profiles"""
+        with self._locked():
+            self.path.unlink(missing_ok=True)
+            self._data, self._stamp = {}, None
+
+    def profiles(self):
+        """Names of the saved profiles, and which one is active"""
+        data = self._read()
+        return sorted(data.get('profiles') or {}), data.get('active_profile')
+
+    def get_profile(self, name):
+        """Get a copy of a profile's values, or None"""
+        return copy.deepcopy((self._read().get('profiles') or {}).get(name))
+
+    def save_profile(self, name, values):
+        """Save values for the profile keys under a name"""
+        profile = {key: copy.deepcopy(values[key]) for key in self.PROFILE_KEYS if values.get(key) is not None}
+        with self._locked():
+            data = copy.deepcopy(self._read(force=True))
+            data.setdefault('profiles', {})[name] = profile
+            data['active_profile'] = name
+            self._write(data)
+        return profile
+
+    def switch_profile(self, name):
+        """Make a profile's values the current settings; returns the profile, or None if unknown"""
+        with self._locked():
+            data = copy.deepcopy(self._read(force=True))
+            profile = (data.get('profiles') or {}).get(name)
+            if profile is None:
+                return None
+            for key in self.PROFILE_KEYS:
+                if key == 'cpu':
+                    continue  # The CPU layout lives in the XMRig config
+                if key in profile:
+                    data[key] = copy.deepcopy(profile[key])
+                else:
+                    data.pop(key, None)
+            data['active_profile'] = name
+            self._write(data)
+        return copy.deepcopy(profile)
+
+    def delete_profile(self, name):
+        """Delete a profile; returns whether it existed"""
+        with self._locked():
+            data = copy.deepcopy(self._read(force=True))
+            if name not in (data.get('profiles') or {}):
+                return False
+            del data['profiles'][name]
+            if data.get('active_profile') == name:
+                data.pop('active_profile')
+            self._write(data)
+        return True
+
+_settings_store = None
+
+def get_settings_store():
+    """The shared store for user_settings.json"""
+    global _settings_store
+    if _settings_store is None:
+        _settings_store = SettingsStore()
+    return _settings_store
+
 def load_user_settings():
     """Load user settings from file"""
-    settings_file = get_script_dir() / "user_settings.json"
-    if settings_file.exists():
-        try:
-            with open(settings_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    return get_settings_store().load()
 
 def save_user_settings(settings):
-    """Save user settings to file"""
-    settings_file = get_script_dir() / "user_settings.json"
+    """Save user settings to file, replacing everything in it"""
+    try:
+        get_settings_store().save(settings)
+        return True
+    except OSError:
+        return False
+
+def update_user_settings(changes=None, **kwargs):
+    """Change some settings without touching the others; None removes a key"""
     try:
-        with open(settings_file, 'w') as f:
-            json.dump(settings, f, indent=2)
+        get_settings_store().update(changes, **kwargs)
         return True
-    except:
+    except OSError:
         return False
 
+def pool_tls_options(pool_info, store=None):
+    """update_pool_config arguments for the TLS endpoint and certificate pin saved for a pool"""
+    saved = ((store or get_settings_store()).get('tls_pools') or {}).get((pool_info or {}).get('name'))
+    if not saved:
+        return {'tls_enabled': False}
+    return {'tls_enabled': True, 'tls_endpoint': f"{saved['host']}:{saved['port']}",
+            'tls_fingerprint': saved.get('fingerprint')}
+
+def apply_config_overrides(config, overrides):
+    """A copy of an XMRig config with dotted keys ("randomx.mode") set to new values"""
+    config = copy.deepcopy(config)
+    for key, value in overrides.items():
+        section = config
+        *parents, leaf = key.split('.')
+        for parent in parents:
+            if not isinstance(section.get(parent), dict):
+                section[parent] = {}
+            section = section[parent]
+        section[leaf] = value
+    return config
+
+def apply_profile(name, xmrig_controller, store=None):
+    """Switch to a saved profile and write its pool, wallet and CPU layout to the XMRig config
+
+    A running XMRig picks the changes up through config watch. Returns
+    (success, message, profile).
+    """
+    store = store or get_settings_store()
+    try:
+        profile = store.switch_profile(name)
+    except OSError as e:
+        return False, f"Could not switch profile: {e}", None
+    if profile is None:
+        names, _ = store.profiles()
+        return False, f"Unknown profile: {name} (saved: {', '.join(names) or 'none'})", None
+
+    config = xmrig_controller.load_config()
+    if config is None:
+        return False, f"Switched settings to profile {name}, but the XMRig config could not be read", profile
+    if 'cpu' in profile:
+        config['cpu'] = profile['cpu']
+        if not xmrig_controller.save_config(config):
+            return False, f"Switched settings to profile {name}, but the CPU layout could not be saved", profile
+    pool, wallet = profile.get('selected_pool'), profile.get('wallet_address')
+    if pool and wallet and not xmrig_controller.update_pool_config(pool, wallet, **pool_tls_options(pool, store)):
+        return False, f"Switched settings to profile {name}, but the pool could not be saved", profile
+    xmrig_controller.events.emit("profile_switch", profile=name)
+    return True, f"Switched to profile {name}", profile
+
+class ControllerLoop:
+    """Single asyncio event loop that runs all of the controller's background work
+
+    Output monitoring, system sampling, governors and network probes run as
+    tasks on one loop thread; blocking calls go to a small fixed executor.
+    Short control jobs (governors, system sampling, event flushes) get an
+    executor of their own, so a few slow network calls can never hold up
+    their sub-second ticks. The interactive UI stays on the main thread and
+    only submits work.
+    """
+
+    def __init__(self, max_workers=2, control_workers=2):
+        self.max_workers = max_workers
+        self.control_workers = control_workers
+        self.loop = None
+        self.loop_thread = None
+        self.control_executor = None
+        self.tasks = {}
+
+    def start(self):
+        """Start the loop in its own thread"""
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(ThreadPoolExecutor(max_workers=self.max_workers,
+                                                          thread_name_prefix="controller-io"))
+        self.control_executor = ThreadPoolExecutor(max_workers=self.control_workers,
+                                                   thread_name_prefix="controller-control")
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, name="controller-loop")
+        self.loop_thread.daemon = True
+        self.loop_thread.start()
+
+    @property
+    def running(self):
+        return self.loop is not None and self.loop.is_running()
+
+    def submit(self, coro):
+        """Schedule a coroutine from any thread; returns a concurrent Future"""
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro, timeout=None):
+        """Run a coroutine on the loop and wait for its result"""
+        return self.submit(coro).result(timeout)
+
+    def spawn(self, name, coro):
+        """Run a named long-lived task, replacing any task with the same name"""
+        async def _spawn():
+            previous = self.tasks.pop(name, None)
+            if previous and not previous.done():
+                previous.cancel()
+            task = self.loop.create_task(coro)
+            self.tasks[name] = task
+            task.add_done_callback(lambda t: self.tasks.get(name) is t and self.tasks.pop(name))
+            return task
+        return self.call(_spawn())
+
+    def cancel(self, name, timeout=2):
+        """Cancel a named task and wait for it to finish"""
+        import asyncio
+
+        async def _cancel():
+            task = self.tasks.pop(name, None)
+            if task and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if self.running:
+            self.call(_cancel(), timeout)
+
+    def is_active(self, name):
+        """Check whether a named task is still running"""
+        task = self.tasks.get(name)
+        return task is not None and not task.done()
+
+    def periodic(self, name, interval, func, delay=0.0, control=False):
+        """Call a blocking function every interval seconds on the executor, first after delay seconds
+
+        control=True runs it on the control executor, for short jobs that
+        must keep their rhythm while network calls block the I/O workers.
+        """
+        import asyncio
+
+        executor = self.control_executor if control else None
+
+        async def _periodic():
+            await asyncio.sleep(delay)
+            while True:
+                try:
+                    await self.loop.run_in_executor(executor, func)
+                except Exception as e:
+                    print(f"Background task {name} failed: {e}", file=sys.stderr)
+                await asyncio.sleep(interval)
+        return self.spawn(name, _periodic())
+
+    def run_blocking(self, func, *args, timeout=None):
+        """Run a blocking function on the loop's executor and wait for it"""
+        async def _run():
+            return await self.loop.run_in_executor(None, func, *args)
+        return self.call(_run(), timeout)
+
+    def stop(self, timeout=5):
+        """Cancel every task, shut down the executors and stop the loop"""
+        import asyncio
+
+        if not self.running:
+            return
+
+        async def _shutdown():
+            tasks = list(self.tasks.values())
+            self.tasks.clear()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.loop.shutdown_default_executor()
+
+        try:
+            self.call(_shutdown(), timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(timeout)
+        self.loop.close()
+        self.loop = None
+        # Cancelled tasks have stopped submitting; a job still running finishes on its own
+        self.control_executor.shutdown(wait=False)
+        self.control_executor = None
+
+class PoolCatalogue:
+    """Pool catalogue stored in pools.json, validated, indexed and optionally refreshed
+
+    Each pool has a default url/port and may list several servers, each with
+    plain and TLS ports and their starting difficulty; pools that accept a
+    "wallet+difficulty" login give its limits in fixed_difficulty. Custom
+    pools are kept in the same file and survive refreshes from a signed
+    remote list.
+    """
+
+    VERSION = 2
+    FIELDS = {
+        'name': (str, True),
+        'url': (str, True),
+        'port': (int, True),
+        'fee': ((int, float), True),
+        'min_payout': ((int, float), True),
+        'type': (str, False),
+        'location': (str, False),
+        'description': (str, False),
+        'features': (list, False),
+        'recommended': (bool, False),
+        'custom': (bool, False),
+        'fixed_difficulty': (dict, False),
+        'servers': (list, False)
+    }
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.pools = []
+        self.notes = {}
+        self.meta = {}
+        self.errors = []
+        self._by_name = {}
+        self._by_region = {}
+        self._by_host = {}
+        self._region_names = {}
+
+    @staticmethod
+    def _valid_port(port):
+        return isinstance(port, int) and not isinstance(port, bool) and 0 < port < 65536
+
+    @classmethod
+    def validate_pool(cls, pool):
+        """Check one pool entry against the schema; returns a list of problems"""
+        if not isinstance(pool, dict):
+            return ["entry is not an object"]
+        errors = []
+        for field, (kind, required) in cls.FIELDS.items():
+            if field not in pool:
+                if required:
+                    errors.append(f"missing '{field}'")
+            elif not isinstance(pool[field], kind) or (kind is not bool and isinstance(pool[field], bool)):
+                errors.append(f"'{field}' has the wrong type")
+        if not errors:
+            if not pool['name'].strip():
+                errors.append("'name' is empty")
+            if not cls._valid_port(pool['port']):
+                errors.append(f"'port' {pool['port']} is out of range")
+            if not 0 <= pool['fee'] <= 100:
+                errors.append(f"'fee' {pool['fee']} is not a percentage")
+            if pool['min_payout'] < 0:
+                errors.append("'min_payout' is negative")
+
+        fixed = pool.get('fixed_difficulty')
+        if isinstance(fixed, dict) and not all(isinstance(fixed.get(key, 1), (int, float)) for key in ('min', 'max')):
+            errors.append("'fixed_difficulty' limits must be numbers")
+
+        servers = pool.get('servers') if isinstance(pool.get('servers'), list) else []
+        for i, server in enumerate(servers):
+            if not isinstance(server, dict) or not isinstance(server.get('host'), str) or not server['host']:
+                errors.append(f"server {i} needs a 'host'")
+                continue
+            ports = server.get('ports')
+            if not isinstance(ports, list) or not ports:
+                errors.append(f"server {server['host']} needs a list of 'ports'")
+                continue
+            for entry in ports:
+                if not isinstance(entry, dict) or not cls._valid_port(entry.get('port')):
+                    errors.append(f"server {server['host']} has an invalid port entry")
+                elif not isinstance(entry.get('tls', False), bool):
+                    errors.append(f"server {server['host']} port {entry['port']} has a non-boolean 'tls'")
+                elif not isinstance(entry.get('difficulty', 0), (int, float)):
+                    errors.append(f"server {server['host']} port {entry['port']} has a non-numeric 'difficulty'")
+        return errors
+
+    def load(self):
+        """Load and validate the catalogue, skipping (and recording) invalid pools"""
+        self.errors = []
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print(f"Pools file {self.path} not found!")
+            data = {}
+        except json.JSONDecodeError:
+            print(f"Invalid pools file {self.path}!")
+            data = {}
+
+        self.pools = []
+        for pool in data.get('pools', []):
+            problems = self.validate_pool(pool)
+            if problems:
+                name = pool.get('name', '?') if isinstance(pool, dict) else '?'
+                self.errors.append(f"{name}: {', '.join(problems)}")
+            else:
+                self.pools.append(pool)
+        if self.errors:
+            print(f"Skipped {len(self.errors)} invalid pool(s) in {self.path}")
+        self.notes = data.get('notes', {})
+        self.meta = {key: value for key, value in data.items() if key not in ('pools', 'notes')}
+        self._index()
+        return not self.errors
+
+    def _index(self):
+        """Rebuild the name, region and host indexes"""
+        self._by_name = {}
+        self._by_region = {}
+        self._by_host = {}
+        self._region_names = {}
+        for pool in self.pools:
+            self._by_name.setdefault(pool['name'].lower(), pool)
+            location = pool.get('location', "Global")
+            regions = {location}
+            self._by_host.setdefault(pool['url'].lower(), pool)
+            for server in pool.get('servers') or []:
+                regions.add(server.get('region', location))
+                self._by_host.setdefault(server['host'].lower(), pool)
+            for region in regions:
+                self._by_region.setdefault(region.lower(), []).append(pool)
+                self._region_names.setdefault(region.lower(), region)
+
+    def get(self, name):
+        """Look up a pool by name (case-insensitive)"""
+        return self._by_name.get(name.lower())
+
+    def regions(self):
+        """Regions served by at least one pool"""
+        return sorted(self._region_names.values())
+
+    def by_region(self, region):
+        """Pools with a server in a region"""
+        return list(self._by_region.get(region.lower(), []))
+
+    def find_by_host(self, host):
+        """Find the pool a server hostname belongs to"""
+        return self._by_host.get(host.lower())
+
+    def endpoints(self, pool, tls=None):
+        """Every host/port of a pool as dicts with host, port, tls, difficulty and region"""
+        region = pool.get('location', "Global")
+        endpoints = []
+        for server in pool.get('servers') or []:
+            for entry in server['ports']:
+                endpoints.append({
+                    'host': server['host'],
+                    'port': entry['port'],
+                    'tls': entry.get('tls', False),
+                    'difficulty': entry.get('difficulty'),
+                    'region': server.get('region', region),
+                    'description': entry.get('description', "")
+                })
+        if not endpoints:
+            endpoints.append({'host': pool['url'], 'port': pool['port'], 'tls': False, 'difficulty': None,
+                              'region': region, 'description': ""})
+        return [endpoint for endpoint in endpoints if tls is None or endpoint['tls'] == tls]
+
+    def save(self):
+        """Write the catalogue atomically"""
+        data = dict(self.meta, version=self.VERSION, pools=self.pools, notes=self.notes)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(temp_path, self.path)
+            return True
+        except OSError:
+            return False
+
+    def add(self, pool):
+        """Validate and persist a custom pool, replacing a custom pool of the same name"""
+        problems = self.validate_pool(pool)
+        if problems:
+            return False, f"Invalid pool: {', '.join(problems)}"
+        existing = self.get(pool['name'])
+        if existing and not existing.get('custom'):
+            return False, f"A catalogue pool named {pool['name']} already exists"
+        pool = dict(pool, custom=True)
+        self.pools = [p for p in self.pools if p is not existing] + [pool]
+        self._index()
+        if not self.save():
+            return False, f"Could not write {self.path}"
+        return True, f"Saved custom pool {pool['name']}"
+
+    def is_stale(self, max_age_hours):
+        """Check whether the last remote refresh is older than max_age_hours"""
+        fetched = (self.meta.get('source') or {}).get('fetched', 0)
+        return time.time() - fetched > max_age_hours * 3600
+
+    def refresh(self, url, public_key, timeout=15):
+        """Replace the catalogue pools with a signed remote list, keeping custom pools
+
+        The list at `url` must be signed with Ed25519; the base64 signature of
+        the exact response body is served at `url + ".sig"`. A list dated
+        before the current catalogue's last_updated is rejected, so an old
+        signed file cannot be replayed. The response ETag is stored so
+        unchanged lists cost one conditional request.
+        """
+        import base64
+        import urllib.request
+        import urllib.error
+        try:
+            from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+            from cryptography.exceptions import InvalidSignature
+        except ImportError:
+            return False, "Install the 'cryptography' package to verify signed pool lists"
+
+        source = self.meta.get('source') or {}
+        request = urllib.request.Request(url, headers={'Accept': "application/json"})
+        if source.get('url') == url and source.get('etag'):
+            request.add_header("If-None-Match", source['etag'])
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                body = response.read()
+                etag = response.headers.get("ETag")
+            with urllib.request.urlopen(url + ".sig", timeout=timeout) as response:
+                signature = base64.b64decode(response.read().strip())
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                self.meta['source'] = dict(source, fetched=time.time())
+                self.save()
+                return True, "Pool list is up to date"
+            return False, f"Pool list download failed: HTTP {e.code}"
+        except (OSError, ValueError) as e:
+            return False, f"Pool list download failed: {e}"
+
+        try:
+            Ed25519PublicKey.from_public_bytes(base64.b64decode(public_key)).verify(signature, body)
+        except (InvalidSignature, ValueError):
+            return False, "Pool list signature is invalid - keeping the current catalogue"
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return False, "Pool list is not valid JSON"
+        remote_pools = data.get('pools') if isinstance(data, dict) else None
+        if not isinstance(remote_pools, list):
+            return False, "Pool list has no 'pools' array"
+        # ISO 8601 dates order as strings; an older list is a replay of a validly signed old file
+        updated = data.get('last_updated')
+        if not isinstance(updated, str) or not updated:
+            return False, "Pool list has no 'last_updated' date"
+        current = self.meta.get('last_updated')
+        if isinstance(current, str) and updated < current:
+            return False, f"Pool list dated {updated} is older than the current catalogue ({current}) - ignored"
+        problems = [f"{pool.get('name', '?') if isinstance(pool, dict) else '?'}: {', '.join(errors)}"
+                    for pool in remote_pools for errors in [self.validate_pool(pool)] if errors]
+        if problems:
+            return False, f"Pool list rejected ({len(problems)} invalid entries, first: {problems[0]})"
+
+        remote_names = {pool['name'].lower() for pool in remote_pools}
+        custom = [pool for pool in self.pools if pool.get('custom') and pool['name'].lower() not in remote_names]
+        self.pools = [dict(pool, custom=False) for pool in remote_pools] + custom
+        self.notes = data.get('notes', self.notes)
+        self.meta['last_updated'] = updated
+        self.meta['source'] = {'url': url, 'etag': etag, 'fetched': time.time()}
+        self._index()
+        if not self.save():
+            return False, f"Could not write {self.path}"
+        return True, f"Pool list updated ({len(remote_pools)} pools, {len(custom)} custom kept)"
+
 class PoolSelector:
     """Handles pool selection and comparison"""
 
+    # Above this many pools, selection asks for a region first
+    REGION_FILTER_THRESHOLD = 20
+
     def __init__(self, pools_file=None):
         if pools_file is None:
             pools_file = get_script_dir() / "pools.json"
         elif not Path(pools_file).is_absolute():
             pools_file = get_script_dir() / pools_file
         self.pools_file = str(pools_file)
-        self.pools = []
-        self.load_pools()
+        self.catalogue = PoolCatalogue(self.pools_file)
+        self._loaded = False
+
+    @property
+    def pools(self):
+        """Pool list, loaded from disk on first use"""
+        if not self._loaded:
+            self.load_pools()
+        return self.catalogue.pools
+
+    @property
+    def notes(self):
+        """Pool notes, loaded together with the pool list"""
+        if not self._loaded:
+            self.load_pools()
+        return self.catalogue.notes
 
     def load_pools(self):
         """Load pool data from JSON file"""
-        try:
-            with open(self.pools_file, 'r') as f:
-                data = json.load(f)
-                self.pools = data.get('pools', [])
-                self.notes = data.get('notes', {})
-        except FileNotFoundError:
-            print(f"Pools file {self.pools_file} not found!")
-            self.pools = []
-            self.notes = {}
-        except json.JSONDecodeError:
-            print(f"Invalid pools file {self.pools_file}!")
-            self.pools = []
-            self.notes = {}
+        self.catalogue.load()
+        self._loaded = True
+
+    def refresh_remote(self, settings):
+        """Refresh from the signed remote list in the 'pool_catalogue' settings, if it is stale"""
+        remote = settings.get('pool_catalogue') or {}
+        if not remote.get('url') or not remote.get('public_key'):
+            return None
+        if not self._loaded:
+            self.load_pools()  # The local catalogue holds the ETag of the last download
+        if not self.catalogue.is_stale(remote.get('refresh_hours', 24)):
+            return None
+        return self.catalogue.refresh(remote['url'], remote['public_key'])
 
-    def display_pool_comparison(self, console):
+    def display_pool_comparison(self, console, pools=None):
         """Display comparison table of available pools"""
-        if not self.pools:
+        from rich.table import Table
+        pools = self.pools if pools is None else pools
+        if not pools:
             console.print("[red]No pools available![/red]")
             return
 
@@ -87,7 +884,7 @@ class PoolSelector:
         table.add_column("Location", style="blue")
         table.add_column("Description", style="white")
 
-        for pool in self.pools:
+        for pool in pools:
             fee = f"{pool['fee']:.1f}"
             min_payout = f"{pool['min_payout']:.4f}"
             recommended_marker = " ⭐" if pool.get('recommended', False) else ""
@@ -96,9 +893,9 @@ class PoolSelector:
                 pool['name'] + recommended_marker,
                 fee,
                 min_payout,
-                pool['type'],
-                pool['location'],
-                pool['description']
+                pool.get('type', "-"),
+                pool.get('location', "-"),
+                pool.get('description', "")
             )
 
         console.print(table)
@@ -112,27 +909,34 @@ class PoolSelector:
 
     def select_pool_interactive(self, console):
         """Interactive pool selection"""
-        self.display_pool_comparison(console)
+        from rich.prompt import IntPrompt, Prompt
+        pools = self.pools
+        regions = self.catalogue.regions()
+        if len(pools) > self.REGION_FILTER_THRESHOLD and len(regions) > 1:
+            region = Prompt.ask("Region", choices=regions + ["all"], default="all")
+            if region != "all":
+                pools = self.catalogue.by_region(region)
+        self.display_pool_comparison(console, pools)
 
         console.print("\n[bold]Pool Selection Options:[/bold]")
-        for i, pool in enumerate(self.pools, 1):
+        for i, pool in enumerate(pools, 1):
             recommended = " ⭐" if pool.get('recommended', False) else ""
             console.print(f"{i}. {pool['name']}{recommended}")
 
-        console.print(f"{len(self.pools) + 1}. Enter custom pool details")
+        console.print(f"{len(pools) + 1}. Enter custom pool details")
 
         while True:
             try:
                 choice = IntPrompt.ask(
-                    f"\nSelect a pool (1-{len(self.pools) + 1})",
+                    f"\nSelect a pool (1-{len(pools) + 1})",
                     default=1
                 )
 
-                if 1 <= choice <= len(self.pools):
-                    selected_pool = self.pools[choice - 1]
+                if 1 <= choice <= len(pools):
+                    selected_pool = pools[choice - 1]
                     console.print(f"[green]Selected: {selected_pool['name']}[/green]")
                     return selected_pool
-                elif choice == len(self.pools) + 1:
+                elif choice == len(pools) + 1:
                     return self.add_custom_pool(console)
                 else:
                     console.print("[red]Invalid choice![/red]")
@@ -141,12 +945,14 @@ class PoolSelector:
                 return None
 
     def add_custom_pool(self, console):
-        """Add a custom pool"""
+        """Add a custom pool and save it to the catalogue"""
+        from rich.prompt import Prompt, IntPrompt
         console.print("[bold]Add Custom Pool[/bold]")
 
         name = Prompt.ask("Pool name")
         url = Prompt.ask("Pool URL (without port)")
         port = IntPrompt.ask("Pool port")
+        tls_port = IntPrompt.ask("TLS port (0 = none)", default=0)
         fee = float(Prompt.ask("Pool fee (%)", default="1.0"))
         min_payout = float(Prompt.ask("Minimum payout (XMR)", default="0.1"))
 
@@ -162,16 +968,22 @@ class PoolSelector:
             "features": ["Custom configuration"],
             "recommended": False
         }
+        if tls_port:
+            custom_pool['servers'] = [{"host": url, "ports": [{"port": port, "tls": False},
+                                                              {"port": tls_port, "tls": True}]}]
 
-        console.print(f"[green]Added custom pool: {name}[/green]")
+        success, message = self.catalogue.add(custom_pool)
+        if success:
+            console.print(f"[green]Added custom pool: {name}[/green]")
+        else:
+            console.print(f"[yellow]{message} - using it for this session only[/yellow]")
         return custom_pool
 
     def get_pool_info(self, pool_name):
         """Get pool information by name"""
-        for pool in self.pools:
-            if pool['name'].lower() == pool_name.lower():
-                return pool
-        return None
+        if not self._loaded:
+            self.load_pools()
+        return self.catalogue.get(pool_name)
 
 class CPUController:
     """Handles CPU configuration and control"""
@@ -182,34 +994,92 @@ class CPUController:
         elif not Path(config_file).is_absolute():
             config_file = get_script_dir() / config_file
         self.config_file = str(config_file)
+        self.cgroup = None
+        self.memory_max_mb = None
+        self.thread_limits = {}  # Governor name -> thread cap it currently asks for
+        self._user_cpu = None  # The user's own cpu section, kept aside while a cap is in force
+        self._written_cpu = None  # The capped cpu section last written, to spot outside edits
+        self._allocation_lock = threading.RLock()
+
+    def enable_cgroup(self, cgroup, memory_max_mb=None):
+        """Enforce CPU settings through a cgroup in addition to the XMRig config"""
+        self.cgroup = cgroup
+        self.memory_max_mb = memory_max_mb
+
+    def get_cgroup_limits(self):
+        """Get the cgroup limits matching the current CPU configuration and any governor cap"""
+        if not self.cgroup:
+            return None
+        limits = self.cgroup.limits_from_cpu_config(self.get_current_config(), self.memory_max_mb)
+        with self._allocation_lock:
+            cap = min(self.thread_limits.values(), default=None)
+        if cap is not None and cap < self.user_thread_count():
+            limits['cpu.max'] = self.cgroup.cpu_max(cap)
+        return limits
 
     def get_cpu_info(self):
         """Get CPU information"""
+        import psutil
         return {
             'physical_cores': psutil.cpu_count(logical=False),
             'logical_cores': psutil.cpu_count(logical=True),
             'usage_percent': psutil.cpu_percent(interval=1)
         }
 
+    @staticmethod
+    def thread_list(cpu_config):
+        """CPU ids of the RandomX threads in a config's cpu section, or None when XMRig picks them itself"""
+        threads = cpu_config.get('rx')
+        if isinstance(threads, list) and threads:
+            # XMRig accepts bare CPU ids or {"intensity", "affinity"} objects
+            return [entry.get('affinity', -1) if isinstance(entry, dict) else entry for entry in threads]
+        # Earlier versions of the controller wrote "affinity", which XMRig ignores
+        affinity = cpu_config.get('affinity')
+        if isinstance(affinity, str) and affinity:
+            try:
+                return [int(cpu) for cpu in affinity.split(',')]
+            except ValueError:
+                return None
+        return None
+
     def update_cpu_config(self, max_threads=None, priority=None, affinity=None):
-        """Update CPU configuration in XMRig config"""
+        """Update CPU configuration in XMRig config
+
+        Threads go into XMRig's RandomX thread list ("rx"), one entry per
+        thread pinned to a CPU id; with "watch" on, XMRig restarts its
+        workers with the new list without rebuilding the dataset. affinity
+        is an explicit list of CPU ids, one per thread. These are the user's
+        settings: while a governor caps the threads, the cap is re-applied
+        on top of them.
+        """
+        with self._allocation_lock:
+            updated = self._update_user_cpu(max_threads, priority, affinity)
+            if updated and self.thread_limits:
+                self._apply_thread_limits()
+            return updated
+
+    def _update_user_cpu(self, max_threads, priority, affinity):
+        """Write the user's CPU settings, starting from their own section if a cap is in force"""
+        import psutil
         try:
             with open(self.config_file, 'r') as f:
                 config = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             return False
 
+        if self._user_cpu is not None:
+            config['cpu'] = copy.deepcopy(self._user_cpu)
+            self._user_cpu = self._written_cpu = None
         if 'cpu' not in config:
             config['cpu'] = {}
 
         updated = False
 
         if max_threads is not None:
-            # Set CPU affinity to use specific cores
+            # One thread per CPU, starting from CPU 0
             if max_threads > 0:
                 cores_to_use = min(max_threads, psutil.cpu_count(logical=True))
-                affinity_str = ",".join(str(i) for i in range(cores_to_use))
-                config['cpu']['affinity'] = affinity_str
+                config['cpu']['rx'] = list(range(cores_to_use))
                 updated = True
 
         if priority is not None:
@@ -219,16 +1089,20 @@ class CPUController:
                 updated = True
 
         if affinity is not None:
-            config['cpu']['affinity'] = affinity
+            config['cpu']['rx'] = [int(cpu) for cpu in affinity]
             updated = True
 
         if updated:
+            config['cpu'].pop('affinity', None)
             try:
                 with open(self.config_file, 'w') as f:
                     json.dump(config, f, indent=4)
-                return True
             except Exception:
                 return False
+            if self.cgroup and self.cgroup.path.exists():
+                # Live update: the kernel enforces new limits without restarting XMRig
+                self.cgroup.apply(self.cgroup.limits_from_cpu_config(config['cpu'], self.memory_max_mb))
+            return True
 
         return False
 
@@ -241,8 +1115,90 @@ class CPUController:
         except:
             return {}
 
+    def get_thread_count(self):
+        """Get the number of threads currently allocated to mining"""
+        import psutil
+        threads = self.thread_list(self.get_current_config())
+        return len(threads) if threads else psutil.cpu_count(logical=True)
+
+    def _user_thread_list(self):
+        """The user's thread list, ignoring governor caps; XMRig's automatic choice counts as every CPU"""
+        import psutil
+        cpu = self._user_cpu if self._user_cpu is not None else self.get_current_config()
+        return self.thread_list(cpu) or list(range(psutil.cpu_count(logical=True)))
+
+    def user_thread_count(self):
+        """Threads the user configured, whatever governors currently cap XMRig to"""
+        with self._allocation_lock:
+            return len(self._user_thread_list())
+
+    def limit_threads(self, owner, threads):
+        """Set (or with None, lift) one governor's thread cap; returns the thread count now in force
+
+        The load and thermal governors and the tariff scheduler all allocate
+        threads through here. XMRig runs the lowest of their caps, never
+        more than the user configured, so one governor lifting its cap
+        cannot undo another's. Once no cap is left, the user's cpu section
+        is written back exactly as it was. When XMRig runs in a cgroup the
+        cap is a cpu.max quota instead, enforced by the kernel at once.
+        """
+        with self._allocation_lock:
+            if threads is None:
+                self.thread_limits.pop(owner, None)
+            else:
+                self.thread_limits[owner] = max(1, int(threads))
+            return self._apply_thread_limits()
+
+    def _apply_thread_limits(self):
+        """Enforce the caps in force; returns the thread count allowed, or None if that failed"""
+        if self.cgroup and self.cgroup.path.exists() and self._user_cpu is None:
+            # The kernel enforces a CPU quota at once: no config rewrite, no XMRig reload
+            user_threads = len(self._user_thread_list())
+            cap = min([user_threads] + list(self.thread_limits.values()))
+            if cap < user_threads:
+                applied = self.cgroup.set_cpu_max(cap)
+            else:
+                applied = self.cgroup.apply(self.get_cgroup_limits())
+            return cap if applied else None
+
+        current = self.get_current_config()
+        if self._user_cpu is not None and current != self._written_cpu:
+            # Edited behind our back (a profile switch, say): that is the user's section now
+            self._user_cpu = None
+        if self._user_cpu is None:
+            if not self.thread_limits:
+                return self.get_thread_count()
+            self._user_cpu = current
+
+        user_threads = self._user_thread_list()
+        cap = min([len(user_threads)] + list(self.thread_limits.values()))
+        if cap >= len(user_threads):
+            cpu, self._user_cpu, self._written_cpu = self._user_cpu, None, None
+        else:
+            cpu = dict(self._user_cpu, rx=user_threads[:cap])
+            cpu.pop('affinity', None)
+            self._written_cpu = cpu
+        if cpu != current and not self._write_cpu_section(cpu):
+            return None
+        return cap
+
+    def _write_cpu_section(self, cpu):
+        """Replace the cpu section of the XMRig config"""
+        try:
+            with open(self.config_file, 'r') as f:
+                config = json.load(f)
+            config['cpu'] = cpu
+            with open(self.config_file, 'w') as f:
+                json.dump(config, f, indent=4)
+        except (OSError, ValueError):
+            return False
+        if self.cgroup and self.cgroup.path.exists():
+            self.cgroup.apply(self.cgroup.limits_from_cpu_config(cpu, self.memory_max_mb))
+        return True
+
     def display_cpu_config(self, console):
         """Display current CPU configuration"""
+        from rich.table import Table
         cpu_info = self.get_cpu_info()
         current_config = self.get_current_config()
 
@@ -255,10 +1211,9 @@ class CPUController:
         table.add_row("Logical Cores", str(cpu_info['logical_cores']), "Logical CPU cores (including hyperthreading)")
         table.add_row("Current Usage", f"{cpu_info['usage_percent']:.1f}%", "Current CPU usage")
 
-        affinity = current_config.get('affinity', 'Auto')
-        if isinstance(affinity, str) and affinity != 'Auto':
-            affinity_cores = len(affinity.split(','))
-            table.add_row("Active Threads", str(affinity_cores), "Number of CPU threads allocated to mining")
+        threads = self.thread_list(current_config)
+        if threads:
+            table.add_row("Active Threads", str(len(threads)), "Number of CPU threads allocated to mining")
         else:
             table.add_row("Active Threads", "Auto", "Automatic thread allocation")
 
@@ -276,16 +1231,896 @@ class CPUController:
         else:
             table.add_row("CPU Priority", "Default", "System default priority")
 
+        if self.cgroup:
+            enforced = self.cgroup.read_limits()
+            if enforced:
+                table.add_row("cgroup", str(self.cgroup.path), "Kernel-enforced resource isolation")
+                table.add_row("cpu.weight", enforced.get('cpu.weight', '-'), "Relative CPU share (default 100)")
+                table.add_row("cpu.max", enforced.get('cpu.max', '-'), "CPU quota per period (µs)")
+                table.add_row("cpuset", enforced.get('cpuset.cpus.effective', '-'), "CPUs XMRig may run on")
+                table.add_row("memory.max", enforced.get('memory.max', '-'), "Memory limit (bytes)")
+            else:
+                table.add_row("cgroup", "Pending", "Limits are applied when mining starts")
+
         console.print(table)
 
+class CgroupManager:
+    """Runs XMRig inside a dedicated cgroup v2 group with kernel-enforced limits"""
+
+    CONTROLLERS = ("cpu", "cpuset", "memory")
+    # XMRig priority 0 (highest) .. 5 (lowest) mapped onto cpu.weight (1-10000, default 100)
+    PRIORITY_WEIGHTS = {0: 1000, 1: 500, 2: 200, 3: 100, 4: 50, 5: 10}
+    CPU_PERIOD = 100000
+
+    def __init__(self, name="xmrig-miner", root="/sys/fs/cgroup"):
+        self.root = Path(root)
+        self.path = self.root / name
+
+    def is_available(self):
+        """Check for a writable unified (v2) cgroup hierarchy"""
+        controllers = self.root / "cgroup.controllers"
+        return controllers.exists() and os.access(self.root, os.W_OK)
+
+    def create(self):
+        """Create the cgroup and delegate the controllers it needs"""
+        try:
+            available = (self.root / "cgroup.controllers").read_text().split()
+            wanted = " ".join(f"+{c}" for c in self.CONTROLLERS if c in available)
+            if wanted:
+                (self.root / "cgroup.subtree_control").write_text(wanted)
+            self.path.mkdir(exist_ok=True)
+            return True
+        except OSError:
+            return False
+
+    def remove(self):
+        """Remove the cgroup once XMRig has exited"""
+        try:
+            self.path.rmdir()
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _format_cpuset(cpus):
+        """Compress a list of CPU ids into cpuset syntax ("0-3,6")"""
+        ranges = []
+        for cpu in sorted(set(cpus)):
+            if ranges and cpu == ranges[-1][1] + 1:
+                ranges[-1][1] = cpu
+            else:
+                ranges.append([cpu, cpu])
+        return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+    def limits_from_cpu_config(self, cpu_config, memory_max_mb=None):
+        """Derive cgroup limits from the CPUController settings in config.json"""
+        limits = {}
+        cpus = [cpu for cpu in CPUController.thread_list(cpu_config) or [] if isinstance(cpu, int) and cpu >= 0]
+        if cpus:
+            limits['cpuset.cpus'] = self._format_cpuset(cpus)
+            limits['cpu.max'] = self.cpu_max(len(cpus))
+        else:
+            limits['cpu.max'] = f"max {self.CPU_PERIOD}"
+
+        limits['cpu.weight'] = str(self.PRIORITY_WEIGHTS.get(cpu_config.get('priority'), 100))
+        limits['memory.max'] = str(memory_max_mb * 1024 * 1024) if memory_max_mb else "max"
+        return limits
+
+    def apply(self, limits):
+        """Write limits to the cgroup; takes effect immediately, no restart needed"""
+        applied = True
+        for name, value in limits.items():
+            try:
+                (self.path / name).write_text(value)
+            except OSError:
+                applied = False
+        return applied
+
+    def cpu_max(self, threads):
+        """cpu.max value giving the CPU time of a number of threads per period"""
+        return f"{threads * self.CPU_PERIOD} {self.CPU_PERIOD}"
+
+    def set_cpu_max(self, threads):
+        """Cap the cgroup to the CPU time of a number of threads; the governors' throttle in cgroup mode"""
+        return self.apply({'cpu.max': self.cpu_max(threads)})
+
+    def attach(self, pid=0):
+        """Move a process into the cgroup (0 means the calling process)"""
+        (self.path / "cgroup.procs").write_text(str(pid))
+
+    def read_limits(self):
+        """Read back the limits currently enforced by the kernel"""
+        limits = {}
+        for name in ("cpu.weight", "cpu.max", "cpuset.cpus.effective", "memory.max", "memory.current"):
+            try:
+                limits[name] = (self.path / name).read_text().strip()
+            except OSError:
+                continue
+        return limits
+
+class HardwareSensors:
+    """Reads CPU temperature, package power (RAPL) and frequency"""
+
+    POWERCAP_DIR = "/sys/class/powercap"
+    CPU_SENSOR_NAMES = ("coretemp", "k10temp", "zenpower", "cpu_thermal", "cpu-thermal", "soc_thermal", "acpitz")
+
+    def __init__(self, powercap_dir=None):
+        self.powercap_dir = Path(powercap_dir or self.POWERCAP_DIR)
+        self._zones = None
+        self._last_energy = None
+
+    def read_temperature(self):
+        """Get the hottest CPU temperature in °C, or None if unavailable"""
+        import psutil
+        if not hasattr(psutil, "sensors_temperatures"):
+            return None
+        try:
+            sensors = psutil.sensors_temperatures()
+        except (OSError, RuntimeError):
+            return None
+
+        readings = []
+        for name in self.CPU_SENSOR_NAMES:
+            readings.extend(entry.current for entry in sensors.get(name, []) if entry.current)
+        if not readings:
+            # Unknown platform driver: use whatever is reported
+            readings = [entry.current for entries in sensors.values() for entry in entries if entry.current]
+        return max(readings) if readings else None
+
+    def _rapl_zones(self):
+        """Find top-level RAPL package zones (intel-rapl:N, not subzones)"""
+        if self._zones is None:
+            self._zones = []
+            if self.powercap_dir.exists():
+                for zone in sorted(self.powercap_dir.iterdir()):
+                    if zone.name.count(':') == 1 and (zone / "energy_uj").exists():
+                        self._zones.append(zone)
+        return self._zones
+
+    def _read_energy_uj(self):
+        """Get per-zone energy counters and their wrap-around ranges"""
+        counters = []
+        for zone in self._rapl_zones():
+            try:
+                energy = int((zone / "energy_uj").read_text())
+                max_range = int((zone / "max_energy_range_uj").read_text())
+            except (OSError, ValueError):
+                return None
+            counters.append((energy, max_range))
+        return counters or None
+
+    def read_power(self):
+        """Get average package power in watts since the previous call"""
+        counters = self._read_energy_uj()
+        if counters is None:
+            return None
+        now = time.monotonic()
+        previous, self._last_energy = self._last_energy, (counters, now)
+        if previous is None or now <= previous[1] or len(previous[0]) != len(counters):
+            return None
+
+        joules = 0.0
+        for (energy, max_range), (old_energy, _) in zip(counters, previous[0]):
+            delta = energy - old_energy
+            if delta < 0:
+                delta += max_range  # Counter wrapped
+            joules += delta / 1e6
+        return joules / (now - previous[1])
+
+    def read_frequency(self):
+        """Get the current average CPU frequency in MHz"""
+        import psutil
+        try:
+            freq = psutil.cpu_freq()
+        except (OSError, RuntimeError, NotImplementedError):
+            return None
+        return freq.current if freq and freq.current else None
+
+class CPUTopology:
+    """Maps logical CPUs onto physical cores, shared L3 caches and NUMA nodes"""
+
+    SYSFS_ROOT = "/sys/devices/system"
+
+    def __init__(self, sysfs_root=None):
+        self.sysfs_root = Path(sysfs_root or self.SYSFS_ROOT)
+        self._cpus = None
+
+    @staticmethod
+    def _parse_cpu_list(text):
+        """Expand cpulist syntax ("0-3,6") into CPU ids"""
+        cpus = []
+        for part in text.strip().split(','):
+            if '-' in part:
+                first, last = part.split('-', 1)
+                cpus.extend(range(int(first), int(last) + 1))
+            elif part:
+                cpus.append(int(part))
+        return cpus
+
+    def _read(self, path, default=None):
+        try:
+            return path.read_text().strip()
+        except OSError:
+            return default
+
+    def _load_sysfs(self):
+        """Read topology from sysfs (Linux)"""
+        cpu_dir = self.sysfs_root / "cpu"
+        online = self._read(cpu_dir / "online")
+        if not online:
+            return None
+
+        nodes = {}
+        for node in (self.sysfs_root / "node").glob("node[0-9]*"):
+            for cpu in self._parse_cpu_list(self._read(node / "cpulist", "")):
+                nodes[cpu] = int(node.name[4:])
+
+        cpus = {}
+        for cpu in self._parse_cpu_list(online):
+            topology = cpu_dir / f"cpu{cpu}" / "topology"
+            package = int(self._read(topology / "physical_package_id", "0"))
+            core = int(self._read(topology / "core_id", str(cpu)))
+            l3 = None
+            for cache in sorted((cpu_dir / f"cpu{cpu}" / "cache").glob("index[0-9]*")):
+                if self._read(cache / "level") == "3":
+                    shared = self._parse_cpu_list(self._read(cache / "shared_cpu_list", str(cpu)))
+                    l3 = int(self._read(cache / "id", str(min(shared))))
+            cpus[cpu] = {
+                'package': package,
+                'core': (package, core),
+                'l3': (package, l3 if l3 is not None else 0),
+                'node': nodes.get(cpu, 0)
+            }
+        return cpus
+
+    def _load_fallback(self):
+        """Approximate topology from core counts when sysfs is unavailable"""
+        import psutil
+        logical = psutil.cpu_count(logical=True) or 1
+        physical = psutil.cpu_count(logical=False) or logical
+        siblings = max(1, logical // physical)
+        return {cpu: {'package': 0, 'core': (0, cpu // siblings), 'l3': (0, 0), 'node': 0}
+                for cpu in range(logical)}
+
+    def cpus(self):
+        """Get topology per logical CPU: package, core, l3 and node ids"""
+        if self._cpus is None:
+            self._cpus = self._load_sysfs() or self._load_fallback()
+        return self._cpus
+
+    def core_efficiency(self, thread_rates, tolerance=0.15):
+        """Group per-thread hashrates by physical core and flag outliers
+
+        thread_rates is a list of (cpu, hashrate) pairs; threads without a
+        pinned CPU are counted as unpinned. A core is an outlier when its
+        hashrate per thread is more than `tolerance` below the median of cores
+        running the same number of threads, so hyperthread pairs are only
+        compared with other pairs.
+        """
+        import statistics
+        cpus = self.cpus()
+        cores = {}
+        unpinned = []
+        for cpu, hashrate in thread_rates:
+            if cpu is None or cpu not in cpus:
+                unpinned.append(hashrate)
+                continue
+            info = cpus[cpu]
+            core = cores.setdefault(info['core'], {
+                'core': info['core'], 'l3': info['l3'], 'node': info['node'], 'threads': {}})
+            core['threads'][cpu] = core['threads'].get(cpu, 0.0) + hashrate
+
+        by_width = {}
+        for core in cores.values():
+            core['hashrate'] = sum(core['threads'].values())
+            core['per_thread'] = core['hashrate'] / len(core['threads'])
+            by_width.setdefault(len(core['threads']), []).append(core['per_thread'])
+        for core in cores.values():
+            median = statistics.median(by_width[len(core['threads'])])
+            core['ratio'] = core['per_thread'] / median if median > 0 else 1.0
+            core['thread_ratios'] = {cpu: rate / median if median > 0 else 1.0
+                                     for cpu, rate in core['threads'].items()}
+
+        outliers = sorted((core for core in cores.values() if core['ratio'] < 1.0 - tolerance),
+                          key=lambda core: core['ratio'])
+
+        # Idle physical cores, best L3 group first, are where outlier threads could move
+        busy_l3 = {}
+        for core in cores.values():
+            busy_l3.setdefault(core['l3'], []).append(core['ratio'])
+        idle = {}
+        for cpu, info in cpus.items():
+            if info['core'] not in cores:
+                idle.setdefault(info['core'], {'core': info['core'], 'l3': info['l3'], 'cpus': []})['cpus'].append(cpu)
+        idle_cores = sorted(idle.values(), key=lambda core: -min(busy_l3.get(core['l3'], [1.0])))
+
+        return {'cores': cores, 'outliers': outliers, 'idle': idle_cores, 'unpinned': unpinned}
+
+class LogRingBuffer:
+    """Keeps the most recent XMRig output in a preallocated byte ring with a time/level index"""
+
+    LEVELS = ("info", "warning", "error")
+    ERROR_KEYWORDS = ("error", "crash", "failed", "rejected", "fatal", "segmentation fault", "no active pools")
+    WARNING_KEYWORDS = ("warning", "retry", "paused", "timeout", "low difficulty")
+
+    def __init__(self, capacity=4 * 1024 * 1024):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.written = 0  # Total bytes ever written; offsets are absolute
+        # Parallel index lists; entries before _first have been overwritten
+        self._offsets = []
+        self._lengths = []
+        self._times = []
+        self._levels = []
+        self._first = 0
+        # Per-level lists of entry numbers, each with its own first-valid pointer
+        self._by_level = {level: [] for level in range(len(self.LEVELS))}
+        self._level_first = {level: 0 for level in range(len(self.LEVELS))}
+        self.lock = threading.Lock()
+
+    def classify(self, line):
+        """Get the level index for a log line"""
+        lowered = line.lower()
+        if any(keyword in lowered for keyword in self.ERROR_KEYWORDS):
+            return 2
+        if any(keyword in lowered for keyword in self.WARNING_KEYWORDS):
+            return 1
+        return 0
+
+    def append(self, line, timestamp=None):
+        """Store one line, evicting the oldest lines when the ring wraps; returns its level"""
+        data = line.encode('utf-8', 'replace')[:self.capacity]
+        level = self.classify(line)
+        timestamp = time.time() if timestamp is None else timestamp
+
+        with self.lock:
+            length = len(data)
+            pos = self.written % self.capacity
+            end = pos + length
+            if end <= self.capacity:
+                self.buffer[pos:end] = data
+            else:
+                split = self.capacity - pos
+                self.buffer[pos:] = data[:split]
+                self.buffer[:length - split] = data[split:]
+
+            entry = len(self._offsets)
+            self._offsets.append(self.written)
+            self._lengths.append(length)
+            self._times.append(timestamp)
+            self._levels.append(level)
+            self._by_level[level].append(entry)
+            self.written += length
+            self._evict()
+        return level
+
+    def _evict(self):
+        """Advance past entries whose bytes have been overwritten"""
+        oldest_valid = self.written - self.capacity
+        while self._first < len(self._offsets) and self._offsets[self._first] < oldest_valid:
+            self._first += 1
+        for level, entries in self._by_level.items():
+            first = self._level_first[level]
+            while first < len(entries) and entries[first] < self._first:
+                first += 1
+            self._level_first[level] = first
+
+        # Compact occasionally so the index does not grow without bound
+        if self._first > 4096 and self._first * 2 > len(self._offsets):
+            shift = self._first
+            del self._offsets[:shift], self._lengths[:shift], self._times[:shift], self._levels[:shift]
+            for level, entries in self._by_level.items():
+                del entries[:self._level_first[level]]
+                self._by_level[level] = [entry - shift for entry in entries]
+                self._level_first[level] = 0
+            self._first = 0
+
+    def _read(self, entry):
+        """Decode the line stored for an index entry"""
+        pos = self._offsets[entry] % self.capacity
+        end = pos + self._lengths[entry]
+        if end <= self.capacity:
+            data = self.buffer[pos:end]
+        else:
+            data = self.buffer[pos:] + self.buffer[:end - self.capacity]
+        return data.decode('utf-8', 'replace')
+
+    def __len__(self):
+        return len(self._offsets) - self._first
+
+    def recent(self, count=50):
+        """Get the most recent lines"""
+        with self.lock:
+            start = max(self._first, len(self._offsets) - count)
+            return [self._read(entry) for entry in range(start, len(self._offsets))]
+
+    def since(self, timestamp):
+        """Get all lines captured at or after a time.time() timestamp"""
+        import bisect
+        with self.lock:
+            start = bisect.bisect_left(self._times, timestamp, self._first)
+            return [self._read(entry) for entry in range(start, len(self._offsets))]
+
+    def by_level(self, level, count=50):
+        """Get the most recent lines of a level ('info', 'warning' or 'error')"""
+        level_index = self.LEVELS.index(level)
+        with self.lock:
+            entries = self._by_level[level_index]
+            start = max(self._level_first[level_index], len(entries) - count)
+            return [self._read(entry) for entry in entries[start:]]
+
+    def errors(self, count=20):
+        """Get the most recent error lines"""
+        return self.by_level("error", count)
+
+    def grep(self, pattern, level=None, since=None, count=None):
+        """Search stored lines with a regular expression, newest last"""
+        import re
+        import bisect
+        regex = re.compile(pattern, re.IGNORECASE)
+        with self.lock:
+            if level is not None:
+                level_index = self.LEVELS.index(level)
+                entries = self._by_level[level_index][self._level_first[level_index]:]
+            else:
+                entries = range(self._first, len(self._offsets))
+            if since is not None:
+                start = bisect.bisect_left(self._times, since, self._first)
+                entries = [entry for entry in entries if entry >= start]
+            matches = [line for line in (self._read(entry) for entry in entries) if regex.search(line)]
+        return matches[-count:] if count else matches
+
+    def clear(self):
+        """Drop all stored lines"""
+        with self.lock:
+            self.written = 0
+            del self._offsets[:], self._lengths[:], self._times[:], self._levels[:]
+            self._first = 0
+            for level in self._by_level:
+                self._by_level[level] = []
+                self._level_first[level] = 0
+
+class EventLog:
+    """Structured controller and miner events as JSON lines, written in batches
+
+    emit() only appends to an in-memory batch, so the UI, the monitor and the
+    controller loop can all call it cheaply; a periodic task on the controller
+    loop writes the batch. Every line also gets a fixed-size record (time,
+    offset, length, type hash) in a sidecar .idx file, so queries binary-search
+    a time range and skip other event types without parsing JSON. Files
+    rotate to .1, .2, ... once they reach max_bytes.
+    """
+
+    RECORD_FORMAT = '<dQII'  # time, byte offset, line length, crc32 of the type
+    RECORD_SIZE = 24
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=3, flush_interval=1.0, batch_size=512):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.pending = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.controller_loop = None
+
+    def emit(self, event_type, **fields):
+        """Queue one event; written by the next flush"""
+        event = {'time': round(time.time(), 3), 'mono': round(time.monotonic(), 3), 'type': event_type}
+        event.update(fields)
+        with self.lock:
+            if len(self.pending) >= self.batch_size * 20:
+                self.dropped += 1  # Disk stalled for a long time; never grow without bound
+                return
+            self.pending.append(event)
+            flush_now = self.controller_loop is None and len(self.pending) >= self.batch_size
+        if flush_now:
+            self.flush()
+
+    def start(self, controller_loop):
+        """Flush periodically on the controller loop's executor"""
+        self.controller_loop = controller_loop
+        controller_loop.periodic("event-log", self.flush_interval, self.flush, control=True)
+
+    def close(self):
+        """Stop the periodic flush and write whatever is still queued"""
+        if self.controller_loop and self.controller_loop.running:
+            self.controller_loop.cancel("event-log")
+        self.controller_loop = None
+        self.flush()
+
+    def flush(self):
+        """Append the queued events and their index records"""
+        import struct
+        import zlib
+
+        with self.lock:
+            events, self.pending = self.pending, []
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            events.append({'time': round(time.time(), 3), 'mono': round(time.monotonic(), 3),
+                           'type': "events_dropped", 'count': dropped})
+        if not events:
+            return 0
+
+        with self.write_lock:
+            try:
+                offset = self.path.stat().st_size
+            except FileNotFoundError:
+                offset = 0
+            if offset >= self.max_bytes:
+                self._rotate()
+                offset = 0
+
+            data = bytearray()
+            index = bytearray()
+            for event in events:
+                line = json.dumps(event, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+                index += struct.pack(self.RECORD_FORMAT, event['time'], offset + len(data), len(line),
+                                     zlib.crc32(event['type'].encode('utf-8')))
+                data += line
+            try:
+                # Data first: an index that lags behind is fine, queries scan the unindexed tail
+                with open(self.path, 'ab') as f:
+                    f.write(data)
+                with open(self.index_path, 'ab') as f:
+                    f.write(index)
+            except OSError as e:
+                print(f"Error writing event log: {e}", file=sys.stderr)
+                return 0
+        return len(events)
+
+    def _rotate(self):
+        """Shift events.jsonl to .1, .1 to .2 and so on, dropping the oldest"""
+        for path in (self.path, self.index_path):
+            for n in range(self.backups, 0, -1):
+                source = path.with_name(f"{path.name}.{n - 1}") if n > 1 else path
+                target = path.with_name(f"{path.name}.{n}")
+                if source.exists():
+                    os.replace(source, target)
+            if self.backups == 0 and path.exists():
+                path.unlink()
+
+    def files(self):
+        """(data, index) file pairs, oldest first"""
+        pairs = [(self.path.with_name(f"{self.path.name}.{n}"), self.index_path.with_name(f"{self.index_path.name}.{n}"))
+                 for n in range(self.backups, 0, -1)]
+        pairs.append((self.path, self.index_path))
+        return [(data, index) for data, index in pairs if data.exists()]
+
+    def query(self, since=None, until=None, types=None, limit=None):
+        """Events between two Unix times, optionally of some types only, oldest first
+
+        With a limit, the newest `limit` matching events are returned: files
+        are read newest first and each index is walked backwards, so only
+        the returned lines are read.
+        """
+        import zlib
+
+        hashes = {zlib.crc32(event_type.encode('utf-8')) for event_type in types} if types else None
+        chunks = []
+        for data_path, index_path in reversed(self.files()):
+            remaining = limit - sum(len(chunk) for chunk in chunks) if limit else None
+            chunks.append(self._query_file(data_path, index_path, since, until, types, hashes, remaining))
+            if limit and sum(len(chunk) for chunk in chunks) >= limit:
+                break
+        return [event for chunk in reversed(chunks) for event in chunk]
+
+    def _query_file(self, data_path, index_path, since, until, types, hashes, limit):
+        """Matching events of one data file, oldest first; with a limit only the newest ones"""
+        import struct
+
+        try:
+            index = index_path.read_bytes()
+        except FileNotFoundError:
+            index = b""
+        try:
+            f = open(data_path, 'rb')
+        except FileNotFoundError:
+            return []  # Rotated away since files() listed it
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            count = len(index) // self.RECORD_SIZE
+            indexed_end = 0
+            while count:
+                _, offset, length, _ = struct.unpack_from(self.RECORD_FORMAT, index, (count - 1) * self.RECORD_SIZE)
+                if offset + length <= size:
+                    indexed_end = offset + length
+                    break
+                count -= 1  # Index written but the data never reached the disk
+
+            def first_after(bound, inclusive):
+                """Binary search for the first record at (or after) a time"""
+                low, high = 0, count
+                while low < high:
+                    mid = (low + high) // 2
+                    timestamp = struct.unpack_from('<d', index, mid * self.RECORD_SIZE)[0]
+                    if timestamp < bound or (not inclusive and timestamp == bound):
+                        low = mid + 1
+                    else:
+                        high = mid
+                return low
+
+            low = first_after(since, True) if since is not None else 0
+            high = first_after(until, False) if until is not None else count
+
+            def matches(event):
+                if since is not None and event.get('time', 0) < since:
+                    return False
+                if until is not None and event.get('time', 0) > until:
+                    return False
+                return not types or event.get('type') in types  # Also guards against crc32 collisions
+
+            # Lines written after the last index record (e.g. a crash between the two writes)
+            tail = []
+            f.seek(indexed_end)
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if matches(event):
+                    tail.append(event)
+            if limit:
+                tail = tail[-limit:]
+
+            def read(record):
+                _, offset, length, type_hash = record
+                if hashes is not None and type_hash not in hashes:
+                    return None
+                f.seek(offset)
+                try:
+                    event = json.loads(f.read(length))
+                except ValueError:
+                    return None
+                return event if matches(event) else None
+
+            if not limit:
+                records = memoryview(index)[low * self.RECORD_SIZE:high * self.RECORD_SIZE]
+                records = struct.iter_unpack(self.RECORD_FORMAT, records)
+                return [event for event in map(read, records) if event is not None] + tail
+
+            events = []
+            for n in range(high - 1, low - 1, -1):
+                if len(events) + len(tail) >= limit:
+                    break
+                event = read(struct.unpack_from(self.RECORD_FORMAT, index, n * self.RECORD_SIZE))
+                if event is not None:
+                    events.append(event)
+            return events[::-1] + tail
+
+class MetricHistory:
+    """Round-robin database of monitor metrics at several resolutions
+
+    Each archive keeps a fixed number of consolidated slots (360 ten-second
+    slots for the last hour, 288 five-minute slots for a day, 336 half-hour
+    slots for a week), so memory is constant and charting any window reads at
+    most one archive no matter how long sampling has run. Gauges are averaged
+    per slot; counters such as shares are summed and read back per hour.
+    Empty slots hold NaN.
+    """
+
+    ARCHIVES = {'1h': (10, 360), '24h': (300, 288), '7d': (1800, 336)}  # window -> (step seconds, slots)
+    SERIES = {'hashrate': "gauge", 'shares': "counter", 'cpu': "gauge", 'temperature': "gauge"}
+    VERSION = 1
+
+    def __init__(self, archives=None, series=None):
+        self.archives = dict(archives or self.ARCHIVES)
+        self.series = dict(series or self.SERIES)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all history"""
+        from array import array
+        nan = float('nan')
+        self.slots = {window: {name: array('d', [nan]) * rows for name in self.series}
+                      for window, (step, rows) in self.archives.items()}
+        self.buckets = {window: None for window in self.archives}  # Bucket number being filled
+        self.sums = {window: dict.fromkeys(self.series, 0.0) for window in self.archives}
+        self.counts = {window: dict.fromkeys(self.series, 0) for window in self.archives}
+
+    def _advance(self, window, bucket):
+        """Close the bucket being filled and blank the slots of any buckets skipped since"""
+        current = self.buckets[window]
+        if current == bucket:
+            return
+        self.buckets[window] = bucket
+        if current is None:
+            return
+        step, rows = self.archives[window]
+        slots, sums, counts = self.slots[window], self.sums[window], self.counts[window]
+        for name in self.series:
+            slot = slots[name]
+            if current < bucket:
+                value = float('nan')
+                if counts[name]:
+                    value = sums[name] if self.series[name] == "counter" else sums[name] / counts[name]
+                slot[current % rows] = value
+                for skipped in range(current + 1, min(bucket, current + rows + 1)):
+                    slot[skipped % rows] = float('nan')
+            sums[name] = 0.0
+            counts[name] = 0
+
+    def update(self, values, timestamp=None):
+        """Add one sample; values maps series names to numbers (None when unavailable)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            for window, (step, rows) in self.archives.items():
+                self._advance(window, int(timestamp // step))
+                sums, counts = self.sums[window], self.counts[window]
+                for name, value in values.items():
+                    if value is not None and name in sums:
+                        sums[name] += value
+                        counts[name] += 1
+
+    def values(self, name, window, width=None, now=None):
+        """Slot values for a window, oldest first, ending with the slot being filled
+
+        Counters come back as a rate per hour. With a width, consecutive slots
+        are averaged down to at most that many points, so the work depends on
+        the archive size, never on how many samples were taken.
+        """
+        step, rows = self.archives[window]
+        now = time.time() if now is None else now
+        with self.lock:
+            self._advance(window, int(now // step))
+            bucket = self.buckets[window]
+            slot = self.slots[window][name]
+            count = self.counts[window][name]
+            partial = float('nan')
+            if count:
+                partial = self.sums[window][name]
+                if self.series[name] != "counter":
+                    partial /= count
+            start = (bucket + 1) % rows
+            # The newest `rows - 1` closed slots, then the open one
+            points = list(slot[start:]) + list(slot[:start])
+            points[-1] = partial
+        if self.series[name] == "counter":
+            scale = 3600 / step
+            points = [point * scale for point in points]
+            if count:
+                # Scale the open slot by the time it has been open, not a whole step
+                points[-1] = partial * 3600 / max(1.0, now - bucket * step)
+
+        if width and width < len(points):
+            grouped = []
+            for i in range(width):
+                group = [point for point in points[i * len(points) // width:(i + 1) * len(points) // width]
+                         if point == point]
+                grouped.append(sum(group) / len(group) if group else float('nan'))
+            points = grouped
+        return points
+
+    def has_data(self, name, window):
+        """Whether any slot of a window holds a value"""
+        with self.lock:
+            return self.counts[window][name] > 0 or any(value == value for value in self.slots[window][name])
+
+    def save(self, path):
+        """Write the archives to disk atomically"""
+        with self.lock:
+            data = {
+                'version': self.VERSION,
+                'archives': {
+                    window: {
+                        'step': step,
+                        'rows': rows,
+                        'bucket': self.buckets[window],
+                        'sums': self.sums[window],
+                        'counts': self.counts[window],
+                        'series': {name: [None if value != value else value for value in slot]
+                                   for name, slot in self.slots[window].items()}
+                    }
+                    for window, (step, rows) in self.archives.items()
+                }
+            }
+        temp_path = Path(path).with_name(Path(path).name + ".tmp")
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, path)
+            return True
+        except OSError as e:
+            print(f"Error saving history: {e}", file=sys.stderr)
+            return False
+
+    def load(self, path):
+        """Restore archives saved by save(); archives whose layout changed are skipped"""
+        from array import array
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != self.VERSION:
+            return False
+        with self.lock:
+            for window, saved in (data.get('archives') or {}).items():
+                if self.archives.get(window) != (saved.get('step'), saved.get('rows')):
+                    continue
+                rows = saved['rows']
+                for name in self.series:
+                    values = (saved.get('series') or {}).get(name)
+                    if isinstance(values, list) and len(values) == rows:
+                        self.slots[window][name] = array('d', [float('nan') if value is None else value
+                                                               for value in values])
+                    self.sums[window][name] = (saved.get('sums') or {}).get(name, 0.0)
+                    self.counts[window][name] = (saved.get('counts') or {}).get(name, 0)
+                self.buckets[window] = saved.get('bucket')
+        return True
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+def sparkline(values):
+    """One-line chart; gaps (NaN) are blank"""
+    valid = [value for value in values if value == value]
+    if not valid:
+        return " " * len(values)
+    low, high = min(valid), max(valid)
+    span = (high - low) or 1.0
+    top = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[round((value - low) / span * top)] if value == value else " " for value in values)
+
+# Braille dot bits by [row][column] within one 2x4 character cell
+BRAILLE_DOTS = ((0x01, 0x08), (0x02, 0x10), (0x04, 0x20), (0x40, 0x80))
+
+def braille_chart(values, height=4, low=None, high=None):
+    """Line chart drawn with braille dots, two values per character; returns the rows top first"""
+    valid = [value for value in values if value == value]
+    width = (len(values) + 1) // 2
+    if not valid:
+        return [" " * width for _ in range(height)]
+    low = min(valid) if low is None else low
+    high = max(valid) if high is None else high
+    span = (high - low) or 1.0
+    dot_rows = height * 4
+    cells = [[0] * width for _ in range(height)]
+    previous = None
+    for x, value in enumerate(values):
+        if value != value:
+            previous = None
+            continue
+        y = dot_rows - 1 - round((min(max(value, low), high) - low) / span * (dot_rows - 1))
+        # Join to the previous point with a vertical run so the line stays continuous
+        top, bottom = (y, y) if previous is None else (min(y, previous), max(y, previous))
+        for dot_y in range(top, bottom + 1):
+            cells[dot_y // 4][x // 2] |= BRAILLE_DOTS[dot_y % 4][x % 2]
+        previous = y
+    return ["".join(chr(0x2800 + cell) if cell else " " for cell in row) for row in cells]
+
+RATE_SUFFIXES = {'k': 1e3, 'm': 1e6, 'g': 1e9}
+
+def cpu_time_totals():
+    """(busy, total) CPU seconds summed over all CPUs, counted the way psutil.cpu_percent counts them
+
+    Callers keep their own previous totals and divide the deltas. psutil's
+    interval-less cpu_percent keeps one baseline per calling thread, so on a
+    shared executor it measures whatever interval has passed since any job
+    last ran on that worker.
+    """
+    import psutil
+    times = psutil.cpu_times()
+    # Linux already counts guest time in user time
+    total = sum(times) - getattr(times, 'guest', 0.0) - getattr(times, 'guest_nice', 0.0)
+    idle = times.idle + getattr(times, 'iowait', 0.0)
+    return total - idle, total
+
 class MiningMonitor:
     """Handles XMRig process monitoring and statistics parsing"""
 
+    SHARE_PATTERN = re.compile(r'(accepted|rejected)\s*\((\d+)/(\d+)\)(?:\s+diff\s+(\d+))?')
+
     def __init__(self, xmrig_process=None):
         self.xmrig_process = xmrig_process
         self.start_time = time.time()
         self.stats = {
             'hashrate': 0.0,
+            'hashrate_windows': [None, None, None],  # XMRig's 10s/60s/15m averages
             'peak_hashrate': 0.0,
             'shares': {'accepted': 0, 'rejected': 0},
             'uptime': 0,
@@ -293,22 +2128,96 @@ class MiningMonitor:
         }
         self.monitoring = False
         self.monitor_thread = None
-
-    def start_monitoring(self, xmrig_process):
+        self.controller_loop = None
+        self.system_sample = None
+        self.lines_processed = 0
+        self.log_buffer = LogRingBuffer()
+        self.sensors = HardwareSensors()
+        self.last_power = None
+        self.topology = CPUTopology()
+        self.thread_hashrates = {}  # XMRig thread index -> (cpu or None, H/s)
+        self.thread_hashrates_at = None
+        self.share_times = collections.deque(maxlen=256)  # (time, difficulty) per accepted share
+        self.events = None  # EventLog for miner events, set by the controller
+        self.stopping = False  # Set while the controller stops XMRig, so its exit is expected
+        self.history = MetricHistory()
+        self.history_path = None
+        self._history_shares = 0
+        self._cpu_totals = None  # cpu_time_totals() at the previous system sample
+
+    def start_monitoring(self, xmrig_process, controller_loop=None):
         """Start monitoring XMRig process"""
         self.xmrig_process = xmrig_process
         self.monitoring = True
         self.start_time = time.time()
-        self.monitor_thread = threading.Thread(target=self._monitor_output)
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
+        self.lines_processed = 0
+        self.log_buffer.clear()
+        self.thread_hashrates = {}
+        self.thread_hashrates_at = None
+        self.share_times.clear()
+        self.stopping = False
+        self.controller_loop = controller_loop
+        if controller_loop and controller_loop.running and sys.platform != "win32":
+            # Non-blocking pipe reads on the shared event loop
+            self.monitor_thread = None
+            controller_loop.spawn("monitor", self._monitor_output_async())
+        else:
+            self.monitor_thread = threading.Thread(target=self._monitor_output)
+            self.monitor_thread.daemon = True
+            self.monitor_thread.start()
 
     def stop_monitoring(self):
         """Stop monitoring"""
         self.monitoring = False
+        if self.controller_loop and self.monitor_thread is None:
+            self.controller_loop.cancel("monitor")
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=2)
 
+    def wait_finished(self, timeout=None):
+        """Wait until all of XMRig's output has been consumed"""
+        if self.monitor_thread:
+            self.monitor_thread.join(timeout)
+            return not self.monitor_thread.is_alive()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.controller_loop and self.controller_loop.is_active("monitor"):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    async def _monitor_output_async(self):
+        """Read XMRig stdout on the event loop without blocking a thread"""
+        import asyncio
+
+        if not self.xmrig_process:
+            return
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=1024 * 1024)
+        transport = None
+        try:
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), self.xmrig_process.stdout)
+            while self.monitoring:
+                line = await reader.readline()
+                if not line:
+                    # EOF: XMRig exited and its output is drained; give the exit code a moment to arrive
+                    for _ in range(20):
+                        if self.xmrig_process.poll() is not None:
+                            break
+                        await asyncio.sleep(0.05)
+                    self._report_exit()
+                    break
+                self._handle_line(line.decode('utf-8', 'replace'))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Record the error but don't crash (or print over the TUI)
+            self._report_error(e)
+        finally:
+            if transport:
+                transport.close()
+
     def _monitor_output(self):
         """Monitor XMRig stdout for statistics"""
         if not self.xmrig_process:
@@ -327,7 +2236,7 @@ class MiningMonitor:
                         if ready:
                             line = self.xmrig_process.stdout.readline()
                             if line:
-                                self._parse_xmrig_line(line.strip())
+                                self._handle_line(line)
                     except (OSError, ValueError):
                         # Handle case where fileno is not available or select fails
                         time.sleep(0.1)
@@ -337,78 +2246,196 @@ class MiningMonitor:
                     try:
                         line = self.xmrig_process.stdout.readline()
                         if line:
-                            self._parse_xmrig_line(line.strip())
+                            self._handle_line(line)
                         else:
                             time.sleep(0.1)
                     except:
                         time.sleep(0.1)
 
+            # XMRig exited: drain whatever it wrote before exiting (e.g. crash messages)
+            if self.monitoring:
+                for line in self.xmrig_process.stdout:
+                    self._handle_line(line)
+                self._report_exit()
+
         except Exception as e:
-            # Log the error but don't crash
-            print(f"Monitoring error: {e}")
-            pass
+            # Record the error but don't crash (or print over the TUI)
+            self._report_error(e)
+
+    def _report_exit(self):
+        """Record XMRig exiting on its own; stops requested by the controller are logged there"""
+        if self.events and not self.stopping:
+            self.events.emit("miner_exit", exit_code=self.xmrig_process.poll())
+
+    def _report_error(self, error):
+        """Keep a monitoring failure in the log buffer and the event log"""
+        self.log_buffer.append(f"Monitoring error: {error}")
+        if self.events:
+            self.events.emit("monitor_error", error=str(error))
+
+    def _handle_line(self, line):
+        """Capture a raw output line and update statistics from it"""
+        line = line.strip()
+        self.lines_processed += 1
+        level = self.log_buffer.append(line)
+        self._parse_xmrig_line(line)
+        if self.events:
+            if level == 2:
+                self.events.emit("miner_error", line=line)
+            elif 'use pool' in line:
+                self.events.emit("pool_connected", line=line)
 
     def _parse_xmrig_line(self, line):
         """Parse XMRig output line for statistics"""
+        # Rows of the per-thread report printed by XMRig's 'h' command
+        if '|' in line:
+            self._parse_thread_row(line)
+            return
+
         line = line.lower()
 
-        # Parse hashrate (various formats)
-        if any(keyword in line for keyword in ['speed', 'h/s', 'hashrate']):
+        # Parse hashrate: "speed 10s/60s/15m 2445.2 n/a n/a H/s max 2625.0 H/s" (every format has the unit)
+        if 'h/s' in line:
             try:
-                # Look for patterns like "speed 2.5s/60s/15m H/s max"
-                if 'h/s' in line:
-                    parts = line.split()
-                    for i, part in enumerate(parts):
-                        if 'h/s' in part:
-                            # Get the value before h/s
-                            rate_part = parts[i-1] if i > 0 else ""
-                            if rate_part:
-                                # Handle K, M, G suffixes
-                                multiplier = 1
-                                if rate_part.endswith('k'):
-                                    multiplier = 1000
-                                    rate_part = rate_part[:-1]
-                                elif rate_part.endswith('m'):
-                                    multiplier = 1000000
-                                    rate_part = rate_part[:-1]
-                                elif rate_part.endswith('g'):
-                                    multiplier = 1000000000
-                                    rate_part = rate_part[:-1]
-
-                                try:
-                                    new_hashrate = float(rate_part) * multiplier
-                                    self.stats['hashrate'] = new_hashrate
-                                    # Track peak hashrate
-                                    if new_hashrate > self.stats['peak_hashrate']:
-                                        self.stats['peak_hashrate'] = new_hashrate
-                                except ValueError:
-                                    pass
-                            break
+                parts = line.split()
+                for i, part in enumerate(parts):
+                    if 'h/s' in part:
+                        # Windows before the unit; the shortest one with a value is the current rate,
+                        # the longer ones stay in hashrate_windows for steady-state consumers
+                        if i >= 4 and parts[i - 4].count('/') == 2:
+                            windows = [self._parse_rate(rate_part) for rate_part in parts[i - 3:i]]
+                            self.stats['hashrate_windows'] = windows
+                        else:
+                            windows = [self._parse_rate(parts[i - 1])] if i > 0 else []
+                        rates = [rate for rate in windows if rate is not None]
+                        if rates:
+                            new_hashrate = rates[0]
+                            self.stats['hashrate'] = new_hashrate
+                            # Track peak hashrate
+                            if new_hashrate > self.stats['peak_hashrate']:
+                                self.stats['peak_hashrate'] = new_hashrate
+                        break
             except:
                 pass
 
-        # Parse accepted shares
-        if 'accepted' in line and ('share' in line or 'shares' in line):
+        # Parse share results: "accepted (123/0) diff 120000 (45 ms)", "rejected (123/1) diff ..."
+        if 'accepted (' in line or 'rejected (' in line:
             try:
-                # Look for patterns like "accepted (123/0) diff"
-                import re
-                match = re.search(r'accepted\s*\((\d+)/(\d+)\)', line)
+                match = self.SHARE_PATTERN.search(line)
                 if match:
-                    accepted = int(match.group(1))
-                    rejected = int(match.group(2))
-                    self.stats['shares']['accepted'] = accepted
-                    self.stats['shares']['rejected'] = rejected
+                    self.stats['shares']['accepted'] = int(match.group(2))
+                    self.stats['shares']['rejected'] = int(match.group(3))
+                    if match.group(1) == 'accepted':
+                        difficulty = int(match.group(4)) if match.group(4) else None
+                        self.share_times.append((time.time(), difficulty))
             except:
                 pass
 
-    def get_system_stats(self):
-        """Get current system statistics"""
-        return {
-            'cpu_usage': psutil.cpu_percent(interval=0.1),
+    @staticmethod
+    def _parse_rate(rate_part):
+        """Parse a hashrate token such as "2.5k" or "n/a" into H/s"""
+        try:
+            return float(rate_part)
+        except ValueError:
+            pass
+        # Handle K, M, G suffixes
+        multiplier = RATE_SUFFIXES.get(rate_part[-1:])
+        if multiplier is None:
+            return None
+        try:
+            return float(rate_part[:-1]) * multiplier
+        except ValueError:
+            return None
+
+    def _parse_thread_row(self, line):
+        """Parse one "| CPU # | AFFINITY | 10s H/s | 60s H/s | 15m H/s |" row"""
+        cells = [cell.strip() for cell in line.split('|')[1:-1]]
+        if len(cells) < 4 or not cells[0].isdigit():
+            return  # Header or the "- | - |" total row
+        try:
+            affinity = int(cells[1])
+        except ValueError:
+            return
+        for cell in cells[2:5]:
+            try:
+                hashrate = float(cell)
+            except ValueError:
+                continue  # "n/a" until the window has filled
+            self.thread_hashrates[int(cells[0])] = (affinity if affinity >= 0 else None, hashrate)
+            self.thread_hashrates_at = time.time()
+            return
+
+    def update_thread_hashrates(self, threads):
+        """Replace per-thread hashrates with (cpu or None, H/s) pairs, e.g. from the API"""
+        self.thread_hashrates = dict(enumerate(threads))
+        self.thread_hashrates_at = time.time()
+
+    def get_core_efficiency(self, max_age=60.0, tolerance=0.15):
+        """Map recent per-thread hashrates onto the CPU topology, or None if there are none"""
+        if not self.thread_hashrates or time.time() - self.thread_hashrates_at > max_age:
+            return None
+        return self.topology.core_efficiency(list(self.thread_hashrates.values()), tolerance)
+
+    def sample_system(self, cpu_interval=None):
+        """Take a fresh system sample (CPU usage since the previous sample when interval is None)"""
+        import psutil
+        power = self.sensors.read_power()
+        if power is not None:
+            self.last_power = power
+        if cpu_interval:
+            cpu_usage = psutil.cpu_percent(interval=cpu_interval)
+        else:
+            previous, self._cpu_totals = self._cpu_totals, cpu_time_totals()
+            busy, total = self._cpu_totals
+            cpu_usage = 0.0
+            if previous and total > previous[1]:
+                cpu_usage = min(100.0, max(0.0, (busy - previous[0]) / (total - previous[1]) * 100))
+        self.system_sample = {
+            'cpu_usage': cpu_usage,
             'memory': psutil.virtual_memory().percent,
             'cpu_cores': psutil.cpu_count(logical=True),
-            'uptime': time.time() - self.start_time
+            'temperature': self.sensors.read_temperature(),
+            'power': self.last_power,
+            'cpu_freq': self.sensors.read_frequency()
         }
+        return self.system_sample
+
+    def start_sampling(self, controller_loop, interval=1.0, history_path=None, save_interval=300.0):
+        """Keep a system sample fresh in the background so stats never block, recording history"""
+        self.controller_loop = controller_loop
+        self.sample_system()  # Set the CPU time baseline
+        controller_loop.periodic("system-sampler", interval, self._sample_and_record, control=True)
+        if history_path:
+            self.history_path = history_path
+            self.history.load(history_path)
+            controller_loop.periodic("history-save", save_interval, self.save_history, delay=save_interval)
+
+    def _sample_and_record(self):
+        """Take a system sample and add it, with the mining stats, to the history"""
+        sample = self.sample_system()
+        running = self.is_xmrig_running()
+        accepted = self.stats['shares']['accepted']
+        # XMRig's share count starts over with each process
+        new_shares = accepted - self._history_shares if accepted >= self._history_shares else accepted
+        self._history_shares = accepted
+        self.history.update({
+            'hashrate': self.stats['hashrate'] if running else None,
+            'shares': new_shares if running else None,
+            'cpu': sample['cpu_usage'],
+            'temperature': sample['temperature']
+        })
+
+    def save_history(self):
+        """Write the history to disk, if sampling was started with a history file"""
+        if self.history_path:
+            self.history.save(self.history_path)
+
+    def get_system_stats(self):
+        """Get current system statistics"""
+        sample = self.system_sample
+        if sample is None or not (self.controller_loop and self.controller_loop.is_active("system-sampler")):
+            sample = self.sample_system(cpu_interval=0.1)
+        return dict(sample, uptime=time.time() - self.start_time)
 
     def is_xmrig_running(self):
         """Check if XMRig process is still running"""
@@ -425,8 +2452,13 @@ class MiningMonitor:
         total_shares = self.stats['shares']['accepted'] + self.stats['shares']['rejected']
         acceptance_rate = (self.stats['shares']['accepted'] / total_shares * 100) if total_shares > 0 else 0
 
+        # Hashes per joule, only meaningful while hashing with a power reading
+        power = system_stats['power']
+        hashes_per_joule = self.stats['hashrate'] / power if power and self.stats['hashrate'] > 0 else None
+
         return {
             'hashrate': self.stats['hashrate'],
+            'hashrate_windows': list(self.stats['hashrate_windows']),
             'peak_hashrate': self.stats['peak_hashrate'],
             'accepted_shares': self.stats['shares']['accepted'],
             'rejected_shares': self.stats['shares']['rejected'],
@@ -435,6 +2467,10 @@ class MiningMonitor:
             'memory_usage': system_stats['memory'],
             'uptime': uptime_str,
             'cpu_cores': system_stats['cpu_cores'],
+            'temperature': system_stats['temperature'],
+            'power': power,
+            'cpu_freq': system_stats['cpu_freq'],
+            'hashes_per_joule': hashes_per_joule,
             'status': 'Running' if self.is_xmrig_running() else 'Stopped'
         }
 
@@ -450,13 +2486,73 @@ class MiningMonitor:
         else:
             return f"{seconds}s"
 
+class XMRigAPI:
+    """Minimal client for the XMRig HTTP API"""
+
+    def __init__(self, host="127.0.0.1", port=44444, access_token=None, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.access_token = access_token
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a client from the 'http' section of an XMRig config"""
+        http = (config or {}).get('http') or {}
+        if not http.get('enabled'):
+            return None
+        host = http.get('host') or "127.0.0.1"
+        if host in ("0.0.0.0", "::"):
+            host = "127.0.0.1"
+        return cls(host, http.get('port', 44444), http.get('access-token'))
+
+    def _request(self, path, payload=None):
+        """Send a request to the API and return the decoded JSON response"""
+        import urllib.request
+        url = f"http://{self.host}:{self.port}{path}"
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(url, data=data)
+        request.add_header("Content-Type", "application/json")
+        if self.access_token:
+            request.add_header("Authorization", f"Bearer {self.access_token}")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = response.read().decode()
+        return json.loads(body) if body else {}
+
+    def summary(self):
+        """Get the miner summary (hashrate, results, connection)"""
+        return self._request("/2/summary")
+
+    def backends(self):
+        """Get per-backend details, including per-thread hashrates"""
+        return self._request("/2/backends")
+
+    def json_rpc(self, method, params=None):
+        """Invoke a JSON-RPC method such as 'pause' or 'resume'"""
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method}
+        if params is not None:
+            payload['params'] = params
+        return self._request("/json_rpc", payload)
+
+    def pause(self):
+        """Pause hashing without tearing down the RandomX dataset"""
+        return self.json_rpc("pause")
+
+    def resume(self):
+        """Resume hashing after a pause"""
+        return self.json_rpc("resume")
+
 class XMRigController:
     """Main controller for XMRig process management"""
 
+    THREAD_HASHRATE_INTERVAL = 10.0
+    # XMRig console hotkeys, read from its stdin
+    HOTKEYS = {'hashrate': 'h', 'pause': 'p', 'resume': 'r', 'results': 's', 'connection': 'c'}
+
     def __init__(self, xmrig_path=None, config_path=None):
         script_dir = get_script_dir()
         if xmrig_path is None:
-            xmrig_path = script_dir / "xmrig"
+            xmrig_path = get_xmrig_path()
         elif not Path(xmrig_path).is_absolute():
             xmrig_path = script_dir / xmrig_path
         self.xmrig_path = str(xmrig_path)
@@ -467,7 +2563,17 @@ class XMRigController:
             config_path = script_dir / config_path
         self.config_path = str(config_path)
         self.xmrig_process = None
+        self.events = EventLog(script_dir / "events.jsonl")
         self.monitor = MiningMonitor()
+        self.monitor.events = self.events
+        self.paused = False
+        self.pause_holds = set()  # Owners ("user", "load", "schedule") currently holding XMRig paused
+        self.cpu_controller = None
+        self.controller_loop = None
+        self.standby = None  # WarmStandby, when enabled
+        self.memory_planner = None  # MemoryPlanner, checks the RandomX footprint before each start
+        self.run_config_path = None  # Config the running XMRig watches, if a cutover moved it off config_path
+        self._stdin_lock = threading.Lock()
 
     def load_config(self):
         """Load XMRig configuration"""
@@ -483,126 +2589,2181 @@ class XMRigController:
 
     def save_config(self, config):
         """Save XMRig configuration"""
+        try:
+            with open(self.config_path, 'r') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+        problem = self._check_wallets(config, previous)
+        if problem:
+            print(f"Error saving config: {problem}")
+            self.events.emit("config_error", error=problem)
+            return False
         try:
             with open(self.config_path, 'w') as f:
                 json.dump(config, f, indent=4)
+        except Exception as e:
+            print(f"Error saving config: {e}")
+            self.events.emit("config_error", error=str(e))
+            return False
+        changed = sorted(key for key in set(config) | set(previous) if config.get(key) != previous.get(key))
+        if changed:
+            self.events.emit("config_change", sections=changed)
+        if self.standby:
+            self.standby.sync(config)
+        return True
+
+    @staticmethod
+    def _check_wallets(config, previous):
+        """Verify the address of every Monero pool login that changed; returns a problem or None"""
+        previous_users = [pool.get('user') for pool in previous.get('pools') or []]
+        for i, pool in enumerate(config.get('pools') or []):
+            user = pool.get('user')
+            if str(pool.get('coin') or "monero").lower() not in ("monero", "xmr"):
+                continue
+            if i < len(previous_users) and user == previous_users[i]:
+                continue
+            ok, message = validate_wallet_address(user)
+            if not ok:
+                return f"pool #{i + 1} login: {message}"
+        return None
+
+    def ensure_api_config(self, port=44444):
+        """Enable the local XMRig HTTP API and config watching used for live control"""
+        import secrets
+        config = self.load_config()
+        if not config:
+            return False
+
+        http = config.setdefault('http', {})
+        changed = False
+        defaults = {
+            'enabled': True,
+            'host': "127.0.0.1",
+            'port': port,
+            'restricted': False
+        }
+        for key, value in defaults.items():
+            if key not in http or (key in ('enabled', 'restricted') and http[key] != value):
+                http[key] = value
+                changed = True
+        if not http.get('access-token'):
+            http['access-token'] = secrets.token_hex(16)
+            changed = True
+        if not config.get('watch'):
+            config['watch'] = True
+            changed = True
+
+        return self.save_config(config) if changed else True
+
+    def get_api(self):
+        """Get an API client for the running XMRig, if the API is enabled"""
+        if self.run_config_path:
+            try:
+                with open(self.run_config_path, 'r') as f:
+                    return XMRigAPI.from_config(json.load(f))
+            except (OSError, ValueError):
+                return None
+        return XMRigAPI.from_config(self.load_config())
+
+    def send_hotkey(self, command):
+        """Send one of XMRig's console hotkeys over its stdin"""
+        key = self.HOTKEYS.get(command)
+        if key is None:
+            return False, f"Unknown command: {command}"
+        if not self.monitor.is_xmrig_running():
+            return False, "XMRig is not running"
+        if self.xmrig_process.stdin is None:
+            return False, "XMRig stdin is not connected"
+        try:
+            with self._stdin_lock:
+                self.xmrig_process.stdin.write(key)
+                self.xmrig_process.stdin.flush()
+        except (OSError, ValueError) as e:
+            return False, f"Failed to send '{key}' to XMRig: {e}"
+        return True, f"Sent '{key}' to XMRig"
+
+    def request_report(self, command, timeout=2.0, settle=0.05):
+        """Ask XMRig for a report (hashrate, results, connection) and collect the lines it prints"""
+        started = time.time()
+        success, message = self.send_hotkey(command)
+        if not success:
+            return False, message, []
+
+        # XMRig prints the report in one burst; wait for the first line, then for output to settle
+        lines = []
+        deadline = time.monotonic() + timeout
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            current = self.monitor.log_buffer.since(started)
+            if len(current) != len(lines):
+                lines = current
+                quiet_since = time.monotonic()
+            elif lines and time.monotonic() - quiet_since >= settle:
+                break
+            time.sleep(0.02)
+        if not lines:
+            return False, f"No {command} report from XMRig within {timeout:.0f}s", []
+        return True, message, lines
+
+    def _set_paused(self, paused):
+        """Pause or resume through the API, falling back to the stdin hotkeys"""
+        command = "pause" if paused else "resume"
+        api = self.get_api()
+        api_error = None
+        if api:
+            try:
+                api.pause() if paused else api.resume()
+                self.paused = paused
+                self.events.emit(f"miner_{command}", via="api")
+                return True, f"XMRig {command}d"
+            except (OSError, ValueError) as e:
+                api_error = e
+        success, message = self.send_hotkey(command)
+        if not success:
+            self.events.emit("command_failed", command=command, error=str(api_error or message))
+            return False, f"Failed to {command} XMRig: {api_error or message}"
+        self.paused = paused
+        self.events.emit(f"miner_{command}", via="console")
+        return True, f"XMRig {command}d (console)"
+
+    def hold_pause(self, owner):
+        """Pause hashing on behalf of an owner, without tearing down the RandomX dataset
+
+        XMRig stays paused until every owner holding it has released it, so
+        a governor letting go cannot undo a pause from the menu or the
+        tariff schedule. Holds outlive a restart; owners re-pause a miner
+        that came back up unpaused.
+        """
+        if not self.monitor.is_xmrig_running():
+            return False, "XMRig is not running"
+        if self.paused:
+            self.pause_holds.add(owner)
+            return True, "XMRig already paused"
+        success, message = self._set_paused(True)
+        if success:
+            self.pause_holds.add(owner)
+        return success, message
+
+    def release_pause(self, owner):
+        """Drop an owner's pause; XMRig resumes once no owner holds it"""
+        self.pause_holds.discard(owner)
+        if not self.paused:
+            return True, "XMRig is not paused"
+        if self.pause_holds:
+            return True, f"XMRig stays paused ({', '.join(sorted(self.pause_holds))})"
+        if not self.monitor.is_xmrig_running():
+            return False, "XMRig is not running"
+        return self._set_paused(False)
+
+    def pause_mining(self):
+        """Pause hashing at the user's request (menu, hotkey or --command)"""
+        return self.hold_pause("user")
+
+    def resume_mining(self):
+        """Release the user's pause; XMRig resumes unless a governor or the schedule still holds it"""
+        return self.release_pause("user")
+
+    def run_command(self, command):
+        """Run a miner command: pause, resume or a hashrate/results/connection report"""
+        if command == "pause":
+            return self.pause_mining()
+        if command == "resume":
+            return self.resume_mining()
+        if command not in self.HOTKEYS:
+            return False, f"Unknown command: {command} (use {', '.join(self.HOTKEYS)})"
+        success, message, lines = self.request_report(command)
+        self.events.emit("miner_report", command=command, ok=success)
+        return success, "\n".join(lines) if success else message
+
+    def refresh_thread_hashrates(self):
+        """Fetch per-thread hashrates from the API, or ask XMRig to print them"""
+        if not self.monitor.is_xmrig_running():
+            return False
+        api = self.get_api()
+        try:
+            backends = api.backends() if api else None
+        except (OSError, ValueError):
+            backends = None  # API not up yet, or an older XMRig without /2/backends
+        if backends is None:
+            # The monitor parses the per-thread table XMRig prints for 'h'
+            return self.send_hotkey("hashrate")[0]
+
+        threads = []
+        for backend in backends if isinstance(backends, list) else []:
+            if backend.get('type') != 'cpu':
+                continue
+            for thread in backend.get('threads') or []:
+                rates = [rate for rate in thread.get('hashrate') or [] if rate]
+                affinity = thread.get('affinity', -1)
+                threads.append((affinity if affinity >= 0 else None, rates[0] if rates else 0.0))
+        if not threads:
+            return False
+        self.monitor.update_thread_hashrates(threads)
+        return True
+
+    def update_pool_config(self, pool_info, wallet_address, tls_enabled=False, tls_endpoint=None,
+                           tls_fingerprint=None):
+        """Update pool configuration in XMRig config; tls_endpoint ("host:port") replaces the pool's plain port"""
+        config = self.load_config()
+        if not config:
+            return False
+
+        if 'pools' not in config or not config['pools']:
+            config['pools'] = [{}]
+
+        pool_config = config['pools'][0]
+        pool_config.update({
+            'coin': 'monero',
+            'url': tls_endpoint if tls_enabled and tls_endpoint else f"{pool_info['url']}:{pool_info['port']}",
+            'user': wallet_address,
+            'pass': 'x',
+            'tls': tls_enabled,
+            'tls-fingerprint': tls_fingerprint if tls_enabled else None,
+            'keepalive': True,
+            'nicehash': False
+        })
+
+        if not self.save_config(config):
+            return False
+        self.events.emit("pool_switch", pool=pool_info.get('name'), url=pool_config['url'], tls=tls_enabled)
+        return True
+
+    def use_xmrig_version(self, version):
+        """Switch to another installed XMRig version, restarting the miner if it is running"""
+        path = get_xmrig_path(version)
+        if not path.exists():
+            installed = ", ".join(list_xmrig_versions()) or "none"
+            return False, f"XMRig {version} is not installed (installed: {installed}; see setup.py --xmrig-version)"
+        running = self.monitor.is_xmrig_running()
+        if running:
+            self.stop_mining()  # Also drops a warm standby built from the old binary
+        self.xmrig_path = str(path)
+        self.events.emit("xmrig_version", version=version, path=self.xmrig_path)
+        if not running:
+            return True, f"Using XMRig {version}"
+        success, message = self.start_mining()
+        return success, f"Switched to XMRig {version}: {message}"
+
+    def start_mining(self):
+        """Start XMRig mining process"""
+        note = self.memory_planner.prepare() if self.memory_planner else None
+        success, message = self._launch()
+        if note:
+            message = f"{message} ({note})"
+        if success:
+            self.events.emit("miner_start", pid=self.xmrig_process.pid, message=message)
+            if self.standby:
+                self.standby.start()
+        else:
+            self.events.emit("miner_start_failed", error=message)
+        return success, message
+
+    def _launch(self):
+        """Spawn XMRig and wait for it to come up"""
+        if self.monitor.is_xmrig_running():
+            return False, "XMRig is already running"
+
+        try:
+            # Check if XMRig executable exists and is executable
+            if not os.path.exists(self.xmrig_path):
+                return False, f"XMRig executable not found: {self.xmrig_path}"
+
+            if not os.access(self.xmrig_path, os.X_OK):
+                return False, f"XMRig executable not executable: {self.xmrig_path}"
+
+            # Live control (pause/resume, thread changes) needs the local API
+            self.ensure_api_config()
+            # A new XMRig starts hashing: the user's pause ends, governors and the schedule re-pause it
+            self.paused = False
+            self.pause_holds.discard("user")
+            self.run_config_path = None
+
+            # Optionally place XMRig in its own cgroup before it execs
+            preexec_fn = None
+            cgroup = self.cpu_controller.cgroup if self.cpu_controller else None
+            if cgroup:
+                if not cgroup.create():
+                    return False, f"Could not create cgroup: {cgroup.path}"
+                cgroup.apply(self.cpu_controller.get_cgroup_limits())
+                preexec_fn = cgroup.attach
+
+            # Start XMRig process with proper pipe handling
+            self.xmrig_process = subprocess.Popen(
+                [self.xmrig_path, "-c", self.config_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                universal_newlines=True,
+                # Command channel for XMRig's console hotkeys (h, p, r, s, c)
+                stdin=subprocess.PIPE,
+                # Add environment and working directory
+                cwd=os.path.dirname(self.xmrig_path) if os.path.dirname(self.xmrig_path) else None,
+                preexec_fn=preexec_fn
+            )
+
+            # Wait up to 3 seconds for process to start properly
+            start_time = time.time()
+            while time.time() - start_time < 3.0:
+                if self.xmrig_process.poll() is None:
+                    # Process is running, start monitoring
+                    self._start_monitoring()
+                    return True, "XMRig started successfully"
+                time.sleep(0.1)
+
+            # Process didn't start within timeout
+            if self.xmrig_process.poll() is not None:
+                return_code = self.xmrig_process.returncode
+                return False, f"XMRig failed to start (exit code: {return_code})"
+            else:
+                # Process started but took too long to respond
+                self._start_monitoring()
+                return True, "XMRig started (initializing...)"
+
+        except Exception as e:
+            return False, f"Failed to start XMRig: {e}"
+
+    def _start_monitoring(self):
+        """Follow XMRig's output and, where the API is available, its per-thread hashrates"""
+        self.monitor.start_monitoring(self.xmrig_process, self.controller_loop)
+        if self.controller_loop and self.controller_loop.running:
+            self.controller_loop.periodic("thread-hashrates", self.THREAD_HASHRATE_INTERVAL,
+                                          self.refresh_thread_hashrates)
+
+    def _stop_monitoring(self):
+        """Stop following XMRig's output and API, and close its command channel"""
+        if self.controller_loop and self.controller_loop.running:
+            self.controller_loop.cancel("thread-hashrates")
+        self.monitor.stop_monitoring()
+        if self.xmrig_process and self.xmrig_process.stdin:
+            try:
+                self.xmrig_process.stdin.close()
+            except OSError:
+                pass
+
+    def stop_mining(self):
+        """Stop XMRig mining process"""
+        if not self.monitor.is_xmrig_running():
+            return False, "XMRig is not running"
+
+        self.monitor.stopping = True
+        if self.standby:
+            self.standby.stop()
+        try:
+            if self.xmrig_process:
+                self.xmrig_process.terminate()
+                self.xmrig_process.wait(timeout=5)
+            self._stop_monitoring()
+            self._remove_cgroup()
+            self.events.emit("miner_stop", exit_code=self.xmrig_process.returncode)
+            return True, "XMRig stopped"
+        except subprocess.TimeoutExpired:
+            self.xmrig_process.kill()
+            self.xmrig_process.wait()
+            self._stop_monitoring()
+            self._remove_cgroup()
+            self.events.emit("miner_stop", exit_code=self.xmrig_process.returncode, forced=True)
+            return True, "XMRig force killed"
+        except Exception as e:
+            self.events.emit("miner_stop_failed", error=str(e))
+            return False, f"Error stopping XMRig: {e}"
+
+    def _remove_cgroup(self):
+        """Remove XMRig's cgroup after the process has exited"""
+        if self.cpu_controller and self.cpu_controller.cgroup:
+            self.cpu_controller.cgroup.remove()
+
+    def restart_mining(self):
+        """Restart XMRig with new configuration"""
+        self.events.emit("miner_restart")
+        if self.standby and self.standby.ready:
+            success, message = self.standby.cutover()
+            if success:
+                return True, message
+            # The old process is gone by now if the standby failed to resume; start cleanly
+            if self.monitor.is_xmrig_running():
+                return False, message
+            return self.start_mining()
+        success, message = self.stop_mining()
+        if not success:
+            return False, message
+
+        time.sleep(1)  # Brief pause
+        return self.start_mining()
+
+    def find_processes(self):
+        """XMRig processes running from this controller's config, whoever started them"""
+        import psutil
+        config_path = os.path.realpath(self.config_path)
+        processes = []
+        for process in psutil.process_iter(['cmdline']):
+            cmdline = process.info['cmdline'] or []
+            # "-c FILE", "--config FILE" or "--config=FILE"
+            values = [value for flag, value in zip(cmdline, cmdline[1:]) if flag in ("-c", "--config")]
+            values += [arg[len("--config="):] for arg in cmdline if arg.startswith("--config=")]
+            for value in values:
+                if not os.path.isabs(value):
+                    try:
+                        value = os.path.join(process.cwd(), value)
+                    except (psutil.AccessDenied, psutil.NoSuchProcess):
+                        continue
+                if os.path.realpath(value) == config_path:
+                    processes.append(process)
+                    break
+        return processes
+
+    def start_detached(self, log_path):
+        """Start XMRig in its own session, logging to a file, so it outlives this process"""
+        if self.find_processes():
+            return False, "XMRig is already running"
+        if not os.access(self.xmrig_path, os.X_OK):
+            return False, f"XMRig executable not found: {self.xmrig_path}"
+        self.ensure_api_config()
+        note = self.memory_planner.prepare() if self.memory_planner else None
+        if sys.platform == "win32":
+            detach = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            detach = {'start_new_session': True}
+        try:
+            with open(log_path, 'a') as log:
+                process = subprocess.Popen([self.xmrig_path, "-c", self.config_path], stdout=log,
+                                           stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                           cwd=os.path.dirname(self.xmrig_path) or None, **detach)
+        except OSError as e:
+            self.events.emit("miner_start_failed", error=str(e))
+            return False, f"Failed to start XMRig: {e}"
+        # A bad config or missing library makes XMRig exit straight away
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline and process.poll() is None:
+            time.sleep(0.05)
+        if process.poll() is not None:
+            self.events.emit("miner_start_failed", error=f"exit code {process.returncode}")
+            return False, f"XMRig exited at once (exit code {process.returncode}); see {log_path}"
+        self.events.emit("miner_start", pid=process.pid, detached=True)
+        message = f"XMRig started (PID {process.pid}, log {log_path})"
+        return True, f"{message} ({note})" if note else message
+
+    def stop_detached(self, timeout=5.0):
+        """Stop every XMRig running from this controller's config"""
+        import psutil
+        processes = self.find_processes()
+        if not processes:
+            return False, "XMRig is not running"
+        for process in processes:
+            try:
+                process.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        _, alive = psutil.wait_procs(processes, timeout=timeout)
+        for process in alive:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        pids = [process.pid for process in processes]
+        self.events.emit("miner_stop", pids=pids, detached=True, forced=bool(alive))
+        return True, f"XMRig {'force killed' if alive else 'stopped'} (PID {', '.join(map(str, pids))})"
+
+class WarmStandby:
+    """A second XMRig, paused with its RandomX dataset built, for near-instant restarts
+
+    The standby starts from the same config (pools, wallet, CPU settings) at
+    low priority and is paused through its API as soon as it reports
+    "dataset ready". A restart then stops the active XMRig and resumes the
+    standby in its place, so the dataset build is skipped; a fresh standby is
+    started behind it.
+
+    Both processes need their own API port, so one of them runs from a mirror
+    of config.json (config-standby.json, API on api_port). config.json stays
+    the file the controller reads and writes; saves are copied to the mirror,
+    and XMRig's config watch applies them to whichever process uses it.
+    """
+
+    NICE = 10
+
+    def __init__(self, xmrig_controller, controller_loop, api_port=44445):
+        self.xmrig_controller = xmrig_controller
+        self.controller_loop = controller_loop
+        self.api_port = api_port
+        self.mirror_path = str(Path(xmrig_controller.config_path).with_name("config-standby.json"))
+        self.config_path = None
+        self.process = None
+        self.monitor = None
+        self.state = "off"
+        self.started_at = None
+        self.dataset_ms = None
+        self.last_gap = None
+        self.cutovers = 0
+
+    @property
+    def ready(self):
+        """Whether a paused standby with a built dataset is waiting"""
+        return self.state == "ready" and self.process is not None and self.process.poll() is None
+
+    def footprint(self):
+        """MemoryPlanner.footprint() of the standby, which runs the active miner's config"""
+        import psutil
+        controller = self.xmrig_controller
+        config = controller.load_config() or {}
+        huge_pages, one_gb_pages, numa = MemoryPlanner.page_settings(config)
+        threads = controller.cpu_controller.get_thread_count() if controller.cpu_controller else psutil.cpu_count()
+        nodes = controller.memory_planner._numa_nodes() if numa and controller.memory_planner else 1
+        return MemoryPlanner.footprint(MemoryPlanner._running_mode(config), threads, huge_pages, one_gb_pages, nodes)
+
+    def check_memory(self):
+        """Whether there is room for a second miner; returns (ok, reason)"""
+        import psutil
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        needed_mb = self.footprint()['total'] + MemoryPlanner.HEADROOM_MB
+        if available_mb < needed_mb:
+            return False, f"needs {needed_mb} MB free for a second miner, {available_mb:.0f} MB available"
+        return True, "ok"
+
+    def sync(self, config):
+        """Copy a saved config to the mirror, if a running process uses it"""
+        active = self.xmrig_controller.run_config_path
+        if self.mirror_path not in (self.config_path, active) or config is None:
+            return True
+        mirror = dict(config, http=dict(config.get('http') or {}, port=self.api_port))
+        try:
+            with open(self.mirror_path, 'w') as f:
+                json.dump(mirror, f, indent=4)
             return True
+        except OSError:
+            return False
+
+    def get_api(self):
+        """API client for the standby process"""
+        try:
+            with open(self.config_path, 'r') as f:
+                return XMRigAPI.from_config(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _command(self, command):
+        """Pause or resume the standby through its API, falling back to its stdin"""
+        api = self.get_api()
+        if api:
+            api.pause() if command == "pause" else api.resume()
+        else:
+            self.process.stdin.write(XMRigController.HOTKEYS[command])
+            self.process.stdin.flush()
+
+    def start(self, wait_for_dataset=True):
+        """Start a standby once the active miner has built its dataset; returns (success, message)"""
+        controller = self.xmrig_controller
+        if self.process is not None and self.process.poll() is None:
+            return True, "Warm standby already running"
+        if not controller.monitor.is_xmrig_running():
+            return False, "Warm standby needs a running miner"
+        if wait_for_dataset and not controller.monitor.log_buffer.grep(r"dataset ready", count=1):
+            # Two dataset builds at once would slow the active miner's start
+            self.state = "waiting"
+            self.controller_loop.periodic("warm-standby", 1.0, self._tick)
+            return True, "Warm standby starts once the miner's dataset is ready"
+        return self._spawn()
+
+    def _spawn(self):
+        """Launch the standby process"""
+        controller = self.xmrig_controller
+        ok, reason = self.check_memory()
+        if not ok:
+            self.state = "no memory"
+            return False, f"Warm standby unavailable: {reason}"
+
+        # Whichever file the active process is not watching
+        self.config_path = controller.config_path if controller.run_config_path else self.mirror_path
+        if not self.sync(controller.load_config()):
+            self.state = "failed"
+            return False, f"Warm standby unavailable: could not write {self.mirror_path}"
+
+        cgroup = controller.cpu_controller.cgroup if controller.cpu_controller else None
+
+        def preexec():
+            os.nice(self.NICE)  # Building the dataset must not starve the active miner
+            if cgroup:
+                cgroup.attach()
+
+        try:
+            self.process = subprocess.Popen(
+                [controller.xmrig_path, "-c", self.config_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                stdin=subprocess.PIPE,
+                cwd=os.path.dirname(controller.xmrig_path) or None,
+                preexec_fn=preexec if sys.platform != "win32" else None
+            )
+        except OSError as e:
+            self.state = "failed"
+            return False, f"Failed to start warm standby: {e}"
+
+        # A threaded monitor drains its output; the pipe is handed to the controller's monitor at cutover
+        self.monitor = MiningMonitor()
+        self.monitor.start_monitoring(self.process)
+        self.state = "starting"
+        self.started_at = time.time()
+        self.dataset_ms = None
+        self.controller_loop.periodic("warm-standby", 1.0, self._tick)
+        return True, "Warm standby starting"
+
+    def _tick(self):
+        """Start, then pause the standby once its dataset is built; notice if it exits"""
+        if self.state == "waiting":
+            monitor = self.xmrig_controller.monitor
+            if not monitor.is_xmrig_running():
+                self.stop()
+            elif monitor.log_buffer.grep(r"dataset ready", count=1):
+                self._spawn()
+            return
+        if self.process is None:
+            return
+        if self.process.poll() is not None:
+            self.state = "exited"
+            self.xmrig_controller.events.emit("standby_exit", exit_code=self.process.returncode)
+            self.monitor.stop_monitoring()
+            self.process = None
+            self.controller_loop.cancel("warm-standby")
+            return
+        if self.state != "starting":
+            return
+        lines = self.monitor.log_buffer.grep(r"dataset ready", since=self.started_at, count=1)
+        if not lines:
+            return
+        try:
+            self._command("pause")
+        except (OSError, ValueError):
+            return  # API not listening yet; try again on the next tick
+        match = re.search(r"dataset ready \((\d+) ms\)", lines[0])
+        self.dataset_ms = int(match.group(1)) if match else None
+        self.state = "ready"
+        self.xmrig_controller.events.emit("standby_ready", dataset_ms=self.dataset_ms,
+                                          startup_s=round(time.time() - self.started_at, 1))
+
+    def cutover(self):
+        """Stop the active XMRig and resume the standby in its place; returns (success, message)"""
+        if not self.ready:
+            return False, "Warm standby is not ready"
+        controller = self.xmrig_controller
+        self.controller_loop.cancel("warm-standby")
+
+        # The gap is from the moment the active miner is told to stop to the standby hashing
+        started = time.monotonic()
+        controller.monitor.stopping = True
+        old_process = controller.xmrig_process
+        old_process.terminate()
+        try:
+            old_process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            old_process.kill()
+            old_process.wait()
+        try:
+            self._command("resume")
+        except (OSError, ValueError) as e:
+            gap = time.monotonic() - started
+            controller._stop_monitoring()
+            self.stop()
+            controller.events.emit("standby_cutover_failed", error=str(e), gap_ms=round(gap * 1000, 1))
+            return False, f"Could not resume the warm standby: {e}"
+        gap = time.monotonic() - started
+
+        # Hand the standby's process and pipe to the controller's monitor
+        controller._stop_monitoring()
+        self.monitor.stop_monitoring()
+        controller.xmrig_process = self.process
+        controller.run_config_path = self.config_path if self.config_path != controller.config_path else None
+        controller.paused = False
+        controller.pause_holds.discard("user")
+        controller._start_monitoring()
+        self.process = None
+        self.monitor = None
+        self.state = "off"
+        self.last_gap = gap
+        self.cutovers += 1
+        controller.events.emit("standby_cutover", gap_ms=round(gap * 1000, 1), dataset_ms=self.dataset_ms)
+
+        saved = f", skipping a {self.dataset_ms / 1000:.1f}s dataset build" if self.dataset_ms else ""
+        message = f"Cut over to the warm standby in {gap * 1000:.0f} ms{saved}"
+        self.start(wait_for_dataset=False)  # The new active miner already has its dataset
+        return True, message
+
+    def stop(self):
+        """Stop the standby process"""
+        if self.controller_loop.running:
+            self.controller_loop.cancel("warm-standby")
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+            self.monitor.stop_monitoring()
+        self.process = None
+        self.monitor = None
+        self.state = "off"
+
+    def get_status(self):
+        """Get a one-line description of the standby"""
+        labels = {"waiting": "Waiting for the miner's dataset", "starting": "Building dataset", "ready": "Ready (paused)", "exited": "Exited",
+                  "no memory": "Not enough memory", "failed": "Failed", "off": "Off"}
+        status = labels.get(self.state, self.state)
+        if self.state == "ready" and self.dataset_ms:
+            status += f", saves {self.dataset_ms / 1000:.1f}s"
+        if self.last_gap is not None:
+            status += f" | last cutover {self.last_gap * 1000:.0f} ms"
+        return status
+
+class LoadGovernor:
+    """Adapts XMRig's CPU footprint to co-located foreground load"""
+
+    PRESSURE_FILE = "/proc/pressure/cpu"
+    LOADAVG_FILE = "/proc/loadavg"
+
+    def __init__(self, xmrig_controller, cpu_controller, controller_loop, interval=0.25,
+                 busy_foreground=50.0, idle_foreground=20.0,
+                 busy_pressure=25.0, idle_pressure=5.0,
+                 busy_samples=2, idle_samples=12, min_threads=1, thread_step=1):
+        self.xmrig_controller = xmrig_controller
+        self.cpu_controller = cpu_controller
+        self.controller_loop = controller_loop
+        self.interval = interval
+        # Separate busy/idle thresholds and sample counts give hysteresis
+        self.busy_foreground = busy_foreground
+        self.idle_foreground = idle_foreground
+        self.busy_pressure = busy_pressure
+        self.idle_pressure = idle_pressure
+        self.busy_samples = busy_samples
+        self.idle_samples = idle_samples
+        self.min_threads = min_threads
+        self.thread_step = thread_step
+
+        self.max_threads = None
+        self.threads = None
+        self.state = "idle"
+        self.last_action = None
+        self.last_sample = {}
+        self._busy_count = 0
+        self._idle_count = 0
+        self._last_pressure = None
+        self._process = None
+        self._cpu_sample = None  # (busy, total, XMRig pid, XMRig CPU seconds) at the previous sample
+        self.running = False
+
+    def start(self):
+        """Start the governor as a periodic task on the controller loop"""
+        if self.running:
+            return
+        self.max_threads = self.cpu_controller.user_thread_count()
+        self.threads = self.max_threads
+        self._cpu_sample = None
+        self.running = True
+        self.controller_loop.periodic("load-governor", self.interval, self._tick, control=True)
+
+    def stop(self):
+        """Stop the governor and give XMRig its full allocation back"""
+        if not self.running:
+            return
+        self.running = False
+        self.controller_loop.cancel("load-governor")
+        self._release_all()
+
+    def _tick(self):
+        """Sample load and adjust XMRig once"""
+        if self.xmrig_controller.monitor.is_xmrig_running():
+            try:
+                self.step(self.sample())
+            except Exception as e:
+                self.last_action = f"Governor error: {e}"
+        else:
+            self._process = None
+            self.state = "idle"
+
+    def _read_pressure(self):
+        """Get CPU pressure (% of wall time stalled) since the previous sample"""
+        try:
+            with open(self.PRESSURE_FILE, 'r') as f:
+                some = f.readline().split()
+        except OSError:
+            return None
+
+        fields = dict(field.split('=', 1) for field in some[1:])
+        total = int(fields.get('total', 0))
+        now = time.monotonic()
+        previous, self._last_pressure = self._last_pressure, (total, now)
+        if previous is None or now <= previous[1]:
+            # First sample: fall back to the kernel's 10 second average
+            return float(fields.get('avg10', 0.0))
+        return min(100.0, (total - previous[0]) / ((now - previous[1]) * 1e6) * 100)
+
+    def _read_run_queue(self):
+        """Get the number of runnable tasks from /proc/loadavg"""
+        try:
+            with open(self.LOADAVG_FILE, 'r') as f:
+                return int(f.read().split()[3].split('/')[0])
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def _xmrig_cpu_seconds(self):
+        """XMRig's (pid, CPU seconds used so far), or (None, None) when it is not running"""
+        import psutil
+        process = self.xmrig_controller.xmrig_process
+        if not process:
+            return None, None
+        try:
+            if self._process is None or self._process.pid != process.pid:
+                self._process = psutil.Process(process.pid)
+            times = self._process.cpu_times()
+            return process.pid, times.user + times.system
+        except psutil.Error:
+            self._process = None
+            return None, None
+
+    def sample(self):
+        """Measure non-XMRig CPU demand, run queue length and CPU pressure"""
+        import psutil
+        logical_cores = psutil.cpu_count(logical=True) or 1
+        # Machine and XMRig CPU time read together and diffed against this governor's own previous sample
+        busy, total = cpu_time_totals()
+        pid, xmrig_seconds = self._xmrig_cpu_seconds()
+        previous, self._cpu_sample = self._cpu_sample, (busy, total, pid, xmrig_seconds)
+        total_cpu = xmrig_cpu = 0.0
+        if previous and total > previous[1]:
+            elapsed = total - previous[1]
+            total_cpu = min(100.0, max(0.0, (busy - previous[0]) / elapsed * 100))
+            if pid is not None and pid == previous[2]:
+                xmrig_cpu = min(total_cpu, max(0.0, (xmrig_seconds - previous[3]) / elapsed * 100))
+        run_queue = self._read_run_queue()
+        mining_threads = 0 if self.xmrig_controller.paused else (self.threads or 0)
+
+        self.last_sample = {
+            'foreground_cpu': max(0.0, total_cpu - xmrig_cpu),
+            'xmrig_cpu': xmrig_cpu,
+            # Runnable tasks beyond XMRig's own threads compete for cores
+            'run_queue': None if run_queue is None else max(0, run_queue - mining_threads),
+            'pressure': self._read_pressure(),
+            'logical_cores': logical_cores
+        }
+        return self.last_sample
+
+    def _is_busy(self, sample):
+        """Check whether foreground work is being starved"""
+        if sample['foreground_cpu'] >= self.busy_foreground:
+            return True
+        if sample['pressure'] is not None and sample['pressure'] >= self.busy_pressure:
+            return True
+        run_queue = sample['run_queue']
+        return run_queue is not None and run_queue > sample['logical_cores']
+
+    def _is_idle(self, sample):
+        """Check whether foreground demand has dropped enough to give cores back"""
+        if sample['foreground_cpu'] > self.idle_foreground:
+            return False
+        if sample['pressure'] is not None and sample['pressure'] > self.idle_pressure:
+            return False
+        run_queue = sample['run_queue']
+        return run_queue is None or run_queue < sample['logical_cores'] // 2
+
+    def step(self, sample):
+        """Apply one governor decision for a load sample"""
+        if self._is_busy(sample):
+            self._busy_count += 1
+            self._idle_count = 0
+        elif self._is_idle(sample):
+            self._idle_count += 1
+            self._busy_count = 0
+        else:
+            # Between thresholds: hold the current level
+            self._busy_count = 0
+            self._idle_count = 0
+
+        if self._busy_count >= self.busy_samples:
+            self._busy_count = 0
+            self._throttle()
+        elif self._idle_count >= self.idle_samples:
+            self._idle_count = 0
+            self._release()
+
+    def _throttle(self):
+        """Shed one level: fewer threads first, then pause"""
+        self.max_threads = self.cpu_controller.user_thread_count()
+        if self.threads > self.min_threads:
+            self._set_threads(max(self.min_threads, self.threads - self.thread_step))
+        elif self.state != "paused" or not self.xmrig_controller.paused:
+            # Also re-pauses a miner that was restarted while this governor held it
+            success, message = self.xmrig_controller.hold_pause("load")
+            self.last_action = message
+            if success:
+                self.state = "paused"
+
+    def _release(self):
+        """Restore one level: resume first, then add threads back"""
+        self.max_threads = self.cpu_controller.user_thread_count()
+        if self.state == "paused":
+            # Only this governor's own pause; XMRig resumes once no one else holds it paused
+            success, message = self.xmrig_controller.release_pause("load")
+            self.last_action = message
+            if success:
+                self.state = "throttled" if self.threads < self.max_threads else "full"
+        elif self.threads < self.max_threads:
+            self._set_threads(min(self.max_threads, self.threads + self.thread_step))
+
+    def _set_threads(self, threads):
+        """Change this governor's thread cap; XMRig picks it up via config watch"""
+        cap = threads if threads < self.max_threads else None
+        if self.cpu_controller.limit_threads("load", cap) is not None:
+            self.threads = threads
+            self.state = "throttled" if threads < self.max_threads else "full"
+            self.last_action = f"Threads set to {threads}/{self.max_threads}"
+
+    def _release_all(self):
+        """Undo any throttling applied by the governor"""
+        if self.state == "paused":
+            self.xmrig_controller.release_pause("load")
+        self.cpu_controller.limit_threads("load", None)
+        self.threads = self.max_threads
+        self.state = "idle"
+
+    def get_status(self):
+        """Get a one-line description of the governor state"""
+        if not self.running:
+            return "Off"
+        if self.state == "paused":
+            return "Paused (foreground load)"
+        if self.state == "throttled":
+            return f"Throttled ({self.threads}/{self.max_threads} threads)"
+        return "Active"
+
+class ThermalGovernor:
+    """Keeps temperature and package power under target while maximising hashes per joule"""
+
+    WINDOW_SECONDS = 10.0  # XMRig's shortest hashrate window, which H/J is measured from
+
+    def __init__(self, xmrig_controller, cpu_controller, controller_loop, max_temp=80.0, max_power=None,
+                 interval=5.0, settle_time=30.0, margin=3.0, min_threads=1, clock=None):
+        self.xmrig_controller = xmrig_controller
+        self.cpu_controller = cpu_controller
+        self.controller_loop = controller_loop
+        self.monitor = xmrig_controller.monitor
+        self.max_temp = max_temp
+        self.max_power = max_power
+        self.interval = interval
+        # Hashrate and power need time to settle after a thread change
+        self.settle_time = settle_time
+        self.margin = margin
+        self.min_threads = min_threads
+        self.clock = clock or time.monotonic
+
+        self.max_threads = None
+        self.threads = None
+        self.efficiency = {}  # threads -> (mean H/J, settle periods)
+        self.state = "idle"
+        self.last_action = None
+        self._changed_at = 0.0  # Last thread change; earlier 10s windows mix in the old count
+        self._period_start = 0.0  # Start of the settle period being averaged
+        self._samples = []  # H/J samples in the current settle period
+        self.running = False
+
+    def start(self):
+        """Start the governor as a periodic task on the controller loop"""
+        if self.running:
+            return
+        self.max_threads = self.cpu_controller.user_thread_count()
+        self.threads = min(self.max_threads, self.cpu_controller.get_thread_count())
+        self._changed_at = self._period_start = self.clock()
+        self._samples = []
+        self.running = True
+        self.controller_loop.periodic("thermal-governor", self.interval, self._tick, control=True)
+
+    def stop(self):
+        """Stop the governor and lift its thread cap"""
+        if not self.running:
+            return
+        self.running = False
+        self.controller_loop.cancel("thermal-governor")
+        self.cpu_controller.limit_threads("thermal", None)
+        self.threads = self.max_threads
+        self.state = "idle"
+
+    def _tick(self):
+        """Sample sensors and adjust threads once"""
+        if self.monitor.is_xmrig_running() and not self.xmrig_controller.paused:
+            try:
+                self.step(self.monitor.get_stats_summary())
+            except Exception as e:
+                self.last_action = f"Governor error: {e}"
+
+    def _over_limit(self, stats, margin=0.0):
+        """Check temperature and power against their targets"""
+        temperature = stats.get('temperature')
+        if temperature is not None and temperature > self.max_temp - margin:
+            return True
+        power = stats.get('power')
+        return bool(self.max_power and power is not None and power > self.max_power - margin)
+
+    def _record_efficiency(self, hashes_per_joule):
+        """Fold a settle-period mean into the running H/J mean for the current thread count"""
+        mean, count = self.efficiency.get(self.threads, (0.0, 0))
+        count += 1
+        self.efficiency[self.threads] = (mean + (hashes_per_joule - mean) / count, count)
+
+    def _sample(self, stats, now):
+        """Add a 10s-window H/J sample once that window only covers the current thread count"""
+        if now - self._changed_at < self.WINDOW_SECONDS:
+            return
+        windows = stats.get('hashrate_windows') or [None]
+        power = stats.get('power')
+        if windows[0] and power:
+            self._samples.append(windows[0] / power)
+
+    def step(self, stats):
+        """Apply one governor decision for a stats sample"""
+        if self._over_limit(stats):
+            # Safety first: shed a thread immediately, no settling
+            self.state = "limiting"
+            if self.threads > self.min_threads:
+                self._set_threads(self.threads - 1, "over target")
+            return
+
+        now = self.clock()
+        self._sample(stats, now)
+        if now - self._period_start < self.settle_time or not self._samples:
+            return
+        self._record_efficiency(sum(self._samples) / len(self._samples))
+        self._samples = []
+        self._period_start = now
+        self.state = "optimizing"
+
+        self.max_threads = self.cpu_controller.user_thread_count()
+        current = self.efficiency.get(self.threads, (0.0, 0))[0]
+        more = self.efficiency.get(self.threads + 1)
+        fewer = self.efficiency.get(self.threads - 1)
+        # The user's thread count is the ceiling; growing also needs thermal/power headroom
+        can_grow = self.threads < self.max_threads and not self._over_limit(stats, self.margin)
+        can_shrink = self.threads > self.min_threads
+
+        # Hill-climb on H/J: explore an unmeasured neighbour while efficiency has not started to fall
+        if can_grow and more is None and (fewer is None or current >= fewer[0]):
+            self._set_threads(self.threads + 1, "exploring")
+        elif can_shrink and fewer is None and (more is None or current >= more[0]):
+            self._set_threads(self.threads - 1, "exploring")
+        elif can_grow and more is not None and more[0] > current:
+            self._set_threads(self.threads + 1, "better H/J")
+        elif can_shrink and fewer is not None and fewer[0] > current:
+            self._set_threads(self.threads - 1, "better H/J")
+
+    def _set_threads(self, threads, reason):
+        """Change this governor's thread cap; XMRig picks it up via config watch"""
+        cap = threads if threads < self.max_threads else None
+        if self.cpu_controller.limit_threads("thermal", cap) is not None:
+            self.threads = threads
+            self._changed_at = self._period_start = self.clock()
+            self._samples = []
+            self.last_action = f"Threads set to {threads} ({reason})"
+
+    def get_best_thread_count(self):
+        """Get the thread count with the highest measured hashes per joule"""
+        if not self.efficiency:
+            return None
+        return max(self.efficiency, key=lambda threads: self.efficiency[threads][0])
+
+    def get_status(self):
+        """Get a one-line description of the governor state"""
+        if not self.running:
+            return "Off"
+        if self.state == "limiting":
+            return f"Limiting ({self.threads} threads)"
+        return f"Optimizing ({self.threads} threads)"
+
+class MemoryPlanner:
+    """Fits RandomX's memory footprint to the machine and watches for swapping
+
+    Fast mode keeps the RandomX dataset in memory (one copy per NUMA node with
+    randomx.numa) next to the cache; light mode keeps only the cache and hashes
+    at a fraction of the speed. Every thread adds a scratchpad, and 1 GB pages
+    round the dataset up to whole gigabytes. Before each start the planner
+    compares that with available memory, counting free hugepages, and in auto
+    mode writes the fastest layout that fits to randomx.mode. While mining it
+    watches how much of XMRig itself is in swap, so other processes paging
+    do not count: sustained swapping is logged and, in auto mode, drops a
+    fast-mode miner to light mode. That choice is saved, and fast mode is
+    tried again once it has fitted with room to spare for a while.
+    """
+
+    DATASET_MB = 2080
+    CACHE_MB = 256
+    SCRATCHPAD_MB = 2
+    OVERHEAD_MB = 64  # Code, buffers and the pool connection
+    HEADROOM_MB = 256  # Left for the OS and everything else on the machine
+    LIGHT_FACTOR = 0.25  # Light-mode hashrate relative to fast, until both have been measured
+    SWAP_MB = 64  # XMRig memory in swap that counts as swapping; RandomX touches all of it constantly
+    SWAP_TICKS = 3
+    RESTORE_MARGIN_MB = 512  # Room beyond the headroom fast mode needs before it is tried again
+    RESTORE_TICKS = 60  # Ticks (5 minutes) that room must last
+
+    def __init__(self, xmrig_controller, cpu_controller, controller_loop, auto=False, hashrates=None, interval=5.0,
+                 avoid_fast=False):
+        self.xmrig_controller = xmrig_controller
+        self.cpu_controller = cpu_controller
+        self.controller_loop = controller_loop
+        self.monitor = xmrig_controller.monitor
+        self.auto = auto
+        self.hashrates = dict(hashrates or {})  # mode -> steady hashrate last measured in it
+        self.interval = interval
+        self.avoid_fast = avoid_fast  # Set once fast mode swapped despite the plan; saved with the settings
+        self.last_plan = None
+        self.last_action = None
+        self.swap_mb = 0.0
+        self.swapping = False
+        self._swap_ticks = 0
+        self._restore_ticks = 0
+        self.running = False
+
+    def settings(self):
+        """The 'memory_planner' user settings: auto mode, measured hashrates and the light-mode fallback"""
+        return {'auto': self.auto, 'hashrates': self.hashrates, 'avoid_fast': self.avoid_fast}
+
+    @classmethod
+    def footprint(cls, mode, threads, huge_pages=True, one_gb_pages=False, numa_nodes=1):
+        """Expected XMRig memory use in MB for one RandomX layout"""
+        dataset = 0
+        if mode == "fast":
+            dataset = -(-cls.DATASET_MB // 1024) * 1024 if one_gb_pages else cls.DATASET_MB
+            dataset *= max(1, numa_nodes)
+        scratchpads = threads * cls.SCRATCHPAD_MB
+        small_pages = cls.CACHE_MB + scratchpads + (0 if one_gb_pages else dataset)
+        return {
+            'dataset': dataset,
+            'cache': cls.CACHE_MB,
+            'scratchpads': scratchpads,
+            'overhead': cls.OVERHEAD_MB,
+            'total': dataset + cls.CACHE_MB + scratchpads + cls.OVERHEAD_MB,
+            'hugepages': small_pages // 2 if huge_pages else 0  # 2 MB pages XMRig will ask for
+        }
+
+    @staticmethod
+    def page_settings(config):
+        """(huge pages, 1 GB pages, NUMA datasets) as an XMRig config sets them"""
+        randomx = config.get('randomx') or {}
+        huge_pages = (config.get('cpu') or {}).get('huge-pages', True) is not False
+        return huge_pages, bool(randomx.get('1gb-pages')), randomx.get('numa', True) is not False
+
+    @staticmethod
+    def read_hugepages(path="/proc/meminfo"):
+        """Reserved hugepages as {'total', 'free', 'size_mb'}, or None where none are reserved"""
+        values = {}
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    key, _, rest = line.partition(':')
+                    if key in ('HugePages_Total', 'HugePages_Free', 'Hugepagesize'):
+                        values[key] = int(rest.split()[0])
+        except (OSError, ValueError, IndexError):
+            return None
+        if not values.get('HugePages_Total'):
+            return None
+        return {'total': values['HugePages_Total'], 'free': values.get('HugePages_Free', 0),
+                'size_mb': values.get('Hugepagesize', 2048) / 1024}
+
+    def _numa_nodes(self):
+        """Number of NUMA nodes with online CPUs"""
+        return len({cpu['node'] for cpu in self.monitor.topology.cpus().values()}) or 1
+
+    def plan(self, config=None, available_mb=None, threads=None, numa_nodes=None):
+        """Find the fastest RandomX layout that fits in memory; returns the plan"""
+        import psutil
+        if config is None:
+            config = self.xmrig_controller.load_config() or {}
+        huge_pages, one_gb_pages, numa = self.page_settings(config)
+        configured = str((config.get('randomx') or {}).get('mode') or "auto")
+        if threads is None:
+            threads = self.cpu_controller.get_thread_count() if self.cpu_controller else psutil.cpu_count(logical=True)
+        if numa_nodes is None:
+            numa_nodes = self._numa_nodes()
+        dataset_nodes = numa_nodes if numa else 1
+        hugepages = self.read_hugepages() if huge_pages else None
+        # A warm standby runs a second miner with the same config, dataset included
+        standby = self.xmrig_controller.standby
+        copies = 2 if standby else 1
+        if available_mb is None:
+            available_mb = psutil.virtual_memory().available / (1024 * 1024)
+            if hugepages:
+                available_mb += hugepages['free'] * hugepages['size_mb']
+            if self.monitor.is_xmrig_running():
+                # What fits after a restart: the running miners' memory comes back first
+                running = self.footprint(self._running_mode(config), threads, huge_pages, one_gb_pages, dataset_nodes)
+                standby_running = standby and standby.process is not None and standby.process.poll() is None
+                available_mb += running['total'] * (2 if standby_running else 1)
+
+        layouts = [("fast", dataset_nodes), ("fast", 1), ("light", 1)]
+        usages = [self.footprint(mode, threads, huge_pages, one_gb_pages, nodes) for mode, nodes in layouts]
+        budget = available_mb - self.HEADROOM_MB
+        choice = next((i for i, usage in enumerate(usages) if usage['total'] * copies <= budget and
+                       not (self.avoid_fast and layouts[i][0] == "fast")), 2)
+        mode, nodes = layouts[choice]
+        usage = usages[choice]
+        current = usages[2] if configured == "light" else usages[0]
+        fits = usage['total'] * copies <= budget
+        self.last_plan = {
+            'configured': configured,
+            'mode': mode,
+            'numa': numa and not (mode == "fast" and nodes < numa_nodes),
+            'threads': threads,
+            'numa_nodes': numa_nodes,
+            'available_mb': round(available_mb),
+            'footprint': usage,  # Per miner; the *_mb totals cover the standby too
+            'copies': copies,
+            'needed_mb': usage['total'] * copies,
+            'fast_mb': usages[0]['total'] * copies,
+            'light_mb': usages[2]['total'] * copies,
+            'configured_mb': current['total'] * copies,
+            'configured_fits': current['total'] * copies <= budget,
+            'fits': fits,
+            # Without room even for light mode, fewer threads (scratchpads) is all that is left to cut
+            'max_threads': threads if fits else max(0, int((budget - usage['total'] * copies)
+                                                           // (self.SCRATCHPAD_MB * copies)) + threads),
+            'hugepages': hugepages,
+            'hashrate_factor': 1.0 if mode == "fast" else self.tradeoff_ratio()
+        }
+        return self.last_plan
+
+    def tradeoff_ratio(self):
+        """Light-mode hashrate as a fraction of fast mode, measured once both have run"""
+        fast, light = self.hashrates.get('fast'), self.hashrates.get('light')
+        return light / fast if fast and light else self.LIGHT_FACTOR
+
+    def tradeoff(self, plan=None):
+        """Fast and light hashrates (measured or estimated) and the memory light mode saves"""
+        plan = plan or self.last_plan or self.plan()
+        ratio = self.tradeoff_ratio()
+        fast, light = self.hashrates.get('fast'), self.hashrates.get('light')
+        return {
+            'fast': fast or (light / ratio if light else None),
+            'light': light or (fast * ratio if fast else None),
+            'ratio': ratio,
+            'measured': bool(fast and light),
+            'saved_mb': plan['fast_mb'] - plan['light_mb']
+        }
+
+    @staticmethod
+    def _running_mode(config):
+        """The mode XMRig runs in for a config; its "auto" means fast on CPUs"""
+        return "light" if (config.get('randomx') or {}).get('mode') == "light" else "fast"
+
+    def apply(self, plan):
+        """Write the plan's mode and NUMA setting to the config; returns (changed, message)"""
+        config = self.xmrig_controller.load_config()
+        if not config:
+            return False, "No XMRig config to update"
+        randomx = config.setdefault('randomx', {})
+        if self._running_mode(config) == plan['mode'] and randomx.get('numa', True) == plan['numa']:
+            return False, f"RandomX {plan['mode']} mode already set"
+        randomx['mode'] = plan['mode']
+        randomx['numa'] = plan['numa']
+        if not self.xmrig_controller.save_config(config):
+            return False, "Failed to write the RandomX mode"
+        self.xmrig_controller.events.emit("memory_plan", mode=plan['mode'], numa=plan['numa'],
+                                          footprint_mb=plan['needed_mb'],
+                                          available_mb=plan['available_mb'])
+        return True, (f"RandomX {plan['mode']} mode (about {plan['needed_mb']} MB of "
+                      f"{plan['available_mb']} MB available)")
+
+    def prepare(self):
+        """Plan before XMRig starts; returns a note for the start message, or None"""
+        plan = self.plan()
+        if self.auto:
+            changed, message = self.apply(plan)
+            if not plan['fits']:
+                return (f"even light mode needs about {plan['light_mb']} MB, {plan['available_mb']} MB available; "
+                        f"at most {plan['max_threads']} threads fit")
+            return message if changed else None
+        if not plan['configured_fits']:
+            self.xmrig_controller.events.emit("memory_warning", mode=plan['configured'],
+                                              footprint_mb=plan['configured_mb'], available_mb=plan['available_mb'])
+            return (f"RandomX {plan['configured']} mode needs about {plan['configured_mb']} MB, "
+                    f"{plan['available_mb']} MB available - expect swapping (light mode needs {plan['light_mb']} MB)")
+        return None
+
+    def start(self):
+        """Watch XMRig's swap use as a periodic task on the controller loop"""
+        if self.running:
+            return
+        self.running = True
+        self._swap_ticks = self._restore_ticks = 0
+        self.controller_loop.periodic("memory-planner", self.interval, self._tick)
+
+    def stop(self):
+        """Stop watching XMRig's swap use"""
+        if not self.running:
+            return
+        self.running = False
+        self.controller_loop.cancel("memory-planner")
+        self.swapping = False
+
+    def _tick(self):
+        """Sample XMRig's swap use once"""
+        try:
+            self.step(self.miner_swap() or 0)
         except Exception as e:
-            print(f"Error saving config: {e}")
-            return False
+            self.last_action = f"Memory planner error: {e}"
 
-    def update_pool_config(self, pool_info, wallet_address, tls_enabled=False):
-        """Update pool configuration in XMRig config"""
-        config = self.load_config()
-        if not config:
-            return False
+    def miner_swap(self):
+        """Bytes of the running XMRig's memory that sit in swap, or None where that cannot be read"""
+        import psutil
+        process = self.xmrig_controller.xmrig_process
+        if process is None or process.poll() is not None:
+            return None
+        try:
+            with open(f"/proc/{process.pid}/status", 'r') as f:
+                for line in f:
+                    if line.startswith("VmSwap:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        try:
+            return getattr(psutil.Process(process.pid).memory_full_info(), 'swap', None)
+        except (psutil.Error, OSError):
+            return None
 
-        if 'pools' not in config or not config['pools']:
-            config['pools'] = [{}]
+    def step(self, swapped_bytes):
+        """Fold in one reading of how many bytes of XMRig are in swap"""
+        self.swap_mb = swapped_bytes / (1024 * 1024)
+        mining = self.monitor.is_xmrig_running() and not self.xmrig_controller.paused
+        if not mining or self.swap_mb < self.SWAP_MB:
+            self._swap_ticks = 0
+            self.swapping = False
+            if mining:
+                self._record_hashrate()
+                if self.auto and self.avoid_fast:
+                    self._check_restore()
+            return
+        self._restore_ticks = 0
+        self._swap_ticks += 1
+        if self._swap_ticks < self.SWAP_TICKS or self.swapping:
+            return
+        self.swapping = True
+        mode = self._running_mode(self.xmrig_controller.load_config() or {})
+        self.xmrig_controller.events.emit("memory_swapping", swap_mb=round(self.swap_mb), mode=mode)
+        self.last_action = f"{self.swap_mb:.0f} MB of XMRig in swap in {mode} mode"
+        if self.auto and mode == "fast":
+            self._fall_back_to_light()
+
+    def _record_hashrate(self):
+        """Remember the steady (60s) hashrate of the running mode for the trade-off report"""
+        rate = self.monitor.stats['hashrate_windows'][1]
+        if rate:
+            self.hashrates[self._running_mode(self.xmrig_controller.load_config() or {})] = rate
+
+    def _fall_back_to_light(self):
+        """Restart a swapping fast-mode miner in light mode"""
+        self.avoid_fast = True
+        plan = self.plan()
+        changed, message = self.apply(plan)
+        if not changed:
+            self.last_action = f"Swapping, but light mode could not be set: {message}"
+            return
+        update_user_settings(memory_planner=self.settings())
+        self.xmrig_controller.stop_mining()
+        success, start_message = self.xmrig_controller.start_mining()
+        self.xmrig_controller.events.emit("memory_mode_switch", mode="light", reason="swapping", ok=success)
+        self.last_action = (f"{self.swap_mb:.0f} MB of XMRig in swap - restarted in light mode" if success
+                            else f"Light mode restart failed: {start_message}")
+
+    def _check_restore(self):
+        """Go back to fast mode once it has fitted, with room to spare, for RESTORE_TICKS ticks"""
+        plan = self.plan()
+        if plan['fast_mb'] + self.HEADROOM_MB + self.RESTORE_MARGIN_MB > plan['available_mb']:
+            self._restore_ticks = 0
+            return
+        self._restore_ticks += 1
+        if self._restore_ticks < self.RESTORE_TICKS:
+            return
+        self._restore_ticks = 0
+        self.avoid_fast = False
+        changed, message = self.apply(self.plan())
+        update_user_settings(memory_planner=self.settings())
+        if not changed:
+            self.last_action = f"Fast mode fits again, but could not be set: {message}"
+            return
+        self.xmrig_controller.stop_mining()
+        success, start_message = self.xmrig_controller.start_mining()
+        self.xmrig_controller.events.emit("memory_mode_switch", mode="fast", reason="memory available", ok=success)
+        self.last_action = (f"Fast mode fits again - restarted with {plan['available_mb']} MB available" if success
+                            else f"Fast mode restart failed: {start_message}")
+
+    def get_status(self):
+        """Get a one-line description of the plan and swap state"""
+        if self.swapping:
+            return f"Swapping ({self.swap_mb:.0f} MB of XMRig in swap)"
+        plan = self.last_plan
+        if not plan:
+            return "Not planned yet"
+        text = f"{plan['mode'].capitalize()}, ~{plan['needed_mb'] / 1024:.1f} of {plan['available_mb'] / 1024:.1f} GB"
+        return text + (" (auto)" if self.auto else "")
+
+class TariffScheduler:
+    """Runs, throttles or pauses XMRig by time-of-use electricity price and expected profit
+
+    Tariff windows are daily "HH:MM"-"HH:MM" ranges with a price per kWh (a
+    window may wrap past midnight); outside every window the default price
+    applies. Expected revenue comes from the live hashrate, the pool fee and
+    the configured network hashrate, block reward and XMR price. The clock is
+    injectable so plans can be checked with a fake time source.
+    """
+
+    BLOCK_TIME = 120  # Seconds per Monero block
+    THROTTLE_BAND = 0.01  # Default profit per hour between the run and pause margins
+
+    def __init__(self, xmrig_controller, cpu_controller, controller_loop, settings=None, pool_fee=0.0,
+                 interval=60.0, clock=None):
+        from datetime import datetime
+        self.xmrig_controller = xmrig_controller
+        self.cpu_controller = cpu_controller
+        self.controller_loop = controller_loop
+        self.monitor = xmrig_controller.monitor
+        self.pool_fee = pool_fee
+        self.interval = interval
+        self.clock = clock or datetime.now
+        self.configure(settings or {})
+
+        self.reference_hashrate = None
+        self.decision = None
+        self.applied_action = None
+        self.last_action = None
+        self.running = False
+
+    def configure(self, settings):
+        """Load windows and thresholds from the 'schedule' settings"""
+        self.windows = [dict(window) for window in settings.get('windows', [])]
+        self.default_price = settings.get('default_price', 0.0)
+        self.xmr_price = settings.get('xmr_price', 0.0)
+        self.network_hashrate = settings.get('network_hashrate', 0.0)
+        self.block_reward = settings.get('block_reward', 0.6)
+        self.power_watts = settings.get('power_watts', 100.0)
+        # Used until XMRig has reported a hashrate of its own
+        self.expected_hashrate = settings.get('expected_hashrate', 0.0)
+        # Margins are profit per hour in the tariff's currency; between them XMRig is throttled
+        self.run_margin = settings.get('run_margin', 0.0)
+        self.pause_margin = settings.get('pause_margin', self.run_margin - self.THROTTLE_BAND)
+        self.throttle_fraction = settings.get('throttle_fraction', 0.5)
+
+    @staticmethod
+    def _minutes(clock_time):
+        """Minutes after midnight for an "HH:MM" time"""
+        hours, minutes = clock_time.split(':')
+        return int(hours) * 60 + int(minutes)
+
+    def window_at(self, now):
+        """Get the tariff window covering a datetime, or None for the default price"""
+        minute = now.hour * 60 + now.minute
+        for window in self.windows:
+            start, end = self._minutes(window['start']), self._minutes(window['end'])
+            if (start <= minute < end) if start <= end else (minute >= start or minute < end):
+                return window
+        return None
 
-        pool_config = config['pools'][0]
-        pool_config.update({
-            'coin': 'monero',
-            'url': f"{pool_info['url']}:{pool_info['port']}",
-            'user': wallet_address,
-            'pass': 'x',
-            'tls': tls_enabled,
-            'keepalive': True,
-            'nicehash': False
-        })
+    def price_at(self, now):
+        """Electricity price per kWh at a datetime"""
+        window = self.window_at(now)
+        return window['price'] if window else self.default_price
+
+    def next_change(self, now):
+        """Next datetime at which the tariff window changes (within a day)"""
+        from datetime import timedelta
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        boundaries = sorted({self._minutes(window[key]) for window in self.windows for key in ('start', 'end')})
+        minute = now.hour * 60 + now.minute
+        for boundary in boundaries:
+            if boundary > minute:
+                return midnight + timedelta(minutes=boundary)
+        return midnight + timedelta(days=1, minutes=boundaries[0]) if boundaries else None
+
+    def revenue_per_hour(self, hashrate):
+        """Expected income per hour in the tariff's currency, after the pool fee"""
+        if not self.network_hashrate or not hashrate:
+            return 0.0
+        xmr_per_hour = hashrate / self.network_hashrate * self.block_reward * 3600 / self.BLOCK_TIME
+        return xmr_per_hour * (1 - self.pool_fee / 100) * self.xmr_price
+
+    def plan(self, now, hashrate, power=None):
+        """Decide run, throttle or pause for one moment; pure apart from its inputs"""
+        price = self.price_at(now)
+        power = power or self.power_watts
+        revenue = self.revenue_per_hour(hashrate)
+        cost = power / 1000 * price
+        margin = revenue - cost
+        if margin >= self.run_margin:
+            action = "run"
+        elif margin >= self.pause_margin:
+            action = "throttle"
+        else:
+            action = "pause"
+        window = self.window_at(now)
+        return {
+            'action': action,
+            'price': price,
+            'window': window.get('name') if window else None,
+            'revenue': revenue,
+            'cost': cost,
+            'margin': margin,
+            'until': self.next_change(now)
+        }
 
-        return self.save_config(config)
+    def plan_day(self, now, hashrate, power=None):
+        """Plan each tariff segment of the next 24 hours"""
+        from datetime import timedelta
+        segments = []
+        moment, end = now, now + timedelta(days=1)
+        while moment < end:
+            decision = self.plan(moment, hashrate, power)
+            decision['start'] = moment
+            segments.append(decision)
+            if decision['until'] is None:
+                break
+            moment = decision['until']
+        return segments
 
-    def start_mining(self):
-        """Start XMRig mining process"""
-        if self.monitor.is_xmrig_running():
-            return False, "XMRig is already running"
+    def start(self):
+        """Start the scheduler as a periodic task on the controller loop"""
+        if self.running:
+            return
+        self.applied_action = None
+        self.running = True
+        self.controller_loop.periodic("tariff-scheduler", self.interval, self._tick)
 
+    def stop(self):
+        """Stop scheduling, leaving XMRig resumed at its full allocation"""
+        if not self.running:
+            return
+        self.running = False
+        self.controller_loop.cancel("tariff-scheduler")
+        if self.applied_action in ("pause", "throttle") and self.monitor.is_xmrig_running():
+            self._apply("run")
+        self.cpu_controller.limit_threads("schedule", None)
+        self.decision = None
+
+    def _tick(self):
+        """Re-plan with live measurements and act on a changed decision"""
         try:
-            # Check if XMRig executable exists and is executable
-            if not os.path.exists(self.xmrig_path):
-                return False, f"XMRig executable not found: {self.xmrig_path}"
-
-            if not os.access(self.xmrig_path, os.X_OK):
-                return False, f"XMRig executable not executable: {self.xmrig_path}"
+            self.step()
+        except Exception as e:
+            self.last_action = f"Scheduler error: {e}"
+
+    def step(self, now=None):
+        """Plan for now and apply the decision if it differs from the last one applied
+
+        A pause is re-applied whenever XMRig is found running unpaused, so a
+        miner (re)started during a pause window does not mine through it.
+        """
+        hashrate = self.monitor.stats['hashrate']
+        if self.monitor.is_xmrig_running() and not self.xmrig_controller.paused and hashrate > 0:
+            # Remember full-allocation hashrate so a paused miner can still be planned for
+            if self.applied_action != "throttle":
+                self.reference_hashrate = hashrate
+        power = self.monitor.last_power if self.applied_action == "run" else None
+        hashrate = self.reference_hashrate or hashrate or self.monitor.stats['peak_hashrate'] or self.expected_hashrate
+        self.decision = self.plan(now or self.clock(), hashrate, power)
+        if self.decision['action'] != self.applied_action:
+            self._apply(self.decision['action'])
+        elif self.applied_action == "pause" and self.monitor.is_xmrig_running() and not self.xmrig_controller.paused:
+            # XMRig was started or restarted inside a pause window and came up hashing
+            self._apply("pause")
+        return self.decision
+
+    def _apply(self, action):
+        """Move XMRig to a run/throttle/pause state with pause/resume and live thread changes"""
+        if not self.monitor.is_xmrig_running():
+            # Only a full-speed decision starts a stopped miner; a throttle cap waits for the next start
+            if action != "run":
+                self.cpu_controller.limit_threads("schedule", self._throttle_threads() if action == "throttle" else None)
+                self.applied_action = action
+                return
+            success, message = self.xmrig_controller.start_mining()
+            if not success:
+                self.last_action = message
+                return
 
-            # Start XMRig process with proper pipe handling
-            self.xmrig_process = subprocess.Popen(
-                [self.xmrig_path, "-c", self.config_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                # Prevent blocking on pipes
-                stdin=subprocess.DEVNULL,
-                # Add environment and working directory
-                cwd=os.path.dirname(self.xmrig_path) if os.path.dirname(self.xmrig_path) else None
-            )
+        if action == "pause":
+            success, message = self.xmrig_controller.hold_pause("schedule")
+        else:
+            threads = self._throttle_threads() if action == "throttle" else None
+            self.cpu_controller.limit_threads("schedule", threads)
+            success, message = self.xmrig_controller.release_pause("schedule")
+            if success and action == "throttle":
+                message = f"Throttled to {threads} threads"
+        self.last_action = message
+        if success:
+            self.applied_action = action
+        self.xmrig_controller.events.emit("schedule", action=action, ok=success, message=message)
+
+    def _throttle_threads(self):
+        """Thread count for a throttled miner"""
+        return max(1, int(self.cpu_controller.user_thread_count() * self.throttle_fraction))
+
+    def get_status(self):
+        """Get a one-line description of the current decision"""
+        if not self.running:
+            return "Off"
+        if not self.decision:
+            return "Planning"
+        until = self.decision['until'].strftime('%H:%M') if self.decision['until'] else "-"
+        return (f"{self.decision['action'].capitalize()} at {self.decision['price']:.2f}/kWh "
+                f"({self.decision['margin']:+.3f}/h) until {until}")
+
+class PortAdvisor:
+    """Picks the pool port or fixed-difficulty suffix that gives a target share interval
+
+    A share is found on average every difficulty / hashrate seconds, so the
+    advisor takes XMRig's steady-state (15m, else 60s) hashrate and picks the
+    catalogue port whose starting difficulty is closest to hashrate * target.
+    When no port is close enough and the pool accepts "wallet+difficulty", a
+    fixed difficulty is used instead. Changes reach XMRig through config
+    watch; afterwards the observed share cadence is checked and corrected.
+    The clock (Unix time, like the monitor's share times) is injectable.
+    """
+
+    TOLERANCE = 2.0  # A tier within this factor of the ideal difficulty is good enough
+    GRACE = 60.0  # Seconds after a change before shares count (reconnect, vardiff settling)
+    MIN_SHARES = 8
+
+    def __init__(self, xmrig_controller, controller_loop, target_interval=30.0, interval=15.0, max_corrections=2,
+                 clock=None):
+        self.xmrig_controller = xmrig_controller
+        self.controller_loop = controller_loop
+        self.monitor = xmrig_controller.monitor
+        self.target_interval = target_interval
+        self.interval = interval
+        self.max_corrections = max_corrections
+        self.clock = clock or time.time
+        self.catalogue = None
+        self.applied = None
+        self.applied_at = None
+        self.corrections = 0
+        self.state = "idle"
+        self.observed_interval = None
+        self.running = False
+
+    def steady_hashrate(self):
+        """XMRig's longest reported hashrate average, or None while it has no 60s value yet"""
+        windows = self.monitor.stats.get('hashrate_windows') or []
+        for rate in reversed(windows[1:]):
+            if rate:
+                return rate
+        return None
 
-            # Wait up to 3 seconds for process to start properly
-            start_time = time.time()
-            while time.time() - start_time < 3.0:
-                if self.xmrig_process.poll() is None:
-                    # Process is running, start monitoring
-                    self.monitor.start_monitoring(self.xmrig_process)
-                    return True, "XMRig started successfully"
-                time.sleep(0.1)
+    @staticmethod
+    def _split_user(user):
+        """Split "wallet+difficulty" into the wallet part and the fixed difficulty (or None)"""
+        base, separator, difficulty = user.partition('+')
+        return base, int(difficulty) if separator and difficulty.isdigit() else None
 
-            # Process didn't start within timeout
-            if self.xmrig_process.poll() is not None:
-                return_code = self.xmrig_process.returncode
-                return False, f"XMRig failed to start (exit code: {return_code})"
-            else:
-                # Process started but took too long to respond
-                self.monitor.start_monitoring(self.xmrig_process)
-                return True, "XMRig started (initializing...)"
+    def recommend(self, catalogue, config=None, hashrate=None):
+        """Work out the best endpoint for the pool in the XMRig config; returns a dict or None"""
+        import math
 
-        except Exception as e:
-            return False, f"Failed to start XMRig: {e}"
+        config = config or self.xmrig_controller.load_config()
+        if not config or not config.get('pools'):
+            return None
+        pool_config = config['pools'][0]
+        host, _, port = pool_config.get('url', '').rpartition(':')
+        pool = catalogue.find_by_host(host) if host else None
+        hashrate = hashrate or self.steady_hashrate()
+        if not pool or not hashrate:
+            return None
 
-    def stop_mining(self):
-        """Stop XMRig mining process"""
-        if not self.monitor.is_xmrig_running():
-            return False, "XMRig is not running"
+        tls = bool(pool_config.get('tls'))
+        target = hashrate * self.target_interval
+        candidates = [endpoint for endpoint in catalogue.endpoints(pool, tls=tls) if endpoint['difficulty']]
+        # Stay on the current server if it publishes tiers, otherwise pick from all of them
+        same_host = [endpoint for endpoint in candidates if endpoint['host'] == host]
+        candidates = same_host or candidates
+        recommendation = {
+            'pool': pool['name'],
+            'hashrate': hashrate,
+            'target_difficulty': target,
+            'host': host,
+            'port': int(port) if port.isdigit() else pool['port'],
+            'fixed_difficulty': None,
+            'difficulty': None
+        }
+        if candidates:
+            best = min(candidates, key=lambda endpoint: abs(math.log(endpoint['difficulty'] / target)))
+            recommendation.update(host=best['host'], port=best['port'], difficulty=best['difficulty'])
+
+        fixed = pool.get('fixed_difficulty')
+        off_by = (max(recommendation['difficulty'], target) / min(recommendation['difficulty'], target)
+                  if recommendation['difficulty'] else None)
+        if fixed and (off_by is None or off_by > self.TOLERANCE):
+            difficulty = max(fixed.get('min', 1), int(round(target, -2) or target))
+            if fixed.get('max'):
+                difficulty = min(fixed['max'], difficulty)
+            recommendation.update(fixed_difficulty=difficulty, difficulty=difficulty)
+        recommendation['interval'] = (recommendation['difficulty'] / hashrate
+                                      if recommendation['difficulty'] else None)
+        return recommendation
+
+    def apply(self, recommendation, catalogue):
+        """Write the recommended endpoint into config.json and start checking the share cadence"""
+        self.catalogue = catalogue
+        self.corrections = 0
+        return self._write(recommendation)
+
+    def _write(self, recommendation):
+        config = self.xmrig_controller.load_config()
+        if not config or not config.get('pools'):
+            return False, "No pool configuration found"
+        pool_config = config['pools'][0]
+        pool_config['url'] = f"{recommendation['host']}:{recommendation['port']}"
+        user, current_fixed = self._split_user(pool_config.get('user', ''))
+        if recommendation['fixed_difficulty']:
+            pool_config['user'] = f"{user}+{recommendation['fixed_difficulty']}"
+        elif current_fixed:
+            pool_config['user'] = user  # Let the port's vardiff take over again
+        if not self.xmrig_controller.save_config(config):
+            return False, "Failed to update configuration"
+
+        self.applied = recommendation
+        self.applied_at = self.clock()
+        self.observed_interval = None
+        self.state = "checking"
+        self.xmrig_controller.events.emit("share_tier", url=pool_config['url'], difficulty=recommendation['difficulty'],
+                                          fixed=bool(recommendation['fixed_difficulty']))
+        if self.controller_loop.running and not self.running:
+            self.running = True
+            self.controller_loop.periodic("port-advisor", self.interval, self._tick)
+        suffix = f" with fixed difficulty {recommendation['fixed_difficulty']}" if recommendation['fixed_difficulty'] else ""
+        return True, f"Switched to {pool_config['url']}{suffix}"
+
+    def stop(self):
+        """Stop checking the share cadence"""
+        if self.running:
+            if self.state != "checking":
+                self.xmrig_controller.events.emit("share_tier_checked", state=self.state,
+                                                  observed_interval=self.observed_interval)
+            self.running = False
+            self.controller_loop.cancel("port-advisor")
 
+    def _tick(self):
         try:
-            if self.xmrig_process:
-                self.xmrig_process.terminate()
-                self.xmrig_process.wait(timeout=5)
-            self.monitor.stop_monitoring()
-            return True, "XMRig stopped"
-        except subprocess.TimeoutExpired:
-            self.xmrig_process.kill()
-            self.monitor.stop_monitoring()
-            return True, "XMRig force killed"
+            self.check()
         except Exception as e:
-            return False, f"Error stopping XMRig: {e}"
-
-    def restart_mining(self):
-        """Restart XMRig with new configuration"""
-        success, message = self.stop_mining()
-        if not success:
-            return False, message
+            self.state = f"error: {e}"
+
+    def check(self, now=None):
+        """Compare the share cadence since the last change with the target; correct once it has diverged"""
+        if self.state != "checking":
+            return self.state
+        now = now or self.clock()
+        since = self.applied_at + self.GRACE
+        shares = [(share_time, difficulty) for share_time, difficulty in self.monitor.share_times if share_time >= since]
+        if len(shares) < self.MIN_SHARES:
+            # No cadence to measure yet; give up if far fewer shares arrived than expected
+            if now - since > self.target_interval * self.MIN_SHARES * 4:
+                self.state = "too slow"
+                self.stop()
+            return self.state
+
+        elapsed = shares[-1][0] - shares[0][0]
+        self.observed_interval = elapsed / (len(shares) - 1)
+        if self.target_interval / self.TOLERANCE <= self.observed_interval <= self.target_interval * self.TOLERANCE:
+            self.state = "converged"
+            self.stop()
+        elif self.corrections < self.max_corrections:
+            # Hashrate as the pool sees it: the difficulty XMRig reported for each share over the time taken
+            self.corrections += 1
+            fallback = self.applied['difficulty'] or self.applied['target_difficulty']
+            work = sum(difficulty or fallback for _, difficulty in shares[1:])
+            recommendation = self.recommend(self.catalogue, hashrate=work / elapsed if elapsed else None)
+            if recommendation:
+                self._write(recommendation)
+        else:
+            self.state = "diverged"
+            self.stop()
+        return self.state
+
+    def get_status(self):
+        """Get a one-line description of the last change and its share cadence"""
+        if not self.applied:
+            return "Off"
+        observed = f"{self.observed_interval:.0f}s" if self.observed_interval else "-"
+        return f"{self.state.capitalize()}: share every {observed} (target {self.target_interval:.0f}s)"
+
+def controller_snapshot(xmrig_controller, pool_name=None):
+    """Flat, JSON-friendly status of a controller for the fleet stream"""
+    monitor = xmrig_controller.monitor
+    stats = monitor.get_stats_summary()
+    snapshot = {
+        'status': 'Paused' if stats['status'] == 'Running' and xmrig_controller.paused else stats['status'],
+        'pool': pool_name,
+        'hashrate': round(stats['hashrate'], 1),
+        'peak_hashrate': round(stats['peak_hashrate'], 1),
+        'accepted_shares': stats['accepted_shares'],
+        'rejected_shares': stats['rejected_shares'],
+        'cpu_usage': round(stats['cpu_usage']),
+        'memory_usage': round(stats['memory_usage']),
+        'temperature': None if stats['temperature'] is None else round(stats['temperature']),
+        'power': None if stats['power'] is None else round(stats['power'], 1),
+        'errors': len(monitor.log_buffer.errors(1000)),
+        'uptime': int(time.time() - monitor.start_time) if stats['status'] == 'Running' else 0
+    }
+    return snapshot
+
+# Pools with a public per-wallet stats API, and the account page to link to
+EARNINGS_APIS = {
+    'MoneroOcean': ("https://api.moneroocean.stream/miner/{wallet}/stats",
+                    "https://moneroocean.stream/#/account/{wallet}")
+}
+POOL_WEBSITES = {
+    'SupportXMR': 'https://supportxmr.com',
+    'MineXMR': 'https://minexmr.com',
+    'P2Pool': 'https://p2pool.io',
+    'Nanopool': 'https://xmr.nanopool.org',
+    'HashVault': 'https://hashvault.pro'
+}
+ATOMIC_UNITS = 1000000000000  # Piconero per XMR
+
+def fetch_earnings(pool_info, wallet_address, timeout=15):
+    """Balance, payouts and pool-side hashrate for a wallet; raises OSError or ValueError
+
+    Pools without a public API in EARNINGS_APIS come back with supported
+    False and their website, where known.
+    """
+    import urllib.request
+
+    name = pool_info.get('name')
+    if name not in EARNINGS_APIS:
+        return {'pool': name, 'supported': False, 'website': POOL_WEBSITES.get(name)}
+    api_url, account_url = EARNINGS_APIS[name]
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json',
+        'Connection': 'keep-alive'
+    }
+    request = urllib.request.Request(api_url.format(wallet=wallet_address), headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = json.loads(response.read().decode())
+
+    earnings = {'pool': name, 'supported': True, 'has_balance': 'balance' in data,
+                'url': account_url.format(wallet=wallet_address)}
+    if earnings['has_balance']:
+        balance = data.get('balance', 0) / ATOMIC_UNITS
+        paid = data.get('paid', 0) / ATOMIC_UNITS
+        min_payout = pool_info.get('min_payout', 0.003)
+        earnings.update({
+            'balance_xmr': balance,
+            'paid_xmr': paid,
+            'total_xmr': balance + paid,
+            'hashrate': data.get('hashrate', 0),
+            'hashrate_15m': data.get('hashrate_15m', 0),
+            'min_payout': min_payout,
+            'until_payout': max(0, min_payout - balance),
+            'last_payment_xmr': (data.get('last_payment') or 0) / ATOMIC_UNITS
+        })
+    return earnings
+
+class StatusServer:
+    """Streams controller status to fleet dashboards as JSON lines over TCP
+
+    Protocol: the client sends {"op": "subscribe"}; the server answers with a
+    "hello", a full "snapshot", then "delta" messages carrying only the fields
+    that changed, and a "heartbeat" when nothing changed for a while. Slow
+    clients that fall behind are resynchronised with a fresh snapshot.
+
+    A client may instead send {"op": "command", "command": "pause"} to run a
+    miner command; commands are only accepted from the local machine.
+    """
+
+    PROTOCOL_VERSION = 1
+
+    def __init__(self, snapshot_fn, host="127.0.0.1", port=7777, interval=1.0, heartbeat=10.0, name=None,
+                 command_fn=None):
+        import socket
+        self.snapshot_fn = snapshot_fn
+        self.command_fn = command_fn
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.name = name or socket.gethostname()
+        self.server = None
+        self.seq = 0
+        self.current = {}
+        self._subscribers = {}  # queue -> client writer
+        self._publisher = None
+
+    async def start(self):
+        """Start listening and publishing (call from the event loop)"""
+        import asyncio
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._publisher = asyncio.get_running_loop().create_task(self._publish())
+        return self.port
+
+    async def stop(self):
+        """Stop publishing and close all client connections"""
+        import asyncio
+        if self._publisher:
+            self._publisher.cancel()
+            await asyncio.gather(self._publisher, return_exceptions=True)
+        # End every subscription before waiting on the server, which may wait for live connections
+        for queue, writer in list(self._subscribers.items()):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+            if writer.transport.get_write_buffer_size():
+                writer.transport.abort()  # Stalled client: don't wait for its backlog to flush
+            else:
+                writer.close()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def _message(self, kind, data=None):
+        message = {"type": kind, "seq": self.seq, "ts": round(time.time(), 3)}
+        if data is not None:
+            message["data"] = data
+        return (json.dumps(message, separators=(',', ':')) + "\n").encode()
+
+    async def _publish(self):
+        """Compute one snapshot per interval and fan deltas out to subscribers"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        last_sent = time.monotonic()
+        while True:
+            try:
+                snapshot = await loop.run_in_executor(None, self.snapshot_fn)
+            except Exception as e:
+                snapshot = dict(self.current, status=f"Error: {e}")
+            delta = {key: value for key, value in snapshot.items() if self.current.get(key, object()) != value}
+            self.current = snapshot
+
+            if delta or time.monotonic() - last_sent >= self.heartbeat:
+                self.seq += 1
+                message = self._message("delta", delta) if delta else self._message("heartbeat")
+                last_sent = time.monotonic()
+                for queue in list(self._subscribers):
+                    try:
+                        queue.put_nowait(message)
+                    except asyncio.QueueFull:
+                        self._resync(queue)
+            await asyncio.sleep(self.interval)
+
+    def _resync(self, queue):
+        """Drop a slow client's backlog and queue a fresh snapshot instead"""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(self._message("snapshot", self.current))
+
+    async def handle_request(self, request, peer=None):
+        """Handle a non-subscribe request; returns a reply dict"""
+        import asyncio
+        import ipaddress
+        if request.get('op') != "command" or not self.command_fn:
+            return {"type": "error", "error": f"unknown op: {request.get('op')}"}
+        try:
+            local = peer is not None and ipaddress.ip_address(peer[0]).is_loopback
+        except ValueError:
+            local = False
+        if not local:
+            return {"type": "error", "error": "commands are only accepted from localhost"}
+
+        success, message = await asyncio.get_running_loop().run_in_executor(
+            None, self.command_fn, str(request.get('command')))
+        return {"type": "result", "ok": success, "message": message}
+
+    async def _handle_client(self, reader, writer):
+        import asyncio
+        queue = None
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=10)
+            request = json.loads(line or b"{}")
+            if request.get('op') != "subscribe":
+                reply = await self.handle_request(request, writer.get_extra_info('peername'))
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+                return
 
-        time.sleep(1)  # Brief pause
-        return self.start_mining()
+            hello = {"type": "hello", "host": self.name, "version": self.PROTOCOL_VERSION,
+                     "interval": self.interval}
+            writer.write((json.dumps(hello) + "\n").encode())
+            queue = asyncio.Queue(maxsize=64)
+            self._subscribers[queue] = writer
+            writer.write(self._message("snapshot", self.current))
+            await writer.drain()
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            pass
+        finally:
+            if queue is not None:
+                self._subscribers.pop(queue, None)
+            writer.close()
+
+def parse_listen_address(value, default_port=7777):
+    """Parse HOST:PORT (or just PORT) for the status server"""
+    host, _, port = value.rpartition(':')
+    return host or "0.0.0.0", int(port or default_port)
+
+def send_command(address, command, timeout=10.0):
+    """Run a miner command on a controller serving --listen; returns (success, message)"""
+    import socket
+    host, port = parse_listen_address(address)
+    if host in ("0.0.0.0", "::"):
+        host = "127.0.0.1"
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            sock.sendall((json.dumps({"op": "command", "command": command}) + "\n").encode())
+            reply = json.loads(sock.makefile('rb').readline() or b"{}")
+    except (OSError, ValueError) as e:
+        return False, f"Could not reach controller at {host}:{port}: {e}"
+    if reply.get('type') == "error":
+        return False, reply.get('error', "unknown error")
+    return bool(reply.get('ok')), reply.get('message', "")
+
+def parse_time_arg(value, now=None):
+    """Unix time for an ISO date/time such as 2026-10-19T06:30 or an age such as 90s, 15m, 2h or 1d"""
+    from datetime import datetime
+    now = time.time() if now is None else now
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    if value[-1:] in units:
+        try:
+            return now - float(value[:-1]) * units[value[-1]]
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value).timestamp()
+
+def print_events(events, as_json=False):
+    """Print queried events, one per line"""
+    for event in events:
+        if as_json:
+            print(json.dumps(event, separators=(',', ':')))
+            continue
+        fields = " ".join(f"{key}={value}" for key, value in event.items() if key not in ('time', 'mono', 'type'))
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event['time']))
+        print(f"{stamp}  {event['type']:<20} {fields}")
 
 class MiningUI:
     """Main terminal user interface"""
 
-    def __init__(self):
+    # History series shown as charts: (series, label, style)
+    HISTORY_CHARTS = (
+        ('hashrate', "Hashrate", "bright_green"),
+        ('shares', "Shares/h", "green"),
+        ('cpu', "CPU %", "cyan"),
+        ('temperature', "Temp °C", "yellow")
+    )
+
+    def __init__(self, listen=None):
+        from rich.console import Console
         self.console = Console()
-        self.pool_selector = PoolSelector()
+        self._pool_selector = None
         self.cpu_controller = CPUController()
         self.xmrig_controller = XMRigController()
+        self.xmrig_controller.cpu_controller = self.cpu_controller
         self.monitor = self.xmrig_controller.monitor
         self.running = True
+        self.notifications = []
+
+        # All background work runs on one event loop; the UI only submits to it
+        self.controller_loop = ControllerLoop()
+        self.controller_loop.start()
+        self.xmrig_controller.controller_loop = self.controller_loop
+        self.xmrig_controller.events.start(self.controller_loop)
+        self.monitor.start_sampling(self.controller_loop, history_path=get_script_dir() / "history.json")
+        self.load_governor = LoadGovernor(self.xmrig_controller, self.cpu_controller, self.controller_loop)
+        self.thermal_governor = ThermalGovernor(self.xmrig_controller, self.cpu_controller, self.controller_loop)
 
         # Load saved settings
+        get_settings_store().events = self.xmrig_controller.events
         settings = load_user_settings()
+        if get_settings_store().last_error:
+            self._notify(f"[yellow]{get_settings_store().last_error}[/yellow]")
         self.selected_pool = settings.get('selected_pool')
         self.wallet_address = settings.get('wallet_address')
+        self.history_window = settings.get('history_window', "1h")
+        if self.history_window not in MetricHistory.ARCHIVES:
+            self.history_window = "1h"
+        schedule_settings = settings.get('schedule') or {}
+        self.tariff_scheduler = TariffScheduler(self.xmrig_controller, self.cpu_controller, self.controller_loop,
+                                                schedule_settings, self._pool_fee())
+        if schedule_settings.get('enabled'):
+            self.tariff_scheduler.start()
+        self.port_advisor = PortAdvisor(self.xmrig_controller, self.controller_loop,
+                                        settings.get('share_interval', 30.0))
+        if settings.get('warm_standby'):
+            self.xmrig_controller.standby = WarmStandby(self.xmrig_controller, self.controller_loop)
+        memory_settings = settings.get('memory_planner') or {}
+        self.memory_planner = MemoryPlanner(self.xmrig_controller, self.cpu_controller, self.controller_loop,
+                                            memory_settings.get('auto', False), memory_settings.get('hashrates'),
+                                            avoid_fast=memory_settings.get('avoid_fast', False))
+        self.xmrig_controller.memory_planner = self.memory_planner
+        self.memory_planner.start()
+        if settings.get('adaptive_throttling'):
+            self.load_governor.start()
+        thermal_settings = settings.get('thermal_governor') or {}
+        if thermal_settings.get('enabled'):
+            self.thermal_governor.max_temp = thermal_settings.get('max_temp', 80.0)
+            self.thermal_governor.max_power = thermal_settings.get('max_power')
+            self.thermal_governor.start()
+        cgroup_settings = settings.get('cgroup') or {}
+        if cgroup_settings.get('enabled'):
+            self.cpu_controller.enable_cgroup(CgroupManager(), cgroup_settings.get('memory_max_mb'))
+
+        self.status_server = None
+        if listen:
+            host, port = parse_listen_address(listen)
+            self.status_server = StatusServer(self.snapshot, host, port, command_fn=self.xmrig_controller.run_command)
+            self.controller_loop.call(self.status_server.start())
+
+    def snapshot(self):
+        """Status snapshot published to fleet dashboards"""
+        pool_name = self.selected_pool['name'] if self.selected_pool else None
+        return controller_snapshot(self.xmrig_controller, pool_name)
+
+    def _pool_fee(self):
+        """Fee of the selected pool in percent"""
+        return (self.selected_pool or {}).get('fee', 0.0)
+
+    @property
+    def pool_selector(self):
+        """Pool selector, created the first time pools are needed"""
+        if self._pool_selector is None:
+            self._pool_selector = PoolSelector()
+        return self._pool_selector
+
+    def _notify(self, message):
+        """Queue a status message for the top of the next screen refresh"""
+        self.notifications.append(message)
+
+    def _wait_for_enter(self):
+        """Keep a detail view on screen until the user is done reading it"""
+        from rich.prompt import Prompt
+        Prompt.ask("\n[dim]Press Enter to return to the menu[/dim]", default="",
+                   show_default=False, console=self.console)
+
+    def shutdown(self):
+        """Stop governors and mining, then cancel all background tasks"""
+        self.port_advisor.stop()
+        self.tariff_scheduler.stop()
+        self.thermal_governor.stop()
+        self.load_governor.stop()
+        self.memory_planner.stop()
+        if self.memory_planner.hashrates:
+            # Keep measured fast/light hashrates for the next trade-off report
+            update_user_settings(memory_planner=self.memory_planner.settings())
+        self.xmrig_controller.stop_mining()
+        if self.status_server:
+            self.controller_loop.call(self.status_server.stop(), timeout=5)
+        self.monitor.save_history()
+        self.xmrig_controller.events.close()
+        self.controller_loop.stop()
 
     def _get_performance_level(self, hashrate):
         """Determine performance level based on hashrate"""
@@ -621,6 +4782,7 @@ class MiningUI:
 
     def _format_hashrate(self, hashrate):
         """Format hashrate with appropriate units and visual styling"""
+        from rich.text import Text
         if hashrate <= 0:
             return Text("N/A", style="dim")
 
@@ -653,6 +4815,7 @@ class MiningUI:
 
     def _get_status_style(self, status):
         """Get styled text for mining status"""
+        from rich.text import Text
         if status == "Running":
             return Text("▶️ Running", style="bold bright_green")
         elif status == "Stopped":
@@ -664,6 +4827,9 @@ class MiningUI:
 
     def create_stats_panel(self):
         """Create statistics display panel"""
+        from rich.table import Table
+        from rich.panel import Panel
+        from rich.text import Text
         stats = self.monitor.get_stats_summary()
 
         table = Table(title="Mining Statistics")
@@ -700,12 +4866,96 @@ class MiningUI:
         mem_style = "green" if stats['memory_usage'] < 70 else "yellow" if stats['memory_usage'] < 90 else "red"
         table.add_row("Memory Usage", Text(f"{stats['memory_usage']:.1f}%", style=mem_style))
 
+        # Thermal and power readings (only shown where the platform exposes them)
+        if stats['temperature'] is not None:
+            temp_style = "green" if stats['temperature'] < 70 else "yellow" if stats['temperature'] < 85 else "red"
+            table.add_row("CPU Temp", Text(f"{stats['temperature']:.0f}°C", style=temp_style))
+        if stats['cpu_freq'] is not None:
+            table.add_row("CPU Freq", Text(f"{stats['cpu_freq'] / 1000:.2f} GHz", style="cyan"))
+        if stats['power'] is not None:
+            table.add_row("Package Power", Text(f"{stats['power']:.1f} W", style="cyan"))
+        if stats['hashes_per_joule'] is not None:
+            table.add_row("Efficiency", Text(f"{stats['hashes_per_joule']:.1f} H/J", style="bright_green"))
+
         table.add_row("Uptime", Text(stats['uptime'], style="cyan"))
 
+        # Per-core heatmap once XMRig has reported per-thread hashrates
+        efficiency = self.monitor.get_core_efficiency()
+        if efficiency and efficiency['cores']:
+            table.add_row("Cores", self._create_core_heatmap(efficiency))
+            if efficiency['outliers']:
+                table.add_row("Re-place", self._format_outliers(efficiency), style="yellow")
+
+        if self.load_governor.running:
+            throttle_style = "yellow" if self.load_governor.state in ("paused", "throttled") else "green"
+            table.add_row("Throttling", Text(self.load_governor.get_status(), style=throttle_style))
+        if self.thermal_governor.running:
+            thermal_style = "yellow" if self.thermal_governor.state == "limiting" else "green"
+            table.add_row("Thermal Governor", Text(self.thermal_governor.get_status(), style=thermal_style))
+        if self.tariff_scheduler.running:
+            decision = self.tariff_scheduler.decision or {}
+            schedule_style = {"run": "green", "throttle": "yellow", "pause": "dim"}.get(decision.get('action'), "white")
+            table.add_row("Schedule", Text(self.tariff_scheduler.get_status(), style=schedule_style))
+        if self.port_advisor.applied:
+            tier_style = {"converged": "green", "checking": "cyan"}.get(self.port_advisor.state, "yellow")
+            table.add_row("Share Tier", Text(self.port_advisor.get_status(), style=tier_style))
+        standby = self.xmrig_controller.standby
+        if standby and stats['status'] == "Running":
+            standby_style = {"ready": "green", "waiting": "dim", "starting": "cyan"}.get(standby.state, "yellow")
+            table.add_row("Standby", Text(standby.get_status(), style=standby_style))
+        if self.memory_planner.swapping or (self.memory_planner.auto and self.memory_planner.last_plan):
+            memory_style = "red" if self.memory_planner.swapping else "green"
+            table.add_row("Memory Plan", Text(self.memory_planner.get_status(), style=memory_style))
+
+        # Trends over the selected history window
+        width = max(10, min(60, self.console.width // 2 - 30))
+        for name, label, style in self.HISTORY_CHARTS:
+            if self.monitor.history.has_data(name, self.history_window):
+                values = self.monitor.history.values(name, self.history_window, width)
+                table.add_row(f"{label} ({self.history_window})", Text(sparkline(values), style=style))
+
         return Panel(table, title="Statistics", border_style="blue")
 
+    def _create_core_heatmap(self, efficiency):
+        """One line per NUMA node and L3 cache; one cell per hashing thread, grouped by core"""
+        from rich.text import Text
+        groups = {}
+        for core in efficiency['cores'].values():
+            groups.setdefault((core['node'], core['l3']), []).append(core)
+
+        text = Text()
+        for (node, l3), cores in sorted(groups.items()):
+            if text:
+                text.append("\n")
+            text.append(f"N{node} L3:{l3[1]} ", style="dim")
+            for core in sorted(cores, key=lambda core: core['core']):
+                for cpu, ratio in sorted(core['thread_ratios'].items()):
+                    style = "green" if ratio >= 0.95 else "yellow" if ratio >= 0.85 else "bold red"
+                    text.append("█", style=style)
+                text.append(" ")
+        if efficiency['unpinned']:
+            text.append(f"\n+{len(efficiency['unpinned'])} threads not pinned to a known CPU", style="dim")
+        return text
+
+    def _format_outliers(self, efficiency):
+        """Describe the slowest cores and where their threads could move"""
+        idle = list(efficiency['idle'])
+        lines = []
+        for core in efficiency['outliers'][:3]:
+            cpus = ",".join(str(cpu) for cpu in sorted(core['threads']))
+            line = f"CPU {cpus}: {core['ratio'] * 100:.0f}% of median"
+            if idle:
+                target = idle.pop(0)
+                line += f" → try CPU {','.join(str(cpu) for cpu in sorted(target['cpus']))}"
+            lines.append(line)
+        if len(efficiency['outliers']) > 3:
+            lines.append(f"... and {len(efficiency['outliers']) - 3} more")
+        return "\n".join(lines)
+
     def create_menu_panel(self):
         """Create control menu panel"""
+        from rich.panel import Panel
+        from rich.text import Text
         menu_text = Text()
         menu_text.append("Control Menu:\n\n", style="bold blue")
 
@@ -730,16 +4980,39 @@ class MiningUI:
         menu_text.append("11. Troubleshoot Connection\n", style="white")
         menu_text.append("12. Reset Settings\n", style="yellow")
         menu_text.append("13. Check Earnings\n", style="bold green")
+        throttle_state = "On" if self.load_governor.running else "Off"
+        menu_text.append(f"14. Adaptive Throttling ({throttle_state})\n", style="cyan")
+        thermal_state = "On" if self.thermal_governor.running else "Off"
+        menu_text.append(f"15. Thermal/Power Governor ({thermal_state})\n", style="cyan")
+        menu_text.append("16. Miner Commands (pause/resume/reports)\n", style="cyan")
+        schedule_state = "On" if self.tariff_scheduler.running else "Off"
+        menu_text.append(f"17. Tariff Schedule ({schedule_state})\n", style="cyan")
+        menu_text.append(f"18. History Charts ({self.history_window})\n", style="white")
+        standby_state = "On" if self.xmrig_controller.standby else "Off"
+        menu_text.append(f"19. Warm Standby ({standby_state})\n", style="cyan")
+        active_profile = get_settings_store().profiles()[1]
+        menu_text.append(f"20. Profiles (Current: {active_profile or 'none'})\n", style="white")
+        memory_state = "Auto" if self.memory_planner.auto else "Manual"
+        menu_text.append(f"21. Memory Planner ({memory_state})\n", style="cyan")
         menu_text.append("0. Exit\n", style="red")
 
         return Panel(menu_text, title="Menu", border_style="green")
 
     def _display_ui(self):
         """Display the current UI state"""
+        from rich.columns import Columns
+        from rich.align import Align
         self.console.clear()
         self.console.print("[bold blue]🚀 Monero Mining Controller[/bold blue]")
         self.console.print("[dim]Control your XMRig mining with dynamic CPU allocation[/dim]\n")
 
+        # Results of the last action, shown once
+        for message in self.notifications:
+            self.console.print(message)
+        if self.notifications:
+            self.console.print()
+        self.notifications = []
+
         # Show welcome message if settings are configured
         if self.selected_pool and self.wallet_address:
             self.console.print(f"[green]✅ Ready to mine![/green] Pool: {self.selected_pool['name']} | Wallet: {self.wallet_address[:10]}...")
@@ -756,15 +5029,15 @@ class MiningUI:
     def handle_menu_choice(self, choice):
         """Handle menu selection"""
         if choice == "1":
+            self._refresh_pool_catalogue()
             old_pool = self.selected_pool
             self.selected_pool = self.pool_selector.select_pool_interactive(self.console)
             if self.selected_pool:
                 self.console.print(f"[green]Pool selected: {self.selected_pool['name']}[/green]")
                 # Save setting if it changed
                 if self.selected_pool != old_pool:
-                    settings = load_user_settings()
-                    settings['selected_pool'] = self.selected_pool
-                    save_user_settings(settings)
+                    self.tariff_scheduler.pool_fee = self._pool_fee()
+                    update_user_settings(selected_pool=self.selected_pool)
 
         elif choice == "2":
             self._set_wallet_address()
@@ -774,59 +5047,56 @@ class MiningUI:
 
         elif choice == "4":
             if not self.selected_pool:
-                self.console.print("[red]Please select a mining pool first![/red]")
-                time.sleep(2)  # Brief pause to show message
+                self._notify("[red]Please select a mining pool first![/red]")
                 return
             if not self.wallet_address:
-                self.console.print("[red]Please set your wallet address first![/red]")
-                time.sleep(2)  # Brief pause to show message
+                self._notify("[red]Please set your wallet address first![/red]")
                 return
 
             # Update config with pool and wallet
-            if self.xmrig_controller.update_pool_config(self.selected_pool, self.wallet_address, tls_enabled=False):
+            if self.xmrig_controller.update_pool_config(self.selected_pool, self.wallet_address,
+                                                        **pool_tls_options(self.selected_pool)):
                 self.console.print("[yellow]Starting XMRig...[/yellow]")
                 success, message = self.xmrig_controller.start_mining()
                 if success:
-                    self.console.print(f"[green]{message}[/green]")
-                    self.console.print("[dim]Check the stats panel for mining status and hashrate[/dim]")
+                    self._notify(f"[green]{message}[/green]")
+                    self._notify("[dim]Check the stats panel for mining status and hashrate[/dim]")
                 else:
-                    self.console.print(f"[red]{message}[/red]")
-                    self.console.print("[yellow]Check the XMRig logs for more details (option 9)[/yellow]")
+                    self._notify(f"[red]{message}[/red]")
+                    self._notify("[yellow]Check the XMRig logs for more details (option 9)[/yellow]")
             else:
-                self.console.print("[red]Failed to update configuration[/red]")
-            time.sleep(3)  # Longer pause to show message
+                self._notify("[red]Failed to update configuration[/red]")
 
         elif choice == "5":
             success, message = self.xmrig_controller.stop_mining()
             if success:
-                self.console.print(f"[yellow]{message}[/yellow]")
+                self._notify(f"[yellow]{message}[/yellow]")
             else:
-                self.console.print(f"[red]{message}[/red]")
-            time.sleep(2)  # Brief pause to show message
+                self._notify(f"[red]{message}[/red]")
 
         elif choice == "6":
             if not self.selected_pool or not self.wallet_address:
-                self.console.print("[red]Please select pool and set wallet address first![/red]")
-                time.sleep(2)  # Brief pause to show message
+                self._notify("[red]Please select pool and set wallet address first![/red]")
                 return
 
-            if self.xmrig_controller.update_pool_config(self.selected_pool, self.wallet_address, tls_enabled=False):
+            if self.xmrig_controller.update_pool_config(self.selected_pool, self.wallet_address,
+                                                        **pool_tls_options(self.selected_pool)):
                 success, message = self.xmrig_controller.restart_mining()
                 if success:
-                    self.console.print(f"[green]{message}[/green]")
+                    self._notify(f"[green]{message}[/green]")
                 else:
-                    self.console.print(f"[red]{message}[/red]")
+                    self._notify(f"[red]{message}[/red]")
             else:
-                self.console.print("[red]Failed to update configuration[/red]")
-            time.sleep(2)  # Brief pause to show message
+                self._notify("[red]Failed to update configuration[/red]")
 
         elif choice == "7":
             self._view_configuration()
-            time.sleep(3)  # Longer pause for configuration viewing
+            self._wait_for_enter()
 
         elif choice == "8":
+            self._refresh_pool_catalogue()
             self.pool_selector.display_pool_comparison(self.console)
-            time.sleep(3)  # Longer pause for pool comparison viewing
+            self._wait_for_enter()
 
         elif choice == "9":
             self._view_xmrig_logs()
@@ -843,33 +5113,67 @@ class MiningUI:
         elif choice == "13":
             self._check_earnings()
 
+        elif choice == "14":
+            self._toggle_adaptive_throttling()
+
+        elif choice == "15":
+            self._toggle_thermal_governor()
+
+        elif choice == "16":
+            self._miner_commands()
+
+        elif choice == "17":
+            self._configure_schedule()
+
+        elif choice == "18":
+            self._show_history_charts()
+
+        elif choice == "19":
+            self._toggle_warm_standby()
+
+        elif choice == "20":
+            self._manage_profiles()
+
+        elif choice == "21":
+            self._memory_planner()
+
         elif choice == "0":
-            self.xmrig_controller.stop_mining()
             self.running = False
 
         else:
-            self.console.print("[red]Invalid choice![/red]")
-            time.sleep(2)  # Brief pause for error message
+            self._notify("[red]Invalid choice![/red]")
+
+    def _refresh_pool_catalogue(self):
+        """Refresh the pool list from its signed remote source when one is configured and stale"""
+        settings = load_user_settings()
+        if not (settings.get('pool_catalogue') or {}).get('url'):
+            return
+        with self.console.status("Checking for an updated pool list..."):
+            result = self.controller_loop.run_blocking(self.pool_selector.refresh_remote, settings)
+        if result:
+            success, message = result
+            self.console.print(f"[green]{message}[/green]" if success else f"[yellow]⚠️  {message}[/yellow]")
 
     def _set_wallet_address(self):
         """Set wallet address"""
+        from rich.prompt import Prompt
         while True:
-            wallet = Prompt.ask("Enter your Monero wallet address")
-            if wallet and len(wallet) > 50:  # Basic validation
+            wallet = Prompt.ask("Enter your Monero wallet address").strip()
+            ok, message = validate_wallet_address(wallet)
+            if ok:
                 old_wallet = self.wallet_address
                 self.wallet_address = wallet
-                self.console.print("[green]Wallet address set![/green]")
+                self.console.print(f"[green]Wallet address set! ({message})[/green]")
                 # Save setting if it changed
                 if self.wallet_address != old_wallet:
-                    settings = load_user_settings()
-                    settings['wallet_address'] = self.wallet_address
-                    save_user_settings(settings)
+                    update_user_settings(wallet_address=self.wallet_address)
                 break
             else:
-                self.console.print("[red]Invalid wallet address. Please try again.[/red]")
+                self.console.print(f"[red]{message}. Please try again.[/red]")
 
     def _configure_cpu(self):
         """Configure CPU usage"""
+        from rich.prompt import IntPrompt
         cpu_info = self.cpu_controller.get_cpu_info()
         max_cores = cpu_info['logical_cores']
 
@@ -892,6 +5196,7 @@ class MiningUI:
             )
 
             if 0 <= priority <= 5:
+                self._configure_cgroup()
                 if self.cpu_controller.update_cpu_config(max_threads=threads, priority=priority):
                     self.console.print(f"[green]CPU configured: {threads} threads, priority {priority}[/green]")
                 else:
@@ -901,6 +5206,334 @@ class MiningUI:
         else:
             self.console.print("[red]Invalid thread count[/red]")
 
+    def _toggle_adaptive_throttling(self):
+        """Turn the load-adaptive governor on or off"""
+        if self.load_governor.running:
+            self.load_governor.stop()
+            update_user_settings(adaptive_throttling=False)
+            self._notify("[yellow]Adaptive throttling disabled - XMRig restored to full allocation[/yellow]")
+        else:
+            self.load_governor.start()
+            update_user_settings(adaptive_throttling=True)
+            self._notify("[green]Adaptive throttling enabled - mining will yield CPU to foreground work[/green]")
+
+    def _toggle_warm_standby(self):
+        """Turn the warm standby for fast restarts on or off"""
+        standby = self.xmrig_controller.standby
+        if standby:
+            standby.stop()
+            self.xmrig_controller.standby = None
+            update_user_settings(warm_standby=False)
+            self._notify("[yellow]Warm standby disabled - restarts rebuild the RandomX dataset[/yellow]")
+        else:
+            standby = WarmStandby(self.xmrig_controller, self.controller_loop)
+            ok, reason = standby.check_memory()
+            if not ok:
+                self._notify(f"[red]Warm standby not enabled: {reason}[/red]")
+                return
+            self.xmrig_controller.standby = standby
+            update_user_settings(warm_standby=True)
+            if self.monitor.is_xmrig_running():
+                standby.start()
+            self._notify("[green]Warm standby enabled - restarts cut over to a paused miner with its dataset built[/green]")
+
+    def _manage_profiles(self):
+        """Save, switch between and delete named pool/wallet/CPU/schedule profiles"""
+        from rich.prompt import Prompt, Confirm
+        from rich.table import Table
+        store = get_settings_store()
+        names, active = store.profiles()
+
+        table = Table(title="Profiles")
+        table.add_column("Name", style="cyan")
+        table.add_column("Pool")
+        table.add_column("Wallet")
+        table.add_column("CPU")
+        table.add_column("Schedule")
+        for name in names:
+            profile = store.get_profile(name)
+            wallet = profile.get('wallet_address') or ""
+            cpu = profile.get('cpu') or {}
+            table.add_row(
+                f"{name} (active)" if name == active else name,
+                (profile.get('selected_pool') or {}).get('name', "-"),
+                f"{wallet[:8]}...{wallet[-6:]}" if wallet else "-",
+                f"{len(CPUController.thread_list(cpu))} threads" if CPUController.thread_list(cpu) else "all threads",
+                "On" if (profile.get('schedule') or {}).get('enabled') else "Off"
+            )
+        if names:
+            self.console.print(table)
+        else:
+            self.console.print("[dim]No profiles saved yet[/dim]")
+
+        action = Prompt.ask("[s]ave current settings, s[w]itch, [d]elete, or Enter to go back",
+                            choices=["s", "w", "d", ""], default="", show_choices=False, console=self.console)
+        if action == "s":
+            name = Prompt.ask("Profile name", default=active or "default", console=self.console).strip()
+            if not name:
+                return
+            if name in names and name != active and not Confirm.ask(f"Overwrite profile {name}?", default=False):
+                return
+            values = {
+                'selected_pool': self.selected_pool,
+                'wallet_address': self.wallet_address,
+                'cpu': self.cpu_controller.get_current_config(),
+                'schedule': store.get('schedule')
+            }
+            store.save_profile(name, values)
+            self._notify(f"[green]Saved profile {name}[/green]")
+        elif action == "w" and names:
+            name = Prompt.ask("Switch to", choices=names, default=active if active in names else names[0],
+                              console=self.console)
+            self._switch_profile(name)
+        elif action == "d" and names:
+            name = Prompt.ask("Delete", choices=names, console=self.console)
+            if Confirm.ask(f"Delete profile {name}?", default=False):
+                store.delete_profile(name)
+                self._notify(f"[yellow]Deleted profile {name}[/yellow]")
+
+    def _switch_profile(self, name):
+        """Apply a profile to the running controller without restarting XMRig"""
+        success, message, profile = apply_profile(name, self.xmrig_controller)
+        if profile is None:
+            self._notify(f"[red]{message}[/red]")
+            return
+        self.selected_pool = profile.get('selected_pool')
+        self.wallet_address = profile.get('wallet_address')
+        schedule = profile.get('schedule') or {}
+        scheduler = self.tariff_scheduler
+        scheduler.configure(schedule)
+        scheduler.pool_fee = self._pool_fee()
+        if schedule.get('enabled') and not scheduler.running:
+            scheduler.start()
+        elif not schedule.get('enabled') and scheduler.running:
+            scheduler.stop()
+        if self.cpu_controller.cgroup and self.cpu_controller.cgroup.path.exists():
+            self.cpu_controller.cgroup.apply(self.cpu_controller.get_cgroup_limits())
+        self._notify(f"[green]{message}[/green]" if success else f"[red]{message}[/red]")
+
+    def _memory_planner(self):
+        """Show the RandomX memory plan and the fast/light trade-off, and switch auto mode"""
+        from rich.table import Table
+        from rich.prompt import Confirm
+        planner = self.memory_planner
+        plan = planner.plan()
+        tradeoff = planner.tradeoff(plan)
+
+        standby = ", counting the warm standby" if plan['copies'] > 1 else ""
+        table = Table(title=f"Memory plan: {plan['threads']} threads, {plan['numa_nodes']} NUMA node(s), "
+                            f"{plan['available_mb']} MB available{standby}")
+        table.add_column("Mode", style="cyan")
+        table.add_column("Footprint", justify="right")
+        table.add_column("Hashrate", justify="right")
+        table.add_column("Fits")
+        source = "measured" if tradeoff['measured'] else "estimated"
+        for mode, footprint_mb in (("fast", plan['fast_mb']), ("light", plan['light_mb'])):
+            rate = tradeoff[mode]
+            relative = 1.0 if mode == "fast" else tradeoff['ratio']
+            rate_text = f"{rate:.0f} H/s" if rate else f"{relative * 100:.0f}%"
+            fits = footprint_mb <= plan['available_mb'] - planner.HEADROOM_MB
+            table.add_row(mode + (" (chosen)" if mode == plan['mode'] else ""), f"{footprint_mb} MB", rate_text,
+                          "[green]yes[/green]" if fits else "[red]no[/red]")
+        self.console.print(table)
+        self.console.print(f"Configured: randomx.mode {plan['configured']} "
+                           f"({'fits' if plan['configured_fits'] else '[red]does not fit[/red]'})")
+        self.console.print(f"Light mode saves {tradeoff['saved_mb']} MB at a cost of {100 - tradeoff['ratio'] * 100:.0f}% "
+                           f"of the hashrate ({source})")
+        hugepages = plan['hugepages']
+        if hugepages:
+            self.console.print(f"Hugepages: {hugepages['free']} of {hugepages['total']} free, "
+                               f"{plan['footprint']['hugepages']} wanted")
+        if plan['numa_nodes'] > 1 and plan['mode'] == "fast" and not plan['numa']:
+            self.console.print("[yellow]One dataset per NUMA node does not fit; randomx.numa would be turned off[/yellow]")
+        if not plan['fits']:
+            self.console.print(f"[red]Even light mode does not fit; at most {plan['max_threads']} threads would[/red]")
+        if planner.last_action:
+            self.console.print(f"[dim]{planner.last_action}[/dim]")
+
+        if planner.auto:
+            if Confirm.ask("Turn automatic mode selection off?", default=False, console=self.console):
+                planner.auto = False
+                update_user_settings(memory_planner=planner.settings())
+                self._notify("[yellow]Memory planner: randomx.mode is left as configured[/yellow]")
+            return
+        if not Confirm.ask("Pick fast or light mode automatically before each start?", default=True, console=self.console):
+            return
+        planner.auto = True
+        planner.avoid_fast = False
+        update_user_settings(memory_planner=planner.settings())
+        changed, message = planner.apply(plan)
+        if changed and self.monitor.is_xmrig_running():
+            if Confirm.ask(f"{message}. Restart XMRig now?", default=True, console=self.console):
+                self.xmrig_controller.stop_mining()  # A warm standby holds the old layout's dataset
+                success, message = self.xmrig_controller.start_mining()
+                self._notify(f"[green]{message}[/green]" if success else f"[red]{message}[/red]")
+                return
+        self._notify(f"[green]Memory planner on: {message}[/green]")
+
+    def _toggle_thermal_governor(self):
+        """Turn the thermal/power governor on or off"""
+        from rich.prompt import Prompt
+        if self.thermal_governor.running:
+            self.thermal_governor.stop()
+            update_user_settings(thermal_governor={'enabled': False})
+            self._notify("[yellow]Thermal/power governor disabled[/yellow]")
+        else:
+            max_temp = float(Prompt.ask("Target maximum CPU temperature (°C)", default=str(self.thermal_governor.max_temp)))
+            max_power = float(Prompt.ask("Target maximum package power in W (0 = no limit)", default="0")) or None
+            self.thermal_governor.max_temp = max_temp
+            self.thermal_governor.max_power = max_power
+            self.thermal_governor.start()
+            update_user_settings(thermal_governor={'enabled': True, 'max_temp': max_temp, 'max_power': max_power})
+            self._notify(f"[green]Thermal/power governor enabled (≤ {max_temp:.0f}°C"
+                         + (f", ≤ {max_power:.0f} W" if max_power else "") + ")[/green]")
+
+    def _miner_commands(self):
+        """Pause, resume or ask the running XMRig for a report"""
+        from rich.prompt import Prompt
+        if not self.monitor.is_xmrig_running():
+            self._notify("[red]XMRig is not running - start mining first (option 4)[/red]")
+            return
+
+        commands = {"1": "hashrate", "2": "results", "3": "connection",
+                    "4": "resume" if self.xmrig_controller.paused else "pause"}
+        self.console.print("\n[bold blue]Miner Commands[/bold blue]")
+        self.console.print("1. Hashrate report (per thread)")
+        self.console.print("2. Results report (shares)")
+        self.console.print("3. Connection report")
+        self.console.print(f"4. {commands['4'].capitalize()} mining (keeps the RandomX dataset)")
+        choice = Prompt.ask("Select command (0 to cancel)", choices=list(commands) + ["0"], default="0")
+        if choice == "0":
+            return
+
+        command = commands[choice]
+        success, message = self.xmrig_controller.run_command(command)
+        if not success:
+            self._notify(f"[red]{message}[/red]")
+        elif command in ("pause", "resume"):
+            self._notify(f"[green]{message}[/green]")
+        else:
+            self.console.print(f"\n[bold]XMRig {command} report:[/bold]")
+            self._print_log_lines(message.splitlines())
+            self._wait_for_enter()
+
+    def _show_schedule_plan(self):
+        """Print the next 24 hours of tariff decisions"""
+        from rich.table import Table
+        scheduler = self.tariff_scheduler
+        stats = self.monitor.stats
+        hashrate = scheduler.reference_hashrate or stats['hashrate'] or stats['peak_hashrate'] or scheduler.expected_hashrate
+        table = Table(title=f"Plan for the next 24h at {hashrate:.0f} H/s")
+        table.add_column("From", style="cyan")
+        table.add_column("Window")
+        table.add_column("Price/kWh", justify="right")
+        table.add_column("Revenue/h", justify="right", style="green")
+        table.add_column("Cost/h", justify="right", style="red")
+        table.add_column("Action")
+        for segment in scheduler.plan_day(scheduler.clock(), hashrate, self.monitor.last_power):
+            style = {"run": "green", "throttle": "yellow", "pause": "dim"}[segment['action']]
+            table.add_row(segment['start'].strftime("%H:%M"), segment['window'] or "default",
+                          f"{segment['price']:.3f}", f"{segment['revenue']:.4f}", f"{segment['cost']:.4f}",
+                          f"[{style}]{segment['action']}[/{style}]")
+        self.console.print(table)
+
+    def _configure_schedule(self):
+        """Turn the tariff scheduler on or off and edit its main settings"""
+        from rich.prompt import Prompt, Confirm
+        schedule = get_settings_store().get('schedule') or {}
+        scheduler = self.tariff_scheduler
+        if scheduler.running:
+            self._show_schedule_plan()
+            if Confirm.ask("Disable the tariff schedule?", default=False):
+                scheduler.stop()
+                schedule['enabled'] = False
+                update_user_settings(schedule=schedule)
+                self._notify("[yellow]Tariff schedule disabled - XMRig restored to full allocation[/yellow]")
+            return
+
+        self.console.print("\n[bold blue]Tariff Schedule[/bold blue]")
+        self.console.print("[dim]Prices are per kWh; more windows can be added to 'schedule' in user_settings.json[/dim]")
+        window = (schedule.get('windows') or [{'name': "cheap", 'start': "23:00", 'end': "07:00", 'price': 0.10}])[0]
+        schedule['default_price'] = float(Prompt.ask("Default electricity price", default=str(schedule.get('default_price', 0.30))))
+        window['start'] = Prompt.ask("Cheap window start (HH:MM)", default=window['start'])
+        window['end'] = Prompt.ask("Cheap window end (HH:MM)", default=window['end'])
+        window['price'] = float(Prompt.ask("Cheap window price", default=str(window['price'])))
+        schedule['windows'] = [window] + (schedule.get('windows') or [])[1:]
+        schedule['xmr_price'] = float(Prompt.ask("XMR price in the same currency", default=str(schedule.get('xmr_price', 150.0))))
+        network = float(Prompt.ask("Network hashrate (GH/s)", default=str(schedule.get('network_hashrate', 5e9) / 1e9)))
+        schedule['network_hashrate'] = network * 1e9
+        measured = self.monitor.last_power or schedule.get('power_watts', 100.0)
+        schedule['power_watts'] = float(Prompt.ask("Power draw while mining (W)", default=f"{measured:.0f}"))
+        expected = self.monitor.stats['peak_hashrate'] or schedule.get('expected_hashrate', 0.0)
+        schedule['expected_hashrate'] = float(Prompt.ask("Expected hashrate until measured (H/s)", default=f"{expected:.0f}"))
+        schedule['run_margin'] = float(Prompt.ask("Run at full speed above profit per hour", default=str(schedule.get('run_margin', 0.0))))
+        schedule['pause_margin'] = float(Prompt.ask("Pause below profit per hour (throttle in between)",
+                                                    default=str(schedule.get('pause_margin', schedule['run_margin'] - TariffScheduler.THROTTLE_BAND))))
+        try:
+            scheduler._minutes(window['start'])
+            scheduler._minutes(window['end'])
+        except ValueError:
+            self._notify("[red]Times must be HH:MM[/red]")
+            return
+
+        scheduler.configure(schedule)
+        scheduler.pool_fee = self._pool_fee()
+        self._show_schedule_plan()
+        schedule['enabled'] = Confirm.ask("Enable this schedule?", default=True)
+        update_user_settings(schedule=schedule)
+        if schedule['enabled']:
+            scheduler.start()
+            self._notify("[green]Tariff schedule enabled - XMRig will run, throttle or pause by price[/green]")
+
+    def _show_history_charts(self):
+        """Braille line charts of the recorded history over a chosen window"""
+        from rich.prompt import Prompt
+        from rich.text import Text
+        window = Prompt.ask("Window", choices=list(MetricHistory.ARCHIVES), default=self.history_window,
+                            console=self.console)
+        if window != self.history_window:
+            self.history_window = window
+            update_user_settings(history_window=window)
+
+        history = self.monitor.history
+        width = max(20, min(MetricHistory.ARCHIVES[window][1], (self.console.width - 14) * 2))
+        shown = False
+        for name, label, style in self.HISTORY_CHARTS:
+            if not history.has_data(name, window):
+                continue
+            shown = True
+            values = history.values(name, window, width)
+            valid = [value for value in values if value == value]
+            self.console.print(f"\n[bold]{label}[/bold] [dim]last {window}: min {min(valid):.1f}, "
+                               f"avg {sum(valid) / len(valid):.1f}, max {max(valid):.1f}[/dim]")
+            rows = braille_chart(values, height=4)
+            for i, row in enumerate(rows):
+                axis = f"{max(valid):>10.1f} ┤" if i == 0 else f"{min(valid):>10.1f} ┤" if i == len(rows) - 1 else " " * 11 + "│"
+                self.console.print(Text(axis, style="dim") + Text(row, style=style))
+        if not shown:
+            self.console.print("[yellow]No history recorded yet - it fills in while the controller runs[/yellow]")
+        self._wait_for_enter()
+
+    def _configure_cgroup(self):
+        """Ask whether XMRig should run inside a cgroup v2 group"""
+        from rich.prompt import IntPrompt, Confirm
+        cgroup = self.cpu_controller.cgroup or CgroupManager()
+        if not cgroup.is_available():
+            return
+
+        enabled = Confirm.ask(
+            "Isolate XMRig in a cgroup v2 group (kernel-enforced limits)?",
+            default=self.cpu_controller.cgroup is not None
+        )
+        memory_max_mb = None
+        if enabled:
+            memory_max_mb = IntPrompt.ask("Memory limit in MB (0 = unlimited)", default=self.cpu_controller.memory_max_mb or 0) or None
+            self.cpu_controller.enable_cgroup(cgroup, memory_max_mb)
+        else:
+            self.cpu_controller.enable_cgroup(None)
+
+        update_user_settings(cgroup={'enabled': enabled, 'memory_max_mb': memory_max_mb})
+
     def _view_configuration(self):
         """View current configuration"""
         config = self.xmrig_controller.load_config()
@@ -910,14 +5543,35 @@ class MiningUI:
         else:
             self.console.print("[red]Could not load configuration[/red]")
 
+    def _print_log_lines(self, lines):
+        """Print captured XMRig output, highlighting errors"""
+        from rich.text import Text
+        log_buffer = self.monitor.log_buffer
+        for line in lines:
+            style = {2: "red", 1: "yellow"}.get(log_buffer.classify(line), "white")
+            self.console.print(Text(line, style=style))
+
     def _view_xmrig_logs(self):
-        """View XMRig log file contents"""
+        """View recent XMRig output, falling back to the log file"""
+        log_buffer = self.monitor.log_buffer
+        if len(log_buffer):
+            self.console.print(f"[bold]XMRig Output (last 40 of {len(log_buffer)} captured lines):[/bold]")
+            self.console.print("[dim]" + "="*50 + "[/dim]")
+            self._print_log_lines(log_buffer.recent(40))
+            self.console.print("[dim]" + "="*50 + "[/dim]")
+            errors = log_buffer.errors(5)
+            if errors:
+                self.console.print("[bold red]Recent errors:[/bold red]")
+                self._print_log_lines(errors)
+            self._wait_for_enter()
+            return
+
         log_file = get_script_dir() / "xmrig.log"
 
         if not log_file.exists():
             self.console.print("[yellow]No XMRig log file found. Start mining first to generate logs.[/yellow]")
             self.console.print(f"[dim]Expected location: {log_file}[/dim]")
-            time.sleep(2)
+            self._wait_for_enter()
             return
 
         try:
@@ -932,11 +5586,12 @@ class MiningUI:
                 self.console.print(content[-2000:])  # Show last 2000 characters to avoid overwhelming output
                 self.console.print("[dim]" + "="*50 + "[/dim]")
                 self.console.print(f"[dim]Full log available at: {log_file}[/dim]")
+                self.console.print(f"[dim]Timeline and summary of whole logs: python log_replay.py {log_file}*[/dim]")
 
         except Exception as e:
             self.console.print(f"[red]Error reading log file: {e}[/red]")
 
-        time.sleep(3)  # Give time to read the logs
+        self._wait_for_enter()
 
     def _check_mining_status(self):
         """Check detailed mining process status"""
@@ -945,6 +5600,7 @@ class MiningUI:
         # Check if XMRig process exists
         if not hasattr(self.xmrig_controller, 'xmrig_process') or self.xmrig_controller.xmrig_process is None:
             self.console.print("❌ [red]No XMRig process found[/red]")
+            self._wait_for_enter()
             return
 
         process = self.xmrig_controller.xmrig_process
@@ -956,20 +5612,26 @@ class MiningUI:
             self.console.print(f"   PID: {process.pid}")
         else:
             self.console.print(f"❌ [red]XMRig process exited with code: {return_code}[/red]")
+            # Crash report straight from the captured output
+            last_lines = self.monitor.log_buffer.recent(10)
+            if last_lines:
+                self.console.print("[bold]Last output before exit:[/bold]")
+                self._print_log_lines(last_lines)
 
         # Check if monitoring is active
         if hasattr(self.xmrig_controller.monitor, 'monitoring') and self.xmrig_controller.monitor.monitoring:
-            self.console.print("✅ [green]Monitoring thread is active[/green]")
+            self.console.print("✅ [green]Output monitor is active[/green]")
         else:
-            self.console.print("❌ [red]Monitoring thread is not active[/red]")
+            self.console.print("❌ [red]Output monitor is not active[/red]")
 
-        # Check if log file exists
+        # Check captured output and log file
+        log_buffer = self.monitor.log_buffer
+        self.console.print(f"📄 [blue]{len(log_buffer)} output lines captured in memory "
+                           f"({len(log_buffer.errors(1000))} errors)[/blue]")
         log_file = get_script_dir() / "xmrig.log"
         if log_file.exists():
             size = log_file.stat().st_size
             self.console.print(f"📄 [blue]Log file exists ({size} bytes)[/blue]")
-        else:
-            self.console.print("❌ [red]No log file found[/red]")
 
         # Show recent stats
         stats = self.monitor.get_stats_summary()
@@ -979,7 +5641,7 @@ class MiningUI:
         self.console.print(f"Accepted: {stats['accepted_shares']}")
         self.console.print(f"Rejected: {stats['rejected_shares']}")
 
-        time.sleep(4)  # Give time to read the status
+        self._wait_for_enter()
 
     def _troubleshoot_connection(self):
         """Troubleshoot mining pool connection issues"""
@@ -997,12 +5659,17 @@ class MiningUI:
             self.console.print(f"[blue]TLS Enabled:[/blue] {tls_enabled}")
         else:
             self.console.print("[red]❌ No pool configuration found[/red]")
-            time.sleep(2)
+            self._wait_for_enter()
             return
 
+        # Show what XMRig itself reported about the connection
+        net_errors = self.monitor.log_buffer.grep(r"error|no active pools|rejected", level="error", count=5)
+        if net_errors:
+            self.console.print("\n[blue]Recent XMRig Errors:[/blue]")
+            self._print_log_lines(net_errors)
+
         # Test connectivity
         self.console.print("\n[blue]Testing Network Connectivity:[/blue]")
-        import subprocess
 
         try:
             # Extract host and port
@@ -1011,25 +5678,25 @@ class MiningUI:
                 port = int(port)
             else:
                 self.console.print("[red]❌ Invalid pool URL format[/red]")
-                time.sleep(2)
+                self._wait_for_enter()
                 return
 
-            # Test connection
-            result = subprocess.run(['nc', '-z', host, str(port)],
-                                  capture_output=True, timeout=5)
+            # Test connection on the controller loop; mining keeps running meanwhile
+            with self.console.status(f"Connecting to {host}:{port}..."):
+                ok, latency_ms, error = self.controller_loop.call(probe_endpoint(host, port, timeout=5))
 
-            if result.returncode == 0:
-                self.console.print(f"✅ [green]Port {port} on {host} is accessible[/green]")
+            if ok:
+                self.console.print(f"✅ [green]Port {port} on {host} is accessible ({latency_ms:.0f} ms)[/green]")
             else:
-                self.console.print(f"❌ [red]Cannot connect to {host}:{port}[/red]")
+                self.console.print(f"❌ [red]Cannot connect to {host}:{port}: {error}[/red]")
 
         except Exception as e:
             self.console.print(f"[yellow]⚠️  Connectivity test failed: {e}[/yellow]")
 
         # Suggest fixes
         self.console.print("\n[blue]Suggested Fixes:[/blue]")
-        self.console.print("1. [cyan]Try disabling TLS[/cyan] - Many pools work better without TLS")
-        self.console.print("2. [cyan]Switch to different ports[/cyan] - Try 10001, 10002, or 10128")
+        self.console.print("1. [cyan]Check TLS[/cyan] - Measure the handshake cost and pin the pool's certificate")
+        self.console.print("2. [cyan]Switch to the port for your hashrate[/cyan] - Pools publish ports per starting difficulty")
         self.console.print("3. [cyan]Try different MoneroOcean servers[/cyan]:")
         self.console.print("   • gulf.moneroocean.stream")
         self.console.print("   • us-west.moneroocean.stream")
@@ -1037,17 +5704,17 @@ class MiningUI:
         self.console.print("4. [cyan]Try alternative pools[/cyan] - SupportXMR, MineXMR, etc.")
 
         self.console.print("\n[yellow]Would you like to apply a quick fix?[/yellow]")
-        self.console.print("• Press 1: Disable TLS")
-        self.console.print("• Press 2: Switch to port 10001")
+        self.console.print("• Press 1: Check TLS (enable it with a pinned certificate, or turn it off)")
+        self.console.print("• Press 2: Pick the port for my hashrate")
         self.console.print("• Press 3: Try different server")
         self.console.print("• Press any other key to return to menu")
 
         try:
             choice = input().strip()
             if choice == "1":
-                self._fix_tls_setting(False)
+                self._check_tls()
             elif choice == "2":
-                self._fix_pool_port("10001")
+                self._advise_pool_port()
             elif choice == "3":
                 self._fix_pool_server()
             else:
@@ -1057,44 +5724,162 @@ class MiningUI:
 
         self.console.print("\n[blue]💡 Tip: Restart mining (option 6) to apply configuration changes[/blue]")
 
-        time.sleep(2)
+        self._wait_for_enter()
+
+    def _check_tls(self):
+        """Handshake with the pool's TLS ports; enable TLS with a pinned certificate when its cost is negligible"""
+        from rich.table import Table
+        from rich.text import Text
+        from rich.prompt import Confirm
+        config = self.xmrig_controller.load_config()
+        pool_config = config['pools'][0]
+        current_host, _, current_port = pool_config.get('url', '').rpartition(':')
+        pool = self.pool_selector.catalogue.find_by_host(current_host) if self.pool_selector.pools else None
+        endpoints = self.pool_selector.catalogue.endpoints(pool, tls=True) if pool else []
+        # The current server first, then the pool's other servers
+        endpoints.sort(key=lambda endpoint: endpoint['host'] != current_host)
+        if pool_config.get('tls') and not any(str(endpoint['port']) == current_port and endpoint['host'] == current_host
+                                              for endpoint in endpoints):
+            endpoints.insert(0, {'host': current_host, 'port': int(current_port)})
+        if not endpoints:
+            self.console.print("[yellow]⚠️  This pool publishes no TLS ports[/yellow]")
+            return
+
+        checker = TLSHealthChecker()
+        pinned = pool_config.get('tls-fingerprint')
+        results = []
+        with self.console.status("Measuring TLS handshakes..."):
+            for endpoint in endpoints[:3]:
+                current = pool_config.get('tls') and endpoint['host'] == current_host and str(endpoint['port']) == current_port
+                results.append(self.controller_loop.run_blocking(checker.check, endpoint['host'], endpoint['port'],
+                                                                 pinned if current else None))
+
+        table = Table(title="TLS Health")
+        table.add_column("Endpoint", style="cyan")
+        table.add_column("TCP", justify="right")
+        table.add_column("Handshake", justify="right")
+        table.add_column("Resumed", justify="right")
+        table.add_column("Protocol")
+        table.add_column("Certificate SHA-256")
+        for result in results:
+            if result.get('fingerprint') is None:
+                table.add_row(f"{result['host']}:{result['port']}", "-", "-", "-", "-",
+                              Text(result['error'] or "failed", style="red"))
+                continue
+            fingerprint_style = "red" if result['pin_matches'] is False or not result['stable'] else "green"
+            table.add_row(
+                f"{result['host']}:{result['port']}",
+                f"{result['connect_ms']:.0f} ms",
+                Text(f"{result['handshake_ms']:.0f} ms", style="green" if result['negligible'] else "yellow"),
+                f"{result['resumed_ms']:.0f} ms" if result['resumption'] else "no",
+                result['version'],
+                Text(f"{result['fingerprint'][:16]}...", style=fingerprint_style)
+            )
+        self.console.print(table)
+        for result in results:
+            if result.get('pin_matches') is False:
+                self.console.print(f"[red]❌ {result['host']}:{result['port']} presents a different certificate than "
+                                   f"the pinned one - XMRig will refuse to connect[/red]")
+            elif result.get('fingerprint') and not result['stable']:
+                self.console.print(f"[yellow]⚠️  {result['host']}:{result['port']} served different certificates; "
+                                   f"pinning one would break some connections[/yellow]")
+
+        best = min((result for result in results if result['recommend']), key=lambda result: result['handshake_ms'],
+                   default=None)
+        if best is None:
+            self.console.print("[yellow]TLS is not recommended here: no endpoint handshakes cheaply with a stable certificate[/yellow]")
+            if pool_config.get('tls') and Confirm.ask("Turn TLS off?", default=False):
+                self._fix_tls_setting(False)
+            return
+        endpoint = f"{best['host']}:{best['port']}"
+        self.console.print(f"[green]TLS adds {best['handshake_ms']:.0f} ms per connection to {endpoint}; "
+                           f"XMRig connects once and keeps the connection[/green]")
+        if pool_config.get('tls') and pool_config.get('url') == endpoint and best['pin_matches']:
+            self.console.print("[green]✅ TLS is already on with this certificate pinned[/green]")
+            return
+        if not Confirm.ask(f"Use TLS on {endpoint}, pinned to certificate {best['fingerprint'][:16]}...?", default=True):
+            return
+        pool_config.update({'url': endpoint, 'tls': True, 'tls-fingerprint': best['fingerprint']})
+        if not self.xmrig_controller.save_config(config):
+            self.console.print("[red]❌ Failed to update configuration[/red]")
+            return
+        if pool:
+            tls_pools = get_settings_store().get('tls_pools') or {}
+            tls_pools[pool['name']] = {'host': best['host'], 'port': best['port'], 'fingerprint': best['fingerprint']}
+            update_user_settings(tls_pools=tls_pools)
+        self.xmrig_controller.events.emit("tls_pinned", url=endpoint, fingerprint=best['fingerprint'],
+                                          handshake_ms=round(best['handshake_ms'], 1))
+        self.console.print(f"[green]✅ TLS enabled on {endpoint} with the certificate pinned[/green]")
 
     def _fix_tls_setting(self, enable_tls):
         """Toggle TLS setting"""
         config = self.xmrig_controller.load_config()
         if config and 'pools' in config and config['pools']:
             config['pools'][0]['tls'] = enable_tls
+            if not enable_tls:
+                config['pools'][0]['tls-fingerprint'] = None
+                host = config['pools'][0].get('url', '').rpartition(':')[0]
+                pool = self.pool_selector.catalogue.find_by_host(host) if self.pool_selector.pools else None
+                plain = self.pool_selector.catalogue.endpoints(pool, tls=False) if pool else []
+                plain.sort(key=lambda endpoint: endpoint['host'] != host)
+                if plain:
+                    config['pools'][0]['url'] = f"{plain[0]['host']}:{plain[0]['port']}"
+                tls_pools = get_settings_store().get('tls_pools') or {}
+                if pool and tls_pools.pop(pool['name'], None):
+                    update_user_settings(tls_pools=tls_pools)
             if self.xmrig_controller.save_config(config):
                 status = "enabled" if enable_tls else "disabled"
                 self.console.print(f"[green]✅ TLS {status} in configuration[/green]")
             else:
                 self.console.print("[red]❌ Failed to update configuration[/red]")
 
-    def _fix_pool_port(self, new_port):
-        """Change pool port"""
-        config = self.xmrig_controller.load_config()
-        if config and 'pools' in config and config['pools']:
-            current_url = config['pools'][0]['url']
-            if ':' in current_url:
-                host = current_url.rsplit(':', 1)[0]
-                config['pools'][0]['url'] = f"{host}:{new_port}"
-                if self.xmrig_controller.save_config(config):
-                    self.console.print(f"[green]✅ Pool port changed to {new_port}[/green]")
-                else:
-                    self.console.print("[red]❌ Failed to update configuration[/red]")
+    def _advise_pool_port(self):
+        """Switch to the port (or fixed difficulty) that gives the target share interval"""
+        catalogue = self.pool_selector.catalogue if self.pool_selector.pools else None
+        recommendation = self.port_advisor.recommend(catalogue) if catalogue else None
+        if not recommendation:
+            if self.port_advisor.steady_hashrate() is None:
+                self.console.print("[yellow]⚠️  Mine for a minute first so XMRig reports a steady hashrate[/yellow]")
+            else:
+                self.console.print("[yellow]⚠️  The current pool publishes no difficulty tiers[/yellow]")
+            return
 
-    def _fix_pool_server(self):
-        """Switch to a different MoneroOcean server"""
-        servers = [
-            "gulf.moneroocean.stream:10001",
-            "us-west.moneroocean.stream:10001",
-            "asia.moneroocean.stream:10001"
-        ]
+        self.console.print(f"[blue]Hashrate:[/blue] {self._format_hashrate(recommendation['hashrate'])} → "
+                           f"difficulty {recommendation['target_difficulty']:,.0f} for a share every "
+                           f"{self.port_advisor.target_interval:.0f}s")
+        success, message = self.port_advisor.apply(recommendation, catalogue)
+        if success:
+            expected = f" (~{recommendation['interval']:.0f}s per share)" if recommendation['interval'] else ""
+            self.console.print(f"[green]✅ {message}{expected}; XMRig reloads it and the cadence is checked[/green]")
+        else:
+            self.console.print(f"[red]❌ {message}[/red]")
 
+    def _fix_pool_server(self):
+        """Switch to the next server of the current pool, keeping the TLS setting"""
         config = self.xmrig_controller.load_config()
         if config and 'pools' in config and config['pools']:
-            # Try the next server in the list
             current_url = config['pools'][0]['url']
+            current_host = current_url.rsplit(':', 1)[0]
+            tls = bool(config['pools'][0].get('tls'))
+
+            # Servers come from the pool catalogue; MoneroOcean's are the fallback
+            pool = self.pool_selector.catalogue.find_by_host(current_host) if self.pool_selector.pools else None
+            servers = []
+            if pool:
+                current_port = current_url.rsplit(':', 1)[-1]
+                ports = {}  # host -> port, preferring the port in use
+                for endpoint in self.pool_selector.catalogue.endpoints(pool, tls=tls):
+                    if endpoint['host'] not in ports or str(endpoint['port']) == current_port:
+                        ports[endpoint['host']] = endpoint['port']
+                servers = [f"{host}:{port}" for host, port in ports.items()]
+            if len(servers) < 2:
+                servers = [
+                    "gulf.moneroocean.stream:10001",
+                    "us-west.moneroocean.stream:10001",
+                    "asia.moneroocean.stream:10001"
+                ]
+
+            # Try the next server in the list
             try:
                 current_index = next(i for i, server in enumerate(servers)
                                    if server.split(':')[0] in current_url)
@@ -1110,11 +5895,10 @@ class MiningUI:
 
     def _reset_settings(self):
         """Reset all user settings"""
+        from rich.prompt import Confirm
         if Confirm.ask("Are you sure you want to reset all settings? This will clear your saved pool and wallet address."):
-            settings_file = get_script_dir() / "user_settings.json"
             try:
-                if settings_file.exists():
-                    settings_file.unlink()
+                get_settings_store().clear()
                 self.selected_pool = None
                 self.wallet_address = None
                 self.console.print("[green]✅ All settings have been reset[/green]")
@@ -1126,89 +5910,62 @@ class MiningUI:
 
     def _check_earnings(self):
         """Check mining earnings from pool API"""
+        import urllib.error
+        from rich.table import Table
         if not self.wallet_address:
-            self.console.print("[red]❌ No wallet address configured. Please set your wallet address first (option 2).[/red]")
-            time.sleep(2)
+            self._notify("[red]❌ No wallet address configured. Please set your wallet address first (option 2).[/red]")
             return
 
         if not self.selected_pool:
-            self.console.print("[red]❌ No pool selected. Please select a pool first (option 1).[/red]")
-            time.sleep(2)
+            self._notify("[red]❌ No pool selected. Please select a pool first (option 1).[/red]")
             return
 
         self.console.print("[bold]💰 Checking Mining Earnings...[/bold]")
         self.console.print(f"[dim]Wallet: {self.wallet_address[:20]}...[/dim]")
         self.console.print(f"[dim]Pool: {self.selected_pool['name']}[/dim]\n")
 
-        # Check if it's MoneroOcean (they have a public API)
-        if self.selected_pool['name'] == 'MoneroOcean':
+        if self.selected_pool['name'] in EARNINGS_APIS:
             try:
-                api_url = f"https://api.moneroocean.stream/miner/{self.wallet_address}/stats"
-                self.console.print("[dim]Fetching data from MoneroOcean API...[/dim]")
-                
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'application/json',
-                    'Connection': 'keep-alive'
-                }
-                
-                request = urllib.request.Request(api_url, headers=headers)
-                with urllib.request.urlopen(request, timeout=15) as response:
-                    data = json.loads(response.read().decode())
-                
-                # Parse MoneroOcean API response
-                if 'balance' in data:
-                    balance = data.get('balance', 0)
-                    paid = data.get('paid', 0)
-                    total_earned = balance + paid
-                    hashrate = data.get('hashrate', 0)
-                    hashrate_15m = data.get('hashrate_15m', 0)
-                    
+                self.console.print(f"[dim]Fetching data from {self.selected_pool['name']} API...[/dim]")
+                # Blocking HTTP runs on the controller loop's executor
+                with self.console.status(f"Waiting for {self.selected_pool['name']}..."):
+                    earnings = self.controller_loop.run_blocking(fetch_earnings, self.selected_pool, self.wallet_address)
+
+                if earnings['has_balance']:
                     table = Table(title="💰 Mining Earnings")
                     table.add_column("Metric", style="cyan")
                     table.add_column("Value", style="green")
-                    
-                    # Format balance
-                    balance_xmr = balance / 1000000000000  # Convert from atomic units
-                    paid_xmr = paid / 1000000000000
-                    total_xmr = total_earned / 1000000000000
-                    
-                    table.add_row("Current Balance", f"{balance_xmr:.6f} XMR")
-                    table.add_row("Total Paid", f"{paid_xmr:.6f} XMR")
-                    table.add_row("Total Earned", f"[bold]{total_xmr:.6f} XMR[/bold]")
-                    
+
+                    table.add_row("Current Balance", f"{earnings['balance_xmr']:.6f} XMR")
+                    table.add_row("Total Paid", f"{earnings['paid_xmr']:.6f} XMR")
+                    table.add_row("Total Earned", f"[bold]{earnings['total_xmr']:.6f} XMR[/bold]")
+
                     # Add hashrate info if available
-                    if hashrate > 0:
-                        hashrate_kh = hashrate / 1000
-                        table.add_row("Current Hashrate", f"{hashrate_kh:.2f} KH/s")
-                    
-                    if hashrate_15m > 0:
-                        hashrate_15m_kh = hashrate_15m / 1000
-                        table.add_row("15m Avg Hashrate", f"{hashrate_15m_kh:.2f} KH/s")
-                    
+                    if earnings['hashrate'] > 0:
+                        table.add_row("Current Hashrate", f"{earnings['hashrate'] / 1000:.2f} KH/s")
+                    if earnings['hashrate_15m'] > 0:
+                        table.add_row("15m Avg Hashrate", f"{earnings['hashrate_15m'] / 1000:.2f} KH/s")
+
                     # Min payout info
-                    min_payout = self.selected_pool.get('min_payout', 0.003)
-                    remaining = max(0, min_payout - balance_xmr)
-                    table.add_row("Min Payout", f"{min_payout:.6f} XMR")
-                    if remaining > 0:
-                        table.add_row("Until Payout", f"{remaining:.6f} XMR")
+                    table.add_row("Min Payout", f"{earnings['min_payout']:.6f} XMR")
+                    if earnings['until_payout'] > 0:
+                        table.add_row("Until Payout", f"{earnings['until_payout']:.6f} XMR")
                     else:
                         table.add_row("Payout Status", "[green]✅ Ready for payout![/green]")
-                    
+
                     self.console.print(table)
-                    
+
                     # Additional info
-                    if 'last_payment' in data and data['last_payment']:
-                        last_payment = data['last_payment'] / 1000000000000
-                        self.console.print(f"\n[dim]Last Payment: {last_payment:.6f} XMR[/dim]")
-                    
-                    self.console.print(f"\n[dim]View full stats: https://moneroocean.stream/#/account/{self.wallet_address}[/dim]")
-                    
+                    if earnings['last_payment_xmr']:
+                        self.console.print(f"\n[dim]Last Payment: {earnings['last_payment_xmr']:.6f} XMR[/dim]")
+
+                    self.console.print(f"\n[dim]View full stats: {earnings['url']}[/dim]")
+
                 else:
                     self.console.print("[yellow]⚠️  No balance data found. You may need to mine for a while before earnings appear.[/yellow]")
-                    
+
             except urllib.error.URLError as e:
-                self.console.print(f"[red]❌ Failed to connect to MoneroOcean API: {e}[/red]")
+                self.console.print(f"[red]❌ Failed to connect to {self.selected_pool['name']} API: {e}[/red]")
                 self.console.print("[dim]Make sure you have an internet connection.[/dim]")
             except json.JSONDecodeError:
                 self.console.print("[red]❌ Invalid response from API. Please try again later.[/red]")
@@ -1221,29 +5978,19 @@ class MiningUI:
             self.console.print(f"1. Visit your pool's website")
             self.console.print(f"2. Enter your wallet address: {self.wallet_address[:20]}...")
             self.console.print(f"3. View your balance and pending payouts")
-            
-            # Provide common pool URLs
-            pool_urls = {
-                'SupportXMR': 'https://supportxmr.com',
-                'MineXMR': 'https://minexmr.com',
-                'P2Pool': 'https://p2pool.io',
-                'Nanopool': 'https://xmr.nanopool.org',
-                'HashVault': 'https://hashvault.pro'
-            }
-            
-            if self.selected_pool['name'] in pool_urls:
-                self.console.print(f"\n[dim]Pool website: {pool_urls[self.selected_pool['name']]}[/dim]")
-        
-        time.sleep(5)  # Give time to read the earnings info
 
-        time.sleep(3)
+            if self.selected_pool['name'] in POOL_WEBSITES:
+                self.console.print(f"\n[dim]Pool website: {POOL_WEBSITES[self.selected_pool['name']]}[/dim]")
+
+        self._wait_for_enter()
 
     def run(self):
         """Main UI loop"""
+        from rich.prompt import Prompt
         # Setup signal handlers
         def signal_handler(sig, frame):
             self.console.print("\n[yellow]Shutting down...[/yellow]")
-            self.xmrig_controller.stop_mining()
+            self.shutdown()
             sys.exit(0)
 
         signal.signal(signal.SIGINT, signal_handler)
@@ -1262,19 +6009,486 @@ class MiningUI:
             except EOFError:
                 break
 
+        self.shutdown()
         self.console.print("[yellow]Goodbye![/yellow]")
 
+class MiningDaemon:
+    """Headless controller for unattended rigs, observed through the status stream"""
+
+    def __init__(self, listen=None):
+        self.controller_loop = ControllerLoop()
+        self.cpu_controller = CPUController()
+        self.xmrig_controller = XMRigController()
+        self.xmrig_controller.cpu_controller = self.cpu_controller
+        self.xmrig_controller.controller_loop = self.controller_loop
+        self.monitor = self.xmrig_controller.monitor
+        self.load_governor = LoadGovernor(self.xmrig_controller, self.cpu_controller, self.controller_loop)
+        self.thermal_governor = ThermalGovernor(self.xmrig_controller, self.cpu_controller, self.controller_loop)
+        self.status_server = None
+        self.listen = listen
+        self.stopping = threading.Event()
+
+        get_settings_store().events = self.xmrig_controller.events
+        settings = load_user_settings()
+        self.selected_pool = settings.get('selected_pool')
+        self.wallet_address = settings.get('wallet_address')
+        self.settings = settings
+        self.tariff_scheduler = TariffScheduler(self.xmrig_controller, self.cpu_controller, self.controller_loop,
+                                                settings.get('schedule'), (self.selected_pool or {}).get('fee', 0.0))
+        memory_settings = settings.get('memory_planner') or {}
+        self.memory_planner = MemoryPlanner(self.xmrig_controller, self.cpu_controller, self.controller_loop,
+                                            memory_settings.get('auto', False), memory_settings.get('hashrates'),
+                                            avoid_fast=memory_settings.get('avoid_fast', False))
+        self.xmrig_controller.memory_planner = self.memory_planner
+
+    def snapshot(self):
+        """Status snapshot published to fleet dashboards"""
+        pool_name = self.selected_pool['name'] if self.selected_pool else None
+        return controller_snapshot(self.xmrig_controller, pool_name)
+
+    def run_command(self, command):
+        """Run a miner command received over the status port and log it"""
+        success, message = self.xmrig_controller.run_command(command)
+        self.log(f"Command '{command}': {'ok' if success else message}")
+        return success, message
+
+    def log(self, message):
+        """Print a timestamped status line (daemon output goes to a log, not a TUI)"""
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+    def start(self):
+        """Start background services and mining"""
+        self.controller_loop.start()
+        self.xmrig_controller.events.start(self.controller_loop)
+        self.monitor.start_sampling(self.controller_loop, history_path=get_script_dir() / "history.json")
+
+        cgroup_settings = self.settings.get('cgroup') or {}
+        if cgroup_settings.get('enabled'):
+            self.cpu_controller.enable_cgroup(CgroupManager(), cgroup_settings.get('memory_max_mb'))
+        if self.settings.get('adaptive_throttling'):
+            self.load_governor.start()
+        self.memory_planner.start()
+        thermal_settings = self.settings.get('thermal_governor') or {}
+        if thermal_settings.get('enabled'):
+            self.thermal_governor.max_temp = thermal_settings.get('max_temp', 80.0)
+            self.thermal_governor.max_power = thermal_settings.get('max_power')
+            self.thermal_governor.start()
+
+        if self.listen:
+            host, port = parse_listen_address(self.listen)
+            self.status_server = StatusServer(self.snapshot, host, port, command_fn=self.run_command)
+            port = self.controller_loop.call(self.status_server.start())
+            self.log(f"Status stream listening on {host}:{port}")
+
+        if not self.selected_pool or not self.wallet_address:
+            self.log("No pool or wallet configured - run the interactive controller first")
+            return False
+        ok, message = validate_wallet_address(self.wallet_address)
+        if not ok:
+            self.log(f"Saved wallet address rejected: {message}")
+            return False
+        if not self.xmrig_controller.update_pool_config(self.selected_pool, self.wallet_address,
+                                                        **pool_tls_options(self.selected_pool)):
+            self.log("Failed to update configuration")
+            return False
+        if (self.settings.get('schedule') or {}).get('enabled'):
+            # The scheduler starts XMRig when the tariff makes mining worthwhile
+            self.tariff_scheduler.start()
+            self.log("Tariff schedule enabled")
+            return True
+        success, message = self.xmrig_controller.start_mining()
+        self.log(message)
+        return success
+
+    def shutdown(self):
+        """Stop mining and all background services"""
+        self.tariff_scheduler.stop()
+        self.thermal_governor.stop()
+        self.load_governor.stop()
+        self.memory_planner.stop()
+        success, message = self.xmrig_controller.stop_mining()
+        if success:
+            self.log(message)
+        if self.status_server:
+            self.controller_loop.call(self.status_server.stop(), timeout=5)
+        self.monitor.save_history()
+        self.xmrig_controller.events.close()
+        self.controller_loop.stop()
+
+    def run(self):
+        """Run until SIGINT/SIGTERM"""
+        def signal_handler(sig, frame):
+            self.stopping.set()
+
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+        self.start()
+        while not self.stopping.wait(1.0):
+            pass
+        self.log("Shutting down...")
+        self.shutdown()
+
+class ControllerInstance:
+    """One controller directory, driven from the command line without the UI
+
+    A directory holds an XMRig config.json and optionally user_settings.json
+    and pools.json (the controller's own pools.json is used otherwise);
+    events go to its events.jsonl. Every operation returns (success, message,
+    data) with JSON-friendly data, so one subcommand can act on many
+    directories in a single invocation.
+    """
+
+    # Keys of a change file for `apply`, in the order they are applied
+    CHANGE_KEYS = {'profile': str, 'pool': str, 'wallet': str, 'threads': int, 'priority': int,
+                   'config': dict, 'settings': dict}
+    # Settings only changed through 'pool' and 'wallet', so the wallet is always validated
+    PROTECTED_SETTINGS = {'selected_pool': 'pool', 'wallet_address': 'wallet'}
+
+    def __init__(self, directory, xmrig_path=None):
+        self.directory = Path(directory).absolute()
+        self.config_path = self.directory / "config.json"
+        self.store = SettingsStore(self.directory / "user_settings.json")
+        if xmrig_path is None and (self.directory / "xmrig").exists():
+            xmrig_path = self.directory / "xmrig"
+        self.xmrig_controller = XMRigController(xmrig_path, str(self.config_path))
+        events = EventLog(self.directory / "events.jsonl")
+        self.xmrig_controller.events = self.xmrig_controller.monitor.events = self.store.events = events
+        self.cpu_controller = CPUController(str(self.config_path))
+        self.xmrig_controller.cpu_controller = self.cpu_controller
+        memory_settings = self.store.get('memory_planner') or {}
+        self.xmrig_controller.memory_planner = MemoryPlanner(self.xmrig_controller, self.cpu_controller, None,
+                                                             memory_settings.get('auto', False),
+                                                             memory_settings.get('hashrates'),
+                                                             avoid_fast=memory_settings.get('avoid_fast', False))
+        pools_file = self.directory / "pools.json"
+        self.pool_selector = PoolSelector(pools_file if pools_file.exists() else None)
+
+    @classmethod
+    def validate_changes(cls, changes):
+        """Check a change file before anything is written; raises ValueError"""
+        if not isinstance(changes, dict) or not changes:
+            raise ValueError("a change file must be a non-empty JSON object")
+        for key, value in changes.items():
+            expected = cls.CHANGE_KEYS.get(key)
+            if expected is None:
+                raise ValueError(f"unknown key {key!r} (allowed: {', '.join(cls.CHANGE_KEYS)})")
+            if not isinstance(value, expected) or isinstance(value, bool):
+                raise ValueError(f"{key} must be {'an object' if expected is dict else 'a ' + expected.__name__}")
+        for key, replacement in cls.PROTECTED_SETTINGS.items():
+            if key in changes.get('settings', {}):
+                raise ValueError(f"settings.{key} cannot be set directly; use {replacement!r}")
+        if 'wallet' in changes:
+            ok, message = validate_wallet_address(changes['wallet'])
+            if not ok:
+                raise ValueError(f"wallet: {message}")
+        if changes.get('threads', 1) < 1:
+            raise ValueError("threads must be at least 1")
+        if not 0 <= changes.get('priority', 0) <= 5:
+            raise ValueError("priority must be between 0 and 5")
+        return changes
+
+    def close(self):
+        """Write the events queued by this invocation"""
+        self.xmrig_controller.events.close()
+
+    def start(self):
+        """Start XMRig detached from this process, logging to xmrig.log"""
+        success, message = self.xmrig_controller.start_detached(self.directory / "xmrig.log")
+        return success, message, {}
+
+    def stop(self):
+        """Stop the XMRig running from this directory's config"""
+        success, message = self.xmrig_controller.stop_detached()
+        return success, message, {}
+
+    def set_pool(self, name, wallet=None):
+        """Point the config at a pool from the catalogue, keeping the saved wallet unless one is given"""
+        pool = self.pool_selector.get_pool_info(name)
+        if pool is None:
+            return False, f"Unknown pool: {name}", {}
+        wallet = wallet or self.store.get('wallet_address')
+        if not wallet:
+            return False, "No wallet address saved (pass --wallet)", {}
+        ok, message = validate_wallet_address(wallet)
+        if not ok:
+            return False, f"Wallet address rejected: {message}", {}
+        if not self.xmrig_controller.update_pool_config(pool, wallet, **pool_tls_options(pool, self.store)):
+            return False, "Failed to update the XMRig config", {}
+        self.store.update(selected_pool=pool, wallet_address=wallet)
+        url = self.xmrig_controller.load_config()['pools'][0]['url']
+        return True, f"Pool set to {name} ({url})", {'pool': name, 'url': url}
+
+    def set_threads(self, threads=None, priority=None):
+        """Change the thread count and/or priority in the config"""
+        if not self.config_path.exists():
+            return False, f"No XMRig config: {self.config_path}", {}
+        if not self.cpu_controller.update_cpu_config(max_threads=threads, priority=priority):
+            return False, "Failed to update the CPU configuration", {}
+        cpu = self.cpu_controller.get_current_config()
+        data = {'threads': self.cpu_controller.get_thread_count(), 'cpus': CPUController.thread_list(cpu),
+                'priority': cpu.get('priority')}
+        return True, f"{data['threads']} thread(s), priority {data['priority']}", data
+
+    def stats(self):
+        """Process state from the process table, mining stats from XMRig's API"""
+        processes = self.xmrig_controller.find_processes()
+        config = self.xmrig_controller.load_config() or {}
+        pools = config.get('pools') or [{}]
+        data = {
+            'status': "Running" if processes else "Stopped",
+            'pids': [process.pid for process in processes],
+            'pool': (self.store.get('selected_pool') or {}).get('name'),
+            'url': pools[0].get('url'),
+            'threads': self.cpu_controller.get_thread_count(),
+            'randomx_mode': (config.get('randomx') or {}).get('mode')
+        }
+        api = XMRigAPI.from_config(config) if processes else None
+        if api:
+            try:
+                summary = api.summary()
+            except (OSError, ValueError) as e:
+                data['api_error'] = str(e)
+            else:
+                windows = (summary.get('hashrate') or {}).get('total') or [None, None, None]
+                results = summary.get('results') or {}
+                good, total = results.get('shares_good', 0), results.get('shares_total', 0)
+                data.update({
+                    'status': "Paused" if summary.get('paused') else "Running",
+                    'hashrate': next((rate for rate in windows if rate), 0.0),
+                    'hashrate_windows': windows,
+                    'peak_hashrate': (summary.get('hashrate') or {}).get('highest'),
+                    'accepted_shares': good,
+                    'rejected_shares': total - good,
+                    'uptime': summary.get('uptime'),
+                    'version': summary.get('version')
+                })
+        message = data['status']
+        if data.get('hashrate'):
+            message += f", {data['hashrate']:.1f} H/s, shares {data['accepted_shares']}/{data['rejected_shares']}"
+        return True, message, data
+
+    def earnings(self):
+        """Balance and payouts for the saved pool and wallet"""
+        pool, wallet = self.store.get('selected_pool'), self.store.get('wallet_address')
+        if not pool or not wallet:
+            return False, "No pool or wallet saved", {}
+        try:
+            earnings = fetch_earnings(pool, wallet)
+        except (OSError, ValueError) as e:
+            return False, f"Earnings lookup failed: {e}", {}
+        if not earnings['supported']:
+            return True, f"No earnings API for {pool['name']}; see {earnings['website'] or 'the pool website'}", earnings
+        if not earnings['has_balance']:
+            return True, "No balance yet", earnings
+        return True, (f"Balance {earnings['balance_xmr']:.6f} XMR, paid {earnings['paid_xmr']:.6f} XMR, "
+                      f"{earnings['until_payout']:.6f} XMR until payout"), earnings
+
+    def apply(self, changes):
+        """Apply a validated change set in CHANGE_KEYS order, stopping at the first failure"""
+        applied = []
+
+        def failed(message):
+            return False, message, {'applied': applied}
+
+        if 'profile' in changes:
+            ok, message, _ = apply_profile(changes['profile'], self.xmrig_controller, self.store)
+            if not ok:
+                return failed(message)
+            applied.append('profile')
+        if 'pool' in changes or 'wallet' in changes:
+            name = changes.get('pool') or (self.store.get('selected_pool') or {}).get('name')
+            if not name:
+                return failed("No pool saved to set the wallet on")
+            ok, message, _ = self.set_pool(name, changes.get('wallet'))
+            if not ok:
+                return failed(message)
+            applied.append('pool')
+        if 'threads' in changes or 'priority' in changes:
+            ok, message, _ = self.set_threads(changes.get('threads'), changes.get('priority'))
+            if not ok:
+                return failed(message)
+            applied.append('cpu')
+        if changes.get('config'):
+            config = self.xmrig_controller.load_config()
+            if config is None or not self.xmrig_controller.save_config(apply_config_overrides(config, changes['config'])):
+                return failed("Failed to update the XMRig config")
+            applied.append('config')
+        if changes.get('settings'):
+            try:
+                self.store.update(changes['settings'])
+            except OSError as e:
+                return failed(f"Failed to update settings: {e}")
+            applied.append('settings')
+        self.xmrig_controller.events.emit("batch_apply", applied=applied)
+        return True, f"Applied {', '.join(applied)}", {'applied': applied}
+
+def cli_directories(args):
+    """Directories named with --dir and --dirs-file, or the controller's own"""
+    directories = list(args.dir or [])
+    if args.dirs_file:
+        with open(args.dirs_file, 'r') as f:
+            directories += [line.split('#', 1)[0].strip() for line in f if line.split('#', 1)[0].strip()]
+    return directories or [str(get_script_dir())]
+
+def print_cli_results(command, results, as_json=False):
+    """Print per-directory results as one JSON document or one line each"""
+    if as_json:
+        print(json.dumps({'command': command, 'ok': all(result['ok'] for result in results), 'results': results},
+                         indent=2, default=str))
+        return
+    for result in results:
+        print(f"{'✅' if result['ok'] else '❌'} {result['dir']}: {result['message']}")
+
+def run_probe_pools(args):
+    """Probe every endpoint of the catalogue (or of the named pools) and print them fastest first"""
+    import asyncio
+
+    selector = PoolSelector(args.pools)
+    if args.pool:
+        pools = [selector.get_pool_info(name) for name in args.pool]
+        unknown = [name for name, pool in zip(args.pool, pools) if pool is None]
+        if unknown:
+            print(f"Unknown pool: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+    else:
+        pools = selector.pools
+    endpoints = [dict(endpoint, pool=pool['name']) for pool in pools
+                 for endpoint in selector.catalogue.endpoints(pool, tls=True if args.tls else None)]
+    results = asyncio.run(probe_pools(endpoints, args.timeout))
+    ok = any(result['ok'] for result in results)
+    if args.json:
+        print(json.dumps({'command': "probe-pools", 'ok': ok, 'results': results}, indent=2))
+    else:
+        for result in results:
+            where = f"{result['pool']} {result['host']}:{result['port']}{' (TLS)' if result['tls'] else ''}"
+            status = f"{result['latency_ms']:.0f} ms" if result['ok'] else result['error']
+            print(f"{'✅' if result['ok'] else '❌'} {where}: {status}")
+    return 0 if ok else 1
+
+def run_cli(args):
+    """Run a subcommand on every target directory; returns the exit code"""
+    import contextlib
+
+    if args.subcommand == "probe-pools":
+        return run_probe_pools(args)
+    changes = None
+    if args.subcommand == "apply":
+        try:
+            with open(args.change_file, 'r') as f:
+                changes = ControllerInstance.validate_changes(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Invalid change file {args.change_file}: {e}", file=sys.stderr)
+            return 2
+    operations = {
+        'start': lambda instance: instance.start(),
+        'stop': lambda instance: instance.stop(),
+        'set-pool': lambda instance: instance.set_pool(args.pool, args.wallet),
+        'set-threads': lambda instance: instance.set_threads(args.threads, args.priority),
+        'stats': lambda instance: instance.stats(),
+        'earnings': lambda instance: instance.earnings(),
+        'apply': lambda instance: instance.apply(changes)
+    }
+    try:
+        directories = cli_directories(args)
+    except OSError as e:
+        print(f"Cannot read {args.dirs_file}: {e}", file=sys.stderr)
+        return 2
+
+    results = []
+    for directory in directories:
+        # Some controller methods report problems with print(); stdout is kept for the results
+        with contextlib.redirect_stdout(sys.stderr):
+            if not (Path(directory) / "config.json").exists():
+                success, message, data = False, "No config.json in this directory", {}
+            else:
+                instance = ControllerInstance(directory, args.xmrig)
+                try:
+                    success, message, data = operations[args.subcommand](instance)
+                except Exception as e:
+                    # One broken directory must not stop a batch
+                    success, message, data = False, f"{type(e).__name__}: {e}", {}
+                finally:
+                    instance.close()
+        results.append(dict(data, dir=str(Path(directory).absolute()), ok=success, message=message))
+    print_cli_results(args.subcommand, results, args.json)
+    return 0 if all(result['ok'] for result in results) else 1
+
 def main():
     """Main application entry point"""
-    # Check if running on macOS
-    if sys.platform != "darwin":
+    import argparse
+    parser = argparse.ArgumentParser(description="Monero Mining Controller")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run headless: start mining with saved settings and wait for signals")
+    parser.add_argument("--listen", metavar="[HOST:]PORT",
+                        help="Serve the status stream for fleet_dashboard.py (e.g. 0.0.0.0:7777)")
+    parser.add_argument("--command", choices=list(XMRigController.HOTKEYS),
+                        help="Send a command to a running controller started with --listen, then exit")
+    parser.add_argument("--connect", metavar="[HOST:]PORT", default="127.0.0.1:7777",
+                        help="Controller to send --command to (default: 127.0.0.1:7777)")
+    parser.add_argument("--events", action="store_true", help="Print events from the event log, then exit")
+    parser.add_argument("--since", help="With --events: start time (ISO date/time or age such as 15m, 2h, 1d)")
+    parser.add_argument("--until", help="With --events: end time (same formats as --since)")
+    parser.add_argument("--type", dest="event_types", help="With --events: comma-separated event types")
+    parser.add_argument("--limit", type=int, help="With --events: print only the newest N events")
+    parser.add_argument("--json", action="store_true",
+                        help="Print machine-readable JSON from a subcommand, or raw JSON lines with --events")
+    parser.add_argument("--profile", help="Switch to this saved settings profile before starting")
+
+    # Non-interactive subcommands; per-directory ones act on every --dir in one invocation
+    targets = argparse.ArgumentParser(add_help=False)
+    targets.add_argument("--dir", action="append", metavar="DIR",
+                         help="Controller directory with a config.json (repeatable; default: this script's directory)")
+    targets.add_argument("--dirs-file", metavar="FILE", help="File listing controller directories, one per line")
+    targets.add_argument("--xmrig", metavar="PATH", help="XMRig binary (default: DIR/xmrig, else the installed one)")
+    commands = parser.add_subparsers(dest="subcommand", metavar="COMMAND")
+    commands.add_parser("start", parents=[targets], help="Start XMRig in the background")
+    commands.add_parser("stop", parents=[targets], help="Stop XMRig")
+    command = commands.add_parser("set-pool", parents=[targets], help="Switch pool (and optionally wallet)")
+    command.add_argument("pool", help="Pool name from pools.json")
+    command.add_argument("--wallet", help="Wallet address (default: the saved one)")
+    command = commands.add_parser("set-threads", parents=[targets], help="Set the mining thread count")
+    command.add_argument("threads", type=int)
+    command.add_argument("--priority", type=int, choices=range(6), help="CPU priority (0=highest to 5=lowest)")
+    commands.add_parser("stats", parents=[targets], help="Show miner status and hashrate")
+    commands.add_parser("earnings", parents=[targets], help="Show pool balance and payouts")
+    command = commands.add_parser("apply", parents=[targets], help="Apply a JSON change file to every directory")
+    command.add_argument("change_file", metavar="CHANGES.json",
+                         help=f"Object with any of: {', '.join(ControllerInstance.CHANGE_KEYS)}")
+    command = commands.add_parser("probe-pools", help="Measure connect latency to pool endpoints")
+    command.add_argument("--pool", action="append", help="Only this pool (repeatable)")
+    command.add_argument("--pools", metavar="FILE", help="Pool catalogue (default: pools.json)")
+    command.add_argument("--tls", action="store_true", help="Only TLS endpoints")
+    command.add_argument("--timeout", type=float, default=5.0, help="Seconds per connection (default: 5)")
+    args = parser.parse_args()
+
+    if args.subcommand:
+        sys.exit(run_cli(args))
+
+    if args.command:
+        success, message = send_command(args.connect, args.command)
+        print(message)
+        sys.exit(0 if success else 1)
+
+    if args.events:
+        try:
+            since = parse_time_arg(args.since) if args.since else None
+            until = parse_time_arg(args.until) if args.until else None
+        except ValueError as e:
+            parser.error(f"invalid time: {e}")
+        types = [name.strip() for name in args.event_types.split(',')] if args.event_types else None
+        print_events(EventLog(get_script_dir() / "events.jsonl").query(since, until, types, args.limit), args.json)
+        return
+
+    # Check if running on macOS (the headless daemon runs anywhere)
+    if sys.platform != "darwin" and not args.daemon:
         print("This application is designed for macOS")
         sys.exit(1)
 
     # Check for required files
     script_dir = get_script_dir()
     required_files = [
-        script_dir / "xmrig",
+        get_xmrig_path(),
         script_dir / "config.json",
         script_dir / "pools.json"
     ]
@@ -1291,18 +6505,27 @@ def main():
         print("\nPlease ensure all required files are present before running.")
         sys.exit(1)
 
-    # Check Python dependencies
-    try:
-        import rich
-        import psutil
-    except ImportError as e:
-        print(f"Missing Python dependencies: {e}")
+    # Check Python dependencies (the module itself imports them lazily)
+    import importlib.util
+    missing_modules = [name for name in ("rich", "psutil") if importlib.util.find_spec(name) is None]
+    if missing_modules:
+        print(f"Missing Python dependencies: {', '.join(missing_modules)}")
         print("Please install required packages:")
         print("  pip install rich psutil")
         sys.exit(1)
 
+    if args.profile:
+        success, message, _ = apply_profile(args.profile, XMRigController())
+        print(message)
+        if not success:
+            sys.exit(1)
+
+    if args.daemon:
+        MiningDaemon(listen=args.listen).run()
+        return
+
     # Start the UI
-    ui = MiningUI()
+    ui = MiningUI(listen=args.listen)
     ui.run()
 
 if __name__ == "__main__":
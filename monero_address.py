@@ -0,0 +1,138 @@
+"""
+Monero Mining Controller - Monero Addresses
+
+Decodes and verifies Monero wallet addresses without third-party packages:
+Monero's block-wise base58, the network/type prefix byte and the Keccak-256
+checksum. mining_controller.py uses validate_wallet_address to check pool
+logins before they are saved.
+"""
+
+import re
+
+# Monero addresses: network byte, public spend and view keys (and for
+# integrated addresses an 8-byte payment ID), then the first 4 bytes of the
+# Keccak-256 of all of that, in Monero's block-wise base58.
+MONERO_ADDRESS_PREFIXES = {
+    18: ("mainnet", "standard"), 19: ("mainnet", "integrated"), 42: ("mainnet", "subaddress"),
+    53: ("testnet", "standard"), 54: ("testnet", "integrated"), 63: ("testnet", "subaddress"),
+    24: ("stagenet", "standard"), 25: ("stagenet", "integrated"), 36: ("stagenet", "subaddress"),
+}
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE58_VALUES = {char: value for value, char in enumerate(BASE58_ALPHABET)}
+# Encoded length of a block of 0..8 bytes, and its inverse
+BASE58_BLOCK_SIZES = (0, 2, 3, 5, 6, 7, 9, 10, 11)
+BASE58_DECODED_SIZES = {size: length for length, size in enumerate(BASE58_BLOCK_SIZES)}
+
+KECCAK_ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+# Rho rotation and pi destination for each lane (index x + 5y), combined into one pass
+KECCAK_RHO_PI = tuple(zip(
+    range(25),
+    (0, 10, 20, 5, 15, 16, 1, 11, 21, 6, 7, 17, 2, 12, 22, 23, 8, 18, 3, 13, 14, 24, 9, 19, 4),
+    (0, 1, 62, 28, 27, 36, 44, 6, 55, 20, 3, 10, 43, 25, 39, 41, 45, 15, 21, 8, 18, 2, 61, 56, 14),
+))
+KECCAK_CHI = tuple((i, i - i % 5 + (i + 1) % 5, i - i % 5 + (i + 2) % 5) for i in range(25))
+KECCAK_MASK = (1 << 64) - 1
+
+def _keccak_f(lanes):
+    """Keccak-f[1600] permutation on 25 64-bit lanes"""
+    mask = KECCAK_MASK
+    rotated = [0] * 25
+    for round_constant in KECCAK_ROUND_CONSTANTS:
+        columns = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        theta = [columns[x - 1] ^ (((columns[(x + 1) % 5] << 1) | (columns[(x + 1) % 5] >> 63)) & mask)
+                 for x in range(5)]
+        for source, dest, shift in KECCAK_RHO_PI:
+            lane = lanes[source] ^ theta[source % 5]
+            rotated[dest] = ((lane << shift) | (lane >> (64 - shift))) & mask
+        lanes = [rotated[i] ^ (~rotated[j] & rotated[k]) for i, j, k in KECCAK_CHI]
+        lanes[0] ^= round_constant
+    return lanes
+
+def keccak256(data):
+    """Keccak-256 as used by Monero (original Keccak padding, not SHA3-256)"""
+    rate = 136
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\0" * (-len(padded) % rate))
+    padded[-1] |= 0x80
+    lanes = [0] * 25
+    for offset in range(0, len(padded), rate):
+        block = padded[offset:offset + rate]
+        for i in range(rate // 8):
+            lanes[i] ^= int.from_bytes(block[i * 8:i * 8 + 8], 'little')
+        lanes = _keccak_f(lanes)
+    return b"".join(lane.to_bytes(8, 'little') for lane in lanes[:4])
+
+def monero_base58_decode(text):
+    """Decode Monero's base58: 11-character blocks of 8 bytes, with a shorter last block"""
+    data = bytearray()
+    for start in range(0, len(text), 11):
+        chunk = text[start:start + 11]
+        size = BASE58_DECODED_SIZES.get(len(chunk))
+        if size is None:
+            raise ValueError("wrong length")
+        value = 0
+        for char in chunk:
+            digit = BASE58_VALUES.get(char)
+            if digit is None:
+                raise ValueError(f"'{char}' is not a base58 character")
+            value = value * 58 + digit
+        if value >> (size * 8):
+            raise ValueError("invalid base58 block")
+        data += value.to_bytes(size, 'big')
+    return bytes(data)
+
+def monero_base58_encode(data):
+    """Encode bytes in Monero's block-wise base58"""
+    out = []
+    for start in range(0, len(data), 8):
+        block = data[start:start + 8]
+        value = int.from_bytes(block, 'big')
+        chars = []
+        for _ in range(BASE58_BLOCK_SIZES[len(block)]):
+            value, digit = divmod(value, 58)
+            chars.append(BASE58_ALPHABET[digit])
+        out.append("".join(reversed(chars)))
+    return "".join(out)
+
+def parse_monero_address(address):
+    """Decode and verify a Monero address; raises ValueError with the reason it is invalid"""
+    if len(address) not in (95, 106):
+        raise ValueError(f"{len(address)} characters, expected 95 (or 106 for an integrated address)")
+    data = monero_base58_decode(address)
+    prefix = MONERO_ADDRESS_PREFIXES.get(data[0])
+    if prefix is None:
+        raise ValueError(f"unknown network byte {data[0]}")
+    network, kind = prefix
+    if len(data) != (77 if kind == "integrated" else 69):
+        raise ValueError(f"wrong length for a {network} {kind} address")
+    body, checksum = data[:-4], data[-4:]
+    if keccak256(body)[:4] != checksum:
+        raise ValueError("checksum mismatch (typo in the address?)")
+    return {
+        'network': network,
+        'type': kind,
+        'spend_key': body[1:33].hex(),
+        'view_key': body[33:65].hex(),
+        'payment_id': body[65:73].hex() if kind == "integrated" else None,
+    }
+
+def validate_wallet_address(login, network="mainnet"):
+    """Check the wallet part of a pool login ("address", "address+diff", "address.worker"); returns (ok, message)"""
+    address = re.split(r"[+.]", (login or "").strip(), maxsplit=1)[0]
+    if not address:
+        return False, "No wallet address"
+    try:
+        info = parse_monero_address(address)
+    except ValueError as e:
+        return False, f"Invalid Monero address: {e}"
+    if network and info['network'] != network:
+        return False, f"This is a {info['network']} address; pools mine on {network}"
+    return True, f"Valid {info['network']} {info['type']} address"
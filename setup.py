@@ -3,9 +3,16 @@
 Monero Mining Controller - Setup Script
 
 This script helps users set up their mining environment by:
-1. Downloading XMRig for their platform
+1. Downloading XMRig for their platform, verified against the release's
+   SHA256SUMS and cached by version in xmrig-versions/
 2. Creating initial configuration files
 3. Installing Python dependencies
+
+XMRig versions can be kept side by side and switched, also offline:
+
+    python setup.py --xmrig-version 6.22.2        # install (or reuse) and activate
+    python setup.py --list-xmrig
+    python setup.py --add-archive xmrig-6.22.2-linux-static-x64.tar.gz --sums SHA256SUMS --xmrig-version 6.22.2
 """
 
 import os
@@ -53,91 +60,262 @@ def detect_platform():
     else:
         return None
 
-def download_xmrig(platform_type):
-    """Download XMRig for the detected platform"""
-    print("🚀 Downloading XMRig...")
+# Archive names per platform; XMRig has published Linux builds under both names
+PLATFORM_ASSETS = {
+    "macos-arm64": ("macos-arm64.tar.gz",),
+    "macos-x64": ("macos-x64.tar.gz",),
+    "linux-x64": ("linux-static-x64.tar.gz", "linux-x64.tar.gz"),
+    "linux-arm64": ("linux-static-arm64.tar.gz", "linux-arm64.tar.gz"),
+    "windows-x64": ("msvc-win64.zip",)
+}
 
-    # Get latest release info
-    try:
-        request = urllib.request.Request("https://api.github.com/repos/xmrig/xmrig/releases/latest")
+class XMRigStore:
+    """Downloaded XMRig releases, verified and kept side by side
+
+    Layout under xmrig-versions/:
+        archives/<sha256>       archives, stored by content hash
+        index.json              version -> {asset, sha256, url} for each cached archive
+        versions/<version>/     extracted release, one directory per version
+
+    Archives are checked against the release's SHA256SUMS before they are
+    stored, and again before every extraction, so a cached archive can be
+    reinstalled offline. ./xmrig is a link to the active version.
+    """
+
+    RELEASES_URL = "https://api.github.com/repos/xmrig/xmrig/releases"
+
+    def __init__(self, root=None, binary_dir=None):
+        self.binary_dir = Path(binary_dir or Path(__file__).parent.absolute())
+        self.root = Path(root or self.binary_dir / "xmrig-versions")
+        self.archives = self.root / "archives"
+        self.versions = self.root / "versions"
+        self.index_path = self.root / "index.json"
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+
+    @staticmethod
+    def sha256_file(path):
+        import hashlib
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def parse_checksums(text):
+        """Parse a SHA256SUMS file into {file name: sha256}"""
+        sums = {}
+        for line in text.splitlines():
+            parts = line.strip().split()
+            if len(parts) == 2 and len(parts[0]) == 64:
+                sums[parts[1].lstrip('*')] = parts[0].lower()
+        return sums
+
+    @staticmethod
+    def _fetch(url):
+        request = urllib.request.Request(url)
         request.add_header("User-Agent", "Python")
-        with urllib.request.urlopen(request) as response:
-            release_data = json.loads(response.read().decode())
-    except:
-        print("❌ Could not fetch XMRig releases. Please download manually from https://github.com/xmrig/xmrig/releases")
-        return False
+        return urllib.request.urlopen(request, timeout=30)
 
-    release_version = release_data.get("tag_name", "").lstrip("v")
-    
-    platform_extensions = {
-        "macos-arm64": "macos-arm64.tar.gz",
-        "macos-x64": "macos-x64.tar.gz",
-        "linux-x64": "linux-x64.tar.gz",
-        "linux-arm64": "linux-arm64.tar.gz",
-        "windows-x64": "msvc-win64.zip"
-    }
-    ext = platform_extensions.get(platform_type)
-    if not ext:
-        print(f"❌ Unsupported platform: {platform_type}")
-        return False
+    def fetch_release(self, version=None):
+        """Release metadata from GitHub: the latest, or a given version"""
+        url = f"{self.RELEASES_URL}/tags/v{version}" if version else f"{self.RELEASES_URL}/latest"
+        with self._fetch(url) as response:
+            return json.loads(response.read().decode())
 
-    asset_pattern = f"xmrig-{release_version}" if platform_type != "windows-x64" else f"xmrig-{release_version}-windows"
-    
-    download_url = None
-    for asset in release_data.get("assets", []):
-        asset_name = asset["name"]
-        if platform_type == "windows-x64":
-            if f"xmrig-{release_version}" in asset_name and ext in asset_name:
-                download_url = asset["browser_download_url"]
+    @staticmethod
+    def pick_asset(release, platform_type):
+        """Find the archive and the SHA256SUMS asset for a platform"""
+        archive = checksums = None
+        for asset in release.get("assets", []):
+            if asset["name"] == "SHA256SUMS":
+                checksums = asset
+        for suffix in PLATFORM_ASSETS.get(platform_type, ()):
+            archive = next((asset for asset in release.get("assets", []) if asset["name"].endswith(suffix)), None)
+            if archive:
                 break
+        return archive, checksums
+
+    def add_archive(self, archive_path, version, expected_sha256, asset_name=None, url=None):
+        """Verify an archive and store it by content hash; returns its sha256"""
+        actual = self.sha256_file(archive_path)
+        if actual != expected_sha256.lower():
+            raise ValueError(f"checksum mismatch for {asset_name or archive_path}: "
+                             f"expected {expected_sha256}, got {actual}")
+        self.archives.mkdir(parents=True, exist_ok=True)
+        stored = self.archives / actual
+        if not stored.exists():
+            temp_path = stored.with_name(actual + ".tmp")
+            shutil.copyfile(archive_path, temp_path)
+            os.replace(temp_path, stored)
+        index = self.load_index()
+        index[version] = {"asset": asset_name or Path(archive_path).name, "sha256": actual, "url": url}
+        self._save_index(index)
+        return actual
+
+    def add_local(self, archive_path, checksums_path, version):
+        """Add a local archive, verified against a local SHA256SUMS file"""
+        name = Path(archive_path).name
+        with open(checksums_path, 'r') as f:
+            expected = self.parse_checksums(f.read()).get(name)
+        if not expected:
+            raise ValueError(f"{name} is not listed in {checksums_path}")
+        return self.add_archive(archive_path, version, expected, name)
+
+    def download(self, platform_type, version=None):
+        """Download and verify a release unless it is cached; returns the version"""
+        index = self.load_index()
+        if version and version in index:
+            return version
+        release = self.fetch_release(version)
+        version = release.get("tag_name", "").lstrip("v")
+        if version in index:
+            return version
+        archive, checksums = self.pick_asset(release, platform_type)
+        if not archive:
+            raise ValueError(f"release {version} has no archive for {platform_type}")
+        if not checksums:
+            raise ValueError(f"release {version} publishes no SHA256SUMS; refusing an unverified download")
+        with self._fetch(checksums["browser_download_url"]) as response:
+            expected = self.parse_checksums(response.read().decode()).get(archive["name"])
+        if not expected:
+            raise ValueError(f"{archive['name']} is not listed in SHA256SUMS")
+
+        self.archives.mkdir(parents=True, exist_ok=True)
+        temp_path = self.archives / f"download-{os.getpid()}.tmp"
+        try:
+            print(f"📥 Downloading {archive['browser_download_url']}")
+            with self._fetch(archive["browser_download_url"]) as response, open(temp_path, 'wb') as out_file:
+                shutil.copyfileobj(response, out_file)
+            self.add_archive(temp_path, version, expected, archive["name"], archive["browser_download_url"])
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        return version
+
+    def _members(self, archive_path, asset):
+        """Yield (relative path, mode, file object) for each file, dropping the top-level directory"""
+        if asset.endswith(".zip"):
+            import zipfile
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        with archive.open(info) as source:
+                            yield info.filename, (info.external_attr >> 16) & 0o777, source
         else:
-            if ext in asset_name and f"xmrig-{release_version}" in asset_name:
-                download_url = asset["browser_download_url"]
-                break
+            import tarfile
+            with tarfile.open(archive_path, 'r:*') as archive:
+                for member in archive:
+                    if member.isfile():
+                        yield member.name, member.mode, archive.extractfile(member)
 
-    if not download_url:
-        print(f"❌ Could not find download URL for {platform_type}")
-        return False
+    def extract(self, version):
+        """Unpack a cached, re-verified archive into versions/<version>; returns the directory"""
+        entry = self.load_index().get(version)
+        if not entry:
+            raise ValueError(f"XMRig {version} is not in the cache")
+        archive_path = self.archives / entry["sha256"]
+        if not archive_path.exists() or self.sha256_file(archive_path) != entry["sha256"]:
+            raise ValueError(f"cached archive for {version} is missing or corrupt; download it again")
+
+        target = self.versions / version
+        staging = self.versions / f".{version}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name, mode, source in self._members(archive_path, entry["asset"]):
+            parts = Path(name).parts[1:] if len(Path(name).parts) > 1 else Path(name).parts
+            if not parts or Path(name).is_absolute() or ".." in parts:
+                continue  # Never write outside the version directory
+            destination = staging.joinpath(*parts)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with open(destination, 'wb') as out_file:
+                shutil.copyfileobj(source, out_file)
+            if platform.system() != "Windows":
+                os.chmod(destination, (mode or 0o644) & 0o755)
+        binary = self.binary_path(version, staging)
+        if not binary.exists():
+            shutil.rmtree(staging)
+            raise ValueError(f"archive for {version} contains no xmrig executable")
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+        return target
+
+    def binary_path(self, version, directory=None):
+        directory = Path(directory or self.versions / version)
+        return directory / ("xmrig.exe" if (directory / "xmrig.exe").exists() else "xmrig")
+
+    def installed(self):
+        """Extracted versions, oldest first"""
+        if not self.versions.exists():
+            return []
+        names = [path.name for path in self.versions.iterdir() if path.is_dir() and not path.name.startswith(".")]
+        return sorted(names, key=lambda name: [int(part) if part.isdigit() else part for part in name.split(".")])
+
+    def cached(self):
+        """Versions with a verified archive in the cache"""
+        return sorted(self.load_index())
+
+    def activate(self, version):
+        """Point ./xmrig at an installed version"""
+        binary = self.binary_path(version)
+        link = self.binary_dir / binary.name
+        temp_link = link.with_name(link.name + ".tmp")
+        if temp_link.exists() or temp_link.is_symlink():
+            temp_link.unlink()
+        try:
+            os.symlink(os.path.relpath(binary, self.binary_dir), temp_link)
+        except (OSError, NotImplementedError):
+            shutil.copy2(binary, temp_link)  # No symlinks (e.g. Windows without developer mode)
+        os.replace(temp_link, link)
+        return link
 
-    filename = f"xmrig-{platform_type}.tar.gz" if platform_type != "windows-x64" else f"xmrig-{platform_type}.zip"
+    def install(self, platform_type, version=None, offline=False):
+        """Make a version available and active; falls back to the newest cached version when offline"""
+        if not offline:
+            try:
+                version = self.download(platform_type, version)
+            except (OSError, ValueError) as e:
+                if version not in self.load_index() and not (version is None and self.cached()):
+                    raise
+                print(f"⚠️  {e}; using the cache")
+        if version is None:
+            cached = self.cached()
+            if not cached:
+                raise ValueError("no XMRig archive in the cache")
+            version = sorted(cached, key=lambda name: [int(part) if part.isdigit() else part
+                                                       for part in name.split(".")])[-1]
+        if version not in self.installed():
+            self.extract(version)
+        self.activate(version)
+        return version
 
+def download_xmrig(platform_type, version=None, offline=False):
+    """Download (or take from the cache), verify and activate XMRig for the detected platform"""
+    print("🚀 Installing XMRig...")
+    if platform_type not in PLATFORM_ASSETS:
+        print(f"❌ Unsupported platform: {platform_type}")
+        return False
+    store = XMRigStore()
     try:
-        print(f"📥 Downloading from: {download_url}")
-        request = urllib.request.Request(download_url)
-        request.add_header("User-Agent", "Python")
-        with urllib.request.urlopen(request) as response, open(filename, 'wb') as out_file:
-            shutil.copyfileobj(response, out_file)
-    except:
-        print("❌ Download failed. Please download manually.")
+        version = store.install(platform_type, version, offline)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        print("Please download manually from https://github.com/xmrig/xmrig/releases")
         return False
-
-    # Extract the archive
-    print("📦 Extracting XMRig...")
-    if platform_type == "windows-x64":
-        import zipfile
-        with zipfile.ZipFile(filename, 'r') as zip_ref:
-            zip_ref.extractall(".")
-    else:
-        run_command(f"tar -xzf {filename}", "Extracting archive")
-
-    # Move xmrig binary to project root
-    xmrig_dirs = [d for d in os.listdir(".") if d.startswith("xmrig-") and os.path.isdir(d)]
-    if xmrig_dirs:
-        xmrig_dir = xmrig_dirs[0]
-        if os.path.exists(f"{xmrig_dir}/xmrig"):
-            shutil.move(f"{xmrig_dir}/xmrig", "xmrig")
-        elif os.path.exists(f"{xmrig_dir}/xmrig.exe"):
-            shutil.move(f"{xmrig_dir}/xmrig.exe", "xmrig.exe")
-
-        # Make executable on Unix systems
-        if platform.system() != "Windows":
-            os.chmod("xmrig", 0o755)
-
-        # Clean up
-        shutil.rmtree(xmrig_dir)
-        os.remove(filename)
-
-    print("✅ XMRig setup complete!")
+    print(f"✅ XMRig {version} installed and active (verified against SHA256SUMS)")
     return True
 
 def create_config():
@@ -154,7 +332,43 @@ def install_dependencies():
     print("📦 Installing Python dependencies...")
     return run_command(f"{sys.executable} -m pip install -r requirements.txt", "Installing dependencies")
 
+def manage_xmrig(args, platform_type):
+    """Handle the XMRig version options; returns an exit code"""
+    store = XMRigStore()
+    if args.list_xmrig:
+        link = store.binary_dir / "xmrig"
+        current = link.resolve().parent.name if link.is_symlink() else None
+        installed = set(store.installed())
+        index = store.load_index()
+        for version in sorted(set(store.cached()) | installed):
+            marks = ["active" if version == current else "", "installed" if version in installed else "",
+                     "cached" if version in index else ""]
+            print(f"{version:<12} {', '.join(mark for mark in marks if mark)}")
+        return 0
+    try:
+        if args.add_archive:
+            if not args.sums or not args.xmrig_version:
+                print("❌ --add-archive needs --sums and --xmrig-version")
+                return 1
+            store.add_local(args.add_archive, args.sums, args.xmrig_version)
+            print(f"✅ Verified and cached {Path(args.add_archive).name} as XMRig {args.xmrig_version}")
+        version = store.install(platform_type, args.xmrig_version, args.offline or bool(args.add_archive))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ XMRig {version} active")
+    return 0
+
 def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Monero Mining Controller setup")
+    parser.add_argument("--xmrig-version", help="Install (or reuse from the cache) and activate this XMRig version")
+    parser.add_argument("--list-xmrig", action="store_true", help="List cached and installed XMRig versions")
+    parser.add_argument("--add-archive", help="Add a local XMRig archive to the cache (needs --sums)")
+    parser.add_argument("--sums", help="SHA256SUMS file to verify --add-archive against")
+    parser.add_argument("--offline", action="store_true", help="Only use archives already in the cache")
+    args = parser.parse_args()
+
     print("🚀 Monero Mining Controller Setup")
     print("=" * 40)
 
@@ -171,6 +385,9 @@ def main():
 
     print(f"✅ Detected platform: {platform_type}")
 
+    if args.xmrig_version or args.list_xmrig or args.add_archive:
+        sys.exit(manage_xmrig(args, platform_type))
+
     # Create config if needed
     create_config()
 
@@ -181,7 +398,7 @@ def main():
 
     # Download XMRig
     if not os.path.exists("xmrig") and not os.path.exists("xmrig.exe"):
-        if not download_xmrig(platform_type):
+        if not download_xmrig(platform_type, offline=args.offline):
             print("❌ Failed to download XMRig")
             print("You can download it manually from: https://github.com/xmrig/xmrig/releases")
             sys.exit(1)
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Monero Mining Controller - XMRig Simulator
+
+A stand-in for the xmrig executable for load and soak testing the controller
+without mining. It accepts the same `-c config.json` invocation, emits
+realistic log lines (speed, accepted/rejected shares, new jobs, network
+errors, crashes) at a configurable rate, and serves a stand-in of the XMRig
+HTTP API (summary, per-thread backends, pause/resume) on the port from the
+config's `http` section. Console hotkeys (h, p, r, s, c) on stdin are answered
+the way XMRig answers them. The simulated hashrate follows the config's
+randomx mode, scratchpad prefetch mode and RandomX thread list ("cpu.rx"),
+so ab_benchmark.py has a difference to find. With "watch" on, edits to the
+config are picked up while running, as XMRig does:
+
+    python xmrig_simulator.py -c config.json --rate 10000 --duration 60
+
+To run the controller against it, point XMRIG_PATH at this script:
+
+    XMRIG_PATH=./xmrig_simulator.py python mining_controller.py
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+
+def load_config(config_path):
+    """Load an XMRig config, returning an empty dict if it is unusable"""
+    try:
+        with open(config_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def load_pool_url(config_path):
+    """Get the first pool URL from an XMRig config, if there is one"""
+    try:
+        return load_config(config_path)['pools'][0]['url']
+    except (KeyError, IndexError, TypeError):
+        return "pool.example.com:3333"
+
+# Rough effect of RandomX settings on the simulated hashrate, so A/B runs have something to find
+RANDOMX_MODE_FACTORS = {'light': 0.25}
+PREFETCH_MODE_FACTORS = {0: 0.97, 1: 1.0, 2: 1.02, 3: 0.99}
+# Threads XMRig would pick for itself on the simulated CPU when the config has no thread list
+DEFAULT_THREADS = 8
+
+def config_threads(config):
+    """Number of RandomX threads: the length of cpu.rx, else XMRig's own choice"""
+    threads = (config.get('cpu') or {}).get('rx')
+    return len(threads) if isinstance(threads, list) and threads else DEFAULT_THREADS
+
+def config_hashrate(config, hashrate):
+    """Scale the simulated hashrate by the config's randomx mode, scratchpad prefetch mode and threads"""
+    randomx = config.get('randomx') or {}
+    factor = RANDOMX_MODE_FACTORS.get(str(randomx.get('mode')), 1.0)
+    factor *= PREFETCH_MODE_FACTORS.get(randomx.get('scratchpad_prefetch_mode', 1), 1.0)
+    return hashrate * factor * config_threads(config) / DEFAULT_THREADS
+
+class LogEmitter:
+    """Generates XMRig-style log lines"""
+
+    def __init__(self, pool_url, hashrate=2500.0, seed=None, error_rate=0.0, threads=DEFAULT_THREADS, slow_thread=None):
+        self.pool_url = pool_url
+        self.base_hashrate = hashrate
+        self.hashrate = hashrate
+        self.threads = threads
+        self.slow_thread = slow_thread
+        self.random = random.Random(seed)
+        self.error_rate = error_rate
+        self.accepted = 0
+        self.rejected = 0
+        self.height = 3300000
+        self.diff = 120000
+        self.paused = False
+        self.started = time.time()
+        self.last_speed = [hashrate, hashrate, hashrate]
+
+    def _timestamp(self):
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+    def line(self, tag, message):
+        """Format a line the way XMRig prints it with colors disabled"""
+        return f"[{self._timestamp()}]  {tag:<8} {message}"
+
+    def banner(self):
+        """Startup lines printed before mining begins"""
+        return [
+            " * ABOUT        XMRig/6.22.2 gcc/13.2.0 (built for Linux x86-64, 64 bit)",
+            " * CPU          Simulated CPU (1) 64-bit AES",
+            f" * POOL #1      {self.pool_url} algo auto",
+            self.line("net", f"use pool {self.pool_url}  127.0.0.1"),
+            self.line("randomx", f"init dataset algo rx/0 ({self.threads} threads) seed 1a2b3c4d..."),
+            self.line("randomx", f"dataset ready ({self.random.randint(4000, 9000)} ms)"),
+            self.ready(),
+        ]
+
+    def ready(self):
+        """Line XMRig prints once its CPU threads are running"""
+        return self.line("cpu", f"READY threads {self.threads}/{self.threads} ({self.threads}) huge pages 100% "
+                                f"{self.threads}/{self.threads} memory {self.threads * 2048} KB (10 ms)")
+
+    def reload(self, config_path, config):
+        """Apply a changed config the way XMRig does with "watch" on: restart the CPU threads"""
+        self.threads = config_threads(config)
+        self.hashrate = config_hashrate(config, self.base_hashrate)
+        return [self.line("config", f'"{config_path}" was changed, reloading configuration'), self.ready()]
+
+    def speed(self):
+        """Periodic hashrate report"""
+        self.last_speed = [self.hashrate * self.random.uniform(0.97, 1.03) for _ in range(3)]
+        return self.line("miner", "speed 10s/60s/15m {:.1f} {:.1f} {:.1f} H/s max {:.1f} H/s".format(
+            *self.last_speed, self.hashrate * 1.05))
+
+    def new_job(self):
+        """New job notification from the pool"""
+        self.height += 1
+        return self.line("net", f"new job from {self.pool_url} diff {self.diff} algo rx/0 height {self.height} (23 tx)")
+
+    def accepted_share(self):
+        """Accepted share result"""
+        self.accepted += 1
+        return self.line("cpu", f"accepted ({self.accepted}/{self.rejected}) diff {self.diff} ({self.random.randint(20, 90)} ms)")
+
+    def rejected_share(self):
+        """Rejected share result"""
+        self.rejected += 1
+        return self.line("cpu", f'rejected ({self.accepted}/{self.rejected}) diff {self.diff} "Low difficulty share" ({self.random.randint(20, 90)} ms)')
+
+    def error(self):
+        """Network or pool error"""
+        host = self.pool_url.rsplit(':', 1)[0]
+        return self.random.choice([
+            self.line("net", f'{self.pool_url} read error: "end of file"'),
+            self.line("net", f'{self.pool_url} connect error: "connection refused"'),
+            self.line("net", f'{host} DNS error: "unknown node or service"'),
+            self.line("net", "no active pools, stop mining"),
+            self.rejected_share(),
+        ])
+
+    def next_line(self):
+        """Pick the next line using a realistic mix of message types"""
+        if self.paused:
+            return self.line("miner", "paused, press r to resume")
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.error()
+        roll = self.random.random()
+        if roll < 0.40:
+            return self.speed()
+        if roll < 0.75:
+            return self.new_job()
+        return self.accepted_share()
+
+    def thread_rates(self):
+        """Split the current 10s hashrate across threads, one of them optionally at 60%"""
+        weights = [0.6 if thread == self.slow_thread else 1.0 for thread in range(self.threads)]
+        total = 0.0 if self.paused else self.last_speed[0]
+        return [total * weight / sum(weights) for weight in weights]
+
+    def backends(self):
+        """Stand-in for the /2/backends API response"""
+        threads = [{"intensity": 1, "affinity": thread, "av": 1, "hashrate": [round(rate, 2), round(rate, 2), None]}
+                   for thread, rate in enumerate(self.thread_rates())]
+        return [{"type": "cpu", "enabled": True, "algo": "rx/0", "threads": threads}]
+
+    def hotkey(self, key):
+        """Lines XMRig prints in response to a console hotkey"""
+        if key == 'h':
+            rates = self.thread_rates()
+            lines = [self.line("cpu", "|    CPU # | AFFINITY | 10s H/s | 60s H/s | 15m H/s |")]
+            lines += [self.line("cpu", f"| {thread:8d} | {thread:8d} | {rate:7.1f} | {rate:7.1f} |     n/a |")
+                      for thread, rate in enumerate(rates)]
+            lines.append(self.line("cpu", f"|        - |        - | {sum(rates):7.1f} | {sum(rates):7.1f} |     n/a |"))
+            return lines + [self.speed()]
+        if key == 'p':
+            self.paused = True
+            return [self.line("miner", "paused, press r to resume")]
+        if key == 'r':
+            self.paused = False
+            return [self.line("miner", "resumed")]
+        if key == 's':
+            total = self.accepted + self.rejected
+            percent = self.accepted / total * 100 if total else 0.0
+            return [self.line("results", f"RESULTS shares good {self.accepted} total {total} ({percent:.2f}%)"),
+                    self.line("results", f"avg diff {self.diff} hashes total {int(self.hashrate * (time.time() - self.started))}")]
+        if key == 'c':
+            return [self.line("net", f"CONNECTION pool {self.pool_url} ip 127.0.0.1 uptime {int(time.time() - self.started)}s"),
+                    self.line("net", f"algo rx/0 diff {self.diff} ping 42 ms")]
+        return []
+
+    def summary(self):
+        """Stand-in for the /2/summary API response"""
+        hashrate = [0.0, 0.0, 0.0] if self.paused else [round(rate, 2) for rate in self.last_speed]
+        return {
+            "id": "simulator",
+            "worker_id": "simulator",
+            "uptime": int(time.time() - self.started),
+            "version": "6.22.2",
+            "paused": self.paused,
+            "algo": "rx/0",
+            "hashrate": {"total": hashrate, "highest": round(self.hashrate * 1.05, 2)},
+            "results": {
+                "diff_current": self.diff,
+                "shares_good": self.accepted,
+                "shares_total": self.accepted + self.rejected,
+                "hashes_total": int(self.hashrate * (time.time() - self.started))
+            },
+            "connection": {"pool": self.pool_url, "ip": "127.0.0.1", "uptime": int(time.time() - self.started),
+                           "accepted": self.accepted, "rejected": self.rejected, "diff": self.diff}
+        }
+
+def serve_api(emitter, host, port, access_token=None):
+    """Serve a stand-in XMRig HTTP API in a background thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def _authorized(self):
+            if not access_token:
+                return True
+            return self.headers.get("Authorization") == f"Bearer {access_token}"
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if not self._authorized():
+                return self._send(401, {"status": 401})
+            if self.path in ("/1/summary", "/2/summary"):
+                return self._send(200, emitter.summary())
+            if self.path == "/2/backends":
+                return self._send(200, emitter.backends())
+            self._send(404, {"status": 404})
+
+        def do_POST(self):
+            if not self._authorized():
+                return self._send(401, {"status": 401})
+            if self.path != "/json_rpc":
+                return self._send(404, {"status": 404})
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"status": 400})
+            method = request.get("method")
+            if method in ("pause", "resume"):
+                emitter.paused = method == "pause"
+                return self._send(200, {"id": request.get("id"), "jsonrpc": "2.0", "result": {"status": "OK"}})
+            self._send(200, {"id": request.get("id"), "jsonrpc": "2.0",
+                             "error": {"code": -32601, "message": "Method not found"}})
+
+        def log_message(self, format, *args):
+            pass  # Keep stdout clean: it carries the simulated miner log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+def config_text(config_path):
+    """Raw config contents, or None if it is unreadable; compared rather than mtimes, which can tie"""
+    try:
+        with open(config_path, 'r') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def read_hotkeys(emitter, pending, lock):
+    """Answer console hotkeys from stdin, queueing the output for the writer loop"""
+    while True:
+        try:
+            key = sys.stdin.read(1)
+        except (OSError, ValueError):
+            return
+        if not key:
+            return  # stdin closed
+        lines = emitter.hotkey(key.lower())
+        if lines:
+            with lock:
+                pending.extend(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated XMRig for testing the mining controller")
+    parser.add_argument("-c", "--config", default="config.json", help="XMRig config file")
+    parser.add_argument("--rate", type=float, default=1.0, help="Log lines per second (0 = as fast as possible)")
+    parser.add_argument("--lines", type=int, default=0, help="Exit after this many lines (0 = run forever)")
+    parser.add_argument("--duration", type=float, default=0.0, help="Exit after this many seconds (0 = run forever)")
+    parser.add_argument("--hashrate", type=float, default=2500.0,
+                        help=f"Simulated hashrate in H/s with {DEFAULT_THREADS} threads")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of lines that are errors (0-1)")
+    parser.add_argument("--crash-after", type=float, default=0.0, help="Crash after this many seconds (0 = never)")
+    parser.add_argument("--crash-code", type=int, default=139, help="Exit code used when crashing")
+    parser.add_argument("--api-port", type=int, default=None, help="Override the HTTP API port from the config")
+    parser.add_argument("--no-api", action="store_true", help="Do not serve the HTTP API")
+    parser.add_argument("--slow-thread", type=int, default=None, help="Thread index that hashes at 60%% of the others")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for deterministic output")
+    args = parser.parse_args()
+
+    # The watcher starts from the very text the config was parsed from, so no early edit is missed
+    text = config_text(args.config)
+    try:
+        config = json.loads(text) if text is not None else {}
+    except ValueError:
+        config = {}
+    emitter = LogEmitter(load_pool_url(args.config), config_hashrate(config, args.hashrate), args.seed, args.error_rate,
+                         config_threads(config), args.slow_thread)
+    emitter.base_hashrate = args.hashrate
+    out = sys.stdout
+
+    http = config.get('http') or {}
+    if not args.no_api and (http.get('enabled') or args.api_port is not None):
+        port = args.api_port if args.api_port is not None else http.get('port', 44444)
+        try:
+            serve_api(emitter, http.get('host') or "127.0.0.1", port, http.get('access-token'))
+            out.write(emitter.line("http", f"HTTP API listening on {http.get('host') or '127.0.0.1'}:{port}") + "\n")
+        except OSError as e:
+            out.write(emitter.line("http", f'HTTP API bind failed: "{e}"') + "\n")
+
+    for line in emitter.banner():
+        out.write(line + "\n")
+    out.flush()
+
+    pending = []
+    pending_lock = threading.Lock()
+    if sys.stdin is not None:
+        threading.Thread(target=read_hotkeys, args=(emitter, pending, pending_lock), daemon=True).start()
+
+    start = time.monotonic()
+    emitted = 0
+    watched_text = text if config.get('watch') else None
+    next_watch = start + 0.5
+    try:
+        while not args.lines or emitted < args.lines:
+            now = time.monotonic()
+            elapsed = now - start
+            if watched_text is not None and now >= next_watch:
+                next_watch = now + 0.5
+                text = config_text(args.config)
+                if text is not None and text != watched_text:
+                    try:
+                        changed = json.loads(text)
+                    except ValueError:
+                        changed = None  # Caught mid-write; the next poll sees the whole file
+                    else:
+                        watched_text = text
+                    if changed:
+                        with pending_lock:
+                            pending.extend(emitter.reload(args.config, changed))
+            if args.duration and elapsed >= args.duration:
+                break
+            if args.crash_after and elapsed >= args.crash_after:
+                out.write(emitter.line("cpu", "thread #0 crashed: Segmentation fault") + "\n")
+                out.flush()
+                sys.exit(args.crash_code)
+
+            # Write every line that is due in one batch, so high rates cost one flush per tick
+            due = int(elapsed * args.rate) + 1 - emitted if args.rate > 0 else 1000
+            if args.lines:
+                due = min(due, args.lines - emitted)
+            if pending:
+                with pending_lock:
+                    replies, pending[:] = pending[:], []
+                out.write("\n".join(replies) + "\n")
+                out.flush()
+            if due > 0:
+                out.write("\n".join(emitter.next_line() for _ in range(due)) + "\n")
+                emitted += due
+                out.flush()
+            if args.rate > 0:
+                time.sleep(min(0.01, 1.0 / args.rate))
+        out.flush()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+
+if __name__ == "__main__":
+    main()